@@ -1,15 +1,32 @@
 from sqlalchemy.orm import Session
-from backend.database.models import Price, ArbitrageSignal, OrderBook
-from backend.core.liquidity_checker import check_liquidity, analyze_order_impact
-from backend.core.risk_managment import check_risk
+from backend.database.models import Price, ArbitrageSignal, OrderBook, Liquidity
+from backend.database.db_connector import get_db
+from backend.core.liquidity_checker import check_liquidity
+from backend.core.price_matrix import PriceMatrix, scan_spreads
+from backend.core.local_orderbook import order_books
+from backend.core.price_board import get_board
+from backend.core.instruments import registry
+from backend.core.risk_managment import check_risk_batch
 from backend.utils.logger import log_arbitrage
-from sqlalchemy import and_
+from sqlalchemy import and_, tuple_
+from backend.core.signal_lifecycle import SignalTracker
+from backend.database.orderbook_codec import BookSide
 from datetime import datetime
+import numpy as np
 import logging
+import time
 
 
 
 MIN_SPREAD = 3.0  # Минимальный спред, при котором сигнал остаётся в БД
+MAX_PRICE_IMPACT = 1.5  # Максимальный price impact (%) на каждой стороне сделки
+TRADE_SIZES_USDT = (100, 500, 1000, 5000)  # Размеры сделки, которые примеряем к стаканам
+PRELOAD_CHUNK = 500  # ключей на один запрос IN при пакетной загрузке
+
+# 🧮 Матрица цен активы × биржи; строки — id активов реестра, значения перезагружаются каждым сканом
+price_matrix = PriceMatrix(registry=registry)
+# 🔄 Открытые межбиржевые сигналы в памяти: в БД пишется только разница между сканами
+signal_tracker = SignalTracker("межбиржевой", min_spread=MIN_SPREAD)
 
 # Настроим логирование
 logging.basicConfig(filename="logs/arbitrage.log", level=logging.INFO, format="%(asctime)s - %(message)s")
@@ -27,42 +44,9 @@ def estimate_price_impact(db: Session, exchange: str, asset: str, order_type: st
         return 100.0  # Если нет данных — считаем большой риск
 
     try:
-        import ast
-        side = ast.literal_eval(book.asks if order_type == "buy" else book.bids)
-        if not side:
-            return 100.0
-
-        total_cost = 0.0
-        acquired = 0.0
-
-        for price_str, qty_str in side:
-            price = float(price_str)
-            qty = float(qty_str)
-            max_buy = qty * price if order_type == "buy" else qty
-
-            if order_type == "buy":
-                if total_cost + max_buy < amount_usdt:
-                    total_cost += max_buy
-                    acquired += qty
-                else:
-                    needed = amount_usdt - total_cost
-                    acquired += needed / price
-                    break
-            else:  # sell
-                if acquired + qty < amount_usdt:
-                    acquired += qty
-                    total_cost += qty * price
-                else:
-                    total_cost += (amount_usdt - acquired) * price
-                    break
-
-        if acquired == 0:
+        impact = BookSide.load(book.asks if order_type == "buy" else book.bids).impact(amount_usdt, order_type)
+        if impact is None:
             return 100.0
-
-        market_price = float(side[0][0])
-        average_price = total_cost / acquired
-        impact = (average_price - market_price) / market_price * 100 if order_type == "buy" else \
-                 (market_price - average_price) / market_price * 100
         return round(impact, 3)
 
     except Exception as e:
@@ -70,118 +54,208 @@ def estimate_price_impact(db: Session, exchange: str, asset: str, order_type: st
         return 100.0
 
 
+def estimate_price_impacts(db: Session, exchange: str, asset: str, order_type: str,
+                           amounts_usdt=TRADE_SIZES_USDT) -> np.ndarray:
+    """📉 Price impact для нескольких размеров ордера за одно чтение стакана (100.0 — нет данных)."""
+    local = order_books.impacts(exchange, asset, amounts_usdt, order_type)  # живой стакан из WS, если есть
+    if local is not None:
+        return np.nan_to_num(local, nan=100.0)
+
+    book = db.query(OrderBook).filter_by(exchange=exchange, asset=asset).first()
+    if not book:
+        return np.full(len(amounts_usdt), 100.0)
+    return side_impacts(book.asks if order_type == "buy" else book.bids, exchange, asset, order_type, amounts_usdt)
+
+
+def side_impacts(value, exchange: str, asset: str, order_type: str, amounts_usdt=TRADE_SIZES_USDT) -> np.ndarray:
+    """📉 Price impact по стороне стакана из БД (100.0 — нет данных или ошибка разбора)."""
+    try:
+        impacts = BookSide.load(value).impacts(amounts_usdt, order_type)
+        return np.nan_to_num(impacts, nan=100.0)
+    except Exception as e:
+        logging.warning(f"⚠️ Ошибка расчета price impact для {exchange} {asset}: {e}")
+        return np.full(len(amounts_usdt), 100.0)
+
+
+def select_in(db: Session, columns, key_columns, keys):
+    """📦 Строки по набору составных ключей: запрос IN на PRELOAD_CHUNK ключей вместо запроса на ключ."""
+    keys = list(keys)
+    for start in range(0, len(keys), PRELOAD_CHUNK):
+        yield from db.query(*columns).filter(tuple_(*key_columns).in_(keys[start:start + PRELOAD_CHUNK]))
+
+
+class ScanPreload:
+    """
+    📦 Ликвидность и стаканы кандидатов скана, загруженные пакетными запросами по (биржа, актив).
+    liquidity() / impacts() заменяют check_liquidity / estimate_price_impacts в filter_candidates: проверки в памяти.
+    """
+
+    def __init__(self, db: Session, candidates):
+        pairs = {(c.buy_exchange, c.asset) for c in candidates} | {(c.sell_exchange, c.asset) for c in candidates}
+        self.liquid = {
+            (exchange, asset)
+            for exchange, asset, bid_volume, ask_volume in select_in(
+                db, (Liquidity.exchange, Liquidity.asset, Liquidity.bid_volume, Liquidity.ask_volume),
+                (Liquidity.exchange, Liquidity.asset), pairs)
+            if bid_volume > 0 and ask_volume > 0
+        }
+        # 📚 Стаканы из БД — только для ликвидных пар без живого стакана из WS
+        missing = [pair for pair in pairs if pair in self.liquid and order_books.book(*pair) is None]
+        self.books = {
+            (exchange, asset): (bids, asks)
+            for exchange, asset, bids, asks in select_in(
+                db, (OrderBook.exchange, OrderBook.asset, OrderBook.bids, OrderBook.asks),
+                (OrderBook.exchange, OrderBook.asset), missing)
+        }
+
+    def liquidity(self, asset: str, exchange: str, db: Session = None) -> bool:
+        return (exchange, asset) in self.liquid
+
+    def impacts(self, db: Session, exchange: str, asset: str, order_type: str,
+                amounts_usdt=TRADE_SIZES_USDT) -> np.ndarray:
+        local = order_books.impacts(exchange, asset, amounts_usdt, order_type)
+        if local is not None:
+            return np.nan_to_num(local, nan=100.0)
+        book = self.books.get((exchange, asset))
+        if book is None:
+            return np.full(len(amounts_usdt), 100.0)
+        return side_impacts(book[1] if order_type == "buy" else book[0], exchange, asset, order_type, amounts_usdt)
+
+
+def pick_trade_size(impact_buy: np.ndarray, impact_sell: np.ndarray, sizes=TRADE_SIZES_USDT):
+    """📏 Наибольший размер сделки, при котором обе стороны укладываются в MAX_PRICE_IMPACT (None — ни один)."""
+    fits = np.nonzero((impact_buy < MAX_PRICE_IMPACT) & (impact_sell < MAX_PRICE_IMPACT))[0]
+    return sizes[int(fits[-1])] if fits.size else None
+
+
+def lap(timings: dict, stage: str, started: float) -> float:
+    """⏱ Добавляет время этапа в timings (если передан) и возвращает новую отметку."""
+    clock = time.perf_counter()
+    if timings is not None:
+        timings[stage] = timings.get(stage, 0.0) + clock - started
+    return clock
+
+
+def filter_candidates(db: Session, candidates, liquidity=check_liquidity, risk=check_risk_batch,
+                      impacts=estimate_price_impacts, now: datetime = None, timings: dict = None) -> tuple:
+    """
+    💧⚡📉 Прогоняет кандидатов через ликвидность, риски и price impact. Возвращает (signals, stats).
+    liquidity / risk / impacts — источники проверок (скан подставляет ScanPreload, бэктест — записанные стаканы),
+    risk оценивает всю пачку за один вызов (булев массив), now — время сигналов (по умолчанию текущее),
+    timings — сюда добавляется время этапов liquidity / risk / impact (сек).
+    """
+    signals = []
+    stats = {"liquidity": 0, "risk": 0, "order": 0}
+    clock = time.perf_counter()
+
+    # 💧 Ликвидность на обеих биржах
+    liquid = [c for c in candidates if liquidity(c[0], c[1], db) and liquidity(c[0], c[2], db)]
+    stats["liquidity"] = len(candidates) - len(liquid)
+    clock = lap(timings, "liquidity", clock)
+
+    # ⚡ Риски — один вызов на пачку
+    safe = risk(liquid)
+    clock = lap(timings, "risk", clock)
+
+    # 📉 Price impact и размер сделки
+    for (asset, low_exchange, high_exchange, low_price, high_price, gross_spread, spread), ok in zip(liquid, safe):
+        if not ok:
+            stats["risk"] += 1
+            continue
+        impact_buy = impacts(db, low_exchange, asset, "buy")
+        impact_sell = impacts(db, high_exchange, asset, "sell")
+        size_usdt = pick_trade_size(impact_buy, impact_sell)
+        if size_usdt is None:
+            stats["order"] += 1
+            continue
+        signals.append(ArbitrageSignal(
+            asset=asset,
+            buy_exchange=low_exchange,
+            sell_exchange=high_exchange,
+            buy_price=low_price,
+            sell_price=high_price,
+            spread=spread,
+            size_usdt=size_usdt,
+            type="межбиржевой",
+            timestamp=now or datetime.utcnow()
+        ))
+    lap(timings, "impact", clock)
+
+    return signals, stats
+
+
+def save_signals(db: Session, signals, scope=None):
+    """
+    💾 Применяет скан к жизненному циклу сигналов (signal_tracker) и одним пакетом пишет только изменения,
+    с коммитом. scope — проверенные активы; None — полный скан: пропавшие сигналы закрываются по всем активам.
+    Возвращает Changes(opened, updated, closed).
+    """
+    return signal_tracker.apply(db, signals, scope)
+
+
+def process_candidates(candidates, assets=()) -> list:
+    """
+    ⚡ Проверяет и сохраняет кандидатов по отдельным активам (событийный режим).
+    assets — активы, у которых возможностей больше нет: их открытые сигналы закрываются.
+    """
+    db = next(get_db())
+    try:
+        preload = ScanPreload(db, candidates)
+        signals, _ = filter_candidates(db, candidates, liquidity=preload.liquidity, impacts=preload.impacts)
+        save_signals(db, signals, scope={c.asset for c in candidates} | set(assets))
+        return signals
+    except Exception as e:
+        logging.error(f"❌ Ошибка в process_candidates: {e}")
+        db.rollback()
+        return []
+    finally:
+        db.close()
+
 
 def find_arbitrage_opportunities(db: Session):
-    analyze_order_impact(db)
   #  update_orderbooks(db)
     """🔍 Анализирует цены и ищет арбитражные возможности."""
     try:
-        prices = db.query(Price).all()
-
-        price_map = {}
-        for price in prices:
-            if price.asset not in price_map:
-                price_map[price.asset] = []
-            price_map[price.asset].append((price.exchange, price.price))
-
-        logging.info(f"🔍 Анализируем {len(price_map)} активов...")
-
-        signals = []
-        skipped_liquidity = 0
-        skipped_risk = 0
-        skipped_spread = 0
-        updated_signals = 0
-        deleted_signals = 0
-        skipped_order = 0
-        
-        # ✅ Межбиржевой арбитраж
-        for asset, price_list in price_map.items():
-            price_list.sort(key=lambda x: x[1])
-            if len(price_list) > 1:
-                low_exchange, low_price = price_list[0]
-                high_exchange, high_price = price_list[-1]
-                if low_price == 0:
-                    continue
-                spread = (high_price - low_price) / low_price * 100
-
-               # logging.info(f"📊 {asset}: Мин цена {low_price} ({low_exchange}), Макс цена {high_price} ({high_exchange}) -> Спред: {spread:.2f}%")
-
-                if spread >= 3:
-                   # logging.info(f"🔎 Проверяем ликвидность {asset} -> {low_exchange}, {high_exchange}")
-                    if check_liquidity(asset, low_exchange, db) and check_liquidity(asset, high_exchange, db):
-                       # logging.info(f"⚡ Проверяем риски {asset} -> {low_exchange}, {high_exchange}")
-                        if check_risk(asset, low_exchange, high_exchange, low_price, high_price):
-                            impact_buy = estimate_price_impact(db, low_exchange, asset, "buy", amount_usdt=100)
-                            impact_sell = estimate_price_impact(db, high_exchange, asset, "sell", amount_usdt=100)
-                            if impact_buy < 1.5 and impact_sell < 1.5:
-                                signal = ArbitrageSignal(
-                                    asset=asset,
-                                    buy_exchange=low_exchange,
-                                    sell_exchange=high_exchange,
-                                    buy_price=low_price,
-                                    sell_price=high_price,
-                                    spread=spread,
-                                    type="межбиржевой",
-                                    timestamp=datetime.utcnow()
-                                )
-                                signals.append(signal)
-                            else:                            
-                                skipped_order += 1
-                                #logging.info(f"❌ Слишком большой price impact: BUY {impact_buy:.2f}% / SELL {impact_sell:.2f}%")
-                        else:
-                            skipped_risk += 1
-                          #  logging.info(f"❌ Отказ из-за риска: {asset}")
-                    else:
-                        skipped_liquidity += 1
-                       # logging.info(f"❌ Отказ из-за ликвидности: {asset}")
-                else:
-                    skipped_spread += 1
-                   # logging.info(f"⛔ Спред ниже 1%: {asset} -> {spread:.2f}%")
-
-       
-
-      
-    
-        for signal in signals:
-            log_message = (
-                f"Арбитраж: {signal.asset} | Купить на {signal.buy_exchange} за {signal.buy_price} | "
-                f"Продать на {signal.sell_exchange} за {signal.sell_price} | Профит: {signal.spread:.2f}% "
-                f"| Тип: {signal.type}"
-            )
-           # logging.info(f"✅ {log_message}")
-
-            existing = db.query(ArbitrageSignal).filter(
-                ArbitrageSignal.asset == signal.asset,
-                ArbitrageSignal.buy_exchange == signal.buy_exchange,
-                ArbitrageSignal.sell_exchange == signal.sell_exchange
-            ).first()
-
-            if signal.spread >= MIN_SPREAD:
-                if existing:
-                    existing.buy_price = signal.buy_price
-                    existing.sell_price = signal.sell_price
-                    existing.spread = signal.spread
-                    existing.timestamp = signal.timestamp
-                    updated_signals += 1
-                   # logging.info(f"🔁 Обновлён сигнал: {signal.asset} | Спред: {signal.spread:.2f}%")
-                else:
-                    db.add(signal)
-                   # logging.info(f"➕ Добавлен сигнал: {signal.asset} | Спред: {signal.spread:.2f}%")
-            else:
-                if existing:
-                    db.delete(existing)
-                    deleted_signals += 1
-                   # logging.info(f"❌ Удалён сигнал: {signal.asset} | Спред упал ниже {MIN_SPREAD}% ({signal.spread:.2f}%)")
-
-        db.commit()
+        timings = {}
+        clock = time.perf_counter()
+        board = get_board()
+        if board is not None:
+            # ⚡ Последние цены из общей памяти процесса приёма, без чтения всей таблицы prices
+            price_matrix.load((exchange, asset, price) for exchange, asset, price, _ in board.rows())
+        else:
+            price_matrix.load(db.query(Price.exchange, Price.asset, Price.price))
+        clock = lap(timings, "prices", clock)
+
+        logging.info(f"🔍 Анализируем {len(price_matrix.assets)} активов...")
+
+        # ✅ Межбиржевой арбитраж: все прибыльные пары бирж по каждому активу за один проход
+        candidates = scan_spreads(price_matrix, min_spread=MIN_SPREAD)
+        skipped_spread = price_matrix.quoted_assets() - len({c.asset for c in candidates})
+        clock = lap(timings, "scan", clock)
 
+        # 📦 Ликвидность и стаканы всех кандидатов — несколькими запросами, дальше проверки в памяти
+        preload = ScanPreload(db, candidates)
+        lap(timings, "preload", clock)
+
+        signals, skipped = filter_candidates(db, candidates, liquidity=preload.liquidity, impacts=preload.impacts,
+                                             timings=timings)
+        clock = time.perf_counter()
+        changes = save_signals(db, signals)
+        lap(timings, "save", clock)
+
+        passed_liquidity = len(candidates) - skipped["liquidity"]
+        passed_risk = passed_liquidity - skipped["risk"]
         logging.info(f"✅ Обработка завершена: {len(signals)} сигналов")
         logging.info(f"📉 Пропущено по спреду: {skipped_spread}")
-        logging.info(f"💧 Пропущено по ликвидности: {skipped_liquidity}")
-        logging.info(f"⚠ Пропущено влияние на цену: {skipped_order}")
-        logging.info(f"⚠ Пропущено по рискам: {skipped_risk}")
-        logging.info(f"🔁 Обновлены сигналы: {updated_signals}")
-        logging.info(f"❌ Удалены сигналы: {deleted_signals}")
+        logging.info(f"💧 Пропущено по ликвидности: {skipped['liquidity']}")
+        logging.info(f"⚠ Пропущено влияние на цену: {skipped['order']}")
+        logging.info(f"⚠ Пропущено по рискам: {skipped['risk']}")
+        logging.info(f"🔁 Сигналы открыты/обновлены: {len(changes.opened)}/{len(changes.updated)}, "
+                     f"без изменений: {len(signals) - len(changes.opened) - len(changes.updated)}")
+        logging.info(f"❌ Закрыты сигналы: {len(changes.closed)} (открыто сейчас: {len(signal_tracker)})")
+        logging.info(f"🔢 Кандидаты по этапам: спред {len(candidates)} → ликвидность {passed_liquidity} → "
+                     f"риски {passed_risk} → price impact {len(signals)}")
+        logging.info("⏱ Этапы, мс: " + ", ".join(f"{stage} {seconds * 1000:.1f}" for stage, seconds in timings.items()))
         logging.info(f"----------------------------------------------------")
         db.close()
         return signals
@@ -191,4 +265,3 @@ def find_arbitrage_opportunities(db: Session):
         db.rollback()
         db.close()
         return []
-
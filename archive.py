@@ -0,0 +1,293 @@
+import argparse
+import asyncio
+import functools
+import logging
+import os
+import time
+from datetime import datetime
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.fs as pafs
+
+# 🗄️ Колоночный архив тиков и снапшотов стаканов вне MySQL: Arrow IPC (Feather v2) со сжатием zstd.
+# Раскладка (hive-разбиение, по нему фильтры отсекают целые каталоги):
+#   archive/ticks/date=2026-01-01/exchange=Binance/part-000001-<pid>-<ts>.arrow   asset, price, ts
+#   archive/books/date=2026-01-01/exchange=Binance/part-....arrow                 asset, ts, bid_price[], bid_qty[], ...
+# Файл раздела пишется пачками (record batch) и закрывается по объёму, возрасту или смене суток.
+# Пока файл открыт, он называется ".part-...arrow" — читатель (pyarrow.dataset) игнорирует имена с точкой
+# и видит только закрытые файлы с футером. Читатель отображает файлы в память (mmap).
+ARCHIVE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../..", "archive"))
+ARCHIVE_FLUSH_INTERVAL = 5       # сек: как часто буфер уходит пачкой в открытые файлы
+ROLL_ROWS = 2_000_000            # строк в одном файле
+ROLL_SECONDS = 3600              # файл закрывается не позже чем через час
+BOOK_SNAPSHOT_INTERVAL = 1.0     # сек между снапшотами стаканов
+BOOK_DEPTH = 20                  # уровней на сторону в снапшоте
+COMPRESSION = "zstd"             # None — без сжатия: чтение из mmap без распаковки (zero-copy)
+
+TICK_SCHEMA = pa.schema([("asset", pa.string()), ("price", pa.float64()), ("ts", pa.float64())])
+BOOK_SCHEMA = pa.schema([
+    ("asset", pa.string()), ("ts", pa.float64()),
+    ("bid_price", pa.list_(pa.float64())), ("bid_qty", pa.list_(pa.float64())),
+    ("ask_price", pa.list_(pa.float64())), ("ask_qty", pa.list_(pa.float64())),
+])
+SCHEMAS = {"ticks": TICK_SCHEMA, "books": BOOK_SCHEMA}
+PARTITION_SCHEMA = pa.schema([("date", pa.string()), ("exchange", pa.string())])
+PARTITIONING = ds.partitioning(PARTITION_SCHEMA, flavor="hive")
+
+
+@functools.lru_cache(maxsize=64)
+def _day_name(day_number: int) -> str:
+    return datetime.utcfromtimestamp(day_number * 86400).strftime("%Y-%m-%d")
+
+
+def day_of(ts: float) -> str:
+    """Значение раздела date (UTC) для unix-времени."""
+    return _day_name(int(ts // 86400))
+
+
+class RollingFile:
+    """Один открытый IPC-файл раздела; после close() переименовывается в видимое имя."""
+
+    def __init__(self, directory: str, name: str, schema: pa.Schema, compression):
+        os.makedirs(directory, exist_ok=True)
+        self.path = os.path.join(directory, name)
+        self.hidden = os.path.join(directory, "." + name)
+        self.sink = pa.OSFile(self.hidden, "wb")
+        self.writer = pa.ipc.new_file(self.sink, schema, options=pa.ipc.IpcWriteOptions(compression=compression))
+        self.opened = time.monotonic()
+        self.rows = 0
+
+    def write(self, batch: pa.RecordBatch):
+        self.writer.write_batch(batch)
+        self.rows += batch.num_rows
+
+    def close(self):
+        self.writer.close()
+        self.sink.close()
+        os.replace(self.hidden, self.path)
+
+
+class ArchiveWriter:
+    """✍️ Пишет пачки одного вида (ticks / books) в открытые файлы разделов (date, exchange) и ротирует их."""
+
+    def __init__(self, kind: str, root: str = ARCHIVE_DIR, roll_rows: int = ROLL_ROWS,
+                 roll_seconds: float = ROLL_SECONDS, compression=COMPRESSION):
+        self.kind = kind
+        self.schema = SCHEMAS[kind]
+        self.root = os.path.join(root, kind)
+        self.roll_rows = roll_rows
+        self.roll_seconds = roll_seconds
+        self.compression = compression
+        self._files = {}     # (date, exchange) -> RollingFile
+        self._seq = 0
+        self.rows = 0
+        self.files = 0
+
+    def _open(self, day: str, exchange: str) -> RollingFile:
+        self._seq += 1
+        name = f"part-{self._seq:06d}-{os.getpid()}-{int(time.time())}.arrow"
+        directory = os.path.join(self.root, f"date={day}", f"exchange={exchange}")
+        return RollingFile(directory, name, self.schema, self.compression)
+
+    def write(self, day: str, exchange: str, columns: dict):
+        """Одна пачка в раздел (date, exchange); columns — {колонка: список значений} по схеме."""
+        key = (day, exchange)
+        file = self._files.get(key)
+        if file is None:
+            file = self._files[key] = self._open(day, exchange)
+        file.write(pa.record_batch([pa.array(columns[field.name], field.type) for field in self.schema],
+                                   schema=self.schema))
+        self.rows += len(columns[self.schema[0].name])
+
+    def roll(self, force: bool = False, today: str = None):
+        """Закрывает файлы: большие, старые, за прошедшие сутки или все (force)."""
+        now = time.monotonic()
+        for key, file in list(self._files.items()):
+            if force or file.rows >= self.roll_rows or now - file.opened >= self.roll_seconds or \
+                    (today is not None and key[0] < today):
+                file.close()
+                self.files += 1
+                del self._files[key]
+
+    def close(self):
+        self.roll(force=True)
+
+
+class Archiver:
+    """
+    📦 Этап конвейера: копит нормализованные тики (подписчик price_store) и снапшоты стаканов
+    и пачками дописывает их в архив. Конвертация в Arrow и запись на диск — в отдельном потоке.
+    """
+
+    def __init__(self, root: str = ARCHIVE_DIR, flush_interval: float = ARCHIVE_FLUSH_INTERVAL,
+                 book_interval: float = BOOK_SNAPSHOT_INTERVAL, book_depth: int = BOOK_DEPTH, **writer_options):
+        self.flush_interval = flush_interval
+        self.book_interval = book_interval
+        self.book_depth = book_depth
+        self.writers = {kind: ArchiveWriter(kind, root, **writer_options) for kind in SCHEMAS}
+        self._ticks = []     # (exchange, asset, price, ts)
+        self._books = []     # (exchange, asset, ts, bids, asks)
+        self._write_lock = asyncio.Lock()
+        self.write_errors = 0
+
+    def record(self, exchange: str, symbol: str, price: float, ts: float = None):
+        """⚡ Тик в буфер (сигнатура подписчика price_store)."""
+        self._ticks.append((exchange, symbol, price, time.time() if ts is None else ts))
+
+    def snapshot_books(self, manager, ts: float = None):
+        """📸 Верхние book_depth уровней всех синхронизированных стаканов OrderBookManager."""
+        ts = time.time() if ts is None else ts
+        for (exchange, asset), book in list(manager.books.items()):
+            if book.synced:
+                bids, asks = book.levels(self.book_depth)
+                self._books.append((exchange, asset, ts, bids, asks))
+
+    def _write(self, ticks, books):
+        grouped = {"ticks": {}, "books": {}}   # вид -> (date, exchange) -> {колонка: значения}
+        for exchange, asset, price, ts in ticks:
+            key = (day_of(ts), exchange)
+            columns = grouped["ticks"].get(key)
+            if columns is None:
+                columns = grouped["ticks"][key] = {field.name: [] for field in TICK_SCHEMA}
+            columns["asset"].append(asset)
+            columns["price"].append(price)
+            columns["ts"].append(ts)
+        for exchange, asset, ts, bids, asks in books:
+            key = (day_of(ts), exchange)
+            columns = grouped["books"].get(key)
+            if columns is None:
+                columns = grouped["books"][key] = {field.name: [] for field in BOOK_SCHEMA}
+            columns["asset"].append(asset)
+            columns["ts"].append(ts)
+            columns["bid_price"].append([price for price, _ in bids])
+            columns["bid_qty"].append([qty for _, qty in bids])
+            columns["ask_price"].append([price for price, _ in asks])
+            columns["ask_qty"].append([qty for _, qty in asks])
+
+        today = day_of(time.time())
+        for kind, partitions in grouped.items():
+            for (day, exchange), columns in partitions.items():
+                self.writers[kind].write(day, exchange, columns)
+            self.writers[kind].roll(today=today)
+
+    async def flush(self):
+        """🔄 Буферы -> пачки в открытых файлах (в потоке, event loop не ждёт диск)."""
+        ticks, self._ticks = self._ticks, []
+        books, self._books = self._books, []
+        async with self._write_lock:
+            try:
+                await asyncio.to_thread(self._write, ticks, books)
+            except Exception as e:
+                self.write_errors += 1
+                logging.error(f"❌ Архив: ошибка записи ({len(ticks)} тиков, {len(books)} стаканов): {e}")
+
+    async def close(self):
+        await self.flush()
+        async with self._write_lock:
+            for writer in self.writers.values():
+                await asyncio.to_thread(writer.close)
+
+    async def _snapshot_loop(self, manager):
+        while True:
+            await asyncio.sleep(self.book_interval)
+            self.snapshot_books(manager)
+
+    async def run(self, books=None):
+        """⏱️ Фоновая задача: сброс каждые flush_interval; books — OrderBookManager для снапшотов стаканов."""
+        snapshots = asyncio.create_task(self._snapshot_loop(books)) if books is not None else None
+        try:
+            while True:
+                await asyncio.sleep(self.flush_interval)
+                await self.flush()
+        finally:
+            if snapshots:
+                snapshots.cancel()
+            await self.close()
+
+    def stats(self) -> dict:
+        stats = {kind: {"rows": writer.rows, "closed_files": writer.files, "open_files": len(writer._files)}
+                 for kind, writer in self.writers.items()}
+        stats.update(pending_ticks=len(self._ticks), pending_books=len(self._books), write_errors=self.write_errors)
+        return stats
+
+
+def archive_ticks(store, **kwargs) -> Archiver:
+    """🔗 Подписывает архив на тики стора; run() запускает вызывающий."""
+    archiver = Archiver(**kwargs)
+    store.subscribe(archiver.record)
+    logging.info(f"🗄️ Архив тиков: {archiver.writers['ticks'].root}")
+    return archiver
+
+
+class ArchiveReader:
+    """
+    📖 Чтение архива через pyarrow.dataset: файлы отображаются в память, фильтры по дате и бирже
+    отсекают каталоги, по активу и времени — проверяются на пачках.
+    """
+
+    def __init__(self, root: str = ARCHIVE_DIR):
+        self.root = root
+        self.filesystem = pafs.LocalFileSystem(use_mmap=True)
+
+    def dataset(self, kind: str) -> ds.Dataset:
+        # схема задана явно: колонки разделов есть, даже если закрытых файлов ещё нет
+        schema = pa.unify_schemas([SCHEMAS[kind], PARTITION_SCHEMA])
+        path = os.path.join(self.root, kind)
+        if not os.path.isdir(path):
+            return ds.dataset(schema.empty_table())
+        return ds.dataset(path, schema=schema, format="ipc", partitioning=PARTITIONING, filesystem=self.filesystem)
+
+    @staticmethod
+    def _filter(start=None, end=None, exchanges=None, assets=None):
+        """start / end — unix-время; [start, end)."""
+        conditions = []
+        if start is not None:
+            conditions += [pc.field("date") >= day_of(start), pc.field("ts") >= start]
+        if end is not None:
+            conditions += [pc.field("date") <= day_of(end), pc.field("ts") < end]
+        if exchanges:
+            conditions.append(pc.field("exchange").isin(list(exchanges)))
+        if assets:
+            conditions.append(pc.field("asset").isin(list(assets)))
+        expression = None
+        for condition in conditions:
+            expression = condition if expression is None else expression & condition
+        return expression
+
+    def scan(self, kind: str = "ticks", start=None, end=None, exchanges=None, assets=None, columns=None) -> pa.Table:
+        """Всё, что попало в фильтр, одной таблицей."""
+        return self.dataset(kind).to_table(columns=columns, filter=self._filter(start, end, exchanges, assets))
+
+    def batches(self, kind: str = "ticks", start=None, end=None, exchanges=None, assets=None, columns=None):
+        """Потоковое чтение пачками (RecordBatch) без загрузки всего диапазона в память."""
+        return self.dataset(kind).to_batches(columns=columns, filter=self._filter(start, end, exchanges, assets))
+
+    def ticks(self, start=None, end=None, exchanges=None, assets=None):
+        """[(exchange, asset, price, ts)] по возрастанию ts — например, для воспроизведения."""
+        table = self.scan("ticks", start, end, exchanges, assets, ["exchange", "asset", "price", "ts"])
+        table = table.sort_by([("ts", "ascending")])
+        return list(zip(*(table.column(name).to_pylist() for name in ("exchange", "asset", "price", "ts"))))
+
+    def days(self, kind: str = "ticks") -> list:
+        """Даты (разделы date=YYYY-MM-DD), за которые в архиве есть данные, по возрастанию."""
+        path = os.path.join(self.root, kind)
+        if not os.path.isdir(path):
+            return []
+        return sorted(name[len("date="):] for name in os.listdir(path) if name.startswith("date="))
+
+    def summary(self, kind: str = "ticks") -> dict:
+        """Файлы, строки и байты на диске по видам архива."""
+        dataset = self.dataset(kind)
+        files = getattr(dataset, "files", [])
+        return {"files": len(files), "rows": dataset.count_rows(),
+                "bytes": sum(os.path.getsize(path) for path in files)}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Сводка по архиву тиков и стаканов")
+    parser.add_argument("--root", default=ARCHIVE_DIR)
+    args = parser.parse_args()
+    reader = ArchiveReader(args.root)
+    for kind in SCHEMAS:
+        print(f"🗄️ {kind}: {reader.summary(kind)}")
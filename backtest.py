@@ -0,0 +1,282 @@
+import argparse
+import heapq
+import logging
+import time
+from collections import deque, namedtuple
+from datetime import datetime, timezone
+import numpy as np
+from backend.core import arbitrage
+from backend.core.archive import ARCHIVE_DIR, ArchiveReader
+from backend.core.price_matrix import DEFAULT_TAKER_FEE, TAKER_FEES, PriceMatrix, scan_spreads
+from backend.database.orderbook_codec import DTYPE, BookSide
+
+# 🎞️ Бэктест: записанные тики и снапшоты стаканов (archive.py) проигрываются через тот же конвейер,
+# что и в событийном режиме — PriceMatrix + scan_spreads по затронутому активу с debounce, затем
+# arbitrage.filter_candidates (ликвидность, check_risk_batch, price impact, размер сделки).
+# Часы симулированные: время берётся из ts событий, ожидания нет, результат детерминирован.
+# Ликвидность и price impact считаются по последнему записанному стакану вместо БД и живых стаканов.
+# Исполнение: через latency_ms после сигнала обе ноги бьют по стаканам того момента, PnL — после комиссий.
+DEBOUNCE_MS = 50               # как у TickArbitrageEngine
+EXECUTION_LATENCY_MS = 200     # от сигнала до исполнения обеих ног
+BOOK_MAX_AGE = 5.0             # сек: более старый снапшот стакана считается отсутствующим
+COOLDOWN = 60.0                # сек между сделками по одной связке (asset, buy, sell) — капитал в переводе
+CHUNK_ROWS = 100_000           # строк архива, превращаемых в Python-объекты за раз
+
+Fill = namedtuple("Fill", "ts asset buy_exchange sell_exchange qty buy_price sell_price cost_usdt pnl_usdt")
+
+
+def fill_price(side: BookSide, amount_usdt: float, order_type: str) -> tuple:
+    """Рыночный ордер на amount_usdt по стороне стакана: (средняя цена, исполнено USDT); глубже стакана — не исполняется."""
+    filled = min(amount_usdt, side.depth_usdt)
+    impact = side.impact(filled, order_type) if filled > 0 else None
+    if impact is None:
+        return None, 0.0
+    best = float(side.prices[0])
+    return best * (1 + impact / 100) if order_type == "buy" else best * (1 - impact / 100), filled
+
+
+class Backtest:
+    """
+    🎞️ Воспроизведение тиков и стаканов быстрее реального времени с симулированными часами.
+    Результат — сигналы (ArbitrageSignal, как их сохранил бы save_signals), сделки (Fill) и PnL в stats().
+    min_spread / risk / fees по умолчанию — боевые (arbitrage.MIN_SPREAD, check_risk_batch, TAKER_FEES).
+    """
+
+    def __init__(self, min_spread: float = None, debounce_ms: float = DEBOUNCE_MS,
+                 latency_ms: float = EXECUTION_LATENCY_MS, book_max_age: float = BOOK_MAX_AGE,
+                 cooldown: float = COOLDOWN, risk=None, fees: dict = None):
+        self.min_spread = arbitrage.MIN_SPREAD if min_spread is None else min_spread
+        self.debounce = debounce_ms / 1000
+        self.latency = latency_ms / 1000
+        self.book_max_age = book_max_age
+        self.cooldown = cooldown
+        self.risk = risk or arbitrage.check_risk_batch
+        self.fees = TAKER_FEES if fees is None else fees
+        self.matrix = PriceMatrix()
+        self.clock = None
+        self._books = {}        # (exchange, asset) -> (ts, bid_price, bid_qty, ask_price, ask_qty)
+        self._sides = {}        # (exchange, asset, order_type) -> BookSide последнего снапшота
+        self._pending = {}      # актив -> время первого необработанного тика
+        self._due = deque()     # (время пересчёта, актив): debounce постоянный — очередь упорядочена
+        self._orders = deque()  # (время исполнения, сигнал)
+        self._last_fill = {}    # (asset, buy, sell) -> время последней сделки
+
+        self.signals = []
+        self.fills = []
+
+        # 📊 Метрики
+        self.ticks = 0
+        self.books = 0
+        self.evaluations = 0
+        self.candidates = 0
+        self.rejected = {"liquidity": 0, "risk": 0, "order": 0}
+        self.cooled = 0
+        self.missed = 0
+        self.first_ts = None
+        self.wall = 0.0
+
+    # --- События ---
+
+    def on_tick(self, exchange: str, asset: str, price: float, ts: float):
+        self._advance(ts)
+        self.ticks += 1
+        if self.first_ts is None:
+            self.first_ts = ts
+        self.matrix.update(exchange, asset, price)
+        if asset not in self._pending:
+            self._pending[asset] = ts
+            self._due.append((ts + self.debounce, asset))
+
+    def on_book(self, exchange: str, asset: str, ts: float, bid_price, bid_qty, ask_price, ask_qty):
+        self._advance(ts)
+        self.books += 1
+        self._books[(exchange, asset)] = (ts, bid_price, bid_qty, ask_price, ask_qty)
+        self._sides.pop((exchange, asset, "buy"), None)
+        self._sides.pop((exchange, asset, "sell"), None)
+
+    def _advance(self, ts: float):
+        """
+        ⏩ Двигает часы к ts, выполняя всё, что назначено раньше. Между событиями цены и стаканы не меняются,
+        поэтому все созревшие пересчёты идут одним scan_spreads, а исполнения — после них.
+        """
+        due = self._due
+        if due and due[0][0] <= ts:
+            batch = []
+            while due and due[0][0] <= ts:
+                batch.append(due.popleft())
+            self._evaluate(batch)
+        orders = self._orders
+        while orders and orders[0][0] <= ts:
+            self.clock, signal = orders.popleft()
+            self._execute(signal)
+        self.clock = ts
+
+    # --- Конвейер ---
+
+    def _evaluate(self, batch):
+        """Пересчёт активов [(время пересчёта, актив)]; сигналы получают время своего пересчёта."""
+        due_at = {}
+        for at, asset in batch:
+            self._pending.pop(asset, None)
+            due_at[asset] = at
+        rows = [self.matrix.asset_index[asset] for asset in due_at]
+        candidates = scan_spreads(self.matrix, min_spread=self.min_spread, fees=self.fees, rows=rows)
+        self.evaluations += len(rows)
+        if not candidates:
+            return
+        self.candidates += len(candidates)
+        by_asset = {}
+        for candidate in candidates:
+            by_asset.setdefault(candidate.asset, []).append(candidate)
+        for asset, found in sorted(by_asset.items(), key=lambda item: due_at[item[0]]):
+            self.clock = due_at[asset]
+            self._filter(found)
+
+    def _filter(self, candidates):
+        signals, skipped = arbitrage.filter_candidates(
+            None, candidates, liquidity=self._liquidity, risk=self.risk, impacts=self._impacts,
+            now=datetime.fromtimestamp(self.clock, timezone.utc).replace(tzinfo=None))
+        for reason, count in skipped.items():
+            self.rejected[reason] += count
+        for signal in signals:
+            self.signals.append(signal)
+            key = (signal.asset, signal.buy_exchange, signal.sell_exchange)
+            last = self._last_fill.get(key)
+            if last is not None and self.clock - last < self.cooldown:
+                self.cooled += 1
+                continue
+            self._last_fill[key] = self.clock
+            self._orders.append((self.clock + self.latency, signal))
+
+    def _side(self, exchange: str, asset: str, order_type: str):
+        """Сторона записанного стакана для рыночного ордера (buy — asks, sell — bids); None — нет или устарел."""
+        book = self._books.get((exchange, asset))
+        if book is None or self.clock - book[0] > self.book_max_age:
+            return None
+        key = (exchange, asset, order_type)
+        side = self._sides.get(key)
+        if side is None:
+            prices, qtys = (book[3], book[4]) if order_type == "buy" else (book[1], book[2])
+            side = self._sides[key] = BookSide(np.column_stack((prices, qtys)).astype(DTYPE).reshape(-1, 2))
+        return side
+
+    def _liquidity(self, asset: str, exchange: str, db=None) -> bool:
+        """Аналог check_liquidity: обе стороны стакана не пусты."""
+        bids, asks = self._side(exchange, asset, "sell"), self._side(exchange, asset, "buy")
+        return bids is not None and asks is not None and len(bids) > 0 and len(asks) > 0
+
+    def _impacts(self, db, exchange: str, asset: str, order_type: str) -> np.ndarray:
+        """Аналог estimate_price_impacts по записанному стакану (100.0 — нет данных)."""
+        side = self._side(exchange, asset, order_type)
+        if side is None:
+            return np.full(len(arbitrage.TRADE_SIZES_USDT), 100.0)
+        return np.nan_to_num(side.impacts(arbitrage.TRADE_SIZES_USDT, order_type), nan=100.0)
+
+    def _execute(self, signal):
+        """💱 Покупка size_usdt по asks биржи покупки и продажа того же объёма по bids биржи продажи."""
+        asks = self._side(signal.buy_exchange, signal.asset, "buy")
+        bids = self._side(signal.sell_exchange, signal.asset, "sell")
+        if asks is None or bids is None or not len(asks) or not len(bids):
+            self.missed += 1
+            return
+        buy_price, spent = fill_price(asks, signal.size_usdt, "buy")
+        if buy_price is None:
+            self.missed += 1
+            return
+        sell_price, sold = fill_price(bids, spent / buy_price * float(bids.prices[0]), "sell")
+        if sell_price is None:
+            self.missed += 1
+            return
+        qty = min(spent / buy_price, sold / sell_price)   # неисполненный остаток не хеджирован — не берём
+        buy_fee = self.fees.get(signal.buy_exchange, DEFAULT_TAKER_FEE) / 100
+        sell_fee = self.fees.get(signal.sell_exchange, DEFAULT_TAKER_FEE) / 100
+        cost = qty * buy_price * (1 + buy_fee)
+        pnl = qty * sell_price * (1 - sell_fee) - cost
+        self.fills.append(Fill(self.clock, signal.asset, signal.buy_exchange, signal.sell_exchange,
+                               qty, buy_price, sell_price, cost, pnl))
+
+    # --- Проигрывание ---
+
+    def replay(self, ticks, books=()):
+        """
+        ▶️ ticks — (exchange, asset, price, ts), books — (exchange, asset, ts, bid_price, bid_qty, ask_price, ask_qty),
+        оба по возрастанию ts. При равном ts стакан применяется раньше тика.
+        """
+        started = time.perf_counter()
+        events = heapq.merge(((book[2], 0, book) for book in books), ((tick[3], 1, tick) for tick in ticks))
+        for _, kind, event in events:
+            if kind:
+                self.on_tick(*event)
+            else:
+                self.on_book(*event)
+        self.wall += time.perf_counter() - started
+        return self
+
+    def finish(self):
+        """⏹️ Доигрывает отложенные пересчёты и исполнения после последнего события."""
+        if self.clock is not None:
+            last = self.clock
+            self._advance(last + self.debounce + self.latency)
+            self.clock = last
+        return self
+
+    def run(self, reader: ArchiveReader, start: float = None, end: float = None, exchanges=None, assets=None):
+        """🗄️ Проигрывает архив по суткам: раздел читается из mmap, сортируется и отдаётся пачками."""
+        first = datetime.fromtimestamp(start, timezone.utc).strftime("%Y-%m-%d") if start is not None else None
+        last = datetime.fromtimestamp(end, timezone.utc).strftime("%Y-%m-%d") if end is not None else None
+        for day in reader.days("ticks"):
+            if (first and day < first) or (last and day > last):
+                continue
+            day_start = datetime.strptime(day, "%Y-%m-%d").replace(tzinfo=timezone.utc).timestamp()
+            window = (max(day_start, start or day_start), min(day_start + 86400, end or day_start + 86400))
+            ticks = reader.scan("ticks", *window, exchanges, assets, ["exchange", "asset", "price", "ts"])
+            books = reader.scan("books", *window, exchanges, assets,
+                                ["exchange", "asset", "ts", "bid_price", "bid_qty", "ask_price", "ask_qty"])
+            self.replay(_rows(ticks.sort_by("ts")), _rows(books.sort_by("ts")))
+            logging.info(f"🎞️ Бэктест {day}: {ticks.num_rows} тиков, {books.num_rows} стаканов")
+        return self.finish()
+
+    def stats(self) -> dict:
+        pnl = [fill.pnl_usdt for fill in self.fills]
+        simulated = (self.clock - self.first_ts) if self.first_ts is not None else 0.0
+        return {
+            "ticks": self.ticks,
+            "books": self.books,
+            "evaluations": self.evaluations,
+            "candidates": self.candidates,
+            "rejected": dict(self.rejected),
+            "signals": len(self.signals),
+            "fills": len(self.fills),
+            "cooldown_skipped": self.cooled,
+            "missed_fills": self.missed,
+            "pnl_usdt": round(sum(pnl), 4),
+            "win_rate": round(sum(p > 0 for p in pnl) / len(pnl), 3) if pnl else 0.0,
+            "simulated_s": round(simulated, 3),
+            "wall_s": round(self.wall, 3),
+            "ticks_per_s": round(self.ticks / self.wall) if self.wall else 0,
+            "speedup": round(simulated / self.wall, 1) if self.wall else 0.0,
+        }
+
+
+def _rows(table):
+    """Строки таблицы Arrow кортежами; в Python-объекты превращается по CHUNK_ROWS строк."""
+    for offset in range(0, table.num_rows, CHUNK_ROWS):
+        chunk = table.slice(offset, CHUNK_ROWS)
+        yield from zip(*(column.to_pylist() for column in chunk.columns))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Бэктест поиска арбитража на архиве тиков и стаканов")
+    parser.add_argument("--root", default=ARCHIVE_DIR)
+    parser.add_argument("--start", type=datetime.fromisoformat, help="UTC, например 2026-01-01T00:00")
+    parser.add_argument("--end", type=datetime.fromisoformat)
+    parser.add_argument("--assets", nargs="*")
+    parser.add_argument("--exchanges", nargs="*")
+    parser.add_argument("--min-spread", type=float)
+    parser.add_argument("--latency-ms", type=float, default=EXECUTION_LATENCY_MS)
+    args = parser.parse_args()
+    utc = lambda value: value.replace(tzinfo=timezone.utc).timestamp() if value else None
+    backtest = Backtest(min_spread=args.min_spread, latency_ms=args.latency_ms)
+    backtest.run(ArchiveReader(args.root), utc(args.start), utc(args.end), args.exchanges, args.assets)
+    for name, value in backtest.stats().items():
+        print(f"🎞️ {name}: {value}")
@@ -0,0 +1,79 @@
+import time
+from backend.core.exchange_adapters import ADAPTERS
+from backend.core.sample_payloads import REST_TICKERS, REST_ORDERBOOKS, WS_FRAMES
+
+# 📊 Микробенчмарк разбора тикеров: старая цепочка if/elif против реестра адаптеров
+REPEAT = 500       # во сколько раз размножаем записанные тикеры
+ITERATIONS = 20
+
+
+def legacy_parse(exchange_name, prices):
+    """Старый разбор из price_updater.fetch_prices (цепочка if/elif на каждый тикер)."""
+    result = []
+    for ticker in prices:
+        if exchange_name == "Binance":
+            symbol, price = ticker["symbol"], float(ticker["price"])
+        elif exchange_name == "Bybit":
+            symbol, price = ticker["symbol"], float(ticker["lastPrice"])
+        elif exchange_name == "Bitget":
+            symbol, price = ticker["symbol"], float(ticker["lastPr"])
+        elif exchange_name == "Gateio":
+            symbol, price = ticker["currency_pair"].replace("_", "").upper(), float(ticker["last"])
+        elif exchange_name == "HTX":
+            symbol, price = ticker["symbol"].upper(), float(ticker["close"])
+        elif exchange_name == "KuCoin":
+            symbol, price = ticker["symbol"].replace("-", "").upper(), float(ticker["last"])
+        elif exchange_name == "MEXC":
+            symbol, price = ticker["symbol"].upper(), float(ticker["price"])
+        elif exchange_name == "OKX":
+            symbol, price = ticker["instId"].replace("-", "").upper(), float(ticker["last"])
+        elif exchange_name == "Poloniex":
+            symbol, price = ticker.get("symbol", "").replace("_", "").upper(), float(ticker.get("price", 0))
+        else:
+            continue
+        result.append((symbol, price))
+    return result
+
+
+def scaled_payload(exchange, data):
+    """Размножает список тикеров внутри записанного ответа биржи."""
+    tickers = ADAPTERS[exchange]._extract_tickers(data)
+    scaled = tickers * REPEAT
+    if isinstance(data, list):
+        return scaled, scaled
+    if exchange == "Bybit":
+        return {"result": {"list": scaled}}, scaled
+    if exchange == "KuCoin":
+        return {"data": {"ticker": scaled}}, scaled
+    return {"data": scaled}, scaled
+
+
+def timed(fn, *args):
+    started = time.perf_counter()
+    for _ in range(ITERATIONS):
+        fn(*args)
+    return (time.perf_counter() - started) / ITERATIONS
+
+
+if __name__ == "__main__":
+    total_legacy = total_registry = 0.0
+    total_tickers = 0
+    print(f"{'Биржа':<10} {'тикеров':>8} {'if/elif, мс':>12} {'реестр, мс':>11}")
+    for exchange, data in REST_TICKERS.items():
+        payload, tickers = scaled_payload(exchange, data)
+        adapter = ADAPTERS[exchange]
+        assert adapter.parse_tickers(payload) == legacy_parse(exchange, tickers)
+
+        legacy = timed(legacy_parse, exchange, tickers)
+        registry = timed(adapter.parse_tickers, payload)
+        total_legacy += legacy
+        total_registry += registry
+        total_tickers += len(tickers)
+        print(f"{exchange:<10} {len(tickers):>8} {legacy * 1000:>12.2f} {registry * 1000:>11.2f}")
+
+    print(f"⚡ Всего {total_tickers} тикеров: {total_tickers / total_legacy:,.0f} -> "
+          f"{total_tickers / total_registry:,.0f} тикеров/с")
+
+    ws_time = timed(lambda: [ADAPTERS[e].parse_ws(f) for e, f in WS_FRAMES.items()])
+    book_time = timed(lambda: [ADAPTERS[e].parse_orderbook(b) for e, b in REST_ORDERBOOKS.items()])
+    print(f"📡 WS-кадры 9 бирж: {ws_time * 1e6:.1f} мкс | 📚 стаканы 9 бирж: {book_time * 1e6:.1f} мкс")
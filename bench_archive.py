@@ -0,0 +1,76 @@
+import asyncio
+import os
+import random
+import shutil
+import tempfile
+import time
+from backend.core.archive import Archiver, ArchiveReader
+from backend.database.orderbook_codec import encode_levels
+
+# 📊 Архив: скорость записи, байт на тик / снапшот стакана и скорость чтения (mmap) по видам сжатия.
+# Для сравнения — строка InnoDB в истории тиков ~ 60–80 байт с индексом; размер BLOB стакана (orderbook_codec)
+# в order_books считается ниже на тех же данных.
+EXCHANGES = ("Binance", "Bybit", "OKX", "Gateio", "KuCoin", "HTX", "MEXC", "Bitget", "Poloniex")
+ASSETS = 500
+TICKS = 2_000_000
+BOOKS = 50_000
+DEPTH = 20
+T0 = 1767225600.0  # 2026-01-01 UTC
+
+
+def make_ticks():
+    prices = {}
+    ticks = []
+    for i in range(TICKS):
+        exchange, asset = random.choice(EXCHANGES), f"COIN{random.randrange(ASSETS)}USDT"
+        price = prices[(exchange, asset)] = round(prices.get((exchange, asset), 100.0) * random.uniform(0.999, 1.001), 4)
+        ticks.append((exchange, asset, price, T0 + i * 0.02))
+    return ticks
+
+
+def make_book():
+    mid = random.uniform(1, 1000)
+    return ([(round(mid - i * 0.01, 2), round(random.uniform(0.1, 10), 3)) for i in range(DEPTH)],
+            [(round(mid + (i + 1) * 0.01, 2), round(random.uniform(0.1, 10), 3)) for i in range(DEPTH)])
+
+
+def disk_size(path: str) -> int:
+    return sum(os.path.getsize(os.path.join(d, f)) for d, _, files in os.walk(path) for f in files)
+
+
+async def write(root: str, compression, ticks, books):
+    archiver = Archiver(root, compression=compression)
+    started = time.perf_counter()
+    for start in range(0, len(ticks), 100_000):   # как фоновый сброс: пачками
+        for tick in ticks[start:start + 100_000]:
+            archiver.record(*tick)
+        await archiver.flush()
+    archiver._books = books
+    await archiver.close()
+    return time.perf_counter() - started
+
+
+if __name__ == "__main__":
+    ticks = make_ticks()
+    books = [(random.choice(EXCHANGES), f"COIN{random.randrange(ASSETS)}USDT", T0 + i, *make_book())
+             for i in range(BOOKS)]
+    blob = sum(len(encode_levels(bids)) + len(encode_levels(asks)) for _, _, _, bids, asks in books[:1000]) / 1000
+    print(f"📊 {TICKS:,} тиков ({len(EXCHANGES)} бирж × {ASSETS} активов), {BOOKS:,} снапшотов стаканов "
+          f"по {DEPTH} уровней; BLOB стакана в MySQL — {blob:.0f} байт")
+    for compression in ("zstd", "lz4", None):
+        root = tempfile.mkdtemp()
+        try:
+            seconds = asyncio.run(write(root, compression, list(ticks), list(books)))
+            tick_bytes, book_bytes = disk_size(os.path.join(root, "ticks")), disk_size(os.path.join(root, "books"))
+            reader = ArchiveReader(root)
+            started = time.perf_counter()
+            total = reader.scan("ticks", columns=["price"]).num_rows
+            full = time.perf_counter() - started
+            started = time.perf_counter()
+            one = reader.scan("ticks", exchanges=["Binance"], assets=["COIN7USDT"], start=T0 + 3600, end=T0 + 7200)
+            filtered = time.perf_counter() - started
+            print(f"{str(compression):>5}: запись {TICKS / seconds:9,.0f} тиков/с, {tick_bytes / TICKS:5.1f} байт/тик, "
+                  f"{book_bytes / BOOKS:6.1f} байт/стакан; полный скан {total / full:12,.0f} строк/с, "
+                  f"1 пара × 1 ч — {filtered * 1000:6.1f} мс ({one.num_rows} строк)")
+        finally:
+            shutil.rmtree(root)
@@ -0,0 +1,70 @@
+import asyncio
+import random
+import shutil
+import tempfile
+import time
+from backend.core.archive import Archiver, ArchiveReader
+from backend.core.backtest import Backtest
+
+# 📊 Бэктест: скорость проигрывания архива (тиков/с) и сколько займут сутки записанных данных.
+# 9 бирж × 500 активов, тик раз в 20 мс (4.3 млн тиков в сутки), снапшоты стаканов раз в BOOK_INTERVAL по 50 парам;
+# изредка одна биржа уходит от остальных на несколько процентов — сигналы, отказы и сделки тоже в замере.
+EXCHANGES = ("Binance", "Bybit", "OKX", "Gateio", "KuCoin", "HTX", "MEXC", "Bitget", "Poloniex")
+ASSETS = 500
+TICKS = 1_000_000
+TICK_INTERVAL = 0.02
+BOOK_PAIRS = 50
+BOOK_INTERVAL = 10
+DAY_TICKS = 86400 / TICK_INTERVAL
+T0 = 1767225600.0  # 2026-01-01 UTC
+
+
+random.seed(7)
+BASE = {f"COIN{i}USDT": random.uniform(0.1, 1000) for i in range(ASSETS)}
+
+
+def make_ticks():
+    for i in range(TICKS):
+        asset = f"COIN{random.randrange(ASSETS)}USDT"
+        noise = random.uniform(0.95, 1.06) if random.random() < 0.001 else random.uniform(0.999, 1.001)
+        yield random.choice(EXCHANGES), asset, BASE[asset] * noise, T0 + i * TICK_INTERVAL
+
+
+def make_books():
+    random.seed(8)
+    assets = [f"COIN{i}USDT" for i in random.sample(range(ASSETS), BOOK_PAIRS // len(EXCHANGES) + 1)]
+    pairs = [(exchange, asset) for asset in assets for exchange in EXCHANGES][:BOOK_PAIRS]
+    for second in range(0, int(TICKS * TICK_INTERVAL), BOOK_INTERVAL):
+        for exchange, asset in pairs:
+            mid = BASE[asset] * random.uniform(0.999, 1.001)
+            bids = [(mid * (1 - i * 0.0005), random.uniform(1, 50)) for i in range(20)]
+            asks = [(mid * (1 + i * 0.0005), random.uniform(1, 50)) for i in range(20)]
+            yield exchange, asset, T0 + second, bids, asks
+
+
+async def write(root: str):
+    archiver = Archiver(root)
+    for n, tick in enumerate(make_ticks()):
+        archiver.record(*tick)
+        if n % 200_000 == 0:
+            await archiver.flush()
+    archiver._books = list(make_books())
+    await archiver.close()
+
+
+if __name__ == "__main__":
+    root = tempfile.mkdtemp()
+    try:
+        asyncio.run(write(root))
+        started = time.perf_counter()
+        backtest = Backtest().run(ArchiveReader(root))
+        total = time.perf_counter() - started
+        stats = backtest.stats()
+        print(f"📊 {stats['ticks']:,} тиков и {stats['books']:,} стаканов ({stats['simulated_s'] / 3600:.1f} ч рынка) "
+              f"за {total:.1f} с вместе с чтением архива")
+        print(f"⚡ Конвейер: {stats['ticks_per_s']:,} тиков/с, ускорение ×{stats['speedup']:,.0f} к реальному времени")
+        print(f"🗓️ Сутки ({DAY_TICKS / 1e6:.1f} млн тиков) ≈ {DAY_TICKS / (stats['ticks'] / total) / 60:.1f} мин")
+        print(f"🔎 Пересчётов {stats['evaluations']:,}, кандидатов {stats['candidates']}, отказы {stats['rejected']}, "
+              f"сигналов {stats['signals']}, сделок {stats['fills']}, PnL {stats['pnl_usdt']} USDT")
+    finally:
+        shutil.rmtree(root)
@@ -0,0 +1,121 @@
+import asyncio
+import os
+import random
+import sqlite3
+import tempfile
+import threading
+import time
+from datetime import datetime
+import numpy as np
+from sqlalchemy import create_engine # type: ignore
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker # type: ignore
+from sqlalchemy.orm import sessionmaker # type: ignore
+from backend.database.db_upsert import bulk_upsert, bulk_upsert_async
+from backend.database.models import Base, Price
+
+# 📊 Остановка event loop на записи в БД: синхронный bulk_upsert прямо в корутине (как было во flush стора
+# и в update_prices) против bulk_upsert_async через aiosqlite.
+# Пульс — задача, которая каждую миллисекунду просыпается и меряет опоздание: так же опаздывало бы
+# чтение вебсокетов. Медленный ответ БД моделирует соседнее соединение, которое периодически держит
+# блокировку записи (как долгая транзакция или нагруженный MySQL): writer ждёт её освобождения.
+PAIRS = 3000
+FLUSH_ROWS = 300           # изменившихся цен за один сброс
+FLUSH_INTERVAL = 0.1       # сек
+LOCK_HOLD = 0.08           # сколько соседняя транзакция держит блокировку (сек)
+LOCK_EVERY = 0.3           # как часто она это делает (сек)
+TICK = 0.001               # период пульса (сек)
+DURATION = 6
+
+
+def make_rows(now):
+    return [{"exchange": f"EX{i % 9}", "asset": f"COIN{i // 9}USDT", "price": random.uniform(1, 100),
+             "timestamp": now} for i in random.sample(range(PAIRS), FLUSH_ROWS)]
+
+
+def slow_neighbour(path: str, stop: threading.Event):
+    conn = sqlite3.connect(path, isolation_level=None)
+    while not stop.wait(LOCK_EVERY - LOCK_HOLD):
+        conn.execute("BEGIN IMMEDIATE")
+        time.sleep(LOCK_HOLD)
+        conn.execute("COMMIT")
+    conn.close()
+
+
+async def heartbeat(lags: list, deadline: float):
+    while time.perf_counter() < deadline:
+        expected = time.perf_counter() + TICK
+        await asyncio.sleep(TICK)
+        lags.append(max(0.0, time.perf_counter() - expected))
+
+
+async def sync_writer(path: str, deadline: float) -> int:
+    Session = sessionmaker(bind=create_engine(f"sqlite:///{path}"))
+    flushes = 0
+    while time.perf_counter() < deadline:
+        db = Session()
+        try:
+            bulk_upsert(db, Price, make_rows(datetime.utcnow()), keys=("exchange", "asset"))
+            db.commit()
+        finally:
+            db.close()
+        flushes += 1
+        await asyncio.sleep(FLUSH_INTERVAL)
+    return flushes
+
+
+async def async_writer(path: str, deadline: float) -> int:
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    Session = async_sessionmaker(engine, expire_on_commit=False)
+    flushes = 0
+    while time.perf_counter() < deadline:
+        async with Session() as db:
+            await bulk_upsert_async(db, Price, make_rows(datetime.utcnow()), keys=("exchange", "asset"))
+            await db.commit()
+        flushes += 1
+        await asyncio.sleep(FLUSH_INTERVAL)
+    await engine.dispose()
+    return flushes
+
+
+async def idle_writer(path: str, deadline: float) -> int:
+    await asyncio.sleep(deadline - time.perf_counter())
+    return 0
+
+
+async def measure(writer, path: str):
+    lags = []
+    stop = threading.Event()
+    neighbour = threading.Thread(target=slow_neighbour, args=(path, stop))
+    neighbour.start()
+    try:
+        deadline = time.perf_counter() + DURATION
+        _, flushes = await asyncio.gather(heartbeat(lags, deadline), writer(path, deadline))
+    finally:
+        stop.set()
+        neighbour.join()
+    return np.array(lags) * 1000, flushes
+
+
+def report(name: str, lags, flushes: int):
+    stalled = lags[lags > 5].sum() / 1000
+    print(f"{name:>18}: {flushes:3d} сбросов, опоздание пульса p50 {np.percentile(lags, 50):5.2f} / "
+          f"p99 {np.percentile(lags, 99):6.2f} / макс. {lags.max():6.2f} мс, "
+          f"loop стоял (>5 мс) {stalled / DURATION * 100:5.1f}% времени")
+
+
+if __name__ == "__main__":
+    path = os.path.join(tempfile.mkdtemp(), "stall.db")
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine)
+    with Session() as db:
+        db.bulk_insert_mappings(Price, [{"exchange": f"EX{i % 9}", "asset": f"COIN{i // 9}USDT", "price": 1.0,
+                                         "timestamp": datetime.utcnow()} for i in range(PAIRS)])
+        db.commit()
+
+    print(f"📊 {FLUSH_ROWS} строк upsert каждые {FLUSH_INTERVAL * 1000:.0f} мс, соседняя транзакция держит "
+          f"блокировку {LOCK_HOLD * 1000:.0f} мс из каждых {LOCK_EVERY * 1000:.0f}, пульс {TICK * 1000:.0f} мс, "
+          f"{DURATION} с")
+    report("без записи", *asyncio.run(measure(idle_writer, path)))
+    report("sync bulk_upsert", *asyncio.run(measure(sync_writer, path)))
+    report("bulk_upsert_async", *asyncio.run(measure(async_writer, path)))
@@ -0,0 +1,98 @@
+import asyncio
+import gzip
+import json
+import time
+from backend.core.exchange_adapters import ADAPTERS
+from backend.core.frame_decoder import FrameDecoder, decode_frame, extract_binance_tickers, orjson
+from backend.core.websocket_price_updater import price_parser
+from backend.core.sample_payloads import WS_FRAMES, make_binance_ticker_arr
+
+# 📊 Бенчмарк декодирования WS-кадров: json в event loop против orjson / выборочного извлечения / пулов
+ITERATIONS = 2000
+BINANCE_TICKERS = 2000   # полный !ticker@arr — сотни КБ
+LOOP_FRAMES = 100
+
+
+def dumps(data) -> str:
+    return json.dumps(data, separators=(",", ":"))
+
+
+def recorded_frames() -> dict:
+    frames = {exchange: dumps(frame) for exchange, frame in WS_FRAMES.items()}
+    frames["Binance"] = dumps(make_binance_ticker_arr(BINANCE_TICKERS))
+    frames["HTX"] = gzip.compress(frames["HTX"].encode())
+    return frames
+
+
+def legacy_decode(message):
+    """Старый путь: gzip и json.loads прямо в обработчике."""
+    if isinstance(message, bytes):
+        message = gzip.decompress(message).decode("utf-8")
+    return json.loads(message)
+
+
+def timed(fn, frame, iterations):
+    started = time.perf_counter()
+    for _ in range(iterations):
+        result = fn(frame)
+    return (time.perf_counter() - started) / iterations, result
+
+
+async def loop_lag(decoder, frames) -> tuple:
+    """Прогоняет кадры через декодер и параллельно меряет, насколько опаздывает 1-мс таймер event loop."""
+    lags = []
+    done = asyncio.Event()
+
+    async def ticker():
+        while not done.is_set():
+            started = time.perf_counter()
+            await asyncio.sleep(0.001)
+            lags.append(time.perf_counter() - started - 0.001)
+
+    probe = asyncio.create_task(ticker())
+    started = time.perf_counter()
+    for frame in frames:
+        data = decoder(frame)
+        if asyncio.iscoroutine(data):
+            await data
+        await asyncio.sleep(0)  # как между двумя сообщениями сокета
+    elapsed = time.perf_counter() - started
+    done.set()
+    await probe
+    return elapsed, sum(lags) / len(lags) if lags else 0.0, max(lags) if lags else 0.0
+
+
+if __name__ == "__main__":
+    frames = recorded_frames()
+    print(f"orjson: {'есть' if orjson else 'нет (json)'}")
+    print(f"{'биржа':>9} | {'кадр, байт':>10} | {'json, мкс':>10} | {'декодер, мкс':>12} | {'извлечение, мкс':>15}")
+    for exchange, frame in frames.items():
+        iterations = 50 if exchange == "Binance" else ITERATIONS
+        adapter = ADAPTERS[exchange]
+        parse = price_parser(exchange)
+
+        legacy_time, legacy_result = timed(lambda f: adapter.parse_ws(legacy_decode(f)), frame, iterations)
+        new_time, new_result = timed(lambda f: parse(decode_frame(f)), frame, iterations)
+        assert [item for _, item in new_result] == legacy_result, exchange
+        extract_column = ""
+        if exchange == "Binance":
+            extract_time, extracted = timed(lambda f: parse(decode_frame(f, extract_binance_tickers)), frame, iterations)
+            assert extracted == new_result
+            extract_column = f"{extract_time * 1e6:>15.1f}"
+        print(f"{exchange:>9} | {len(frame):>10} | {legacy_time * 1e6:>10.1f} | {new_time * 1e6:>12.1f} | {extract_column}")
+
+    print(f"\n⏱️ Блокировка event loop: {LOOP_FRAMES} кадров Binance !ticker@arr + {LOOP_FRAMES} gzip-кадров HTX")
+    heavy = [frames["Binance"], frames["HTX"]] * LOOP_FRAMES
+    variants = [
+        ("json в loop", legacy_decode),
+        ("декодер в loop", FrameDecoder()),
+        ("извлечение в loop", FrameDecoder(extract=extract_binance_tickers)),
+        ("декодер + threads", FrameDecoder(offload="thread")),
+        ("декодер + processes", FrameDecoder(offload="process")),
+    ]
+    for name, decoder in variants:
+        if isinstance(decoder, FrameDecoder) and decoder.pool is not None:
+            asyncio.run(loop_lag(decoder, heavy[:4]))  # прогрев пула
+        elapsed, avg_lag, max_lag = asyncio.run(loop_lag(decoder, heavy))
+        print(f"{name:>20}: {len(heavy) / elapsed:8.0f} кадров/с, задержка таймера "
+              f"ср. {avg_lag * 1000:5.2f} / макс. {max_lag * 1000:6.2f} мс")
@@ -0,0 +1,68 @@
+import ast
+import time
+from backend.database.orderbook_codec import encode_levels, decode_levels, BookSide
+from backend.core.sample_payloads import make_levels
+
+# 📊 Бенчмарк хранения стакана: Text + ast.literal_eval против упакованных float64
+DEPTHS = (50, 500)
+ITERATIONS = 2000
+AMOUNT_USDT = 100
+BATCH_SIZES_USDT = (100, 500, 1000, 5000)
+
+
+def legacy_impact(side, order_type, amount_usdt):
+    """Старый цикл estimate_price_impact по уровням (только покупка)."""
+    total_cost = 0.0
+    acquired = 0.0
+    for price_str, qty_str in side:
+        price = float(price_str)
+        qty = float(qty_str)
+        max_buy = qty * price
+        if total_cost + max_buy < amount_usdt:
+            total_cost += max_buy
+            acquired += qty
+        else:
+            acquired += (amount_usdt - total_cost) / price
+            total_cost = amount_usdt
+            break
+    market_price = float(side[0][0])
+    return (total_cost / acquired - market_price) / market_price * 100
+
+
+def timed(fn, *args):
+    started = time.perf_counter()
+    for _ in range(ITERATIONS):
+        result = fn(*args)
+    return (time.perf_counter() - started) / ITERATIONS * 1e6, result
+
+
+if __name__ == "__main__":
+    print(f"{'глубина':>7} | {'Text, байт':>10} {'BLOB, байт':>10} | {'encode Text/BLOB, мкс':>22} | "
+          f"{'decode Text/BLOB, мкс':>22} | {'impact старый/новый, мкс':>25}")
+    batches = []
+    for depth in DEPTHS:
+        levels = [(float(p), float(q)) for p, q in make_levels(100.0, depth)]
+
+        text_encode, text_blob = timed(str, levels)
+        bin_encode, bin_blob = timed(encode_levels, levels)
+        text_decode, text_side = timed(ast.literal_eval, text_blob)
+        bin_decode, bin_side = timed(decode_levels, bin_blob)
+
+        amount = AMOUNT_USDT * depth  # чтобы ордер проходил вглубь стакана
+        legacy_time, legacy_value = timed(lambda: legacy_impact(ast.literal_eval(text_blob), "buy", amount))
+        new_time, new_value = timed(lambda: BookSide(decode_levels(bin_blob)).impact(amount, "buy"))
+        assert abs(legacy_value - new_value) < 1e-9
+        side = BookSide(decode_levels(bin_blob))
+        legacy_side = ast.literal_eval(text_blob)
+        sizes = [size * depth / 50 for size in BATCH_SIZES_USDT]
+        legacy_batch, legacy_values = timed(lambda: [legacy_impact(legacy_side, "buy", a) for a in sizes])
+        batch_time, batch_values = timed(side.impacts, sizes, "buy")
+        assert max(abs(x - y) for x, y in zip(legacy_values, batch_values)) < 1e-9
+        batches.append((depth, legacy_batch, batch_time))
+
+        print(f"{depth:>7} | {len(text_blob):>10} {len(bin_blob):>10} | {text_encode:>10.1f} / {bin_encode:<9.1f} | "
+              f"{text_decode:>10.1f} / {bin_decode:<9.1f} | {legacy_time:>11.1f} / {new_time:<11.1f}")
+
+    print(f"📏 Пакет размеров {BATCH_SIZES_USDT} USDT (×глубина/50) по готовому стакану (обход уровней / cum-индекс):")
+    for depth, legacy_batch, batch_time in batches:
+        print(f"{depth:>7} | {legacy_batch:>8.1f} / {batch_time:.1f} мкс")
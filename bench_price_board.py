@@ -0,0 +1,79 @@
+import multiprocessing
+import os
+import random
+import tempfile
+import time
+from datetime import datetime
+from sqlalchemy import create_engine # type: ignore
+from sqlalchemy.orm import sessionmaker # type: ignore
+from backend.core.price_board import PriceBoard
+from backend.database.models import Base, Price
+from backend.database.db_upsert import bulk_upsert
+
+# 📊 Бенчмарк доски цен: чтение последних цен из таблицы prices (SQLite в памяти) против mmap-доски
+N_PAIRS = 5000
+LOOKUPS = 20000
+SNAPSHOTS = 50
+WRITER_SECONDS = 2
+
+
+def pairs():
+    return [(exchange, f"COIN{i}USDT") for i in range(N_PAIRS // 5)
+            for exchange in ("Binance", "Bybit", "OKX", "Gateio", "KuCoin")]
+
+
+def timed(fn, iterations):
+    started = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - started) / iterations
+
+
+def hammer(path, keys, seconds):
+    """Писатель в отдельном процессе: случайные тики, пока читатель меряет."""
+    board = PriceBoard(path, writer=True)
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        exchange, symbol = random.choice(keys)
+        price = random.uniform(1, 100)
+        board.write(exchange, symbol, price, price)
+
+
+if __name__ == "__main__":
+    keys = pairs()
+    path = os.path.join(tempfile.mkdtemp(), "prices.board")
+    board = PriceBoard(path, writer=True)
+    now = time.time()
+
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    bulk_upsert(db, Price, [{"exchange": e, "asset": s, "price": 1.0, "timestamp": datetime.utcnow()}
+                            for e, s in keys], keys=("exchange", "asset"))
+    db.commit()
+
+    write = timed(lambda: board.write(*random.choice(keys), random.uniform(1, 100), now), LOOKUPS * 5)
+    reader = PriceBoard(path)
+    lookup = lambda: reader.get(*random.choice(keys))
+    db_lookup = lambda: db.query(Price.price).filter(Price.exchange == "OKX", Price.asset == "COIN7USDT").first()
+    print(f"📊 {N_PAIRS} пар (биржа, символ)")
+    print(f"{'запись тика на доску':>32}: {write * 1e6:8.2f} мкс")
+    print(f"{'цена пары: SELECT по ключу':>32}: {timed(db_lookup, LOOKUPS // 20) * 1e6:8.2f} мкс")
+    print(f"{'цена пары: доска':>32}: {timed(lookup, LOOKUPS) * 1e6:8.2f} мкс")
+    print(f"{'все цены: SELECT * FROM prices':>32}: "
+          f"{timed(lambda: db.query(Price.exchange, Price.asset, Price.price).all(), SNAPSHOTS) * 1e3:8.2f} мс")
+    print(f"{'все цены: snapshot() доски':>32}: {timed(reader.snapshot, SNAPSHOTS) * 1e3:8.2f} мс")
+    print(f"{'все цены: rows() доски':>32}: {timed(reader.rows, SNAPSHOTS) * 1e3:8.2f} мс")
+
+    # ✍️ Чтение под непрерывной записью из другого процесса: ни одного рваного значения, считаем повторы
+    board.close()
+    writer = multiprocessing.get_context("fork").Process(target=hammer, args=(path, keys, WRITER_SECONDS))
+    writer.start()
+    reads = 0
+    while writer.is_alive():
+        for exchange, symbol in keys[:100]:
+            price, ts = reader.get(exchange, symbol)
+            assert price == ts or ts == now
+            reads += 1
+    writer.join()
+    print(f"\n✍️ Чтение под записью: {reads / WRITER_SECONDS:,.0f} чтений/с, повторов seqlock: {reader.retries}")
@@ -0,0 +1,90 @@
+import os
+import tempfile
+import time
+from datetime import datetime
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine # type: ignore
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker # type: ignore
+from sqlalchemy.orm import Session, sessionmaker # type: ignore
+from sqlalchemy.pool import NullPool # type: ignore
+from backend.core import read_api
+from backend.database.db_connector import get_db, get_async_db
+from backend.database.models import Base, Price, ArbitrageSignal
+
+# 📊 Бенчмарк API чтения: старый GET /prices (все ORM-объекты) против страницы, кэша и 304 (SQLite во временном файле)
+N_PRICES = 5000
+N_SIGNALS = 2000
+REQUESTS = 50
+
+
+def make_app():
+    path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    SessionLocal = sessionmaker(bind=engine)
+    db = SessionLocal()
+    now = datetime.utcnow()
+    db.bulk_insert_mappings(Price, [{"exchange": f"EX{i % 9}", "asset": f"COIN{i // 9}USDT", "price": 1.0 + i,
+                                     "timestamp": now} for i in range(N_PRICES)])
+    db.bulk_insert_mappings(ArbitrageSignal, [
+        {"asset": f"COIN{i}USDT", "buy_exchange": "EX0", "sell_exchange": "EX1", "buy_price": 1.0,
+         "sell_price": 1.01, "spread": (i % 500) / 100, "size_usdt": 100.0, "type": "межбиржевой", "timestamp": now}
+        for i in range(N_SIGNALS)])
+    db.commit()
+    AsyncSessionLocal = async_sessionmaker(create_async_engine(f"sqlite+aiosqlite:///{path}", poolclass=NullPool))
+
+    async def async_session():
+        async with AsyncSessionLocal() as s:
+            yield s
+
+    def session():
+        s = SessionLocal()
+        try:
+            yield s
+        finally:
+            s.close()
+
+    app = FastAPI()
+
+    @app.get("/legacy/prices")
+    def legacy_prices(db: Session = Depends(get_db)):
+        """Старый обработчик: вся таблица ORM-объектами через jsonable_encoder."""
+        return {"data": db.query(Price).all()}
+
+    app.include_router(read_api.router)
+    app.dependency_overrides[get_db] = session
+    app.dependency_overrides[get_async_db] = async_session
+    read_api.get_board = lambda: None
+    return TestClient(app)
+
+
+def timed(client, url, params=None, headers=None, no_cache=False):
+    started = time.perf_counter()
+    for _ in range(REQUESTS):
+        if no_cache:
+            read_api.cache._entries.clear()
+        response = client.get(url, params=params, headers=headers)
+    return (time.perf_counter() - started) / REQUESTS * 1000, len(response.content), response.status_code
+
+
+if __name__ == "__main__":
+    client = make_app()
+    etag = client.get("/prices", params={"limit": 100}).headers["etag"]
+    deep = client.get("/prices", params={"limit": 100, "sort": "-price"})
+    for _ in range(20):
+        deep = client.get("/prices", params={"limit": 100, "sort": "-price", "cursor": deep.json()["next_cursor"]})
+    cases = [
+        ("GET /prices, вся таблица (старый)", "/legacy/prices", None, None, True),
+        ("GET /prices?limit=100, без кэша", "/prices", {"limit": 100}, None, True),
+        ("  то же, 21-я страница по -price", "/prices", {"limit": 100, "sort": "-price",
+                                                       "cursor": deep.json()["next_cursor"]}, None, True),
+        ("  то же, попадание в кэш", "/prices", {"limit": 100}, None, False),
+        ("  то же, If-None-Match -> 304", "/prices", {"limit": 100}, {"If-None-Match": etag}, False),
+        ("GET /arbitrage?min_spread=4, без кэша", "/arbitrage", {"min_spread": 4, "fields": "asset,spread"}, None,
+         True),
+    ]
+    print(f"📊 {N_PRICES} цен, {N_SIGNALS} сигналов, {REQUESTS} запросов на вариант")
+    for name, url, params, headers, no_cache in cases:
+        ms, size, status = timed(client, url, params, headers, no_cache)
+        print(f"{name:>38}: {ms:7.2f} мс, {size:>7} байт, HTTP {status}")
@@ -0,0 +1,65 @@
+import asyncio
+import json
+import multiprocessing
+import time
+from backend.core.frame_decoder import decode_frame
+from backend.core.price_store import LastPriceStore
+from backend.core.sample_payloads import make_binance_ticker_arr
+from backend.core.sharded_ingest import ShardedIngestion, pipe_sink
+from backend.core.websocket_price_updater import price_parser
+
+# 📊 Бенчмарк шардирования: тиков/с в родительском сторе в зависимости от числа воркеров.
+# Воркеры вместо сети гоняют записанные кадры через тот же декодер и парсер, что и живые коннекторы.
+DURATION = 3
+TICKERS_PER_FRAME = 500
+SHARDS = 4
+WORKER_COUNTS = (1, 2, 4)
+
+
+def make_frame(index: int) -> str:
+    tickers = make_binance_ticker_arr(TICKERS_PER_FRAME)
+    for ticker in tickers:
+        ticker["s"] = f"S{index}{ticker['s']}"
+    return json.dumps(tickers, separators=(",", ":"))
+
+
+def replay_worker(specs, conn):
+    """Воркер бенчмарка: decode + parse записанных кадров своих шардов и отправка тиков родителю."""
+    feeds = [(make_frame(index), price_parser(exchange), pipe_sink(exchange, conn)) for exchange, index, _ in specs]
+    deadline = time.monotonic() + DURATION + 1
+    while time.monotonic() < deadline:
+        for frame, parse, sink in feeds:
+            sink([item for _, item in parse(decode_frame(frame))])
+
+
+def single_process() -> float:
+    """Базовая линия: всё в одном процессе, как websocket_price_updater.main."""
+    store = LastPriceStore()
+    feeds = [(make_frame(index), price_parser("Binance")) for index in range(SHARDS)]
+    started = time.monotonic()
+    while time.monotonic() - started < DURATION:
+        for frame, parse in feeds:
+            for _, (symbol, price) in parse(decode_frame(frame)):
+                store.update("Binance", symbol, price)
+    return store.updates / (time.monotonic() - started)
+
+
+async def sharded(workers: int) -> float:
+    specs = [("Binance", index, SHARDS) for index in range(SHARDS)]
+    plan = [specs[i::workers] for i in range(workers)]
+    ingestion = ShardedIngestion(plan, store=LastPriceStore(), target=replay_worker)
+    task = asyncio.create_task(ingestion.run())
+    await asyncio.sleep(0.5)  # старт процессов
+    before, started = ingestion.store.updates, time.monotonic()
+    await asyncio.sleep(DURATION)
+    rate = (ingestion.store.updates - before) / (time.monotonic() - started)
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+    return rate
+
+
+if __name__ == "__main__":
+    print(f"📊 {SHARDS} шарда по {TICKERS_PER_FRAME} тикеров в кадре, ядер: {multiprocessing.cpu_count()}")
+    print(f"{'один процесс':>14}: {single_process():>10,.0f} тиков/с")
+    for workers in WORKER_COUNTS:
+        print(f"{workers:>6} воркер(а): {asyncio.run(sharded(workers)):>10,.0f} тиков/с")
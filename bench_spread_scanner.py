@@ -0,0 +1,70 @@
+import random
+import time
+from backend.core.price_matrix import PriceMatrix, scan_spreads
+
+# 📊 Бенчмарк поиска спредов: 3000 активов × 9 бирж, старый цикл против векторного сканера
+N_ASSETS = 3000
+EXCHANGES = ["Binance", "Bybit", "Bitget", "Gateio", "HTX", "KuCoin", "MEXC", "OKX", "Poloniex"]
+ITERATIONS = 20
+MIN_SPREAD = 3.0
+
+
+def make_rows():
+    random.seed(42)
+    rows = []
+    for i in range(N_ASSETS):
+        base = random.uniform(0.01, 1000)
+        for exchange in EXCHANGES:
+            if random.random() < 0.8:  # не каждая пара есть на каждой бирже
+                # обычно котировки расходятся на доли процента, иногда — на несколько процентов
+                noise = random.uniform(0.95, 1.08) if random.random() < 0.05 else random.uniform(0.998, 1.002)
+                rows.append((exchange, f"COIN{i}USDT", base * noise))
+    return rows
+
+
+def legacy_scan(rows):
+    """Старый find_arbitrage_opportunities: price_map + сортировка + только min/max."""
+    price_map = {}
+    for exchange, asset, price in rows:
+        if asset not in price_map:
+            price_map[asset] = []
+        price_map[asset].append((exchange, price))
+
+    found = []
+    for asset, price_list in price_map.items():
+        price_list.sort(key=lambda x: x[1])
+        if len(price_list) > 1:
+            low_exchange, low_price = price_list[0]
+            high_exchange, high_price = price_list[-1]
+            spread = (high_price - low_price) / low_price * 100
+            if spread >= MIN_SPREAD:
+                found.append((asset, low_exchange, high_exchange, spread))
+    return found
+
+
+def timed(fn, *args):
+    started = time.perf_counter()
+    for _ in range(ITERATIONS):
+        result = fn(*args)
+    return (time.perf_counter() - started) / ITERATIONS, result
+
+
+if __name__ == "__main__":
+    rows = make_rows()
+    matrix = PriceMatrix.from_rows(rows, EXCHANGES)
+
+    legacy_time, legacy_found = timed(legacy_scan, rows)
+    vector_time, vector_found = timed(scan_spreads, matrix, MIN_SPREAD)
+    top_time, top = timed(lambda: scan_spreads(matrix, MIN_SPREAD, top_k=50))
+    load_time, _ = timed(matrix.load, rows)
+
+    started = time.perf_counter()
+    for exchange, asset, price in rows:
+        matrix.update(exchange, asset, price)
+    update_us = (time.perf_counter() - started) / len(rows) * 1e6
+
+    print(f"📊 {N_ASSETS} активов × {len(EXCHANGES)} бирж ({len(rows)} котировок)")
+    print(f"🐢 Цикл min/max:        {legacy_time * 1000:7.2f} мс, {len(legacy_found)} возможностей (только крайние, без комиссий)")
+    print(f"⚡ Векторный сканер:    {vector_time * 1000:7.2f} мс, {len(vector_found)} возможностей (все пары, с комиссиями)")
+    print(f"🏆 Топ-50:              {top_time * 1000:7.2f} мс, лучший спред {top[0].spread:.2f}%")
+    print(f"🔄 Перезагрузка матрицы: {load_time * 1000:7.2f} мс | точечное обновление: {update_us:.2f} мкс")
@@ -0,0 +1,154 @@
+import asyncio
+import json
+import multiprocessing
+import random
+import socket
+import time
+import aiohttp
+import numpy as np
+import uvicorn
+import websockets
+from fastapi import FastAPI
+from backend.core import stream_api
+from backend.core.stream_api import StreamHub
+
+# 📊 Нагрузочный тест потоковой раздачи: сервер в отдельном процессе, сотни локальных клиентов.
+# Задержка раздачи = время получения клиентом − "ts" сообщения (момент публикации в хабе).
+PAIRS = 1000
+CHANGED_PER_TICK = 100
+TICK_INTERVAL = 0.1
+WS_CLIENTS = 200
+SSE_CLIENTS = 50
+FILTERED_SHARE = 0.5     # доля клиентов с фильтром по активам
+CLIENT_BUFFER = 16
+DURATION = 8
+# Фаза 2: медленные клиенты не читают вовсе и должны быть отключены, а не тормозить сервер.
+# До хаба давление доходит, только когда заполнены буферы сокета (на loopback до tcp_wmem ≈ 4 МБ),
+# поэтому здесь меняются все цены на каждом тике — ~50 КБ на сообщение.
+SLOW_CLIENTS = 5
+SLOW_PHASE_CLIENTS = 20
+SLOW_PHASE_DURATION = 15
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def run_server(port: int, changed_per_tick: int):
+    keys = [(exchange, f"COIN{i}USDT") for i in range(PAIRS // 5)
+            for exchange in ("Binance", "Bybit", "OKX", "Gateio", "KuCoin")]
+    prices = {key: 1.0 for key in keys}
+
+    async def synthetic_prices():
+        for key in random.sample(keys, changed_per_tick):
+            prices[key] = round(prices[key] * random.uniform(0.99, 1.01), 6)
+        now = time.time()
+        return [(exchange, asset, price, now) for (exchange, asset), price in prices.items()], True
+
+    async def no_signals():
+        return []
+
+    stream_api.hub = StreamHub(prices=synthetic_prices, signals=no_signals, price_interval=TICK_INTERVAL,
+                               buffer=CLIENT_BUFFER)
+    app = FastAPI()
+    app.include_router(stream_api.router)
+    uvicorn.run(app, host="127.0.0.1", port=port, log_level="error")
+
+
+def client_filter(i: int) -> str:
+    if i % int(1 / FILTERED_SHARE):
+        return ""
+    return "assets=" + ",".join(f"COIN{j}USDT" for j in random.sample(range(PAIRS // 5), 20))
+
+
+async def ws_client(port: int, i: int, latencies: list, deadline: float):
+    async with websockets.connect(f"ws://127.0.0.1:{port}/ws/stream?{client_filter(i)}", max_size=None) as ws:
+        while time.time() < deadline:
+            try:
+                message = await asyncio.wait_for(ws.recv(), deadline - time.time())
+            except asyncio.TimeoutError:
+                break
+            latencies.append(time.time() - json.loads(message)["ts"])
+
+
+async def sse_client(session, port: int, i: int, latencies: list, deadline: float):
+    async with session.get(f"http://127.0.0.1:{port}/stream?{client_filter(i)}") as response:
+        while time.time() < deadline:
+            try:
+                line = await asyncio.wait_for(response.content.readline(), deadline - time.time())
+            except asyncio.TimeoutError:
+                break
+            if line.startswith(b"data: "):
+                latencies.append(time.time() - json.loads(line[6:])["ts"])
+
+
+async def slow_client(port: int, deadline: float):
+    """Сырой TCP: рукопожатие WebSocket с крошечным окном приёма, дальше ни одного чтения."""
+    sock = socket.socket()
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4096)
+    sock.setblocking(False)
+    await asyncio.get_running_loop().sock_connect(sock, ("127.0.0.1", port))
+    reader, writer = await asyncio.open_connection(sock=sock)
+    writer.write(b"GET /ws/stream HTTP/1.1\r\nHost: 127.0.0.1\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+                 b"Sec-WebSocket-Key: dGhlIHNhbXBsZSBub25jZQ==\r\nSec-WebSocket-Version: 13\r\n\r\n")
+    await reader.readuntil(b"\r\n\r\n")
+    writer.transport.pause_reading()
+    await asyncio.sleep(deadline - time.time())
+    writer.close()
+
+
+def report(name: str, latencies: list, duration: float):
+    ms = np.array(latencies) * 1000
+    print(f"{name:>10}: {len(ms) / duration:8.0f} сообщ./с, задержка p50 {np.percentile(ms, 50):6.1f} / "
+          f"p95 {np.percentile(ms, 95):6.1f} / p99 {np.percentile(ms, 99):6.1f} / макс. {ms.max():6.1f} мс")
+
+
+async def stats(session, port: int) -> dict:
+    async with session.get(f"http://127.0.0.1:{port}/stream/stats") as response:
+        return await response.json()
+
+
+async def fan_out(port: int):
+    ws_latencies, sse_latencies = [], []
+    deadline = time.time() + DURATION
+    async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=None)) as session:
+        await asyncio.gather(*[ws_client(port, i, ws_latencies, deadline) for i in range(WS_CLIENTS)],
+                             *[sse_client(session, port, i, sse_latencies, deadline) for i in range(SSE_CLIENTS)])
+        hub = await stats(session, port)
+    print(f"📊 {WS_CLIENTS} WS + {SSE_CLIENTS} SSE клиентов (половина с фильтром), "
+          f"{CHANGED_PER_TICK} изменений из {PAIRS} каждые {TICK_INTERVAL * 1000:.0f} мс, {DURATION} с")
+    report("WebSocket", ws_latencies, DURATION)
+    report("SSE", sse_latencies, DURATION)
+    print(f"🛰️ Хаб: {hub}")
+
+
+async def slow_clients(port: int):
+    latencies = []
+    deadline = time.time() + SLOW_PHASE_DURATION
+    async with aiohttp.ClientSession() as session:
+        await asyncio.gather(*[ws_client(port, 1, latencies, deadline) for _ in range(SLOW_PHASE_CLIENTS)],
+                             *[slow_client(port, deadline) for _ in range(SLOW_CLIENTS)])
+        hub = await stats(session, port)
+    print(f"\n🐢 {SLOW_CLIENTS} нечитающих клиентов + {SLOW_PHASE_CLIENTS} обычных, все {PAIRS} цен на каждом тике, "
+          f"{SLOW_PHASE_DURATION} с")
+    report("обычные", latencies, SLOW_PHASE_DURATION)
+    print(f"Отключены сервером: {hub['dropped_clients']} из {SLOW_CLIENTS}")
+
+
+def run_phase(phase, changed_per_tick: int):
+    port = free_port()
+    server = multiprocessing.get_context("fork").Process(target=run_server, args=(port, changed_per_tick),
+                                                         daemon=True)
+    server.start()
+    time.sleep(2)
+    try:
+        asyncio.run(phase(port))
+    finally:
+        server.kill()
+
+
+if __name__ == "__main__":
+    run_phase(fan_out, CHANGED_PER_TICK)
+    run_phase(slow_clients, PAIRS)
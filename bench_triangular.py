@@ -0,0 +1,101 @@
+import math
+import random
+import time
+import numpy as np
+from backend.core.triangular import TriangularDetector
+
+# 📊 Треугольный арбитраж на графе одной биржи из 2000 пар: пересчёт только циклов через обновлённую пару
+# против полного прохода по всем циклам и против Bellman-Ford (поиск отрицательного цикла) на каждом тике.
+PAIRS = 2000
+TICKS = 20_000
+MAJORS = {"BTC": 60000.0, "ETH": 3000.0, "BNB": 600.0}
+FEE = 0.1
+
+
+def make_rows():
+    random.seed(3)
+    usdt = dict(MAJORS, USDT=1.0)
+    rows = [(f"{base}{quote}", usdt[base] / usdt[quote])
+            for base, quote in (("BTC", "USDT"), ("ETH", "USDT"), ("BNB", "USDT"), ("ETH", "BTC"), ("BNB", "BTC"),
+                                ("BNB", "ETH"))]
+    coin = 0
+    while len(rows) < PAIRS:
+        usdt[f"COIN{coin}"] = random.uniform(0.01, 100)
+        for quote, share in (("USDT", 1.0), ("BTC", 0.6), ("ETH", 0.3), ("BNB", 0.1)):
+            if len(rows) < PAIRS and (quote == "USDT" or random.random() < share):
+                rows.append((f"COIN{coin}{quote}", usdt[f"COIN{coin}"] / usdt[quote]))
+        coin += 1
+    return [("Binance", symbol, price) for symbol, price in rows]
+
+
+def make_ticks(rows):
+    random.seed(4)
+    ticks = []
+    for _ in range(TICKS):
+        _, symbol, price = random.choice(rows)
+        noise = random.uniform(0.97, 1.03) if random.random() < 0.001 else random.uniform(0.9995, 1.0005)
+        ticks.append(("Binance", symbol, price * noise))
+    return ticks
+
+
+class BellmanFord:
+    """Отрицательный цикл в графе -log(курс после комиссии): векторная релаксация всех рёбер до сходимости."""
+
+    def __init__(self, graph):
+        self.graph = graph
+        nodes = {currency: i for i, currency in enumerate(graph.neighbors)}
+        pairs = np.array([(nodes[base], nodes[quote]) for base, quote in graph.pairs])
+        self.size = len(nodes)
+        # ребро 2k: base -> quote (продажа по price), 2k+1: quote -> base (покупка по 1/price)
+        self.src = np.column_stack([pairs[:, 0], pairs[:, 1]]).ravel()
+        self.dst = np.column_stack([pairs[:, 1], pairs[:, 0]]).ravel()
+        self.fee = -math.log(1 - FEE / 100)
+
+    def has_cycle(self) -> bool:
+        logs = self.graph.log_prices[:len(self.graph.symbols)]
+        weights = np.column_stack([-logs, logs]).ravel() + self.fee
+        dist = np.zeros(self.size)
+        for _ in range(self.size):
+            relaxed = dist.copy()
+            np.minimum.at(relaxed, self.dst, dist[self.src] + weights)
+            if np.array_equal(relaxed, dist):
+                return False
+            dist = relaxed
+        return True
+
+
+if __name__ == "__main__":
+    rows = make_rows()
+    ticks = make_ticks(rows)
+
+    detector = TriangularDetector()
+    started = time.perf_counter()
+    detector.load(rows)
+    graph = detector.graph("Binance")
+    print(f"📊 {len(graph.symbols)} пар, {len(graph.neighbors)} валют, {len(graph)} треугольников; "
+          f"построение графа и индекса {(time.perf_counter() - started) * 1000:.1f} мс")
+    sizes = [len(graph.cycles_of(pair)) if graph.cycles_of(pair) is not None else 0 for pair in range(len(graph.symbols))]
+    print(f"🔺 циклов через пару: в среднем {np.mean(sizes):.1f}, максимум {max(sizes)} (BTCUSDT и др. мажоры)")
+
+    started = time.perf_counter()
+    found = sum(len(detector.on_tick(*tick)) for tick in ticks)
+    incremental = (time.perf_counter() - started) / TICKS
+    print(f"⚡ по индексу:      {incremental * 1e6:8.1f} мкс/тик ({1 / incremental:9,.0f} тиков/с), "
+          f"проверено {detector.cycle_checks / (TICKS + 1):.1f} циклов/тик, найдено {found}")
+
+    cycles = graph.all_cycles()
+    started = time.perf_counter()
+    for _, symbol, price in ticks[:2000]:
+        graph.update(symbol, price)
+        graph.check(cycles, detector.threshold)
+    full = (time.perf_counter() - started) / 2000
+    print(f"🐢 все циклы:       {full * 1e6:8.1f} мкс/тик ({1 / full:9,.0f} тиков/с), ×{full / incremental:.0f} медленнее")
+
+    bellman = BellmanFord(graph)
+    started = time.perf_counter()
+    for _, symbol, price in ticks[:200]:
+        graph.update(symbol, price)
+        bellman.has_cycle()
+    bf = (time.perf_counter() - started) / 200
+    print(f"🐌 Bellman-Ford:    {bf * 1e6:8.1f} мкс/тик ({1 / bf:9,.0f} тиков/с), ×{bf / incremental:.0f} медленнее "
+          f"(и только да/нет, без перечня циклов)")
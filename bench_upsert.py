@@ -0,0 +1,60 @@
+import random
+import time
+from datetime import datetime
+from sqlalchemy import create_engine # type: ignore
+from sqlalchemy.orm import sessionmaker # type: ignore
+from backend.database.models import Base, Price
+from backend.database.db_upsert import bulk_upsert
+
+# 📊 Бенчмарк записи снапшота цен: построчный SELECT+UPDATE против bulk upsert (SQLite в памяти)
+N_PAIRS = 2000
+ROUNDS = 3
+
+
+def make_snapshot(n: int):
+    now = datetime.utcnow()
+    return [
+        {"exchange": "Binance", "asset": f"COIN{i}USDT", "price": random.uniform(0.01, 100.0), "timestamp": now}
+        for i in range(n)
+    ]
+
+
+def write_row_by_row(db, rows):
+    """Старый путь: query().filter().first() на каждую пару."""
+    for row in rows:
+        existing_price = db.query(Price).filter(Price.exchange == row["exchange"], Price.asset == row["asset"]).first()
+        if existing_price:
+            existing_price.price = row["price"]
+        else:
+            db.add(Price(**row))
+    db.commit()
+
+
+def write_bulk(db, rows):
+    """Новый путь: один INSERT ... ON CONFLICT/ON DUPLICATE KEY UPDATE на пачку."""
+    bulk_upsert(db, Price, rows, keys=("exchange", "asset"))
+    db.commit()
+
+
+def run(writer) -> float:
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    written = 0
+    started = time.perf_counter()
+    for _ in range(ROUNDS):  # первый раунд — вставка, остальные — обновление
+        rows = make_snapshot(N_PAIRS)
+        writer(db, rows)
+        written += len(rows)
+    elapsed = time.perf_counter() - started
+    assert db.query(Price).count() == N_PAIRS
+    db.close()
+    return written / elapsed
+
+
+if __name__ == "__main__":
+    before = run(write_row_by_row)
+    after = run(write_bulk)
+    print(f"📊 {N_PAIRS} пар x {ROUNDS} раунда")
+    print(f"🐢 Построчно:   {before:,.0f} строк/с")
+    print(f"⚡ Bulk upsert: {after:,.0f} строк/с (x{after / before:.1f})")
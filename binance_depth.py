@@ -0,0 +1,95 @@
+import asyncio
+import json
+import logging
+import time
+import websockets
+from backend.core.websocket_connector import backoff_delay
+
+# 🔀 Binance combined streams: много @depth5 на одном соединении вместо сокета на каждую пару
+COMBINED_URL = "wss://stream.binance.com:9443/stream?streams="
+STREAMS_PER_CONNECTION = 200  # лимит Binance — 1024 потока, держим запас и короткий URL
+DEPTH_LEVELS = 5
+
+
+def stream_name(asset: str) -> str:
+    return f"{asset.lower()}@depth{DEPTH_LEVELS}@100ms"
+
+
+class Depth5Multiplexer:
+    """
+    📡 Top-5 стаканов Binance по списку активов через несколько общих соединений.
+    Каждое сообщение раздаётся по символу: latest[asset] и слушатели add_listener(asset, callback).
+    """
+
+    def __init__(self, assets, url: str = COMBINED_URL, streams_per_connection: int = STREAMS_PER_CONNECTION):
+        self.assets = list(dict.fromkeys(asset.upper() for asset in assets))
+        self.url = url
+        self.streams_per_connection = streams_per_connection
+        self._by_stream = {stream_name(asset): asset for asset in self.assets}
+        self.latest = {}     # asset -> (bid_volume, ask_volume, bids, asks, ts)
+        self.listeners = {}  # asset -> [callback(asset, bid_volume, ask_volume, bids, asks)]
+        self.messages = 0
+        self.reconnects = 0
+
+    def batches(self) -> list:
+        """Списки потоков, по одному на соединение."""
+        streams = list(self._by_stream)
+        return [streams[i:i + self.streams_per_connection] for i in range(0, len(streams), self.streams_per_connection)]
+
+    def add_listener(self, asset: str, callback):
+        self.listeners.setdefault(asset, []).append(callback)
+
+    def handle(self, message: dict):
+        """{"stream": "btcusdt@depth5@100ms", "data": {...}} -> обновление latest и вызов слушателей."""
+        asset = self._by_stream.get(message.get("stream"))
+        data = message.get("data")
+        if asset is None or not data:
+            return None
+        bids = data.get("bids", [])
+        asks = data.get("asks", [])
+        bid_volume = sum(float(b[1]) for b in bids[:DEPTH_LEVELS])
+        ask_volume = sum(float(a[1]) for a in asks[:DEPTH_LEVELS])
+        self.latest[asset] = (bid_volume, ask_volume, bids, asks, time.time())
+        self.messages += 1
+        for callback in self.listeners.get(asset, ()):
+            callback(asset, bid_volume, ask_volume, bids, asks)
+        return asset
+
+    async def run_connection(self, streams: list):
+        url = self.url + "/".join(streams)
+        attempt = 0
+        while True:
+            try:
+                async with websockets.connect(url, max_size=None) as ws:
+                    logging.info(f"🔀 Binance depth{DEPTH_LEVELS}: {len(streams)} потоков на соединении")
+                    async for message in ws:
+                        attempt = 0
+                        self.handle(json.loads(message))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logging.error(f"❌ Binance depth{DEPTH_LEVELS}: {e}")
+            self.reconnects += 1
+            await asyncio.sleep(backoff_delay(attempt))
+            attempt += 1
+
+    async def run(self):
+        """🔄 Все соединения сразу; работает, пока не отменят."""
+        await asyncio.gather(*(self.run_connection(streams) for streams in self.batches()))
+
+    async def snapshot(self, timeout: float = 10) -> list:
+        """Разовый срез: ждём первое сообщение по каждому активу (или timeout) и закрываем соединения."""
+        task = asyncio.create_task(self.run())
+        deadline = time.monotonic() + timeout
+        try:
+            while len(self.latest) < len(self.assets) and time.monotonic() < deadline:
+                await asyncio.sleep(0.05)
+        finally:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+        return self.results()
+
+    def results(self) -> list:
+        """[(exchange, asset, bid_volume, ask_volume, bids, asks)] — формат update_all_liquidity."""
+        return [("Binance", asset, bid_volume, ask_volume, bids, asks)
+                for asset, (bid_volume, ask_volume, bids, asks, _) in self.latest.items()]
@@ -1,5 +1,6 @@
 from sqlalchemy import create_engine # type: ignore 
 from sqlalchemy.orm import sessionmaker # type: ignore 
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker # type: ignore
 import yaml # type: ignore 
 import os
 
@@ -11,6 +12,8 @@ with open(CONFIG_PATH, "r") as file:
 
 # Формируем строку подключения
 DATABASE_URL = f"mysql+pymysql://{config['db']['user']}:{config['db']['password']}@{config['db']['host']}/{config['db']['name']}"
+# Та же база через асинхронный драйвер — для корутин (FastAPI, приём цен), чтобы не блокировать event loop
+ASYNC_DATABASE_URL = f"mysql+aiomysql://{config['db']['user']}:{config['db']['password']}@{config['db']['host']}/{config['db']['name']}"
 
 # Создаем подключение
 engine = create_engine(
@@ -29,3 +32,20 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+# ⚡ Асинхронный движок: пока MySQL отвечает, event loop продолжает читать вебсокеты и обслуживать запросы.
+# Синхронный engine выше остаётся для скриптов (миграции, order_checker, liquidity_checker).
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL,
+    echo=False,
+    pool_size=20,
+    max_overflow=30,
+    pool_timeout=60,
+)
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+# Асинхронная сессия для async-эндпоинтов (Depends(get_async_db))
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
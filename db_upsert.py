@@ -0,0 +1,88 @@
+from sqlalchemy.dialects.mysql import insert as mysql_insert # type: ignore
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert # type: ignore
+from sqlalchemy.orm import Session # type: ignore
+from sqlalchemy.ext.asyncio import AsyncSession # type: ignore
+
+UPSERT_CHUNK_SIZE = 1000  # строк на один INSERT
+# Сборка INSERT идёт в потоке event loop (~0.1 мс на строку), поэтому асинхронный upsert режет мельче:
+# между пачками loop успевает обработать тики
+ASYNC_UPSERT_CHUNK_SIZE = 200
+# Драйверы, которые сами выполняют executemany одной пачкой: им уходит шаблон INSERT без значений,
+# он компилируется один раз и дальше берётся из кэша SQLAlchemy (многострочный .values(rows) не кэшируется).
+# aiomysql не узнаёт синтаксис MySQL 8.0.20+ (VALUES (...) AS new ON DUPLICATE KEY UPDATE) и отправил бы
+# строки по одной, поэтому для него остаётся многострочный INSERT.
+EXECUTEMANY_DRIVERS = ("aiosqlite",)
+
+
+def build_upsert(dialect: str, model, rows: list, keys: tuple, update_columns: list):
+    """
+    🧱 Собирает INSERT ... ON DUPLICATE KEY UPDATE (MySQL) или ON CONFLICT DO UPDATE (SQLite).
+    rows=None — шаблон без значений для db.execute(stmt, rows).
+    """
+    table = model.__table__
+    if dialect == "mysql":
+        stmt = mysql_insert(table) if rows is None else mysql_insert(table).values(rows)
+        return stmt.on_duplicate_key_update({col: stmt.inserted[col] for col in update_columns})
+    if dialect == "sqlite":
+        stmt = sqlite_insert(table) if rows is None else sqlite_insert(table).values(rows)
+        return stmt.on_conflict_do_update(
+            index_elements=list(keys),
+            set_={col: stmt.excluded[col] for col in update_columns},
+        )
+    raise ValueError(f"Upsert не поддерживается для диалекта {dialect}")
+
+
+def dedupe_rows(rows: list, keys: tuple) -> list:
+    """Оставляет последнюю строку для каждого ключа (порядок первого появления сохраняется)."""
+    unique = {}
+    for row in rows:
+        unique[tuple(row[k] for k in keys)] = row
+    return list(unique.values())
+
+
+def prepare_rows(rows: list, keys: tuple, update_columns: list = None):
+    """Дедупликация и колонки для обновления (по умолчанию — всё, кроме ключа)."""
+    rows = dedupe_rows(rows, keys)
+    if update_columns is None:
+        update_columns = [col for col in rows[0] if col not in keys]
+    return rows, update_columns
+
+
+def chunked_upserts(dialect: str, model, rows: list, keys: tuple, update_columns: list, chunk_size: int):
+    """Многострочные INSERT по chunk_size строк."""
+    return [build_upsert(dialect, model, rows[start:start + chunk_size], keys, update_columns)
+            for start in range(0, len(rows), chunk_size)]
+
+
+def bulk_upsert(db: Session, model, rows: list, keys: tuple, update_columns: list = None,
+                chunk_size: int = UPSERT_CHUNK_SIZE) -> int:
+    """
+    ⚡ Пакетный upsert по уникальному ключу.
+    rows: список словарей {колонка: значение}
+    keys: колонки уникального индекса, например ("exchange", "asset")
+    update_columns: что обновлять при конфликте (по умолчанию — всё, кроме ключа)
+    Коммит остаётся за вызывающим кодом.
+    """
+    if not rows:
+        return 0
+
+    rows, update_columns = prepare_rows(rows, keys, update_columns)
+    for stmt in chunked_upserts(db.get_bind().dialect.name, model, rows, keys, update_columns, chunk_size):
+        db.execute(stmt)
+    return len(rows)
+
+
+async def bulk_upsert_async(db: AsyncSession, model, rows: list, keys: tuple, update_columns: list = None,
+                            chunk_size: int = ASYNC_UPSERT_CHUNK_SIZE) -> int:
+    """⚡ То же для AsyncSession: event loop не ждёт ответа БД. Коммит остаётся за вызывающим кодом."""
+    if not rows:
+        return 0
+
+    rows, update_columns = prepare_rows(rows, keys, update_columns)
+    dialect = db.get_bind().dialect
+    if dialect.driver in EXECUTEMANY_DRIVERS:
+        await db.execute(build_upsert(dialect.name, model, None, keys, update_columns), rows)
+        return len(rows)
+    for stmt in chunked_upserts(dialect.name, model, rows, keys, update_columns, chunk_size):
+        await db.execute(stmt)
+    return len(rows)
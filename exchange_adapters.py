@@ -0,0 +1,294 @@
+import logging
+
+# 💱 Котируемые валюты для разбора символа на base/quote (длинные — первыми)
+QUOTE_ASSETS = sorted(
+    ["USDT", "USDC", "FDUSD", "TUSD", "BUSD", "DAI", "BTC", "ETH", "BNB", "EUR", "TRY", "USD"],
+    key=len, reverse=True,
+)
+
+
+def split_symbol(asset: str):
+    """Разбирает канонический символ (BTCUSDT) на (base, quote) или None."""
+    for quote in QUOTE_ASSETS:
+        if asset.endswith(quote) and len(asset) > len(quote):
+            return asset[:-len(quote)], quote
+    return None
+
+
+class ExchangeAdapter:
+    """🔌 Формат одной биржи: разбор тикеров, стакана, WS-сообщений и символов."""
+
+    def __init__(self, name, ticker_url, orderbook_url, symbol_format,
+                 extract_tickers, ticker_fields, parse_orderbook, parse_ws, lower_symbols=False):
+        self.name = name
+        self.ticker_url = ticker_url
+        self.orderbook_url = orderbook_url
+        self.symbol_format = symbol_format
+        self.lower_symbols = lower_symbols
+        self._extract_tickers = extract_tickers
+        self._symbol_field, self._price_field = ticker_fields
+        self._parse_orderbook = parse_orderbook
+        self._parse_ws = parse_ws
+        self._canonical = {}  # нативный символ -> канонический
+        self._native = {}     # канонический символ -> нативный
+
+    def bind(self, native: str, symbol: str):
+        """Связка из реестра инструментов: нативный символ <-> канонический (вместо разбора строки)."""
+        self._canonical[native] = symbol
+        self._native[symbol] = native
+
+    def canonical(self, raw: str) -> str:
+        """BTC-USDT / btcusdt / BTC_USDT -> BTCUSDT (с кешем)."""
+        symbol = self._canonical.get(raw)
+        if symbol is None:
+            symbol = raw.replace("-", "").replace("_", "").replace("/", "").upper()
+            self._canonical[raw] = symbol
+            self._native.setdefault(symbol, raw)
+        return symbol
+
+    def native(self, asset: str) -> str:
+        """BTCUSDT -> символ в формате биржи (с кешем)."""
+        symbol = self._native.get(asset)
+        if symbol is None:
+            parts = split_symbol(asset)
+            symbol = self.symbol_format.format(base=parts[0], quote=parts[1]) if parts else asset
+            if self.lower_symbols:
+                symbol = symbol.lower()
+            self._native[asset] = symbol
+        return symbol
+
+    def parse_tickers(self, data) -> list:
+        """🔄 REST-ответ со всеми тикерами -> [(symbol, price)]."""
+        tickers = self._extract_tickers(data)
+        if tickers is None:
+            logging.warning(f"⚠ Неизвестный формат данных {self.name}")
+            return []
+        symbol_field, price_field = self._symbol_field, self._price_field
+        cached, canonical = self._canonical.get, self.canonical
+        try:
+            # Быстрый путь: один проход без проверок на каждом тикере
+            return [(cached(t[symbol_field]) or canonical(t[symbol_field]), float(t[price_field])) for t in tickers]
+        except (KeyError, ValueError, TypeError, AttributeError):
+            pass
+
+        result = []
+        for ticker in tickers:
+            try:
+                result.append((canonical(ticker[symbol_field]), float(ticker[price_field])))
+            except (KeyError, ValueError, TypeError, AttributeError) as e:
+                logging.warning(f"❌ Ошибка обработки {self.name} (пара {ticker}): {e}")
+        return result
+
+    def parse_orderbook(self, data, depth: int = 50):
+        """📚 REST-ответ стакана -> (bids, asks) списками (price, qty)."""
+        bids, asks = self._parse_orderbook(data)
+        return ([(float(p), float(q)) for p, q in bids[:depth]],
+                [(float(p), float(q)) for p, q in asks[:depth]])
+
+    def parse_ws(self, data) -> list:
+        """📡 Разобранное WS-сообщение -> [(symbol, price)] (пусто для служебных сообщений, цены <= 0 отбрасываются)."""
+        result = []
+        for raw, price in self._parse_ws(data):
+            if raw and price is not None:
+                price = float(price)
+                if price > 0:
+                    result.append((self.canonical(raw), price))
+        return result
+
+    def orderbook_request_url(self, asset: str) -> str:
+        return self.orderbook_url.format(self.native(asset))
+
+
+# --- Списки тикеров в REST-ответах ---
+
+def _as_list(data):
+    return data if isinstance(data, list) else None
+
+
+def _data_field(data):
+    return data.get("data") if isinstance(data, dict) else None
+
+
+def _bybit_list(data):
+    return data.get("result", {}).get("list") if isinstance(data, dict) else None
+
+
+def _kucoin_list(data):
+    return data.get("data", {}).get("ticker") if isinstance(data, dict) else None
+
+
+# --- Уровни стакана ---
+
+def _pairs(levels):
+    return [(level[0], level[1]) for level in levels]
+
+
+def _flat_pairs(levels):
+    """Poloniex отдаёт уровни плоским списком [p1, q1, p2, q2, ...]."""
+    if levels and isinstance(levels[0], (list, tuple)):
+        return _pairs(levels)
+    return list(zip(levels[::2], levels[1::2]))
+
+
+# --- WS-сообщения ---
+
+def _ws_binance(data):
+    if not isinstance(data, list):
+        return ()
+    return ((item["s"], item["c"]) for item in data)
+
+
+def _ws_bybit(data):
+    if not data.get("topic", "").startswith("tickers.") or "data" not in data:
+        return ()
+    ticker = data["data"]
+    return ((ticker.get("symbol"), ticker.get("lastPrice")),)
+
+
+def _ws_okx(data):
+    if data.get("arg", {}).get("channel") != "tickers" or "data" not in data:
+        return ()
+    return ((ticker.get("instId"), ticker.get("last")) for ticker in data["data"])
+
+
+def _ws_kucoin(data):
+    if data.get("type") != "message" or "data" not in data:
+        return ()
+    return ((data.get("subject"), data["data"].get("price")),)
+
+
+def _ws_gateio(data):
+    if data.get("channel") != "spot.tickers" or data.get("event") != "update":
+        return ()
+    result = data.get("result", [])
+    if isinstance(result, dict):
+        result = [result]
+    return ((ticker.get("currency_pair"), ticker.get("last")) for ticker in result)
+
+
+def _ws_htx(data):
+    if "ch" not in data or "tick" not in data:
+        return ()
+    tick = data["tick"]
+    symbol = tick.get("symbol") or data["ch"].split(".")[1]
+    return ((symbol, tick.get("close")),)
+
+
+def _ws_mexc(data):
+    if not data.get("c", "").startswith("spot@public.deals.v3.api"):  # канал вида spot@public.deals.v3.api@BTCUSDT
+        return ()
+    return ((deal.get("s") or data.get("s"), deal.get("p")) for deal in data.get("d", {}).get("deals", []))
+
+
+def _ws_bitget(data):
+    if data.get("action") not in ("update", "snapshot") or "data" not in data:
+        return ()
+    return ((ticker.get("instId"), ticker.get("lastPr")) for ticker in data["data"])
+
+
+def _ws_poloniex(data):
+    if data.get("channel") != "ticker" or not data.get("data"):
+        return ()
+    return ((ticker.get("symbol"), ticker.get("close")) for ticker in data["data"])
+
+
+# 🗂️ Реестр адаптеров: один dict-lookup на сообщение вместо цепочки if/elif
+ADAPTERS = {
+    adapter.name: adapter for adapter in (
+        ExchangeAdapter(
+            "Binance",
+            "https://api.binance.com/api/v3/ticker/price",
+            "https://api.binance.com/api/v3/depth?symbol={}&limit=50",
+            "{base}{quote}",
+            _as_list,
+            ("symbol", "price"),
+            lambda d: (d["bids"], d["asks"]),
+            _ws_binance,
+        ),
+        ExchangeAdapter(
+            "Bybit",
+            "https://api.bybit.com/v5/market/tickers?category=spot",
+            "https://api.bybit.com/v5/market/orderbook?category=spot&symbol={}&limit=50",
+            "{base}{quote}",
+            _bybit_list,
+            ("symbol", "lastPrice"),
+            lambda d: (_pairs(d["result"]["b"]), _pairs(d["result"]["a"])),
+            _ws_bybit,
+        ),
+        ExchangeAdapter(
+            "Bitget",
+            "https://api.bitget.com/api/v2/spot/market/tickers",
+            "https://api.bitget.com/api/v2/spot/market/orderbook?symbol={}&limit=50",
+            "{base}{quote}",
+            _data_field,
+            ("symbol", "lastPr"),
+            lambda d: (_pairs(d["data"]["bids"]), _pairs(d["data"]["asks"])),
+            _ws_bitget,
+        ),
+        ExchangeAdapter(
+            "Gateio",
+            "https://api.gateio.ws/api/v4/spot/tickers",
+            "https://api.gateio.ws/api/v4/spot/order_book?currency_pair={}&limit=50",
+            "{base}_{quote}",
+            _as_list,
+            ("currency_pair", "last"),
+            lambda d: (_pairs(d["bids"]), _pairs(d["asks"])),
+            _ws_gateio,
+        ),
+        ExchangeAdapter(
+            "HTX",
+            "https://api.huobi.pro/market/tickers",
+            "https://api.huobi.pro/market/depth?symbol={}&type=step0",
+            "{base}{quote}",
+            _data_field,
+            ("symbol", "close"),
+            lambda d: (_pairs(d["tick"]["bids"]), _pairs(d["tick"]["asks"])),
+            _ws_htx,
+            lower_symbols=True,
+        ),
+        ExchangeAdapter(
+            "KuCoin",
+            "https://api.kucoin.com/api/v1/market/allTickers",
+            "https://api.kucoin.com/api/v1/market/orderbook/level2_100?symbol={}",
+            "{base}-{quote}",
+            _kucoin_list,
+            ("symbol", "last"),
+            lambda d: (_pairs(d["data"]["bids"]), _pairs(d["data"]["asks"])),
+            _ws_kucoin,
+        ),
+        ExchangeAdapter(
+            "MEXC",
+            "https://api.mexc.com/api/v3/ticker/price",
+            "https://api.mexc.com/api/v3/depth?symbol={}&limit=50",
+            "{base}{quote}",
+            _as_list,
+            ("symbol", "price"),
+            lambda d: (_pairs(d["bids"]), _pairs(d["asks"])),
+            _ws_mexc,
+        ),
+        ExchangeAdapter(
+            "OKX",
+            "https://www.okx.com/api/v5/market/tickers?instType=SPOT",
+            "https://www.okx.com/api/v5/market/books?instId={}&sz=50",
+            "{base}-{quote}",
+            _data_field,
+            ("instId", "last"),
+            lambda d: (_pairs(d["data"][0]["bids"]), _pairs(d["data"][0]["asks"])),
+            _ws_okx,
+        ),
+        ExchangeAdapter(
+            "Poloniex",
+            "https://api.poloniex.com/markets/price",
+            "https://api.poloniex.com/markets/{}/orderBook?limit=50",
+            "{base}_{quote}",
+            _as_list,
+            ("symbol", "price"),
+            lambda d: (_flat_pairs(d["bids"]), _flat_pairs(d["asks"])),
+            _ws_poloniex,
+        ),
+    )
+}
+
+
+def get_adapter(exchange: str) -> ExchangeAdapter:
+    return ADAPTERS.get(exchange)
@@ -1,9 +1,8 @@
-from fastapi import FastAPI, Depends, BackgroundTasks
+from fastapi import FastAPI
 from fastapi.responses import FileResponse
 from fastapi.staticfiles import StaticFiles
-from sqlalchemy.orm import Session
-from backend.database.db_connector import get_db
-from backend.database.models import Price, ArbitrageSignal
+from backend.core.stream_api import router as stream_router
+from backend.core.read_api import router as read_router
 import os
 
 # 📂 Определяем пути
@@ -18,6 +17,12 @@ app = FastAPI()
 # 📂 Подключаем статические файлы (CSS, JS)
 app.mount("/static", StaticFiles(directory=os.path.join(ROOT_DIR, "frontend/static")), name="static")
 
+# 📚 Цены и сигналы: /prices, /price/{symbol}, /quotes/{symbol}, /arbitrage (пагинация, фильтры, кэш с ETag)
+app.include_router(read_router)
+
+# 📡 Потоковая раздача дельт: /ws/stream (WebSocket), /stream (SSE)
+app.include_router(stream_router)
+
 # 📂 Подключаем HTML-шаблоны
 TEMPLATES_DIR = os.path.join(ROOT_DIR, "frontend/templates")
 
@@ -30,26 +35,6 @@ async def root():
 async def get_dashboard():
     return FileResponse(os.path.join(TEMPLATES_DIR, "dashboard.html"))
 
-# 📊 Получение всех цен
-@app.get("/prices")
-def get_prices(db: Session = Depends(get_db)):
-    prices = db.query(Price).all()
-    return {"data": prices}
-
-# 📈 Получение цены для конкретного актива
-@app.get("/price/{symbol}")
-def get_price(symbol: str, db: Session = Depends(get_db)):
-    price = db.query(Price).filter(Price.asset == symbol).first()
-    if price:
-        return {"symbol": symbol, "price": price.price, "exchange": price.exchange}
-    return {"error": "Asset not found"}
-
-# 📊 Получение арбитражных сигналов
-@app.get("/arbitrage")
-def get_arbitrage_signals(db: Session = Depends(get_db)):
-    signals = db.query(ArbitrageSignal).all()
-    return {"data": signals}
-
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="localhost", port=8080, log_level="debug")
@@ -0,0 +1,218 @@
+import asyncio
+import json
+import logging
+import math
+import os
+import time
+from collections import namedtuple
+import aiohttp
+from backend.core.price_matrix import TAKER_FEES, DEFAULT_TAKER_FEE
+
+# 💸 Комиссии и сети вывода: (биржа, монета, сеть) -> комиссия вывода в монете, открыт ли вывод / депозит,
+# число подтверждений депозита. Публичные эндпоинты валют грузятся по FEES_TTL; у Binance / Bybit / OKX / MEXC /
+# Gate эндпоинты комиссий вывода подписанные — их данные (и реальные тейкерские комиссии аккаунта) берутся из
+# локального файла FEES_FILE, пока ключи не настроены. Для пары бирж выбирается самая дешёвая общая сеть.
+FEES_FILE = os.path.abspath(os.path.join(os.path.dirname(__file__), "../..", "cache", "fees.json"))
+FEES_TTL = 3600   # сек
+FEES_TIMEOUT = 20
+WITHDRAWAL_PROCESSING_MINUTES = 5   # обработка вывода биржей до попадания в сеть
+
+# 🔗 Названия сетей у бирж -> единое имя (после upper() и без пробелов / дефисов / скобок)
+NETWORK_ALIASES = {
+    "ERC20": "ETH", "ETHEREUM": "ETH", "ETHERC20": "ETH",
+    "TRC20": "TRX", "TRON": "TRX", "TRXTRC20": "TRX",
+    "BEP20": "BSC", "BEP20BSC": "BSC", "BNBSMARTCHAIN": "BSC", "BSCBEP20": "BSC",
+    "SOLANA": "SOL", "BITCOIN": "BTC", "LITECOIN": "LTC", "DOGECOIN": "DOGE",
+    "ARBITRUM": "ARB", "ARBITRUMONE": "ARB", "ARBONE": "ARB",
+    "POLYGON": "MATIC", "POLYGONPOS": "MATIC", "OPTIMISM": "OP",
+    "AVAXC": "AVAXC", "AVAXCCHAIN": "AVAXC", "CCHAIN": "AVAXC", "TONCOIN": "TON",
+}
+
+# ⏱ Время блока по сетям (сек) — подтверждения депозита переводятся в минуты
+BLOCK_SECONDS = {
+    "BTC": 600, "ETH": 12, "TRX": 3, "BSC": 3, "SOL": 0.4, "ARB": 0.25, "MATIC": 2, "OP": 2,
+    "AVAXC": 2, "LTC": 150, "DOGE": 60, "XRP": 4, "TON": 5,
+}
+
+NetworkInfo = namedtuple("NetworkInfo", "exchange coin network withdraw_fee withdraw_enabled deposit_enabled confirmations")
+Route = namedtuple("Route", "network fee minutes")
+
+UNKNOWN_ROUTE = Route(None, math.nan, math.nan)   # нет данных хотя бы по одной бирже
+NO_ROUTE = Route(None, math.inf, math.inf)        # данные есть, общей открытой сети нет
+
+
+def normalize_network(name: str) -> str:
+    key = "".join(ch for ch in str(name).upper() if ch.isalnum())
+    return NETWORK_ALIASES.get(key, key)
+
+
+def transfer_minutes(network: str, confirmations) -> float:
+    """⏳ Оценка времени перевода: обработка вывода + подтверждения депозита (NaN — сеть неизвестна)."""
+    block = BLOCK_SECONDS.get(network)
+    if block is None or confirmations is None:
+        return math.nan
+    return WITHDRAWAL_PROCESSING_MINUTES + confirmations * block / 60
+
+
+def _number(value):
+    return float(value) if value not in (None, "") else None
+
+
+def _flag(value) -> bool:
+    return value is True or str(value).lower() in ("true", "1", "allowed")
+
+
+# --- Ответы эндпоинтов валют -> (coin, network, withdraw_fee, withdraw_enabled, deposit_enabled, confirmations) ---
+
+def _bitget(data):
+    for coin in data.get("data", []):
+        for chain in coin.get("chains", []):
+            yield (coin["coin"], chain["chain"], _number(chain.get("withdrawFee")), _flag(chain.get("withdrawable")),
+                   _flag(chain.get("rechargeable")), _number(chain.get("depositConfirm")))
+
+
+def _kucoin(data):
+    for coin in data.get("data", []):
+        for chain in coin.get("chains") or []:
+            yield (coin["currency"], chain["chainName"], _number(chain.get("withdrawalMinFee")),
+                   _flag(chain.get("isWithdrawEnabled")), _flag(chain.get("isDepositEnabled")),
+                   _number(chain.get("confirms")))
+
+
+def _htx(data):
+    for coin in data.get("data", []):
+        for chain in coin.get("chains", []):
+            yield (coin["currency"], chain.get("baseChain") or chain["displayName"],
+                   _number(chain.get("transactFeeWithdraw")), _flag(chain.get("withdrawStatus")),
+                   _flag(chain.get("depositStatus")), _number(chain.get("numOfConfirmations")))
+
+
+def _poloniex(data):
+    for coin in data:
+        for chain in coin.get("networkList", []):
+            yield (coin["coin"], chain["blockchain"], _number(chain.get("withdrawFee")),
+                   _flag(chain.get("withdrawalEnable")), _flag(chain.get("depositEnable")),
+                   _number(chain.get("minConfirm")))
+
+
+FEE_SOURCES = {
+    "Bitget": ("https://api.bitget.com/api/v2/spot/public/coins", _bitget),
+    "HTX": ("https://api.huobi.pro/v2/reference/currencies", _htx),
+    "KuCoin": ("https://api.kucoin.com/api/v3/currencies", _kucoin),
+    "Poloniex": ("https://api.poloniex.com/v2/currencies", _poloniex),
+}
+
+
+class FeeMetadata:
+    """💸 Сети вывода и комиссии по (биржа, монета) с маршрутом перевода между биржами за один dict-lookup."""
+
+    def __init__(self, ttl: float = FEES_TTL, sources=FEE_SOURCES, path: str = FEES_FILE):
+        self.ttl = ttl
+        self.sources = sources   # биржа -> (url, разбор ответа)
+        self.path = path
+        self.networks = {}       # (биржа, монета) -> {сеть: NetworkInfo}
+        self.taker_fees = {}     # биржа -> тейкерская комиссия аккаунта, %
+        self._routes = {}        # (монета, откуда, куда) -> Route
+        self.loaded_at = None
+
+    def __len__(self):
+        return sum(len(networks) for networks in self.networks.values())
+
+    def add(self, exchange: str, coin: str, network: str, withdraw_fee, withdraw_enabled=True,
+            deposit_enabled=True, confirmations=None):
+        if withdraw_fee is None:
+            return
+        coin, network = coin.upper(), normalize_network(network)
+        self.networks.setdefault((exchange, coin), {})[network] = NetworkInfo(
+            exchange, coin, network, float(withdraw_fee), bool(withdraw_enabled), bool(deposit_enabled), confirmations)
+        self._routes.clear()
+
+    def taker_fee(self, exchange: str) -> float:
+        fee = self.taker_fees.get(exchange)
+        return fee if fee is not None else TAKER_FEES.get(exchange, DEFAULT_TAKER_FEE)
+
+    def route(self, coin: str, from_exchange: str, to_exchange: str) -> Route:
+        """🛣️ Самая дешёвая сеть, где вывод с from_exchange и депозит на to_exchange открыты."""
+        key = (coin, from_exchange, to_exchange)
+        route = self._routes.get(key)
+        if route is None:
+            route = self._routes[key] = self._best_route(coin, from_exchange, to_exchange)
+        return route
+
+    def _best_route(self, coin: str, from_exchange: str, to_exchange: str) -> Route:
+        source = self.networks.get((from_exchange, coin))
+        target = self.networks.get((to_exchange, coin))
+        if source is None or target is None:
+            return UNKNOWN_ROUTE
+        best = NO_ROUTE
+        for network, info in source.items():
+            deposit = target.get(network)
+            if info.withdraw_enabled and deposit is not None and deposit.deposit_enabled \
+                    and info.withdraw_fee < best.fee:
+                best = Route(network, info.withdraw_fee, transfer_minutes(network, deposit.confirmations))
+        return best
+
+    # --- Загрузка ---
+
+    def load_file(self, path: str = None) -> bool:
+        """
+        📂 Локальные данные: {"taker_fees": {биржа: %}, "networks": [[биржа, монета, сеть, комиссия, ...], ...]}.
+        Файла нет (первый запуск) — тейкеры из TAKER_FEES, сети только из публичных эндпоинтов.
+        """
+        path = path or self.path
+        try:
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            logging.info(f"💸 {path}: локального файла комиссий нет — тейкеры по умолчанию, сети из публичных API")
+            return False
+        except (OSError, ValueError) as e:
+            logging.warning(f"⚠ {path}: не удалось прочитать комиссии ({e})")
+            return False
+        self.taker_fees.update(data.get("taker_fees", {}))
+        for row in data.get("networks", []):
+            self.add(*row)
+        return True
+
+    async def fetch(self, session: aiohttp.ClientSession, exchange: str) -> int:
+        """🌐 Сети и комиссии вывода одной биржи. Возвращает число сетей (0 — ошибка)."""
+        url, parse = self.sources[exchange]
+        try:
+            async with session.get(url) as response:
+                response.raise_for_status()
+                data = await response.json(content_type=None)
+            rows = list(parse(data))
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError, KeyError, TypeError, AttributeError) as e:
+            logging.error(f"❌ Комиссии вывода {exchange}: {e or type(e).__name__}")
+            return 0
+        for row in rows:
+            self.add(exchange, *row)
+        return len(rows)
+
+    async def refresh(self, session: aiohttp.ClientSession = None, exchanges=None) -> dict:
+        """🔄 Локальный файл + параллельная загрузка публичных эндпоинтов. Возвращает {биржа: число сетей}."""
+        self.load_file()
+        exchanges = list(exchanges or self.sources)
+        own = session is None
+        if own:
+            session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=FEES_TIMEOUT))
+        try:
+            counts = await asyncio.gather(*(self.fetch(session, exchange) for exchange in exchanges))
+        finally:
+            if own:
+                await session.close()
+        self.loaded_at = time.time()
+        return dict(zip(exchanges, counts))
+
+    def is_stale(self) -> bool:
+        return self.loaded_at is None or time.time() - self.loaded_at > self.ttl
+
+    async def run(self):
+        """🔁 Фоновое обновление раз в ttl (биржа недоступна — остаются прошлые данные)."""
+        while True:
+            if self.is_stale():
+                logging.info(f"💸 Комиссии вывода: {await self.refresh()}")
+            await asyncio.sleep(max(self.ttl - (time.time() - self.loaded_at), 1))
+
+
+fee_metadata = FeeMetadata()
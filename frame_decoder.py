@@ -0,0 +1,87 @@
+import asyncio
+import gzip
+import json
+import re
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+try:
+    import orjson  # в 3–5 раз быстрее json, но не обязателен
+except ImportError:
+    orjson = None
+
+# 🧩 Декодирование WS-кадров: быстрый парсер, выборочное извлечение полей, вынос тяжёлых кадров из event loop
+OFFLOAD_BYTES = 64 * 1024  # кадры крупнее уходят в пул (если он задан)
+POOL_WORKERS = 2
+GZIP_MAGIC = b"\x1f\x8b"
+
+loads = orjson.loads if orjson is not None else json.loads
+
+
+class ExtractedTickers(list):
+    """[(symbol, price)], вынутые из кадра без полного разбора JSON."""
+
+
+# Binance 24hrTicker: "s" (символ) всегда раньше "c" (последняя цена) внутри объекта
+_BINANCE_TICKER = re.compile(r'"s":\s*"([^"]+)"[^{}]*?"c":\s*"([^"]+)"')
+
+
+def extract_binance_tickers(message):
+    """Кадр !ticker@arr -> ExtractedTickers; None — это не массив тикеров (разбираем обычным путём)."""
+    if isinstance(message, (bytes, bytearray)):
+        message = message.decode("utf-8")
+    if not message.startswith("[") or '"24hrTicker"' not in message[:40]:
+        return None
+    return ExtractedTickers((symbol, float(price)) for symbol, price in _BINANCE_TICKER.findall(message))
+
+
+def decode_frame(message, extract=None):
+    """Сырой кадр -> объект: gzip, текстовый "pong", выборочное извлечение, затем orjson/json."""
+    if isinstance(message, (bytes, bytearray)) and message[:2] == GZIP_MAGIC:
+        message = gzip.decompress(message)
+    if message in ("pong", b"pong"):
+        return {"event": "pong"}
+    if extract is not None:
+        tickers = extract(message)
+        if tickers is not None:
+            return tickers
+    return loads(message)
+
+
+_pools = {}
+
+
+def get_pool(kind: str, workers: int = POOL_WORKERS):
+    """Общий пул процесса: "thread" — gzip (zlib отпускает GIL), "process" — крупный JSON."""
+    if kind not in _pools:
+        _pools[kind] = ThreadPoolExecutor(workers) if kind == "thread" else ProcessPoolExecutor(workers)
+    return _pools[kind]
+
+
+class FrameDecoder:
+    """
+    🔧 Декодер одной биржи для WebSocketConnector.
+    offload: None — всё в event loop; "thread"/"process" — крупные (>= offload_bytes) и сжатые кадры в пул.
+    extract: функция выборочного извлечения (должна быть на уровне модуля, чтобы работать в process-пуле).
+    """
+
+    def __init__(self, extract=None, offload: str = None, offload_bytes: int = OFFLOAD_BYTES, pool=None):
+        self.extract = extract
+        self.offload_bytes = offload_bytes
+        self.pool = pool or (get_pool(offload) if offload else None)
+        self.offloaded = 0
+
+    def decode(self, message):
+        return decode_frame(message, self.extract)
+
+    def should_offload(self, message) -> bool:
+        if self.pool is None:
+            return False
+        if isinstance(message, (bytes, bytearray)) and message[:2] == GZIP_MAGIC:
+            return True
+        return len(message) >= self.offload_bytes
+
+    async def __call__(self, message):
+        if not self.should_offload(message):
+            return decode_frame(message, self.extract)
+        self.offloaded += 1
+        return await asyncio.get_running_loop().run_in_executor(self.pool, decode_frame, message, self.extract)
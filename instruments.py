@@ -0,0 +1,299 @@
+import asyncio
+import json
+import logging
+import os
+import time
+from collections import namedtuple
+import aiohttp
+from backend.core.exchange_adapters import ADAPTERS
+
+# 🏷️ Реестр инструментов: канонический символ (BASE+QUOTE), base / quote, нативный символ биржи, шаг цены и лота.
+# Загружается один раз из эндпоинтов инструментов бирж и кешируется на диске (JSON); при старте читается кеш,
+# если он свежее INSTRUMENTS_TTL. Каждый инструмент (биржа, символ) получает целочисленный id, каждый
+# канонический символ — id актива; id стабильны между перезапусками (порядок в кеше сохраняется).
+# id активов — номера строк PriceMatrix арбитража и ключи отложенных пересчётов TickArbitrageEngine.
+# Реестр заполняет кеши адаптеров: canonical()/native() отвечают по данным биржи, а не по разбору строки.
+# Инструменты, пропавшие из успешного ответа биржи, помечаются снятыми с торгов (id не освобождается): их нет
+# в natives() / native() / listings(), т.е. в подписках WS; вернувшийся в ответ инструмент снова активен.
+INSTRUMENTS_CACHE = os.path.abspath(os.path.join(os.path.dirname(__file__), "../..", "cache", "instruments.json"))
+INSTRUMENTS_TTL = 24 * 3600   # сек
+INSTRUMENTS_TIMEOUT = 20
+
+Instrument = namedtuple("Instrument", "id exchange symbol base quote native tick_size lot_size")
+
+
+def _step(decimals):
+    """Число знаков после запятой -> шаг (4 -> 0.0001)."""
+    return 10.0 ** -int(decimals) if decimals is not None and decimals != "" else None
+
+
+def _number(value):
+    return float(value) if value not in (None, "") else None
+
+
+def _binance_filters(item, kind, field):
+    return next((_number(f.get(field)) for f in item.get("filters", []) if f.get("filterType") == kind), None)
+
+
+# --- Ответы эндпоинтов инструментов -> (native, base, quote, tick_size, lot_size) для торгуемых пар ---
+
+def _binance(data):
+    for s in data.get("symbols", []):
+        if s.get("status") == "TRADING":
+            yield (s["symbol"], s["baseAsset"], s["quoteAsset"],
+                   _binance_filters(s, "PRICE_FILTER", "tickSize"), _binance_filters(s, "LOT_SIZE", "stepSize"))
+
+
+def _mexc(data):
+    for s in data.get("symbols", []):
+        if s.get("status") in ("1", "ENABLED", "TRADING"):
+            yield (s["symbol"], s["baseAsset"], s["quoteAsset"],
+                   _step(s.get("quotePrecision")), _number(s.get("baseSizePrecision")))
+
+
+def _bybit(data):
+    for s in data.get("result", {}).get("list", []):
+        if s.get("status") == "Trading":
+            yield (s["symbol"], s["baseCoin"], s["quoteCoin"],
+                   _number(s.get("priceFilter", {}).get("tickSize")),
+                   _number(s.get("lotSizeFilter", {}).get("basePrecision")))
+
+
+def _okx(data):
+    for s in data.get("data", []):
+        if s.get("state") == "live":
+            yield s["instId"], s["baseCcy"], s["quoteCcy"], _number(s.get("tickSz")), _number(s.get("lotSz"))
+
+
+def _gateio(data):
+    for s in data:
+        if s.get("trade_status") == "tradable":
+            yield s["id"], s["base"], s["quote"], _step(s.get("precision")), _step(s.get("amount_precision"))
+
+
+def _kucoin(data):
+    for s in data.get("data", []):
+        if s.get("enableTrading"):
+            yield (s["symbol"], s["baseCurrency"], s["quoteCurrency"],
+                   _number(s.get("priceIncrement")), _number(s.get("baseIncrement")))
+
+
+def _htx(data):
+    for s in data.get("data", []):
+        if s.get("state") == "online":
+            yield (s["symbol"], s["base-currency"], s["quote-currency"],
+                   _step(s.get("price-precision")), _step(s.get("amount-precision")))
+
+
+def _bitget(data):
+    for s in data.get("data", []):
+        if s.get("status") == "online":
+            yield (s["symbol"], s["baseCoin"], s["quoteCoin"],
+                   _step(s.get("pricePrecision")), _step(s.get("quantityPrecision")))
+
+
+def _poloniex(data):
+    for s in data:
+        if s.get("state") == "NORMAL":
+            limits = s.get("symbolTradeLimit", {})
+            yield (s["symbol"], s["baseCurrencyName"], s["quoteCurrencyName"],
+                   _step(limits.get("priceScale")), _step(limits.get("quantityScale")))
+
+
+INSTRUMENT_SOURCES = {
+    "Binance": ("https://api.binance.com/api/v3/exchangeInfo", _binance),
+    "Bybit": ("https://api.bybit.com/v5/market/instruments-info?category=spot", _bybit),
+    "Bitget": ("https://api.bitget.com/api/v2/spot/public/symbols", _bitget),
+    "Gateio": ("https://api.gateio.ws/api/v4/spot/currency_pairs", _gateio),
+    "HTX": ("https://api.huobi.pro/v1/common/symbols", _htx),
+    "KuCoin": ("https://api.kucoin.com/api/v2/symbols", _kucoin),
+    "MEXC": ("https://api.mexc.com/api/v3/exchangeInfo", _mexc),
+    "OKX": ("https://www.okx.com/api/v5/public/instruments?instType=SPOT", _okx),
+    "Poloniex": ("https://api.poloniex.com/markets", _poloniex),
+}
+
+
+class InstrumentRegistry:
+    """🏷️ Инструменты всех бирж с целочисленными id и O(1)-поиском в обе стороны."""
+
+    def __init__(self, path: str = INSTRUMENTS_CACHE, ttl: float = INSTRUMENTS_TTL, sources=INSTRUMENT_SOURCES):
+        self.path = path
+        self.ttl = ttl
+        self.sources = sources    # биржа -> (url, разбор ответа)
+        self.instruments = []     # id инструмента -> Instrument
+        self.assets = []          # id актива -> канонический символ
+        self.asset_index = {}     # канонический символ -> id актива
+        self._by_native = {}      # (биржа, нативный символ) -> id инструмента
+        self._by_symbol = {}      # (биржа, канонический символ) -> id инструмента
+        self._listings = []       # id актива -> {биржа: id инструмента}
+        self.delisted = set()     # id инструментов, которых нет в последнем ответе биржи
+        self.loaded_at = None
+        self.conflicts = 0
+
+    def __len__(self):
+        return len(self.instruments)
+
+    def add(self, exchange: str, native: str, base: str, quote: str, tick_size=None, lot_size=None) -> int:
+        """Добавляет или обновляет инструмент; id существующего не меняется."""
+        base, quote = base.upper(), quote.upper()
+        symbol = base + quote
+        instrument_id = self._by_native.get((exchange, native))
+        if instrument_id is None:
+            instrument_id = self._by_symbol.get((exchange, symbol))
+            if instrument_id is not None:   # другой нативный символ с тем же base/quote — оставляем первый
+                self.conflicts += 1
+                logging.warning(f"⚠ {exchange}: {native} и {self.instruments[instrument_id].native} -> {symbol}")
+                return instrument_id
+            instrument_id = len(self.instruments)
+            self.instruments.append(None)
+            self._by_native[(exchange, native)] = instrument_id
+            self._by_symbol[(exchange, symbol)] = instrument_id
+            self._listings[self.add_asset(symbol)][exchange] = instrument_id
+        self.instruments[instrument_id] = Instrument(instrument_id, exchange, symbol, base, quote, native,
+                                                     tick_size, lot_size)
+        return instrument_id
+
+    def add_asset(self, symbol: str) -> int:
+        """id актива канонического символа; новый символ (и без инструментов) получает следующий id."""
+        asset_id = self.asset_index.get(symbol)
+        if asset_id is None:
+            asset_id = self.asset_index[symbol] = len(self.assets)
+            self.assets.append(symbol)
+            self._listings.append({})
+        return asset_id
+
+    # --- Поиск ---
+
+    def get(self, instrument_id: int) -> Instrument:
+        return self.instruments[instrument_id]
+
+    def find(self, exchange: str, symbol: str):
+        """Instrument по каноническому символу или None."""
+        instrument_id = self._by_symbol.get((exchange, symbol))
+        return self.instruments[instrument_id] if instrument_id is not None else None
+
+    def instrument_id(self, exchange: str, symbol: str):
+        return self._by_symbol.get((exchange, symbol))
+
+    def asset_id(self, symbol: str):
+        return self.asset_index.get(symbol)
+
+    def canonical(self, exchange: str, native: str):
+        """Нативный символ биржи -> канонический (None — инструмент неизвестен)."""
+        instrument_id = self._by_native.get((exchange, native))
+        return self.instruments[instrument_id].symbol if instrument_id is not None else None
+
+    def native(self, exchange: str, symbol: str):
+        """Канонический символ -> нативный символ биржи (None — на бирже нет или снят с торгов)."""
+        instrument_id = self._by_symbol.get((exchange, symbol))
+        if instrument_id is None or instrument_id in self.delisted:
+            return None
+        return self.instruments[instrument_id].native
+
+    def listings(self, symbol: str) -> dict:
+        """🔗 Индекс актива по биржам: {биржа: Instrument} для канонического символа."""
+        asset_id = self.asset_index.get(symbol)
+        if asset_id is None:
+            return {}
+        return {exchange: self.instruments[i] for exchange, i in self._listings[asset_id].items()
+                if i not in self.delisted}
+
+    def is_delisted(self, exchange: str, symbol: str) -> bool:
+        """Биржа сняла инструмент с торгов; неизвестный реестру символ — не снят (данных нет)."""
+        instrument_id = self._by_symbol.get((exchange, symbol))
+        return instrument_id is not None and instrument_id in self.delisted
+
+    def natives(self, exchange: str) -> list:
+        """Нативные символы торгуемых инструментов биржи (для подписок WS)."""
+        return [i.native for i in self.instruments if i.exchange == exchange and i.id not in self.delisted]
+
+    def mark_listed(self, exchange: str, listed):
+        """🗑️ Инструменты биржи не из listed (id из успешного ответа) помечаются снятыми с торгов."""
+        gone = {i.id for i in self.instruments if i.exchange == exchange and i.id not in listed}
+        new = gone - self.delisted
+        self.delisted = {i for i in self.delisted if self.instruments[i].exchange != exchange} | gone
+        if new:
+            logging.info(f"🗑️ {exchange}: сняты с торгов {', '.join(self.instruments[i].native for i in sorted(new))}")
+
+    # --- Загрузка ---
+
+    def install(self, adapters=ADAPTERS):
+        """Заполняет кеши адаптеров: canonical()/native() дальше — один dict-lookup по данным биржи."""
+        for instrument in self.instruments:
+            adapter = adapters.get(instrument.exchange)
+            if adapter is not None:
+                adapter.bind(instrument.native, instrument.symbol)
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        rows = [[i.exchange, i.native, i.base, i.quote, i.tick_size, i.lot_size] for i in self.instruments]
+        delisted = [[i.exchange, i.native] for i in map(self.get, sorted(self.delisted))]
+        temporary = self.path + ".tmp"
+        with open(temporary, "w", encoding="utf-8") as f:
+            json.dump({"saved_at": time.time(), "instruments": rows, "delisted": delisted}, f)
+        os.replace(temporary, self.path)
+
+    def load_cache(self, max_age: float = None) -> bool:
+        """Читает кеш с диска; False — кеша нет или он старше max_age (по умолчанию ttl)."""
+        max_age = self.ttl if max_age is None else max_age
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                cached = json.load(f)
+        except (OSError, ValueError):
+            return False
+        if time.time() - cached.get("saved_at", 0) > max_age:
+            return False
+        for row in cached["instruments"]:
+            self.add(*row)
+        self.delisted |= {self._by_native[tuple(key)] for key in cached.get("delisted", [])
+                          if tuple(key) in self._by_native}
+        self.loaded_at = cached["saved_at"]
+        return True
+
+    async def fetch(self, session: aiohttp.ClientSession, exchange: str) -> int:
+        """🌐 Инструменты биржи из её API (пропавшие из ответа — сняты с торгов). Возвращает число (0 — ошибка)."""
+        url, parse = self.sources[exchange]
+        try:
+            async with session.get(url) as response:
+                response.raise_for_status()
+                data = await response.json(content_type=None)
+            rows = list(parse(data))
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError, KeyError, TypeError, AttributeError) as e:
+            logging.error(f"❌ Инструменты {exchange}: {e or type(e).__name__}")
+            return 0
+        if rows:   # пустой ответ — сбой биржи, а не снятие всех пар
+            self.mark_listed(exchange, {self.add(exchange, *row) for row in rows})
+        return len(rows)
+
+    async def refresh(self, session: aiohttp.ClientSession = None, exchanges=None) -> dict:
+        """🔄 Параллельно загружает инструменты бирж и сохраняет кеш. Возвращает {биржа: число инструментов}."""
+        exchanges = list(exchanges or self.sources)
+        own = session is None
+        if own:
+            session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=INSTRUMENTS_TIMEOUT))
+        try:
+            counts = await asyncio.gather(*(self.fetch(session, exchange) for exchange in exchanges))
+        finally:
+            if own:
+                await session.close()
+        if any(counts):
+            self.loaded_at = time.time()
+            self.save()
+        return dict(zip(exchanges, counts))
+
+    async def ensure(self, session: aiohttp.ClientSession = None) -> "InstrumentRegistry":
+        """
+        🚀 При старте: свежий кеш с диска, иначе загрузка с бирж; если биржи недоступны — устаревший кеш.
+        Затем заполняет кеши адаптеров.
+        """
+        if not self.load_cache():
+            stale = self.load_cache(max_age=float("inf"))   # id сохраняются, недоступные биржи остаются из кеша
+            counts = await self.refresh(session)
+            if stale and not all(counts.values()):
+                logging.warning("⚠ Не все биржи отдали инструменты — для них используется устаревший кеш")
+            logging.info(f"🏷️ Инструменты: {counts}")
+        self.install()
+        return self
+
+
+registry = InstrumentRegistry()
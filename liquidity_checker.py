@@ -1,11 +1,17 @@
 import asyncio
-import json
-import websockets
+import logging
 from sqlalchemy.orm import Session
 from backend.database.models import Liquidity, Price
 from backend.database.db_connector import get_db
+from backend.database.db_upsert import bulk_upsert
+from backend.core.exchange_adapters import ADAPTERS
+from backend.core.instruments import registry
+from backend.core.local_orderbook import order_books
+from backend.core.binance_depth import Depth5Multiplexer
 from datetime import datetime
 
+LIQUIDITY_FLUSH_INTERVAL = 5  # как часто сбрасываем накопленную ликвидность в БД (сек)
+
 # Функция для получения всех пар из базы данных
 def get_all_pairs():
     db = next(get_db())
@@ -14,48 +20,87 @@ def get_all_pairs():
     return pairs
 
 def format_symbol(exchange: str, asset: str) -> str:
-    if "USDT" not in asset:
-        return asset
-    base_asset = asset.replace("USDT", "")
-    if exchange in ["KuCoin", "OKX"]:
-        return f"{base_asset}-USDT"
-    elif exchange in ["Gateio", "Poloniex"]:
-        return f"{base_asset}_USDT"
-    else:
-        return asset
-
-async def fetch_binance_liquidity(asset: str):
-    symbol = asset.lower()
-    url = f"wss://stream.binance.com:9443/ws/{symbol}@depth5@100ms"
-    try:
-        async with websockets.connect(url) as ws:
-            response = await ws.recv()
-            data = json.loads(response)
-            bids = data.get("bids", [])
-            asks = data.get("asks", [])
-            bid_volume = sum(float(b[1]) for b in bids[:5])
-            ask_volume = sum(float(a[1]) for a in asks[:5])
-            return "Binance", asset.upper(), bid_volume, ask_volume, bids, asks
-    except Exception as e:
-        print(f"❌ Ошибка Binance ({asset}): {e}")
-        return None
-
-# Здесь можно реализовать аналогичные функции для других бирж
+    """BTCUSDT -> символ в формате биржи (BTC-USDT, BTC_USDT, btcusdt ...): из реестра инструментов, иначе по формату."""
+    native = registry.native(exchange, asset)
+    if native is not None:
+        return native
+    adapter = ADAPTERS.get(exchange)
+    return adapter.native(asset) if adapter else asset
 
 async def update_all_liquidity(pairs):
+    """💧 Разовый срез top-5 по всем парам: локальные стаканы, остальное Binance — общими combined-соединениями."""
     results = []
+    binance_assets = []
     for exchange, asset in pairs:
-        if exchange == "Binance":
-            print(f"🌐 Проверка пары {asset} на Binance")
-            result = await fetch_binance_liquidity(asset)
-            if result:
-                print(f"✅ Получено: {result[0]} {result[1]}")
-                results.append(result)
-            else:
-                print(f"❌ Нет данных по {asset}")
+        book = order_books.book(exchange, asset)
+        if book is not None:  # 📚 локальный стакан уже в памяти — сокет не нужен
+            bids, asks = book.levels(5)
+            results.append((exchange, asset, book.volume("bids", 5), book.volume("asks", 5), bids, asks))
+        elif exchange == "Binance":
+            binance_assets.append(asset)
+
+    # Здесь можно реализовать аналогичные мультиплексоры для других бирж
+    if binance_assets:
+        print(f"🌐 Проверка {len(binance_assets)} пар на Binance")
+        received = await Depth5Multiplexer(binance_assets).snapshot()
+        print(f"✅ Получено: {len(received)} из {len(binance_assets)}")
+        results.extend(received)
     return results
 
 
+def save_liquidity(rows) -> int:
+    db = next(get_db())
+    try:
+        updated = bulk_upsert(db, Liquidity, rows, keys=("exchange", "asset"))
+        db.commit()
+        return updated
+    finally:
+        db.close()
+
+
+async def stream_binance_liquidity(pairs, interval: float = LIQUIDITY_FLUSH_INTERVAL):
+    """🔄 Непрерывное обновление Liquidity по Binance: depth5-потоки + пакетная запись раз в interval секунд."""
+    multiplexer = Depth5Multiplexer([asset for exchange, asset in pairs if exchange == "Binance"])
+    dirty = {}
+
+    def remember(asset, bid_volume, ask_volume, bids, asks):
+        dirty[asset] = (bid_volume, ask_volume)
+
+    for asset in multiplexer.assets:
+        multiplexer.add_listener(asset, remember)
+
+    async def flush():
+        while True:
+            await asyncio.sleep(interval)
+            if not dirty:
+                continue
+            now = datetime.utcnow()
+            rows = [{"exchange": "Binance", "asset": asset, "bid_volume": bid_volume,
+                     "ask_volume": ask_volume, "timestamp": now}
+                    for asset, (bid_volume, ask_volume) in dirty.items()]
+            dirty.clear()
+            try:
+                await asyncio.to_thread(save_liquidity, rows)
+            except Exception as e:
+                logging.error(f"❌ Ошибка записи ликвидности: {e}")
+
+    await asyncio.gather(multiplexer.run(), flush())
+
+
+def delete_delisted_prices(db: Session, instruments=registry) -> int:
+    """
+    🧹 Удаляет цены пар, которые биржа сняла с торгов (по реестру инструментов). Стакан, не пришедший
+    за таймаут среза, — «неизвестно»: медленный или переподключающийся поток не стирает валидные цены.
+    """
+    deleted = 0
+    for pair in db.query(Price).all():
+        if instruments.is_delisted(pair.exchange, pair.asset):
+            print(f"🗑 Удаляю снятую с торгов пару: {pair.exchange} - {pair.asset}")
+            db.delete(pair)
+            deleted += 1
+    return deleted
+
+
 def check_liquidity(asset, exchange, db: Session):
     liquidity_data = db.query(Liquidity).filter(
         Liquidity.asset == asset, Liquidity.exchange == exchange
@@ -66,32 +111,21 @@ def check_liquidity(asset, exchange, db: Session):
 
 async def main():
     pairs = get_all_pairs()
+    await registry.ensure()   # снятые с торгов пары — по последнему ответу эндпоинтов инструментов
     results = await update_all_liquidity(pairs)
     db = next(get_db())
-    valid_assets = set()
+    rows = []
+    now = datetime.utcnow()
     for exchange, asset, bid_volume, ask_volume, bids, asks in results:
-        existing_liquidity = db.query(Liquidity).filter(Liquidity.exchange == exchange, Liquidity.asset == asset).first()
-        if existing_liquidity:
-            existing_liquidity.bid_volume = bid_volume
-            existing_liquidity.ask_volume = ask_volume
-            existing_liquidity.timestamp = datetime.utcnow()
-        else:
-            db.add(Liquidity(
-                exchange=exchange,
-                asset=asset,
-                bid_volume=bid_volume,
-                ask_volume=ask_volume,
-                timestamp=datetime.utcnow()
-            ))
-    # 🧹 Удаляем невалидные пары для этой биржи (только Binance, пока)
-    binance_assets_in_db = db.query(Price).filter(Price.exchange == "Binance").all()
-    for pair in binance_assets_in_db:
-        if (pair.exchange, pair.asset) not in valid_assets:
-            print(f"🗑 Удаляю невалидную пару: {pair.exchange} - {pair.asset}")
-            db.delete(pair)
-            # 🎯 Здесь можно анализировать bids/asks и оценивать влияние на рынок
-            price_impact = analyze_order_impact(bids, asks, bid_volume, ask_volume)
-            print(f"💡 Влияние на цену ({exchange} - {asset}): {price_impact:.4f}%")
+        rows.append({
+            "exchange": exchange,
+            "asset": asset,
+            "bid_volume": bid_volume,
+            "ask_volume": ask_volume,
+            "timestamp": now
+        })
+    bulk_upsert(db, Liquidity, rows, keys=("exchange", "asset"))
+    delete_delisted_prices(db)
 
     db.commit()
     db.close()
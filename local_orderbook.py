@@ -0,0 +1,450 @@
+import asyncio
+import bisect
+import json
+import logging
+import time
+from collections import namedtuple
+import aiohttp
+import numpy as np
+import websockets
+from backend.core.exchange_adapters import ADAPTERS
+from backend.core.websocket_connector import backoff_delay
+from backend.database.orderbook_codec import BookSide, DTYPE
+
+# 📚 Локальные стаканы: REST-снапшот + диффы из WebSocket с контролем последовательности
+BUFFER_SIZE = 1000           # сколько диффов держим, пока ждём снапшот
+MAX_LEVELS = 1000            # глубже этого уровни отбрасываем
+STREAMS_PER_CONNECTION = 200  # сколько пар подписываем на одно соединение
+SNAPSHOT_TIMEOUT = 10
+
+# symbol — нативный символ биржи; first_id/last_id — диапазон номеров обновлений в сообщении
+DepthEvent = namedtuple("DepthEvent", "symbol snapshot first_id last_id bids asks")
+
+
+class SequenceGap(Exception):
+    """Пропущены обновления стакана — нужен ресинк."""
+
+
+class BookLevels:
+    """Одна сторона стакана: цена -> объём плюс отсортированный список цен (лучшая — первой)."""
+
+    def __init__(self, descending: bool):
+        self.sign = -1.0 if descending else 1.0
+        self.keys = []   # sign * price по возрастанию
+        self.qty = {}
+
+    def __len__(self):
+        return len(self.keys)
+
+    def clear(self):
+        self.keys.clear()
+        self.qty.clear()
+
+    def set(self, price: float, qty: float):
+        if qty == 0:
+            if self.qty.pop(price, None) is not None:
+                i = bisect.bisect_left(self.keys, self.sign * price)
+                del self.keys[i]
+        else:
+            if price not in self.qty:
+                bisect.insort(self.keys, self.sign * price)
+            self.qty[price] = qty
+
+    def apply(self, levels):
+        for level in levels:
+            self.set(float(level[0]), float(level[1]))
+        if len(self.keys) > 2 * MAX_LEVELS:  # хвост далеко от рынка нам не нужен
+            for key in self.keys[MAX_LEVELS:]:
+                del self.qty[self.sign * key]
+            del self.keys[MAX_LEVELS:]
+
+    def best(self):
+        return self.sign * self.keys[0] if self.keys else None
+
+    def top(self, depth: int = None) -> list:
+        sign, qty = self.sign, self.qty
+        return [(sign * key, qty[sign * key]) for key in self.keys[:depth]]
+
+
+class LocalOrderBook:
+    """📖 Стакан одной пары в памяти. До снапшота диффы копятся в буфере."""
+
+    def __init__(self, exchange: str, asset: str, buffer_size: int = BUFFER_SIZE):
+        self.exchange = exchange
+        self.asset = asset
+        self.bids = BookLevels(descending=True)
+        self.asks = BookLevels(descending=False)
+        self.last_update_id = None
+        self.synced = False
+        self.updated_at = None
+        self.buffer_size = buffer_size
+        self._buffer = []
+
+    def reset(self, drop_buffer: bool = False):
+        self.bids.clear()
+        self.asks.clear()
+        self.last_update_id = None
+        self.synced = False
+        if drop_buffer:
+            self._buffer.clear()
+
+    def buffer(self, event: DepthEvent):
+        self._buffer.append(event)
+        if len(self._buffer) > self.buffer_size:
+            del self._buffer[0]  # потеря начала буфера проявится как разрыв при проигрывании
+
+    def apply_snapshot(self, bids, asks, update_id: int):
+        """Заливает снапшот и проигрывает накопленные диффы. SequenceGap — снапшот не стыкуется с буфером."""
+        self.reset()
+        self.bids.apply(bids)
+        self.asks.apply(asks)
+        self.last_update_id = update_id
+        self.synced = True
+        self.updated_at = time.time()
+
+        buffered, self._buffer = self._buffer, []
+        for i, event in enumerate(buffered):
+            try:
+                self.apply_diff(event)
+            except SequenceGap:
+                self.reset()
+                self._buffer = buffered[i:]
+                raise
+
+    def apply_diff(self, event: DepthEvent) -> bool:
+        """Применяет дифф; False — устаревший дифф пропущен, SequenceGap — разрыв последовательности."""
+        if event.first_id > event.last_id + 1:  # биржа сбросила нумерацию
+            raise SequenceGap(f"{self.exchange} {self.asset}: сброс последовательности {event.first_id} > {event.last_id}")
+        if event.last_id <= self.last_update_id:
+            return False
+        if event.first_id > self.last_update_id + 1:
+            raise SequenceGap(f"{self.exchange} {self.asset}: ждали {self.last_update_id + 1}, пришло {event.first_id}")
+        self.bids.apply(event.bids)
+        self.asks.apply(event.asks)
+        self.last_update_id = event.last_id
+        self.updated_at = time.time()
+        return True
+
+    # --- Запросы ---
+
+    def best_bid(self):
+        return self.bids.best()
+
+    def best_ask(self):
+        return self.asks.best()
+
+    def levels(self, depth: int = 50) -> tuple:
+        """(bids, asks) списками (price, qty) от лучшей цены."""
+        return self.bids.top(depth), self.asks.top(depth)
+
+    def volume(self, side: str, depth: int = 5) -> float:
+        levels = self.bids if side == "bids" else self.asks
+        return sum(qty for _, qty in levels.top(depth))
+
+    def book_side(self, order_type: str, depth: int = None) -> BookSide:
+        """Сторона для рыночного ордера: buy — asks, sell — bids."""
+        levels = (self.asks if order_type == "buy" else self.bids).top(depth)
+        return BookSide(np.array(levels, dtype=DTYPE).reshape(-1, 2))
+
+    def impacts(self, amounts_usdt, order_type: str, depth: int = None) -> np.ndarray:
+        return self.book_side(order_type, depth).impacts(amounts_usdt, order_type)
+
+
+class DepthStream:
+    """📡 Канал диффов стакана одной биржи: подписка, разбор сообщений, источник снапшота."""
+
+    def __init__(self, exchange, url, subscribe, unsubscribe, parse,
+                 snapshot_url=None, parse_snapshot=None, batch_size=10, ping=None, ping_interval=20):
+        self.exchange = exchange
+        self.url = url
+        self.subscribe = subscribe        # [нативные символы] -> сообщение подписки
+        self.unsubscribe = unsubscribe
+        self.parse = parse                # WS-сообщение -> DepthEvent или None
+        self.snapshot_url = snapshot_url  # None — снапшот приходит в самом WS-канале
+        self.parse_snapshot = parse_snapshot
+        self.batch_size = batch_size
+        self.ping = ping
+        self.ping_interval = ping_interval
+
+    @property
+    def rest_snapshot(self) -> bool:
+        return self.snapshot_url is not None
+
+
+# --- Разбор диффов ---
+
+def _depth_binance(data):
+    data = data.get("data", data)  # combined stream заворачивает событие в {"stream", "data"}
+    if data.get("e") != "depthUpdate":
+        return None
+    return DepthEvent(data["s"], False, data["U"], data["u"], data["b"], data["a"])
+
+
+def _depth_gateio(data):
+    if data.get("channel") != "spot.order_book_update" or data.get("event") != "update":
+        return None
+    result = data["result"]
+    return DepthEvent(result["s"], False, result["U"], result["u"], result.get("b", []), result.get("a", []))
+
+
+def _depth_bybit(data):
+    if not data.get("topic", "").startswith("orderbook.") or "data" not in data:
+        return None
+    book = data["data"]
+    snapshot = data.get("type") == "snapshot" or book["u"] == 1  # u=1 — биржа перезапустила стакан
+    return DepthEvent(book["s"], snapshot, book["u"], book["u"], book["b"], book["a"])
+
+
+def _depth_okx(data):
+    if data.get("arg", {}).get("channel") != "books" or not data.get("data"):
+        return None
+    book = data["data"][0]
+    return DepthEvent(data["arg"]["instId"], data.get("action") == "snapshot",
+                      book.get("prevSeqId", -1) + 1, book["seqId"], book["bids"], book["asks"])
+
+
+def _binance_subscription(method):
+    return lambda symbols: {"method": method, "params": [f"{s.lower()}@depth@100ms" for s in symbols], "id": 1}
+
+
+def _gateio_subscription(event):
+    return lambda symbols: {"time": int(time.time()), "channel": "spot.order_book_update",
+                            "event": event, "payload": [symbols[0], "100ms"]}
+
+
+# 🗂️ Биржи с диффами стакана. HTX, MEXC, Bitget, KuCoin и Poloniex пока только через REST
+DEPTH_STREAMS = {
+    stream.exchange: stream for stream in (
+        DepthStream(
+            "Binance",
+            "wss://stream.binance.com:9443/ws",
+            _binance_subscription("SUBSCRIBE"),
+            _binance_subscription("UNSUBSCRIBE"),
+            _depth_binance,
+            snapshot_url="https://api.binance.com/api/v3/depth?symbol={}&limit=1000",
+            parse_snapshot=lambda d: (d["lastUpdateId"], d["bids"], d["asks"]),
+            batch_size=50,
+        ),
+        DepthStream(
+            "Gateio",
+            "wss://api.gateio.ws/ws/v4/",
+            _gateio_subscription("subscribe"),
+            _gateio_subscription("unsubscribe"),
+            _depth_gateio,
+            snapshot_url="https://api.gateio.ws/api/v4/spot/order_book?currency_pair={}&limit=100&with_id=true",
+            parse_snapshot=lambda d: (d["id"], d["bids"], d["asks"]),
+            batch_size=1,
+            ping=lambda: {"time": int(time.time()), "channel": "spot.ping"},
+        ),
+        DepthStream(
+            "Bybit",
+            "wss://stream.bybit.com/v5/public/spot",
+            lambda symbols: {"op": "subscribe", "args": [f"orderbook.50.{s}" for s in symbols]},
+            lambda symbols: {"op": "unsubscribe", "args": [f"orderbook.50.{s}" for s in symbols]},
+            _depth_bybit,
+            batch_size=10,
+            ping=lambda: {"op": "ping"},
+        ),
+        DepthStream(
+            "OKX",
+            "wss://ws.okx.com:8443/ws/v5/public",
+            lambda symbols: {"op": "subscribe", "args": [{"channel": "books", "instId": s} for s in symbols]},
+            lambda symbols: {"op": "unsubscribe", "args": [{"channel": "books", "instId": s} for s in symbols]},
+            _depth_okx,
+            batch_size=20,
+            ping=lambda: "ping",
+        ),
+    )
+}
+
+
+def _encode(message) -> str:
+    return message if isinstance(message, str) else json.dumps(message)
+
+
+class OrderBookManager:
+    """
+    🧠 Держит локальные стаканы по (exchange, asset) и отвечает на запросы из памяти.
+    Разрыв последовательности -> сброс стакана и ресинк (новый REST-снапшот или переподписка).
+    """
+
+    def __init__(self, streams=DEPTH_STREAMS, buffer_size: int = BUFFER_SIZE):
+        self.streams = streams
+        self.buffer_size = buffer_size
+        self.books = {}
+        self.metrics = {}
+
+    def _metrics(self, exchange: str) -> dict:
+        if exchange not in self.metrics:
+            self.metrics[exchange] = {"messages": 0, "snapshots": 0, "gaps": 0, "resyncs": 0, "reconnects": 0}
+        return self.metrics[exchange]
+
+    def _book(self, exchange: str, asset: str) -> LocalOrderBook:
+        book = self.books.get((exchange, asset))
+        if book is None:
+            book = self.books[(exchange, asset)] = LocalOrderBook(exchange, asset, self.buffer_size)
+        return book
+
+    # --- Запросы из памяти ---
+
+    def book(self, exchange: str, asset: str):
+        """Синхронизированный стакан или None."""
+        book = self.books.get((exchange, asset))
+        return book if book is not None and book.synced else None
+
+    def best_bid_ask(self, exchange: str, asset: str):
+        book = self.book(exchange, asset)
+        return (book.best_bid(), book.best_ask()) if book else None
+
+    def levels(self, exchange: str, asset: str, depth: int = 50):
+        book = self.book(exchange, asset)
+        return book.levels(depth) if book else None
+
+    def impacts(self, exchange: str, asset: str, amounts_usdt, order_type: str):
+        """Price impact (%) по локальному стакану; None — стакана нет или он не синхронизирован."""
+        book = self.book(exchange, asset)
+        return book.impacts(amounts_usdt, order_type) if book else None
+
+    # --- Применение сообщений ---
+
+    def handle(self, exchange: str, data):
+        """Применяет одно WS-сообщение. Возвращает актив, которому нужен ресинк, иначе None."""
+        event = self.streams[exchange].parse(data)
+        if event is None:
+            return None
+        metrics = self._metrics(exchange)
+        metrics["messages"] += 1
+        asset = ADAPTERS[exchange].canonical(event.symbol)
+        book = self._book(exchange, asset)
+
+        try:
+            if event.snapshot:
+                metrics["snapshots"] += 1
+                book.apply_snapshot(event.bids, event.asks, event.last_id)
+                return None
+            if not book.synced:
+                book.buffer(event)
+                return asset if self.streams[exchange].rest_snapshot else None
+            book.apply_diff(event)
+            return None
+        except SequenceGap as e:
+            logging.warning(f"⚠️ Разрыв стакана, ресинк: {e}")
+            metrics["gaps"] += 1
+            if book.synced:  # разрыв на живом стакане: сам дифф пригодится после снапшота
+                book.reset()
+                book.buffer(event)
+            return asset
+
+    def apply_rest_snapshot(self, exchange: str, asset: str, data) -> bool:
+        """Заливает REST-снапшот. False — снапшот старше буфера, нужен следующий."""
+        update_id, bids, asks = self.streams[exchange].parse_snapshot(data)
+        self._metrics(exchange)["snapshots"] += 1
+        try:
+            self._book(exchange, asset).apply_snapshot(bids, asks, update_id)
+            return True
+        except SequenceGap as e:
+            logging.warning(f"⚠️ Снапшот не стыкуется с диффами: {e}")
+            self._metrics(exchange)["gaps"] += 1
+            return False
+
+    # --- Сеть ---
+
+    async def _resync_rest(self, session, exchange: str, asset: str, snapshot_url: str):
+        native = ADAPTERS[exchange].native(asset)
+        for attempt in range(3):
+            self._metrics(exchange)["resyncs"] += 1
+            try:
+                async with session.get(snapshot_url.format(native)) as response:
+                    response.raise_for_status()
+                    data = await response.json()
+            except Exception as e:
+                logging.error(f"❌ Снапшот {exchange} {asset}: {e}")
+                await asyncio.sleep(1 + attempt)
+                continue
+            if self.apply_rest_snapshot(exchange, asset, data):
+                return
+            await asyncio.sleep(0.1 * (attempt + 1))  # даём диффам догнать снапшот
+
+    async def _ping(self, ws, stream: DepthStream):
+        while True:
+            await asyncio.sleep(stream.ping_interval)
+            await ws.send(_encode(stream.ping()))
+
+    async def run_exchange(self, exchange: str, assets, url: str = None, snapshot_url: str = None):
+        """🔄 Одно соединение: подписка на диффы по assets, ресинки, переподключение при обрыве."""
+        stream = self.streams[exchange]
+        adapter = ADAPTERS[exchange]
+        snapshot_url = snapshot_url or stream.snapshot_url
+        natives = [adapter.native(asset) for asset in assets]
+
+        attempt = 0
+        async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=SNAPSHOT_TIMEOUT)) as session:
+            while True:
+                resyncing = {}
+                ping_task = None
+                try:
+                    async with websockets.connect(url or stream.url, max_size=None) as ws:
+                        for i in range(0, len(natives), stream.batch_size):
+                            await ws.send(_encode(stream.subscribe(natives[i:i + stream.batch_size])))
+                        if stream.ping:
+                            ping_task = asyncio.create_task(self._ping(ws, stream))
+                        logging.info(f"📚 {exchange}: подписка на стаканы {len(natives)} пар")
+
+                        async for message in ws:
+                            attempt = 0  # соединение живое — backoff начинается заново
+                            if message == "pong":
+                                continue
+                            asset = self.handle(exchange, json.loads(message))
+                            if asset is None:
+                                continue
+                            if stream.rest_snapshot:
+                                task = resyncing.get(asset)
+                                if task is None or task.done():
+                                    resyncing[asset] = asyncio.create_task(
+                                        self._resync_rest(session, exchange, asset, snapshot_url))
+                            else:
+                                self._metrics(exchange)["resyncs"] += 1
+                                native = adapter.native(asset)
+                                await ws.send(_encode(stream.unsubscribe([native])))
+                                await ws.send(_encode(stream.subscribe([native])))
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    logging.error(f"❌ WebSocket стаканов {exchange}: {e}")
+                finally:
+                    if ping_task:
+                        ping_task.cancel()
+                    for task in resyncing.values():
+                        task.cancel()
+                    for asset in assets:  # без соединения диффы потеряны — стаканы больше не актуальны
+                        book = self.books.get((exchange, asset))
+                        if book:
+                            book.reset(drop_buffer=True)
+
+                self._metrics(exchange)["reconnects"] += 1
+                await asyncio.sleep(backoff_delay(attempt))
+                attempt += 1
+
+    async def run(self, pairs):
+        """🚀 Стаканы для всех (exchange, asset), у бирж которых есть канал диффов."""
+        by_exchange = {}
+        for exchange, asset in pairs:
+            if exchange in self.streams:
+                by_exchange.setdefault(exchange, []).append(asset)
+        tasks = [
+            self.run_exchange(exchange, assets[i:i + STREAMS_PER_CONNECTION])
+            for exchange, assets in by_exchange.items()
+            for i in range(0, len(assets), STREAMS_PER_CONNECTION)
+        ]
+        await asyncio.gather(*tasks)
+
+    def stats(self) -> dict:
+        synced = {}
+        for (exchange, _), book in self.books.items():
+            synced[exchange] = synced.get(exchange, 0) + book.synced
+        return {exchange: {**metrics, "synced_books": synced.get(exchange, 0)}
+                for exchange, metrics in self.metrics.items()}
+
+
+# 🌍 Общие стаканы процесса (событийный режим запускает order_books.run)
+order_books = OrderBookManager()
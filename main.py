@@ -1,11 +1,22 @@
+import argparse
 import asyncio
 from sqlalchemy.orm import Session
 from backend.database.db_connector import get_db
-from backend.core.arbitrage import find_arbitrage_opportunities
-from backend.core.liquidity_checker import update_all_liquidity
+from backend.core.arbitrage import find_arbitrage_opportunities, process_candidates, MIN_SPREAD
+from backend.core.price_store import price_store
+from backend.core.tick_engine import CandidateBatcher, TickArbitrageEngine
+from backend.core.triangular import TriangularDetector
+from backend.core.fee_metadata import fee_metadata
+from backend.core.local_orderbook import order_books
+from backend.core.archive import Archiver
+from backend.core.websocket_price_updater import main as run_price_feeds
+from backend.core.sharded_ingest import main as run_sharded_feeds, parse_shards
+from backend.core.liquidity_checker import update_all_liquidity, stream_binance_liquidity
 from backend.core.liquidity_checker import check_liquidity
 from backend.database.models import Liquidity
 from backend.database.models import Price
+from backend.database.db_upsert import bulk_upsert
+from datetime import datetime
 
 from frontend import app
 
@@ -19,14 +30,12 @@ pairs = [(p.exchange, p.asset) for p in db.query(Price).all()]
 # Запускаем асинхронное обновление ликвидности
 liquidity_data = asyncio.run(update_all_liquidity(pairs))
 
-# ✅ Записываем в базу
-for exchange, asset, bid_vol, ask_vol in liquidity_data:
-    existing_liquidity = db.query(Liquidity).filter(Liquidity.exchange == exchange, Liquidity.asset == asset).first()
-    if existing_liquidity:
-        existing_liquidity.bid_volume = bid_vol
-        existing_liquidity.ask_volume = ask_vol
-    else:
-        db.add(Liquidity(exchange=exchange, asset=asset, bid_volume=bid_vol, ask_volume=ask_vol))
+# ✅ Записываем в базу одним пакетом
+now = datetime.utcnow()
+bulk_upsert(db, Liquidity, [
+    {"exchange": exchange, "asset": asset, "bid_volume": bid_vol, "ask_volume": ask_vol, "timestamp": now}
+    for exchange, asset, bid_vol, ask_vol, _, _ in liquidity_data
+], keys=("exchange", "asset"))
 
 db.commit()
 print(f"✅ Обновление ликвидности завершено!")
@@ -39,6 +48,60 @@ async def run_arbitrage():
         db.close()
         await asyncio.sleep(10)
 
+async def run_poll_mode():
+    """🐢 Полный скан каждые 10 с, ликвидность Binance обновляется непрерывно"""
+    await asyncio.gather(run_arbitrage(), stream_binance_liquidity(pairs), fee_metadata.run())
+
+
+RECONCILE_INTERVAL = 60  # полный скан-сверка в событийном режиме (сек)
+
+async def run_reconciliation(interval: float = RECONCILE_INTERVAL):
+    """🧹 Полный скан по БД как страховка для событийного режима"""
+    while True:
+        await asyncio.sleep(interval)
+        db: Session = next(get_db())
+        await asyncio.to_thread(find_arbitrage_opportunities, db)
+
+async def run_event_mode(workers: int = 0, shards=None):
+    """
+    ⚡ Событийный режим: тики из WebSocket сразу пересчитывают спред затронутого актива.
+    workers > 0 — приём цен в отдельных процессах (sharded_ingest), тики приходят в тот же price_store.
+    """
+    # одна запись в БД за раз: пачки, пришедшие во время записи, сливаются по активу
+    batcher = CandidateBatcher(process_candidates)
+    engine = TickArbitrageEngine(
+        on_opportunities=batcher.on_opportunities,
+        on_cleared=batcher.on_cleared,  # закрыть сигналы актива
+        min_spread=MIN_SPREAD,
+    )
+    price_store.subscribe(engine.on_tick)
+    # 🔺 Треугольники внутри бирж: граф из текущих цен, дальше — по тикам
+    triangular = TriangularDetector()
+    triangular.load(db.query(Price.exchange, Price.asset, Price.price))
+    price_store.subscribe(triangular.on_tick)
+    await asyncio.gather(
+        run_sharded_feeds(shards=shards, workers=workers) if workers else run_price_feeds(),
+        order_books.run(pairs),
+        Archiver().run(books=order_books),  # снапшоты стаканов в колоночный архив (тики архивирует приём цен)
+        stream_binance_liquidity(pairs),
+        engine.run(),
+        engine.report(),
+        triangular.run(),
+        fee_metadata.run(),  # сети и комиссии вывода для check_risk_batch, обновление раз в FEES_TTL
+        run_reconciliation(),
+    )
+
 
 if __name__ == "__main__":
-    asyncio.run(run_arbitrage())
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--mode", choices=["poll", "events"], default="poll",
+                        help="poll — полный скан каждые 10 с, events — пересчёт по тикам")
+    parser.add_argument("--workers", type=int, default=0,
+                        help="events: число процессов приёма цен (0 — всё в одном процессе)")
+    parser.add_argument("--shards", nargs="*", default=[], metavar="EXCHANGE=N",
+                        help="events: шарды по символам на биржу, например Bybit=2 OKX=2")
+    args = parser.parse_args()
+    if args.mode == "events":
+        asyncio.run(run_event_mode(args.workers, parse_shards(args.shards)))
+    else:
+        asyncio.run(run_poll_mode())
@@ -0,0 +1,163 @@
+import logging
+from sqlalchemy import inspect, text # type: ignore
+from backend.database.db_connector import engine
+from backend.database.models import Base
+from backend.database.orderbook_codec import encode_levels, decode_legacy, is_binary
+
+# 🔑 Уникальные ключи, на которые опирается bulk_upsert
+UNIQUE_KEYS = [
+    ("prices", "uq_prices_exchange_asset", ("exchange", "asset")),
+    ("liquidity", "uq_liquidity_exchange_asset", ("exchange", "asset")),
+    ("arbitrage_signals", "uq_signals_asset_buy_sell", ("asset", "buy_exchange", "sell_exchange")),
+    ("order_books", "uq_orderbooks_exchange_asset", ("exchange", "asset")),
+]
+
+MIGRATION_BATCH_SIZE = 500
+
+
+def add_unique_keys(bind=engine):
+    """🧹 Удаляет дубликаты (оставляя самую свежую строку) и создаёт уникальные индексы."""
+    inspector = inspect(bind)
+    tables = inspector.get_table_names()
+
+    with bind.begin() as conn:
+        for table, index_name, columns in UNIQUE_KEYS:
+            if table not in tables:
+                continue
+            existing = {ix["name"] for ix in inspector.get_indexes(table)}
+            existing |= {uc["name"] for uc in inspector.get_unique_constraints(table)}
+            if index_name in existing:
+                continue
+
+            cols = ", ".join(columns)
+            deleted = conn.execute(text(
+                f"DELETE FROM {table} WHERE id NOT IN ("
+                f"SELECT keep_id FROM (SELECT MAX(id) AS keep_id FROM {table} GROUP BY {cols}) AS keep)"
+            )).rowcount
+            conn.execute(text(f"CREATE UNIQUE INDEX {index_name} ON {table} ({cols})"))
+            logging.info(f"🔑 {table}: удалено дубликатов {deleted}, создан индекс {index_name}")
+
+
+def migrate_orderbooks_to_binary(bind=engine):
+    """📦 Переводит order_books.bids/asks из Text (repr списка) в упакованные float64 BLOB."""
+    inspector = inspect(bind)
+    if "order_books" not in inspector.get_table_names():
+        return 0
+
+    with bind.begin() as conn:
+        if bind.dialect.name == "mysql":
+            columns = {col["name"]: col["type"] for col in inspector.get_columns("order_books")}
+            if "BLOB" not in str(columns["bids"]).upper():
+                conn.execute(text("ALTER TABLE order_books MODIFY bids MEDIUMBLOB NOT NULL, MODIFY asks MEDIUMBLOB NOT NULL"))
+
+        converted = 0
+        batch = []
+        for book_id, bids, asks in conn.execute(text("SELECT id, bids, asks FROM order_books")).all():
+            if is_binary(bids) and is_binary(asks):
+                continue
+            try:
+                batch.append({
+                    "id": book_id,
+                    "bids": bids if is_binary(bids) else encode_levels(decode_legacy(bids)),
+                    "asks": asks if is_binary(asks) else encode_levels(decode_legacy(asks)),
+                })
+            except (ValueError, SyntaxError) as e:
+                logging.warning(f"⚠ order_books id={book_id}: не удалось разобрать стакан ({e})")
+                continue
+            if len(batch) >= MIGRATION_BATCH_SIZE:
+                conn.execute(text("UPDATE order_books SET bids = :bids, asks = :asks WHERE id = :id"), batch)
+                converted += len(batch)
+                batch = []
+        if batch:
+            conn.execute(text("UPDATE order_books SET bids = :bids, asks = :asks WHERE id = :id"), batch)
+            converted += len(batch)
+
+    logging.info(f"📦 order_books: переведено в бинарный формат {converted} строк")
+    return converted
+
+
+# ➕ Колонки, добавленные в модели после создания таблиц
+NEW_COLUMNS = [
+    ("arbitrage_signals", "size_usdt", "FLOAT NULL"),
+]
+
+
+def add_missing_columns(bind=engine):
+    """➕ Добавляет в существующие таблицы колонки, появившиеся в моделях."""
+    inspector = inspect(bind)
+    tables = inspector.get_table_names()
+    with bind.begin() as conn:
+        for table, column, ddl in NEW_COLUMNS:
+            if table not in tables:
+                continue
+            if column in {col["name"] for col in inspector.get_columns(table)}:
+                continue
+            conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}"))
+            logging.info(f"➕ {table}: добавлена колонка {column}")
+
+
+# 📏 Колонки, расширенные в моделях (MySQL; SQLite длину VARCHAR не проверяет)
+RESIZED_COLUMNS = [
+    ("arbitrage_signals", "asset", 40, "VARCHAR(40) NOT NULL"),
+]
+
+
+def resize_columns(bind=engine):
+    """📏 Расширяет строковые колонки до длины из моделей."""
+    if bind.dialect.name != "mysql":
+        return
+    inspector = inspect(bind)
+    tables = inspector.get_table_names()
+    with bind.begin() as conn:
+        for table, column, length, ddl in RESIZED_COLUMNS:
+            if table not in tables:
+                continue
+            current = {col["name"]: col["type"] for col in inspector.get_columns(table)}[column]
+            if (getattr(current, "length", None) or 0) >= length:
+                continue
+            conn.execute(text(f"ALTER TABLE {table} MODIFY {column} {ddl}"))
+            logging.info(f"📏 {table}: колонка {column} расширена до {length}")
+
+
+# 🗂️ Неуникальные индексы под запросы API
+NEW_INDEXES = [
+    ("prices", "ix_prices_asset", ("asset",)),
+    ("arbitrage_signals", "ix_signals_spread", ("spread", "id")),
+]
+
+
+def add_missing_indexes(bind=engine):
+    """🗂️ Создаёт индексы, появившиеся в моделях."""
+    inspector = inspect(bind)
+    tables = inspector.get_table_names()
+    with bind.begin() as conn:
+        for table, index_name, columns in NEW_INDEXES:
+            if table not in tables:
+                continue
+            if index_name in {ix["name"] for ix in inspector.get_indexes(table)}:
+                continue
+            conn.execute(text(f"CREATE INDEX {index_name} ON {table} ({', '.join(columns)})"))
+            logging.info(f"🗂️ {table}: создан индекс {index_name}")
+
+
+# 🆕 Таблицы, появившиеся в моделях после первого развёртывания
+NEW_TABLES = ["price_candles", "signal_history"]
+
+
+def create_missing_tables(bind=engine):
+    """🆕 Создаёт недостающие таблицы из NEW_TABLES (существующие не трогает)."""
+    tables = inspect(bind).get_table_names()
+    for name in NEW_TABLES:
+        if name not in tables:
+            Base.metadata.tables[name].create(bind)
+            logging.info(f"🆕 Создана таблица {name}")
+
+
+if __name__ == "__main__":
+    create_missing_tables()
+    add_missing_columns()
+    resize_columns()
+    migrate_orderbooks_to_binary()
+    add_unique_keys()
+    add_missing_indexes()
+    print("✅ Миграция завершена!")
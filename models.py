@@ -1,10 +1,15 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, Text # type: ignore
+from sqlalchemy import Column, Integer, String, Float, DateTime, LargeBinary, UniqueConstraint, Index # type: ignore
+from sqlalchemy import Double, MetaData, Table # type: ignore
+from sqlalchemy.dialects.mysql import MEDIUMBLOB # type: ignore
 from sqlalchemy.ext.declarative import declarative_base # type: ignore
 from datetime import datetime
 
 
 Base = declarative_base()
 
+# 📦 Бинарная сторона стакана: MEDIUMBLOB в MySQL (BLOB ограничен 64 КБ)
+OrderBookSide = LargeBinary().with_variant(MEDIUMBLOB(), "mysql")
+
 class Price(Base):
     __tablename__ = "prices"
     id = Column(Integer, primary_key=True, autoincrement=True)
@@ -13,19 +18,54 @@ class Price(Base):
     price = Column(Float, nullable=False)
     timestamp = Column(DateTime, default=datetime.utcnow)
 
+    __table_args__ = (
+        UniqueConstraint("exchange", "asset", name="uq_prices_exchange_asset"),
+        Index("ix_prices_asset", "asset"),  # котировки одного символа со всех бирж (/quotes/{symbol})
+    )
+
 class ArbitrageSignal(Base):
     __tablename__ = "arbitrage_signals"
 
     id = Column(Integer, primary_key=True, autoincrement=True)
-    asset = Column(String, nullable=False)
-    buy_exchange = Column(String, nullable=False)  # ✅ Должно быть buy_exchange
-    sell_exchange = Column(String, nullable=False)  # ✅ Должно быть sell_exchange
+    asset = Column(String(40), nullable=False)  # символ или путь треугольника "USDT>BTC>ETH"
+    buy_exchange = Column(String(50), nullable=False)  # ✅ Должно быть buy_exchange
+    sell_exchange = Column(String(50), nullable=False)  # ✅ Должно быть sell_exchange
     buy_price = Column(Float, nullable=False)
     sell_price = Column(Float, nullable=False)
     spread = Column(Float, nullable=False)
-    type = Column(String, nullable=False)
+    size_usdt = Column(Float, nullable=True)  # Максимальный размер сделки в пределах допустимого price impact
+    type = Column(String(50), nullable=False)
     timestamp = Column(DateTime, default=datetime.utcnow)
 
+    __table_args__ = (
+        UniqueConstraint("asset", "buy_exchange", "sell_exchange", name="uq_signals_asset_buy_sell"),
+        Index("ix_signals_spread", "spread", "id"),  # сортировка и keyset-пагинация по спреду
+    )
+
+
+class SignalHistory(Base):
+    """📜 Закрытые сигналы: время жизни, спред при открытии / пиковый / последний (см. signal_lifecycle)."""
+    __tablename__ = "signal_history"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    asset = Column(String(40), nullable=False)
+    buy_exchange = Column(String(50), nullable=False)
+    sell_exchange = Column(String(50), nullable=False)
+    type = Column(String(50), nullable=False)
+    opened_at = Column(DateTime, nullable=False)
+    closed_at = Column(DateTime, nullable=False)
+    duration_s = Column(Float, nullable=False)
+    open_spread = Column(Float, nullable=False)
+    peak_spread = Column(Float, nullable=False)
+    close_spread = Column(Float, nullable=False)  # спред в последнем скане, где сигнал ещё был
+    size_usdt = Column(Float, nullable=True)      # последний размер сделки
+    updates = Column(Integer, nullable=False, default=0)  # сколько раз сигнал переписывался в БД
+
+    __table_args__ = (
+        Index("ix_signal_history_closed", "closed_at"),
+        Index("ix_signal_history_asset", "asset", "closed_at"),
+    )
+
 
 class Liquidity(Base):
     __tablename__ = "liquidity"
@@ -36,6 +76,8 @@ class Liquidity(Base):
     ask_volume = Column(Float, nullable=False)
     timestamp = Column(DateTime, default=datetime.utcnow)
 
+    __table_args__ = (UniqueConstraint("exchange", "asset", name="uq_liquidity_exchange_asset"),)
+
 class Log(Base):
     __tablename__ = "logs"
     id = Column(Integer, primary_key=True, autoincrement=True)
@@ -49,6 +91,59 @@ class OrderBook(Base):
     id = Column(Integer, primary_key=True, index=True)
     exchange = Column(String(50), nullable=False)
     asset = Column(String(50), nullable=False)
-    bids = Column(Text, nullable=False)  # JSON-строка с bid-ордерами
-    asks = Column(Text, nullable=False)  # JSON-строка с ask-ордерами
-    timestamp = Column(DateTime, default=datetime.utcnow)
\ No newline at end of file
+    bids = Column(OrderBookSide, nullable=False)  # упакованные float64 [price, qty] (см. orderbook_codec)
+    asks = Column(OrderBookSide, nullable=False)  # упакованные float64 [price, qty]
+    timestamp = Column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (UniqueConstraint("exchange", "asset", name="uq_orderbooks_exchange_asset"),)
+
+
+class PriceCandle(Base):
+    """🕯️ OHLC-свеча и статистика спреда пары за period секунд (1 / 60 / 3600), см. tick_history."""
+    __tablename__ = "price_candles"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    exchange = Column(String(50), nullable=False)
+    asset = Column(String(20), nullable=False)
+    period = Column(Integer, nullable=False)  # длина свечи, сек
+    start = Column(DateTime, nullable=False)  # начало свечи (UTC)
+    open = Column(Float, nullable=False)
+    high = Column(Float, nullable=False)
+    low = Column(Float, nullable=False)
+    close = Column(Float, nullable=False)
+    ticks = Column(Integer, nullable=False)
+    # Премия к самой дешёвой из остальных бирж, %: min / max и сумма со счётчиком (среднее = sum / count)
+    spread_min = Column(Float, nullable=True)
+    spread_max = Column(Float, nullable=True)
+    spread_sum = Column(Float, nullable=False, default=0.0)
+    spread_count = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        UniqueConstraint("exchange", "asset", "period", "start", name="uq_candles_exchange_asset_period_start"),
+        Index("ix_candles_asset_period_start", "asset", "period", "start"),  # диапазон по символу со всех бирж
+    )
+
+
+# 📼 Сырые тики: отдельная append-only таблица на каждые сутки (price_ticks_YYYYMMDD).
+# Старые сутки удаляются целиком (DROP TABLE) — без DELETE по огромной таблице.
+TICK_TABLE_PREFIX = "price_ticks_"
+tick_metadata = MetaData()
+
+
+def tick_table(day) -> Table:
+    """
+    Таблица тиков за сутки day (date). ts — unix-время в DOUBLE: DATETIME в MySQL без fsp теряет доли секунды,
+    а FLOAT (4 байта) — вообще минуты.
+    """
+    name = f"{TICK_TABLE_PREFIX}{day:%Y%m%d}"
+    table = tick_metadata.tables.get(name)
+    if table is None:
+        table = Table(
+            name, tick_metadata,
+            Column("exchange", String(50), nullable=False),
+            Column("asset", String(20), nullable=False),
+            Column("price", Float, nullable=False),
+            Column("ts", Double, nullable=False),
+            Index(f"ix_{name}_asset_ts", "asset", "ts"),
+        )
+    return table
@@ -0,0 +1,117 @@
+import ast
+import struct
+import numpy as np
+
+# 📦 Бинарный формат стороны стакана:
+# заголовок 16 байт (magic, число колонок, число уровней) + float64 little-endian построчно
+# [price, qty, cum_qty, cum_notional]; старые записи из двух колонок [price, qty] тоже читаются
+MAGIC = b"OBK1"
+HEADER = struct.Struct("<4sIQ")
+DTYPE = np.dtype("<f8")
+EMPTY_SIDE = np.empty((0, 2), dtype=DTYPE)
+
+
+def encode_levels(levels) -> bytes:
+    """[(price, qty), ...] -> компактный BLOB c колонками [price, qty, cum_qty, cum_notional]."""
+    arr = np.asarray(levels, dtype=DTYPE)
+    if arr.size == 0:
+        arr = EMPTY_SIDE
+    elif arr.ndim != 2:
+        arr = arr.reshape(-1, 2)
+    prices, qtys = arr[:, 0], arr[:, 1]
+    packed = np.column_stack([prices, qtys, np.cumsum(qtys), np.cumsum(prices * qtys)]).astype(DTYPE, copy=False)
+    return HEADER.pack(MAGIC, packed.shape[1], packed.shape[0]) + np.ascontiguousarray(packed).tobytes()
+
+
+def decode_levels(blob) -> np.ndarray:
+    """BLOB -> массив (n, k) float64 без копирования (read-only view на буфер)."""
+    magic, ncols, count = HEADER.unpack_from(blob)
+    if magic != MAGIC:
+        raise ValueError("Неизвестный формат стакана")
+    return np.frombuffer(blob, dtype=DTYPE, count=count * ncols, offset=HEADER.size).reshape(count, ncols)
+
+
+def decode_legacy(text) -> np.ndarray:
+    """Старый Text-формат: repr списка [(price, qty), ...] / [["price", "qty"], ...]."""
+    if isinstance(text, (bytes, bytearray, memoryview)):
+        text = bytes(text).decode("utf-8")
+    levels = ast.literal_eval(text)
+    if not levels:
+        return EMPTY_SIDE
+    return np.array([(float(p), float(q)) for p, q, *_ in levels], dtype=DTYPE)
+
+
+def is_binary(value) -> bool:
+    return isinstance(value, (bytes, bytearray, memoryview)) and bytes(value[:4]) == MAGIC
+
+
+def load_side(value) -> np.ndarray:
+    """📖 Читает сторону стакана из БД: бинарный формат или старый текстовый (до миграции)."""
+    if value is None:
+        return EMPTY_SIDE
+    if is_binary(value):
+        return decode_levels(value)
+    return decode_legacy(value)
+
+
+class BookSide:
+    """
+    📚 Сторона стакана с накопленными объёмами: impact для любой суммы —
+    бинарный поиск по cum_notional и одна интерполяция внутри уровня.
+    """
+
+    __slots__ = ("prices", "qtys", "cum_qty", "cum_notional")
+
+    def __init__(self, levels: np.ndarray):
+        self.prices = levels[:, 0]
+        self.qtys = levels[:, 1]
+        if levels.shape[1] >= 4:  # накопленные колонки уже лежат в BLOB
+            self.cum_qty = levels[:, 2]
+            self.cum_notional = levels[:, 3]
+        else:
+            self.cum_qty = np.cumsum(self.qtys)
+            self.cum_notional = np.cumsum(self.prices * self.qtys)
+
+    @classmethod
+    def load(cls, value):
+        return cls(load_side(value))
+
+    def __len__(self):
+        return self.prices.shape[0]
+
+    @property
+    def depth_usdt(self) -> float:
+        return float(self.cum_notional[-1]) if len(self) else 0.0
+
+    def impacts(self, amounts_usdt, order_type: str) -> np.ndarray:
+        """
+        📉 Price impact (%) для вектора сумм в USDT за один вызов.
+        order_type: "buy" (по asks) или "sell" (по bids). Пустой стакан -> NaN.
+        Сумма больше глубины стакана -> NaN: такой ордер стакан не исполнит.
+        """
+        amounts = np.asarray(amounts_usdt, dtype=DTYPE)
+        if not len(self):
+            return np.full(amounts.shape, np.nan)
+
+        k = np.searchsorted(self.cum_notional, amounts, side="left")
+        exhausted = k >= len(self)
+        k = np.minimum(k, len(self) - 1)
+        spent_before = np.where(k > 0, self.cum_notional[k - 1], 0.0)
+        acquired_before = np.where(k > 0, self.cum_qty[k - 1], 0.0)
+
+        acquired = acquired_before + (amounts - spent_before) / self.prices[k]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            average_price = amounts / acquired
+        market_price = self.prices[0]
+        impacts = (average_price - market_price) if order_type == "buy" else (market_price - average_price)
+        return np.where(exhausted, np.nan, impacts / market_price * 100)
+
+    def impact(self, amount_usdt: float, order_type: str) -> float:
+        """Price impact (%) одной суммы; None — если стакан пуст."""
+        value = float(self.impacts([amount_usdt], order_type)[0])
+        return None if np.isnan(value) else value
+
+
+def side_impact(levels: np.ndarray, order_type: str, amount_usdt: float) -> float:
+    """📉 Price impact (%) рыночного ордера на amount_usdt по одной стороне стакана (None — пусто)."""
+    return BookSide(levels).impact(amount_usdt, order_type)
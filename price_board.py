@@ -0,0 +1,270 @@
+import logging
+import mmap
+import os
+import struct
+import tempfile
+import time
+import numpy as np
+
+# 🗺️ Доска последних цен в общей памяти (mmap-файл фиксированной раскладки).
+# Пишет один процесс приёма цен, читают сколько угодно процессов (API, арбитраж) без БД и без копирования.
+#
+# Раскладка файла:
+#   заголовок  64 байта: magic, version, capacity, count
+#   ключи      capacity × 48 байт: exchange (16) + symbol (32), слот = номер ключа
+#   слоты      capacity × 24 байта: seq (u64), price (f64), ts (f64)
+#
+# Seqlock: писатель делает seq нечётным, пишет price/ts, делает seq чётным.
+# Читатель повторяет чтение, если seq нечётный или изменился за время чтения.
+PRICE_BOARD_PATH = os.path.join("/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir(),
+                                "arbitrage_prices.board")
+PRICE_BOARD_CAPACITY = 65536      # (биржа, символ) — 9 бирж × несколько тысяч пар с запасом
+PRICE_BOARD_STALE_AFTER = 30      # доска без тиков дольше (сек) считается остановившейся
+SPIN_RETRIES = 16                 # столько раз перечитываем подряд, дальше уступаем CPU писателю
+READ_RETRIES = 10000
+
+MAGIC = b"PRBOARD1"
+VERSION = 1
+HEADER = struct.Struct("<8sIII")
+HEADER_SIZE = 64
+COUNT_WORD = 4                    # count — пятое 4-байтовое слово заголовка (после magic, version и capacity)
+KEY_DTYPE = np.dtype([("exchange", "S16"), ("symbol", "S32")])
+SLOT_DTYPE = np.dtype([("seq", "<u8"), ("price", "<f8"), ("ts", "<f8")])
+
+
+class BoardFull(Exception):
+    """Все слоты доски заняты или ключ не помещается в слот."""
+
+
+def board_size(capacity: int) -> int:
+    return HEADER_SIZE + capacity * (KEY_DTYPE.itemsize + SLOT_DTYPE.itemsize)
+
+
+class PriceBoard:
+    """
+    📌 Доска цен поверх mmap.
+    writer=True — единственный писатель (процесс приёма цен): создаёт файл или продолжает существующий,
+    так что номера слотов стабильны между перезапусками. writer=False — читатель, файл только на чтение.
+    """
+
+    def __init__(self, path: str = PRICE_BOARD_PATH, capacity: int = PRICE_BOARD_CAPACITY, writer: bool = False):
+        self.path = path
+        self.writer = writer
+        if writer:
+            self._open_writer(capacity)
+        else:
+            self._open_reader()
+        self.capacity = HEADER.unpack_from(self._mm)[2]
+        keys_offset = HEADER_SIZE
+        self._slots_offset = keys_offset + self.capacity * KEY_DTYPE.itemsize
+        # Представления прямо над mmap, без копирования
+        self._keys = np.frombuffer(self._mm, KEY_DTYPE, self.capacity, keys_offset)
+        self._slots = np.frombuffer(self._mm, SLOT_DTYPE, self.capacity, self._slots_offset)
+        # count и слоты как машинные слова: каждое поле пишется одной выровненной записью.
+        # struct.pack_into не годится — он сначала зануляет байты, и читатель может увидеть seq == 0.
+        self._header = memoryview(self._mm)[:HEADER_SIZE].cast("I")
+        region = memoryview(self._mm)[self._slots_offset:]
+        self._words = region.cast("Q")
+        self._floats = region.cast("d")
+        self._index = {}          # (exchange, symbol) -> слот
+        self._by_symbol = {}      # symbol -> [(exchange, слот)]
+        self._names = []          # слот -> (exchange, symbol)
+        self._known = 0
+        self._refresh()
+        if writer:
+            # писатель мог умереть посреди записи — не оставляем слоты с нечётным seq навсегда
+            seq = self._slots["seq"]
+            seq[seq & 1 == 1] += 1
+
+        # 📊 Метрики
+        self.writes = 0
+        self.retries = 0
+        self.dropped = 0
+
+    def _open_writer(self, capacity: int):
+        size = board_size(capacity)
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            existing = os.fstat(fd).st_size
+            if existing >= HEADER_SIZE:
+                magic, version, old_capacity, _ = HEADER.unpack(os.pread(fd, HEADER.size, 0))
+                if magic == MAGIC and version == VERSION and existing == board_size(old_capacity):
+                    self._mm = mmap.mmap(fd, existing)
+                    return
+                logging.warning(f"⚠️ {self.path}: несовместимая доска цен, создаём заново")
+            os.ftruncate(fd, 0)
+            os.ftruncate(fd, size)
+            self._mm = mmap.mmap(fd, size)
+            HEADER.pack_into(self._mm, 0, MAGIC, VERSION, capacity, 0)
+        finally:
+            os.close(fd)
+
+    def _open_reader(self):
+        fd = os.open(self.path, os.O_RDONLY)
+        try:
+            self._mm = mmap.mmap(fd, 0, access=mmap.ACCESS_READ)
+        finally:
+            os.close(fd)
+        magic, version, capacity, _ = HEADER.unpack_from(self._mm)
+        if magic != MAGIC or version != VERSION or len(self._mm) != board_size(capacity):
+            self._mm.close()
+            raise ValueError(f"{self.path}: не доска цен или другая версия")
+
+    def close(self):
+        self._header.release()
+        self._words.release()
+        self._floats.release()
+        self._keys = self._slots = None
+        self._mm.close()
+
+    def __len__(self):
+        return self._header[COUNT_WORD]
+
+    def _refresh(self):
+        """Подхватывает ключи, добавленные писателем после прошлого обновления индекса."""
+        count = len(self)
+        for slot in range(self._known, count):
+            key = self._keys[slot]
+            exchange, symbol = key["exchange"].decode(), key["symbol"].decode()
+            self._index[(exchange, symbol)] = slot
+            self._by_symbol.setdefault(symbol, []).append((exchange, slot))
+            self._names.append((exchange, symbol))
+        self._known = count
+
+    def slot(self, exchange: str, symbol: str):
+        """Номер слота или None (читатель заново просматривает таблицу символов, если она выросла)."""
+        slot = self._index.get((exchange, symbol))
+        if slot is None and len(self) != self._known:
+            self._refresh()
+            slot = self._index.get((exchange, symbol))
+        return slot
+
+    def _allocate(self, exchange: str, symbol: str) -> int:
+        slot = len(self)
+        if slot >= self.capacity:
+            raise BoardFull(f"Доска цен заполнена ({self.capacity} слотов)")
+        key = (exchange.encode(), symbol.encode())
+        if len(key[0]) > KEY_DTYPE["exchange"].itemsize or len(key[1]) > KEY_DTYPE["symbol"].itemsize:
+            raise BoardFull(f"Ключ {exchange}/{symbol} длиннее поля таблицы символов")
+        self._keys[slot] = key
+        # count публикуется после ключа — читатель не увидит слот без имени
+        self._header[COUNT_WORD] = slot + 1
+        self._index[(exchange, symbol)] = slot
+        self._by_symbol.setdefault(symbol, []).append((exchange, slot))
+        self._names.append((exchange, symbol))
+        self._known = slot + 1
+        return slot
+
+    def write(self, exchange: str, symbol: str, price: float, ts: float = None):
+        """⚡ Запись цены (сигнатура подписчика price_store). Только из процесса-писателя."""
+        slot = self._index.get((exchange, symbol))
+        if slot is None:
+            try:
+                slot = self._allocate(exchange, symbol)
+            except BoardFull as e:
+                # Приём цен не должен падать из-за доски: цена всё равно уйдёт в БД через price_store
+                if not self.dropped:
+                    logging.warning(f"⚠️ {e}")
+                self.dropped += 1
+                return
+        words, floats, i = self._words, self._floats, slot * 3
+        seq = words[i]
+        words[i] = seq + 1
+        floats[i + 1] = price
+        floats[i + 2] = time.time() if ts is None else ts
+        words[i] = seq + 2
+        self.writes += 1
+
+    def _read_slot(self, slot: int):
+        words, floats, i = self._words, self._floats, slot * 3
+        for attempt in range(READ_RETRIES):
+            before = words[i]
+            if before & 1 == 0:
+                price, ts = floats[i + 1], floats[i + 2]
+                if words[i] == before:
+                    return (price, ts) if before else None
+            self.retries += 1
+            if attempt >= SPIN_RETRIES:
+                os.sched_yield()  # писатель мог быть вытеснен посреди записи (особенно на одном ядре)
+        raise TimeoutError(f"Слот {slot} доски цен постоянно перезаписывается")
+
+    def get(self, exchange: str, symbol: str):
+        """Возвращает (price, ts) или None — как LastPriceStore.get."""
+        slot = self.slot(exchange, symbol)
+        return None if slot is None else self._read_slot(slot)
+
+    def quotes(self, symbol: str) -> list:
+        """Все котировки символа: [(exchange, price, ts)]."""
+        if len(self) != self._known:
+            self._refresh()
+        quotes = []
+        for exchange, slot in self._by_symbol.get(symbol, ()):
+            value = self._read_slot(slot)
+            if value is not None:
+                quotes.append((exchange, *value))
+        return quotes
+
+    def _read_all(self):
+        """Векторное чтение всех слотов: (written, prices, timestamps); попавшие на запись перечитываются по одному."""
+        self._refresh()
+        count = self._known
+        slots = self._slots[:count]
+        before = slots["seq"].copy()
+        prices = slots["price"].copy()
+        timestamps = slots["ts"].copy()
+        torn = np.flatnonzero((before != slots["seq"]) | (before & 1 == 1))
+        for slot in torn:
+            prices[slot], timestamps[slot] = self._read_slot(int(slot)) or (np.nan, 0.0)
+        written = before > 0
+        written[torn] = ~np.isnan(prices[torn])
+        return written, prices, timestamps
+
+    def snapshot(self):
+        """📸 Согласованный снимок всей доски: (keys, prices, timestamps) как массивы numpy."""
+        written, prices, timestamps = self._read_all()
+        return self._keys[:len(written)][written], prices[written], timestamps[written]
+
+    def rows(self):
+        """[(exchange, symbol, price, ts)] по всем заполненным слотам."""
+        written, prices, timestamps = self._read_all()
+        names = self._names
+        return [names[slot] + (price, ts) for slot, price, ts in
+                zip(np.flatnonzero(written).tolist(), prices[written].tolist(), timestamps[written].tolist())]
+
+    def last_update(self) -> float:
+        """Время самого свежего тика на доске (0, если пусто)."""
+        count = len(self)
+        return float(self._slots["ts"][:count].max()) if count else 0.0
+
+    def is_live(self, stale_after: float = PRICE_BOARD_STALE_AFTER) -> bool:
+        """Писатель жив: на доске есть тики не старше stale_after секунд."""
+        return time.time() - self.last_update() < stale_after
+
+    def stats(self) -> dict:
+        return {"symbols": len(self), "capacity": self.capacity, "writes": self.writes, "retries": self.retries,
+                "dropped": self.dropped}
+
+
+def publish_to_board(store, path: str = PRICE_BOARD_PATH) -> PriceBoard:
+    """🔗 Открывает доску на запись и подписывает её на обновления стора (один писатель на файл)."""
+    board = PriceBoard(path, writer=True)
+    store.subscribe(board.write)
+    logging.info(f"🗺️ Доска цен: {path} ({len(board)} / {board.capacity} слотов)")
+    return board
+
+
+_reader = None
+
+
+def get_board(path: str = PRICE_BOARD_PATH):
+    """
+    📖 Читатель доски для процессов-потребителей или None, если писатель не запущен
+    (нет файла или тики давно не приходят) — тогда вызывающий идёт в БД.
+    """
+    global _reader
+    if _reader is None or _reader.path != path:
+        try:
+            _reader = PriceBoard(path)
+        except (FileNotFoundError, ValueError):
+            return None
+    return _reader if _reader.is_live() else None
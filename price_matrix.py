@@ -0,0 +1,154 @@
+from collections import namedtuple
+import numpy as np
+
+# 💸 Тейкерские комиссии бирж в % (пока без запросов к API)
+TAKER_FEES = {
+    "Binance": 0.1,
+    "Bybit": 0.1,
+    "Bitget": 0.1,
+    "Gateio": 0.2,
+    "HTX": 0.2,
+    "KuCoin": 0.1,
+    "MEXC": 0.05,
+    "OKX": 0.1,
+    "Poloniex": 0.2,
+}
+DEFAULT_TAKER_FEE = 0.2
+
+Opportunity = namedtuple(
+    "Opportunity", "asset buy_exchange sell_exchange buy_price sell_price gross_spread spread"
+)
+
+
+class PriceMatrix:
+    """
+    🧮 Цены в виде матрицы активы × биржи (NaN — нет котировки), обновляется точечно.
+    registry — строка матрицы = id актива реестра инструментов (assets / asset_index — его же структуры,
+    новые символы получают id в реестре); без реестра матрица нумерует активы сама (бэктест, тесты).
+    """
+
+    def __init__(self, exchanges=(), capacity: int = 1024, registry=None):
+        self.exchanges = []
+        self.exchange_index = {}
+        self.registry = registry
+        if registry is not None:
+            self.assets, self.asset_index = registry.assets, registry.asset_index
+        else:
+            self.assets, self.asset_index = [], {}
+        self._data = np.full((capacity, max(len(exchanges), 1)), np.nan)
+        for exchange in exchanges:
+            self.exchange_col(exchange)
+
+    @classmethod
+    def from_rows(cls, rows, exchanges=()):
+        matrix = cls(exchanges)
+        matrix.load(rows)
+        return matrix
+
+    @property
+    def prices(self) -> np.ndarray:
+        """Живое представление заполненной части матрицы (без копирования)."""
+        if len(self.assets) > self._data.shape[0]:   # реестр добавил активы в обход матрицы
+            self._grow(len(self.assets))
+        return self._data[:len(self.assets), :len(self.exchanges)]
+
+    def _grow(self, rows: int):
+        extra = np.full((max(rows, 2 * self._data.shape[0]) - self._data.shape[0], self._data.shape[1]), np.nan)
+        self._data = np.vstack([self._data, extra])
+
+    def exchange_col(self, exchange: str) -> int:
+        col = self.exchange_index.get(exchange)
+        if col is None:
+            col = len(self.exchanges)
+            if col >= self._data.shape[1]:
+                extra = np.full((self._data.shape[0], self._data.shape[1]), np.nan)
+                self._data = np.hstack([self._data, extra])
+            self.exchanges.append(exchange)
+            self.exchange_index[exchange] = col
+        return col
+
+    def asset_row(self, asset: str) -> int:
+        row = self.asset_index.get(asset)
+        if row is None:
+            if self.registry is not None:
+                row = self.registry.add_asset(asset)
+            else:
+                row = len(self.assets)
+                self.assets.append(asset)
+                self.asset_index[asset] = row
+        if row >= self._data.shape[0]:
+            self._grow(row + 1)
+        return row
+
+    def update(self, exchange: str, asset: str, price: float) -> int:
+        """⚡ Точечное обновление одной котировки. Возвращает строку актива."""
+        row = self.asset_row(asset)
+        col = self.exchange_col(exchange)
+        self._data[row, col] = price if price and price > 0 else np.nan
+        return row
+
+    def remove(self, exchange: str, asset: str):
+        row = self.asset_index.get(asset)
+        col = self.exchange_index.get(exchange)
+        if row is not None and col is not None:
+            self._data[row, col] = np.nan
+
+    def load(self, rows):
+        """🔄 Полная перезагрузка значений из (exchange, asset, price); индексы сохраняются."""
+        self._data.fill(np.nan)
+        for exchange, asset, price in rows:
+            self.update(exchange, asset, price)
+
+    def quoted_assets(self) -> int:
+        """Сколько активов котируются хотя бы на двух биржах."""
+        return int((np.count_nonzero(~np.isnan(self.prices), axis=1) > 1).sum())
+
+
+def fee_vector(exchanges, fees=None) -> np.ndarray:
+    fees = TAKER_FEES if fees is None else fees
+    return np.array([fees.get(exchange, DEFAULT_TAKER_FEE) for exchange in exchanges]) / 100
+
+
+def scan_spreads(matrix: PriceMatrix, min_spread: float = 3.0, top_k: int = None,
+                 fees: dict = None, rows=None) -> list:
+    """
+    ⚡ Ищет все прибыльные пары (buy, sell) по каждому активу за один векторный проход.
+    spread — спред после тейкерских комиссий на обеих биржах, gross_spread — без них.
+    rows: индексы строк активов (по умолчанию — вся матрица).
+    Возвращает top_k возможностей, отсортированных по убыванию spread.
+    """
+    prices = matrix.prices if rows is None else matrix.prices[rows]
+    if prices.size == 0:
+        return []
+    asset_rows = np.arange(prices.shape[0]) if rows is None else np.asarray(rows)
+
+    fee = fee_vector(matrix.exchanges, fees)
+    buy_cost = prices * (1 + fee)        # цена покупки с комиссией
+    sell_net = prices * (1 - fee)        # выручка продажи с комиссией
+
+    # [актив, биржа покупки, биржа продажи]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        spread = (sell_net[:, None, :] - buy_cost[:, :, None]) / buy_cost[:, :, None] * 100
+        found = spread >= min_spread
+    found &= ~np.eye(len(matrix.exchanges), dtype=bool)   # покупка и продажа на одной бирже — не пара
+    a, b, s = np.nonzero(found)
+    if a.size == 0:
+        return []
+
+    values = spread[a, b, s]
+    if top_k is not None and values.size > top_k:
+        keep = np.argpartition(-values, top_k - 1)[:top_k]
+        a, b, s, values = a[keep], b[keep], s[keep], values[keep]
+    order = np.argsort(-values, kind="stable")
+
+    a, b, s, values = a[order], b[order], s[order], values[order]
+    buy_prices = prices[a, b]
+    sell_prices = prices[a, s]
+    gross = (sell_prices - buy_prices) / buy_prices * 100
+    assets, exchanges = matrix.assets, matrix.exchanges
+    return [
+        Opportunity(assets[row], exchanges[buy], exchanges[sell], buy_price, sell_price, gross_spread, net_spread)
+        for row, buy, sell, buy_price, sell_price, gross_spread, net_spread in zip(
+            asset_rows[a].tolist(), b.tolist(), s.tolist(),
+            buy_prices.tolist(), sell_prices.tolist(), gross.tolist(), values.tolist())
+    ]
@@ -0,0 +1,134 @@
+import asyncio
+import logging
+import time
+from datetime import datetime
+from backend.database.db_connector import AsyncSessionLocal
+from backend.database.models import Price
+from backend.database.db_upsert import bulk_upsert_async
+
+
+class LastPriceStore:
+    """🧠 Последние цены в памяти по (exchange, symbol) с отложенной записью в БД (write-behind)."""
+
+    def __init__(self, flush_interval_ms: int = 500, session_factory=AsyncSessionLocal):
+        self.flush_interval_ms = flush_interval_ms
+        self.session_factory = session_factory
+        self._prices = {}        # (exchange, symbol) -> (price, ts)
+        self._dirty = set()      # ключи, изменённые с последнего сброса
+        self._dirty_since = None  # время самого старого несохранённого обновления
+        self._listeners = []      # подписчики на каждое обновление (событийный режим)
+
+        # 📊 Метрики
+        self.updates = 0
+        self.coalesced = 0       # обновления, перезаписавшие ещё не сохранённую цену
+        self.flushes = 0
+        self.flushed_rows = 0
+        self.flush_errors = 0
+        self.last_flush_lag_ms = 0.0
+        self.max_flush_lag_ms = 0.0
+
+    def update(self, exchange: str, symbol: str, price: float, ts: float = None):
+        """⚡ Синхронно обновляет цену в памяти. Никаких обращений к БД."""
+        key = (exchange, symbol)
+        if ts is None:
+            ts = time.time()
+        self._prices[key] = (price, ts)
+        self.updates += 1
+        if key in self._dirty:
+            self.coalesced += 1
+        else:
+            self._dirty.add(key)
+            if self._dirty_since is None:
+                self._dirty_since = ts
+        for listener in self._listeners:
+            listener(exchange, symbol, price, ts)
+
+    def subscribe(self, listener):
+        """🔔 listener(exchange, symbol, price, ts) вызывается синхронно на каждое обновление."""
+        self._listeners.append(listener)
+
+    def unsubscribe(self, listener):
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def get(self, exchange: str, symbol: str):
+        """Возвращает (price, ts) или None."""
+        return self._prices.get((exchange, symbol))
+
+    def __len__(self):
+        return len(self._prices)
+
+    def take_dirty(self):
+        """Забирает изменённые записи и сбрасывает dirty-набор."""
+        rows = [(exchange, symbol) + self._prices[(exchange, symbol)] for exchange, symbol in self._dirty]
+        dirty_since = self._dirty_since
+        self._dirty = set()
+        self._dirty_since = None
+        return rows, dirty_since
+
+    def _restore_dirty(self, rows, dirty_since):
+        """Возвращает строки в dirty-набор после неудачной записи."""
+        for exchange, symbol, _, _ in rows:
+            self._dirty.add((exchange, symbol))
+        if self._dirty_since is None or (dirty_since and dirty_since < self._dirty_since):
+            self._dirty_since = dirty_since
+
+    async def write_rows(self, rows):
+        """💾 Записывает пачку цен в таблицу prices одним bulk upsert (асинхронный драйвер — тики не ждут БД)."""
+        async with self.session_factory() as db:
+            try:
+                await bulk_upsert_async(db, Price, [
+                    {"exchange": exchange, "asset": symbol, "price": price,
+                     "timestamp": datetime.utcfromtimestamp(ts)}
+                    for exchange, symbol, price, ts in rows
+                ], keys=("exchange", "asset"))
+                await db.commit()
+            except Exception:
+                await db.rollback()
+                raise
+
+    async def flush(self):
+        """🔄 Сбрасывает все изменённые цены в БД. Возвращает количество записанных строк."""
+        rows, dirty_since = self.take_dirty()
+        if not rows:
+            return 0
+        try:
+            await self.write_rows(rows)
+        except Exception as e:
+            self.flush_errors += 1
+            self._restore_dirty(rows, dirty_since)
+            logging.error(f"❌ Ошибка записи цен в БД ({len(rows)} строк): {e}")
+            return 0
+
+        self.flushes += 1
+        self.flushed_rows += len(rows)
+        self.last_flush_lag_ms = (time.time() - dirty_since) * 1000
+        self.max_flush_lag_ms = max(self.max_flush_lag_ms, self.last_flush_lag_ms)
+        return len(rows)
+
+    async def run_flusher(self):
+        """⏱️ Фоновая задача: сбрасывает изменённые цены каждые flush_interval_ms."""
+        try:
+            while True:
+                await asyncio.sleep(self.flush_interval_ms / 1000)
+                await self.flush()
+        finally:
+            await self.flush()
+
+    def stats(self) -> dict:
+        """📊 Метрики стора: объём обновлений, склейки и задержка сброса."""
+        return {
+            "symbols": len(self._prices),
+            "dirty": len(self._dirty),
+            "updates": self.updates,
+            "coalesced": self.coalesced,
+            "flushes": self.flushes,
+            "flushed_rows": self.flushed_rows,
+            "flush_errors": self.flush_errors,
+            "last_flush_lag_ms": round(self.last_flush_lag_ms, 1),
+            "max_flush_lag_ms": round(self.max_flush_lag_ms, 1),
+        }
+
+
+# Общий стор для всех websocket-обработчиков процесса
+price_store = LastPriceStore()
@@ -1,92 +1,172 @@
 import asyncio
-import requests
-import random
-from sqlalchemy.orm import Session
-from backend.database.db_connector import get_db
+import time
+import aiohttp
+from backend.database.db_connector import AsyncSessionLocal
 from backend.database.models import Price
+from backend.database.db_upsert import bulk_upsert_async
+from backend.core.exchange_adapters import ADAPTERS
+from backend.core.instruments import registry
+from datetime import datetime
 
 # 🔗 API URL для всех бирж
-EXCHANGE_APIS = {
-    "Binance": "https://api.binance.com/api/v3/ticker/price",
-    "Bybit": "https://api.bybit.com/v5/market/tickers?category=spot",
-    "Bitget": "https://api.bitget.com/api/v2/spot/market/tickers",
-    "Gateio": "https://api.gateio.ws/api/v4/spot/tickers",
-    "HTX": "https://api.huobi.pro/market/tickers",
-    "KuCoin": "https://api.kucoin.com/api/v1/market/allTickers",
-    "MEXC": "https://api.mexc.com/api/v3/ticker/price",
-    "OKX": "https://www.okx.com/api/v5/market/tickers?instType=SPOT",
-    "Poloniex": "https://api.poloniex.com/markets/price"
+EXCHANGE_APIS = {name: adapter.ticker_url for name, adapter in ADAPTERS.items()}
+
+# 🚦 Минимальный интервал между запросами к одной бирже (сек) вместо случайных пауз
+RATE_LIMITS = {
+    "Binance": 1.0,
+    "Bybit": 1.0,
+    "Bitget": 1.0,
+    "Gateio": 1.0,
+    "HTX": 1.0,
+    "KuCoin": 2.0,
+    "MEXC": 1.0,
+    "OKX": 1.0,
+    "Poloniex": 2.0,
 }
+DEFAULT_RATE_LIMIT = 2.0
+
+POLL_INTERVAL = 60        # пауза между циклами опроса (сек)
+REQUEST_TIMEOUT = 10      # таймаут одного запроса (сек)
+MAX_CONNECTIONS = 20      # размер пула соединений aiohttp
+
+
+class RateLimiter:
+    """🚦 Пропускает не больше одного запроса в min_interval секунд."""
+
+    def __init__(self, min_interval: float):
+        self.min_interval = min_interval
+        self._next_at = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self):
+        async with self._lock:
+            now = time.monotonic()
+            delay = self._next_at - now
+            if delay > 0:
+                await asyncio.sleep(delay)
+            self._next_at = max(now, self._next_at) + self.min_interval
+
+
+rate_limiters = {}
+
+# 📊 Метрики опроса по биржам: задержка ответа, свежесть данных, ошибки
+exchange_metrics = {}
+
+
+def get_rate_limiter(exchange_name: str) -> RateLimiter:
+    limiter = rate_limiters.get(exchange_name)
+    if limiter is None:
+        limiter = rate_limiters[exchange_name] = RateLimiter(RATE_LIMITS.get(exchange_name, DEFAULT_RATE_LIMIT))
+    return limiter
+
+
+def record_metrics(exchange_name: str, latency_ms: float = None, pairs: int = None, error: str = None):
+    metrics = exchange_metrics.setdefault(exchange_name, {
+        "latency_ms": None, "pairs": 0, "last_success": None, "errors": 0, "last_error": None,
+    })
+    if error is not None:
+        metrics["errors"] += 1
+        metrics["last_error"] = error
+        return
+    metrics["latency_ms"] = round(latency_ms, 1)
+    metrics["pairs"] = pairs
+    metrics["last_success"] = time.time()
+
+
+def get_metrics() -> dict:
+    """📊 Метрики по биржам + возраст последних успешных данных (freshness)."""
+    now = time.time()
+    return {
+        exchange: dict(metrics, age_s=round(now - metrics["last_success"], 1) if metrics["last_success"] else None)
+        for exchange, metrics in exchange_metrics.items()
+    }
 
-async def fetch_prices(exchange_name, api_url):
-    """🔄 Запрашивает цены с биржи через REST API и обновляет базу данных"""
-    db = next(get_db())
-    
-    # ⏱️ Добавим рандомную задержку перед каждым запросом (для обхода rate limit)
-    await asyncio.sleep(random.uniform(3.0, 5.0))
 
+def parse_tickers(exchange_name: str, data) -> list:
+    """🔄 Превращает ответ биржи в строки для таблицы prices."""
+    adapter = ADAPTERS.get(exchange_name)
+    if adapter is None:
+        return []
+    now = datetime.utcnow()
+    return [
+        {"exchange": exchange_name, "asset": symbol, "price": price, "timestamp": now}
+        for symbol, price in adapter.parse_tickers(data)
+    ]
+
+
+async def fetch_prices(session: aiohttp.ClientSession, exchange_name: str, api_url: str):
+    """🔄 Запрашивает цены с биржи через REST API (неблокирующе). Возвращает строки или None."""
+    await get_rate_limiter(exchange_name).wait()
+
+    started = time.perf_counter()
     try:
-        response = requests.get(api_url, timeout=10)
-        response.raise_for_status()
-        data = response.json()
-
-        if isinstance(data, list):  
-            prices = data
-        elif isinstance(data, dict) and "data" in data:
-            prices = data["data"]  
-        elif isinstance(data, dict) and "result" in data and "list" in data["result"]:
-            prices = data["result"]["list"]  
-        else:
-            print(f"⚠ Неизвестный формат данных {exchange_name}: {data}")
-            return
-
-        print(f"✅ Обновляю {exchange_name} ({len(prices)} пар)")
-
-        for ticker in prices:
-            try:
-                if exchange_name == "Binance":
-                    symbol, price = ticker["symbol"], float(ticker["price"])
-                elif exchange_name == "Bybit":
-                    symbol, price = ticker["symbol"], float(ticker["lastPrice"])
-                elif exchange_name == "Bitget":
-                    symbol, price = ticker["symbol"], float(ticker["lastPr"])
-                elif exchange_name == "Gateio":
-                    symbol, price = ticker["currency_pair"].replace("_", "").upper(), float(ticker["last"])
-                elif exchange_name == "HTX":
-                    symbol, price = ticker["symbol"].upper(), float(ticker["close"])
-                elif exchange_name == "KuCoin":
-                    symbol, price = ticker["symbol"].replace("-", "").upper(), float(ticker["last"])
-                elif exchange_name == "MEXC":
-                    symbol, price = ticker["symbol"].upper(), float(ticker["price"])
-                elif exchange_name == "OKX":
-                    symbol, price = ticker["instId"].replace("-", "").upper(), float(ticker["last"])
-                elif exchange_name == "Poloniex":
-                    symbol, price = ticker.get("symbol", "").replace("_", "").upper(), float(ticker.get("price", 0))
-                else:
-                    continue  
-
-                # Запись в БД
-                existing_price = db.query(Price).filter(Price.exchange == exchange_name, Price.asset == symbol).first()
-                if existing_price:
-                    existing_price.price = price
-                else:
-                    db.add(Price(exchange=exchange_name, asset=symbol, price=price))
-
-            except (KeyError, ValueError, TypeError) as e:
-                print(f"❌ Ошибка обработки {exchange_name} (пара {ticker}): {e}")
-
-        db.commit()
-        print(f"✅ Цены {exchange_name} обновлены в БД")
-
-    except requests.exceptions.RequestException as e:
+        async with session.get(api_url) as response:
+            response.raise_for_status()
+            data = await response.json(content_type=None)
+    except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:   # ValueError — не JSON (HTML, техработы)
+        record_metrics(exchange_name, error=str(e) or type(e).__name__)
         print(f"❌ Ошибка {exchange_name}: {e}")
+        return None
+
+    latency_ms = (time.perf_counter() - started) * 1000
+    rows = parse_tickers(exchange_name, data)
+    record_metrics(exchange_name, latency_ms=latency_ms, pairs=len(rows))
+    print(f"✅ Обновляю {exchange_name} ({len(rows)} пар, {latency_ms:.0f} мс)")
+    return rows
+
+
+async def poll_once(session: aiohttp.ClientSession, apis: dict = None) -> dict:
+    """⚡ Опрашивает все биржи параллельно. Возвращает {биржа: строки}; сбой одной биржи не прерывает опрос."""
+    apis = apis or EXCHANGE_APIS
+    results = await asyncio.gather(*(
+        fetch_prices(session, exchange, api_url) for exchange, api_url in apis.items()
+    ), return_exceptions=True)
+    polled = {}
+    for exchange, rows in zip(apis, results):
+        if isinstance(rows, Exception):
+            record_metrics(exchange, error=str(rows) or type(rows).__name__)
+            print(f"❌ Ошибка {exchange}: {rows!r}")
+        elif rows:
+            polled[exchange] = rows
+    return polled
+
+
+async def save_prices(rows: list):
+    """💾 Записывает цены всех бирж в БД одним пакетом (асинхронно — опрос бирж не стоит на время записи)."""
+    if not rows:
+        return
+    async with AsyncSessionLocal() as db:
+        await bulk_upsert_async(db, Price, rows, keys=("exchange", "asset"))
+        await db.commit()
+
+
+async def poll_and_save(session: aiohttp.ClientSession, apis: dict = None) -> dict:
+    """🔁 Один цикл: опрос бирж и запись в БД (ошибка БД логируется, следующий цикл перезапишет цены)."""
+    results = await poll_once(session, apis)
+    try:
+        await save_prices([row for rows in results.values() for row in rows])
+    except Exception as e:
+        print(f"❌ Ошибка записи цен в БД: {e}")
+    else:
+        print(f"✅ Цены обновлены в БД: {', '.join(results)}")
+    return results
+
+
+def create_session() -> aiohttp.ClientSession:
+    """🌐 Общий HTTP-клиент с пулом соединений."""
+    return aiohttp.ClientSession(
+        connector=aiohttp.TCPConnector(limit=MAX_CONNECTIONS, ttl_dns_cache=300),
+        timeout=aiohttp.ClientTimeout(total=REQUEST_TIMEOUT),
+    )
+
 
 async def update_prices():
-    """🔄 Фоновая задача для обновления цен каждые 10 секунд"""
-    while True:
-        for exchange, api_url in EXCHANGE_APIS.items():
-            await fetch_prices(exchange, api_url)
-        await asyncio.sleep(60)
+    """🔄 Фоновая задача: параллельный опрос всех бирж каждые POLL_INTERVAL секунд"""
+    async with create_session() as session:
+        await registry.ensure(session)
+        while True:
+            await poll_and_save(session)
+            await asyncio.sleep(POLL_INTERVAL)
 
 if __name__ == "__main__":
     asyncio.run(update_prices())
@@ -0,0 +1,347 @@
+import base64
+import bisect
+import hashlib
+import json
+import time
+from datetime import datetime, timedelta, timezone
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy import or_, select, tuple_ # type: ignore
+from sqlalchemy.ext.asyncio import AsyncSession # type: ignore
+from backend.core.price_board import get_board
+from backend.database.db_connector import get_async_db
+from backend.database.models import Price, ArbitrageSignal, PriceCandle
+
+try:
+    import orjson  # сериализует datetime и numpy без default=, в разы быстрее json
+except ImportError:
+    orjson = None
+
+# 📚 Чтение цен и сигналов для дашборда: курсорная пагинация, фильтры, выбор колонок,
+# сортировка и короткий кэш готовых ответов с ETag / If-None-Match.
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 1000
+CACHE_TTL = 1.0           # сек: дашборд, опрашивающий раз в секунду, почти всегда попадает в кэш
+CACHE_MAX_ENTRIES = 512
+
+PRICE_FIELDS = ("exchange", "asset", "price", "timestamp")
+PRICE_SORTS = ("exchange", "asset", "price", "timestamp")
+SIGNAL_FIELDS = ("id", "asset", "buy_exchange", "sell_exchange", "buy_price", "sell_price",
+                 "spread", "size_usdt", "type", "timestamp")
+SIGNAL_SORTS = ("spread", "timestamp", "id")
+CANDLE_PERIODS = {"1s": 1, "1m": 60, "1h": 3600}   # периоды, которые ведёт tick_history
+MAX_CANDLES = 1000        # свечей на биржу за запрос; без явного period берётся самый мелкий, что укладывается
+DEFAULT_CANDLE_SPAN = timedelta(hours=1)
+
+
+def dumps(data) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data, separators=(",", ":"), default=str).encode()
+
+
+class ResponseCache:
+    """🗄️ Готовые JSON-ответы по (путь, параметры) на ttl секунд; ETag — хэш тела."""
+
+    def __init__(self, ttl: float = CACHE_TTL, max_entries: int = CACHE_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = {}   # key -> (etag, body, expires)
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+
+    async def get(self, key, build):
+        """(etag, body): из кэша, если не истёк, иначе await build() -> сериализация."""
+        now = time.monotonic()
+        entry = self._entries.get(key)
+        if entry is not None and entry[2] > now:
+            self.hits += 1
+            return entry[0], entry[1]
+        self.misses += 1
+        body = dumps(await build())
+        etag = f'"{hashlib.blake2b(body, digest_size=8).hexdigest()}"'
+        if len(self._entries) >= self.max_entries:
+            self._entries = {k: e for k, e in self._entries.items() if e[2] > now}
+            if len(self._entries) >= self.max_entries:
+                self._entries.clear()
+        self._entries[key] = (etag, body, now + self.ttl)
+        return etag, body
+
+    async def respond(self, request: Request, build) -> Response:
+        """Ответ с ETag; если клиент прислал тот же If-None-Match — 304 без тела."""
+        key = (request.url.path, tuple(sorted(request.query_params.multi_items())))
+        etag, body = await self.get(key, build)
+        headers = {"ETag": etag, "Cache-Control": f"max-age={self.ttl:g}"}
+        if request.headers.get("if-none-match") == etag:
+            self.not_modified += 1
+            return Response(status_code=304, headers=headers)
+        return Response(body, media_type="application/json", headers=headers)
+
+    def stats(self) -> dict:
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses,
+                "not_modified": self.not_modified}
+
+
+cache = ResponseCache()
+
+
+def parse_list(value: str):
+    """"Binance,OKX" -> ["Binance", "OKX"]; пусто — без фильтра."""
+    return [item for item in value.split(",") if item] if value else None
+
+
+def parse_fields(value: str, allowed) -> list:
+    fields = parse_list(value) or list(allowed)
+    unknown = [field for field in fields if field not in allowed]
+    if unknown:
+        raise HTTPException(400, f"Неизвестные поля: {', '.join(unknown)}")
+    return fields
+
+
+def parse_sort(value: str, allowed, default: str):
+    """"-spread" -> ("spread", True); True — по убыванию."""
+    value = value or default
+    field, desc = value.lstrip("-"), value.startswith("-")
+    if field not in allowed:
+        raise HTTPException(400, f"Сортировка возможна по: {', '.join(allowed)}")
+    return field, desc
+
+
+def encode_cursor(values) -> str:
+    return base64.urlsafe_b64encode(dumps(list(values))).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort_field: str) -> tuple:
+    """Курсор -> ключ последней строки страницы; timestamp возвращается как datetime."""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        if sort_field == "timestamp":
+            values[0] = datetime.fromisoformat(values[0])
+        return tuple(values)
+    except (ValueError, TypeError, IndexError):
+        raise HTTPException(400, "Некорректный курсор")
+
+
+def keyset(columns, key, desc: bool):
+    """Условие "строго после key" в порядке сортировки (сравнение кортежей)."""
+    return tuple_(*columns) < key if desc else tuple_(*columns) > key
+
+
+async def page_query(db: AsyncSession, query, order_columns, fields, cursor, sort_field, desc, limit):
+    """
+    📄 Keyset-пагинация в SQL: WHERE (sort, tiebreak...) > курсор ORDER BY ... LIMIT n+1.
+    Курсор кодирует ключ последней строки, поэтому глубокие страницы не дороже первой.
+    """
+    if cursor:
+        query = query.where(keyset(order_columns, decode_cursor(cursor, sort_field), desc))
+    query = query.order_by(*[column.desc() if desc else column.asc() for column in order_columns])
+    rows = (await db.execute(query.limit(limit + 1))).all()
+    key_names = [column.key for column in order_columns]
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(getattr(rows[-1], name) for name in key_names)
+    return [{field: getattr(row, field) for field in fields} for row in rows], next_cursor
+
+
+def page_rows(rows, key_names, fields, cursor, sort_field, desc, limit):
+    """То же для строк в памяти (доска цен): сортировка по ключу и бинарный поиск курсора."""
+    keys = [tuple(row[name] for name in key_names) for row in rows]
+    order = sorted(range(len(rows)), key=keys.__getitem__, reverse=desc)
+    start = 0
+    if cursor:
+        after = decode_cursor(cursor, sort_field)
+        ordered = [keys[i] for i in order]
+        if desc:
+            start = len(ordered) - bisect.bisect_left(ordered[::-1], after)
+        else:
+            start = bisect.bisect_right(ordered, after)
+    page = order[start:start + limit]
+    next_cursor = encode_cursor(keys[page[-1]]) if page and start + limit < len(order) else None
+    return [{field: rows[i][field] for field in fields} for i in page], next_cursor
+
+
+def board_prices(board, exchanges, assets) -> list:
+    return [
+        {"exchange": exchange, "asset": asset, "price": price, "timestamp": datetime.utcfromtimestamp(ts)}
+        for exchange, asset, price, ts in board.rows()
+        if (exchanges is None or exchange in exchanges) and (assets is None or asset in assets)
+    ]
+
+
+async def list_prices(db: AsyncSession, exchange=None, asset=None, fields=None, sort=None, cursor=None,
+                limit=DEFAULT_LIMIT) -> dict:
+    """💲 Страница цен: с доски цен, если писатель жив, иначе из таблицы prices."""
+    exchanges, assets = parse_list(exchange), parse_list(asset)
+    fields = parse_fields(fields, PRICE_FIELDS)
+    sort_field, desc = parse_sort(sort, PRICE_SORTS, "exchange")
+    key_names = list(dict.fromkeys([sort_field, "exchange", "asset"]))  # сортировка + уникальный ключ пары
+
+    board = get_board()
+    if board is not None:
+        data, next_cursor = page_rows(board_prices(board, exchanges, assets), key_names, fields,
+                                      cursor, sort_field, desc, limit)
+    else:
+        columns = {name: getattr(Price, name) for name in PRICE_FIELDS}
+        query = select(*[columns[name] for name in dict.fromkeys(fields + key_names)])
+        if exchanges:
+            query = query.where(Price.exchange.in_(exchanges))
+        if assets:
+            query = query.where(Price.asset.in_(assets))
+        data, next_cursor = await page_query(db, query, [columns[name] for name in key_names], fields,
+                                       cursor, sort_field, desc, limit)
+    return {"data": data, "next_cursor": next_cursor, "count": len(data)}
+
+
+async def list_signals(db: AsyncSession, exchange=None, asset=None, min_spread: float = None, signal_type: str = None,
+                 fields=None, sort=None, cursor=None, limit=DEFAULT_LIMIT) -> dict:
+    """📈 Страница сигналов; фильтр по бирже совпадает с любой из двух бирж сигнала."""
+    exchanges, assets = parse_list(exchange), parse_list(asset)
+    fields = parse_fields(fields, SIGNAL_FIELDS)
+    sort_field, desc = parse_sort(sort, SIGNAL_SORTS, "-spread")
+    key_names = list(dict.fromkeys([sort_field, "id"]))
+
+    query = select(*[getattr(ArbitrageSignal, name) for name in dict.fromkeys(fields + key_names)])
+    if exchanges:
+        query = query.where(or_(ArbitrageSignal.buy_exchange.in_(exchanges),
+                                 ArbitrageSignal.sell_exchange.in_(exchanges)))
+    if assets:
+        query = query.where(ArbitrageSignal.asset.in_(assets))
+    if min_spread is not None:
+        query = query.where(ArbitrageSignal.spread >= min_spread)
+    if signal_type:
+        query = query.where(ArbitrageSignal.type == signal_type)
+    data, next_cursor = await page_query(db, query, [getattr(ArbitrageSignal, name) for name in key_names], fields,
+                                   cursor, sort_field, desc, limit)
+    return {"data": data, "next_cursor": next_cursor, "count": len(data)}
+
+
+async def symbol_quotes(db: AsyncSession, symbol: str) -> list:
+    """Котировки символа со всех бирж, от дешёвой к дорогой: индекс доски или ix_prices_asset."""
+    board = get_board()
+    quotes = board.quotes(symbol) if board is not None else []
+    if quotes:
+        rows = [{"exchange": exchange, "price": price, "timestamp": datetime.utcfromtimestamp(ts)}
+                for exchange, price, ts in quotes]
+    else:
+        result = await db.execute(select(Price.exchange, Price.price, Price.timestamp).where(Price.asset == symbol))
+        rows = [{"exchange": exchange, "price": price, "timestamp": timestamp} for exchange, price, timestamp in result]
+    return sorted(rows, key=lambda row: (row["price"], row["exchange"]))
+
+
+def utc_naive(value: datetime) -> datetime:
+    """В БД время хранится как naive UTC."""
+    return value.astimezone(timezone.utc).replace(tzinfo=None) if value.tzinfo else value
+
+
+def pick_period(span: timedelta, period: str = None) -> int:
+    if period is not None:
+        if period not in CANDLE_PERIODS:
+            raise HTTPException(400, f"Период свечей: {', '.join(CANDLE_PERIODS)}")
+        seconds = CANDLE_PERIODS[period]
+        if span.total_seconds() / seconds > MAX_CANDLES:
+            raise HTTPException(400, f"Больше {MAX_CANDLES} свечей {period} — сузьте диапазон или укрупните период")
+        return seconds
+    for seconds in sorted(CANDLE_PERIODS.values()):
+        if span.total_seconds() / seconds <= MAX_CANDLES:
+            return seconds
+    return max(CANDLE_PERIODS.values())
+
+
+async def list_candles(db: AsyncSession, symbol: str, exchange=None, period: str = None, start: datetime = None,
+                       end: datetime = None) -> dict:
+    """🕯️ Свечи символа за [start, end) со статистикой спреда по биржам — из price_candles, не из сырых тиков."""
+    end = utc_naive(end) if end else datetime.utcnow()
+    start = utc_naive(start) if start else end - DEFAULT_CANDLE_SPAN
+    if start >= end:
+        raise HTTPException(400, "start должен быть раньше end")
+    seconds = pick_period(end - start, period)
+    first = datetime.utcfromtimestamp(start.replace(tzinfo=timezone.utc).timestamp() // seconds * seconds)
+
+    query = (select(PriceCandle.exchange, PriceCandle.start, PriceCandle.open, PriceCandle.high, PriceCandle.low,
+                    PriceCandle.close, PriceCandle.ticks, PriceCandle.spread_min, PriceCandle.spread_max,
+                    PriceCandle.spread_sum, PriceCandle.spread_count)
+             .where(PriceCandle.asset == symbol, PriceCandle.period == seconds,
+                    PriceCandle.start >= first, PriceCandle.start < end)
+             .order_by(PriceCandle.exchange, PriceCandle.start))
+    exchanges = parse_list(exchange)
+    if exchanges:
+        query = query.where(PriceCandle.exchange.in_(exchanges))
+
+    candles, spread = [], {}
+    for row in await db.execute(query):
+        candles.append({"exchange": row.exchange, "start": row.start, "open": row.open, "high": row.high,
+                        "low": row.low, "close": row.close, "ticks": row.ticks, "spread_min": row.spread_min,
+                        "spread_max": row.spread_max,
+                        "spread_avg": row.spread_sum / row.spread_count if row.spread_count else None})
+        if row.spread_count:
+            stats = spread.setdefault(row.exchange, {"min": row.spread_min, "max": row.spread_max, "sum": 0.0, "count": 0})
+            stats["min"] = min(stats["min"], row.spread_min)
+            stats["max"] = max(stats["max"], row.spread_max)
+            stats["sum"] += row.spread_sum
+            stats["count"] += row.spread_count
+    return {
+        "symbol": symbol, "period": next(name for name, value in CANDLE_PERIODS.items() if value == seconds),
+        "start": start, "end": end, "candles": candles,
+        "spread": {exchange: {"min": stats["min"], "max": stats["max"], "avg": stats["sum"] / stats["count"],
+                              "ticks": stats["count"]} for exchange, stats in spread.items()},
+    }
+
+
+router = APIRouter()
+
+
+# 📊 Получение цен (страницами)
+@router.get("/prices")
+async def get_prices(request: Request, exchange: str = None, asset: str = None, fields: str = None, sort: str = None,
+               cursor: str = None, limit: int = DEFAULT_LIMIT, db: AsyncSession = Depends(get_async_db)):
+    """?exchange=Binance,OKX&asset=BTCUSDT&fields=asset,price&sort=-price&limit=100&cursor=..."""
+    limit = max(1, min(limit, MAX_LIMIT))
+    return await cache.respond(request, lambda: list_prices(db, exchange, asset, fields, sort, cursor, limit))
+
+
+# 📈 Получение цены для конкретного актива
+@router.get("/price/{symbol}")
+async def get_price(symbol: str, db: AsyncSession = Depends(get_async_db)):
+    """Самая дешёвая котировка символа (детерминированно; все биржи — /quotes/{symbol})."""
+    quotes = await symbol_quotes(db, symbol)
+    if quotes:
+        return {"symbol": symbol, "price": quotes[0]["price"], "exchange": quotes[0]["exchange"]}
+    return {"error": "Asset not found"}
+
+
+# 🔎 Котировки одного символа на всех биржах
+@router.get("/quotes/{symbol}")
+async def get_quotes(request: Request, symbol: str, db: AsyncSession = Depends(get_async_db)):
+    async def build():
+        quotes = await symbol_quotes(db, symbol)
+        if not quotes:
+            raise HTTPException(404, "Asset not found")
+        low, high = quotes[0]["price"], quotes[-1]["price"]
+        return {"symbol": symbol, "quotes": quotes,
+                "spread": round((high - low) / low * 100, 4) if low > 0 else None}
+    return await cache.respond(request, build)
+
+
+# 📊 Получение арбитражных сигналов (страницами)
+@router.get("/arbitrage")
+async def get_arbitrage_signals(request: Request, exchange: str = None, asset: str = None, min_spread: float = None,
+                          signal_type: str = Query(None, alias="type"), fields: str = None, sort: str = None, cursor: str = None,
+                          limit: int = DEFAULT_LIMIT, db: AsyncSession = Depends(get_async_db)):
+    """?min_spread=0.5&exchange=OKX&sort=-spread&fields=asset,spread&limit=50&cursor=..."""
+    limit = max(1, min(limit, MAX_LIMIT))
+    return await cache.respond(request, lambda: list_signals(db, exchange, asset, min_spread, signal_type, fields, sort,
+                                                       cursor, limit))
+
+
+# 🕯️ Свечи и статистика спреда символа за период
+@router.get("/candles/{symbol}")
+async def get_candles(request: Request, symbol: str, exchange: str = None, period: str = None, start: datetime = None,
+                      end: datetime = None, db: AsyncSession = Depends(get_async_db)):
+    """?period=1m&start=2026-01-01T00:00:00&end=2026-01-01T06:00:00&exchange=Binance,OKX"""
+    return await cache.respond(request, lambda: list_candles(db, symbol, exchange, period, start, end))
+
+
+@router.get("/cache/stats")
+async def cache_stats():
+    return cache.stats()
@@ -1,26 +1,75 @@
-def check_risk(asset: str, buy_exchange: str, sell_exchange: str, buy_price: float, sell_price: float, max_fee=0.5):
-    """⚠ Проверяет риски арбитражной сделки."""
-    
-    # 📉 Проверяем разницу цены (слишком резкий скачок?)
-    price_diff = abs(sell_price - buy_price) / buy_price * 100
-    if price_diff > 10:
-        print(f"⚠ Слишком резкое изменение цены {asset}: {price_diff}%")
-        return False
-    
-    # 💸 Проверяем комиссии (если комиссия выше 0.5%, сделка невыгодная)
-    trading_fee = 0.1  # TODO: Запрашивать реальную комиссию с API
-    withdrawal_fee = 0.2  # TODO: Запрашивать реальные данные
-
-    total_fee = trading_fee + withdrawal_fee
-    if total_fee > max_fee:
-        print(f"❌ Слишком высокая комиссия для {asset}: {total_fee}%")
-        return False
-
-    # ⏳ Проверяем скорость вывода (если долго - пропускаем)
-    withdrawal_time = 30  # TODO: Запрашивать реальные данные в минутах
-    if withdrawal_time > 60:
-        print(f"⚠ Долгое время вывода {asset} с {buy_exchange} -> {sell_exchange}: {withdrawal_time} минут")
-        return False
-
-    print(f"✅ Сделка безопасна: {asset} ({buy_exchange} -> {sell_exchange})")
-    return True
+import numpy as np
+from backend.core.exchange_adapters import split_symbol
+from backend.core.fee_metadata import fee_metadata
+from backend.core.instruments import registry
+from backend.core.price_board import get_board
+from backend.core.price_store import price_store
+
+MAX_PRICE_DIFF = 10.0            # %, больше — подозрительный скачок цены
+MAX_FEE = 1.0                    # %, тейкер обеих сторон + вывод
+MAX_WITHDRAWAL_MINUTES = 60
+RISK_SIZE_USDT = 1000            # размер сделки, к которому приводится фиксированная комиссия вывода
+DEFAULT_WITHDRAWAL_FEE = 0.2     # %, нет данных о сетях монеты
+DEFAULT_WITHDRAWAL_MINUTES = 30
+USD_QUOTES = {"USDT", "USDC", "FDUSD", "TUSD", "BUSD", "DAI", "USD"}   # цена пары уже в долларах
+
+
+def instrument_coins(asset: str, exchange: str) -> tuple:
+    """🪙 (base, quote) инструмента по реестру, иначе разбором символа (quote None — не разбирается)."""
+    instrument = registry.find(exchange, asset)
+    if instrument is not None:
+        return instrument.base, instrument.quote
+    return split_symbol(asset) or (asset, None)
+
+
+def transfer_coin(asset: str, exchange: str) -> str:
+    """🪙 Монета, которая переводится между биржами: base инструмента (BTCUSDT -> BTC)."""
+    return instrument_coins(asset, exchange)[0]
+
+
+def usd_price(coin: str, exchange: str):
+    """💵 Последняя цена coin/USDT на бирже: доска цен (приём в другом процессе), затем price_store; None — нет."""
+    symbol = coin + "USDT"
+    board = get_board()
+    quote = board.get(exchange, symbol) if board is not None else None
+    quote = quote or price_store.get(exchange, symbol)
+    return quote[0] if quote else None
+
+
+def check_risk_batch(candidates, max_fee=MAX_FEE, metadata=fee_metadata, size_usdt=RISK_SIZE_USDT,
+                     usd_price=usd_price) -> np.ndarray:
+    """
+    ⚠ Риски пачки кандидатов (asset, buy_exchange, sell_exchange, buy_price, sell_price, ...) за один вызов.
+    Возвращает булев массив: True — сделка проходит по скачку цены, комиссиям и времени вывода.
+    usd_price(coin, exchange) — цена base в USDT для пар с недолларовой котировкой (ETHBTC).
+    """
+    if not len(candidates):
+        return np.zeros(0, dtype=bool)
+    routes, trading_fee, base_usd = [], [], []
+    for asset, buy_exchange, sell_exchange, buy_price, *_ in candidates:
+        base, quote = instrument_coins(asset, buy_exchange)
+        routes.append(metadata.route(base, buy_exchange, sell_exchange))
+        trading_fee.append(metadata.taker_fee(buy_exchange) + metadata.taker_fee(sell_exchange))
+        base_usd.append(buy_price if quote in USD_QUOTES else usd_price(base, buy_exchange))
+    base_usd = np.array(base_usd, dtype=np.float64)   # None — цены base в USDT нет (NaN)
+    buy_price = np.fromiter((c[3] for c in candidates), dtype=np.float64, count=len(candidates))
+    sell_price = np.fromiter((c[4] for c in candidates), dtype=np.float64, count=len(candidates))
+    withdraw_fee, minutes = np.array([(r.fee, r.minutes) for r in routes], dtype=np.float64).T
+
+    # 📉 Разница цены (слишком резкий скачок?)
+    price_diff = np.abs(sell_price - buy_price) / buy_price * 100
+    # 💸 Комиссии: тейкер на обеих биржах + вывод (монеты base -> USDT -> % от сделки);
+    # нет сети — inf, нет данных или цены base в USDT — по умолчанию
+    with np.errstate(invalid="ignore"):
+        withdrawal_fee = withdraw_fee * base_usd / size_usdt * 100
+    total_fee = np.asarray(trading_fee) + np.where(np.isnan(withdrawal_fee), DEFAULT_WITHDRAWAL_FEE, withdrawal_fee)
+    # ⏳ Скорость вывода
+    minutes = np.where(np.isnan(minutes), DEFAULT_WITHDRAWAL_MINUTES, minutes)
+
+    return (price_diff <= MAX_PRICE_DIFF) & (total_fee <= max_fee) & (minutes <= MAX_WITHDRAWAL_MINUTES)
+
+
+def check_risk(asset: str, buy_exchange: str, sell_exchange: str, buy_price: float, sell_price: float,
+               max_fee=MAX_FEE) -> bool:
+    """⚠ Проверяет риски одной арбитражной сделки."""
+    return bool(check_risk_batch([(asset, buy_exchange, sell_exchange, buy_price, sell_price)], max_fee)[0])
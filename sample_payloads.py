@@ -0,0 +1,266 @@
+# 📼 Записанные ответы бирж (урезанные) — для тестов и бенчмарков без сети
+
+# REST: список тикеров по всем парам
+REST_TICKERS = {
+    "Binance": [
+        {"symbol": "BTCUSDT", "price": "67250.01000000"},
+        {"symbol": "ETHUSDT", "price": "3512.44000000"},
+        {"symbol": "SOLUSDT", "price": "151.23000000"},
+        {"symbol": "ETHBTC", "price": "0.05223000"},
+    ],
+    "Bybit": {
+        "retCode": 0,
+        "retMsg": "OK",
+        "result": {
+            "category": "spot",
+            "list": [
+                {"symbol": "BTCUSDT", "bid1Price": "67249.9", "ask1Price": "67250", "lastPrice": "67250.5", "volume24h": "8123.4"},
+                {"symbol": "ETHUSDT", "bid1Price": "3512.1", "ask1Price": "3512.2", "lastPrice": "3512.15", "volume24h": "61234.1"},
+                {"symbol": "SOLUSDT", "bid1Price": "151.2", "ask1Price": "151.21", "lastPrice": "151.2", "volume24h": "512345.2"},
+            ],
+        },
+        "time": 1718000000000,
+    },
+    "Bitget": {
+        "code": "00000",
+        "msg": "success",
+        "data": [
+            {"symbol": "BTCUSDT", "lastPr": "67251.2", "bidPr": "67251.1", "askPr": "67251.3"},
+            {"symbol": "ETHUSDT", "lastPr": "3512.9", "bidPr": "3512.8", "askPr": "3513"},
+            {"symbol": "SOLUSDT", "lastPr": "151.25", "bidPr": "151.24", "askPr": "151.26"},
+        ],
+    },
+    "Gateio": [
+        {"currency_pair": "BTC_USDT", "last": "67248.3", "lowest_ask": "67248.4", "highest_bid": "67248.3"},
+        {"currency_pair": "ETH_USDT", "last": "3511.87", "lowest_ask": "3511.88", "highest_bid": "3511.87"},
+        {"currency_pair": "SOL_USDT", "last": "151.19", "lowest_ask": "151.2", "highest_bid": "151.19"},
+    ],
+    "HTX": {
+        "status": "ok",
+        "ts": 1718000000000,
+        "data": [
+            {"symbol": "btcusdt", "open": 66800.0, "close": 67249.1, "bid": 67249.0, "ask": 67249.2},
+            {"symbol": "ethusdt", "open": 3490.0, "close": 3512.6, "bid": 3512.5, "ask": 3512.7},
+            {"symbol": "solusdt", "open": 150.1, "close": 151.22, "bid": 151.21, "ask": 151.23},
+        ],
+    },
+    "KuCoin": {
+        "code": "200000",
+        "data": {
+            "time": 1718000000000,
+            "ticker": [
+                {"symbol": "BTC-USDT", "last": "67250.7", "buy": "67250.6", "sell": "67250.7"},
+                {"symbol": "ETH-USDT", "last": "3512.31", "buy": "3512.3", "sell": "3512.31"},
+                {"symbol": "SOL-USDT", "last": "151.234", "buy": "151.233", "sell": "151.234"},
+            ],
+        },
+    },
+    "MEXC": [
+        {"symbol": "BTCUSDT", "price": "67252.03"},
+        {"symbol": "ETHUSDT", "price": "3512.98"},
+        {"symbol": "SOLUSDT", "price": "151.27"},
+    ],
+    "OKX": {
+        "code": "0",
+        "msg": "",
+        "data": [
+            {"instType": "SPOT", "instId": "BTC-USDT", "last": "67249.8", "bidPx": "67249.7", "askPx": "67249.8"},
+            {"instType": "SPOT", "instId": "ETH-USDT", "last": "3512.01", "bidPx": "3512", "askPx": "3512.01"},
+            {"instType": "SPOT", "instId": "SOL-USDT", "last": "151.21", "bidPx": "151.2", "askPx": "151.21"},
+        ],
+    },
+    "Poloniex": [
+        {"symbol": "BTC_USDT", "price": "67255.12", "time": 1718000000000},
+        {"symbol": "ETH_USDT", "price": "3513.4", "time": 1718000000000},
+        {"symbol": "SOL_USDT", "price": "151.3", "time": 1718000000000},
+    ],
+}
+
+# REST: стакан BTCUSDT (5 уровней)
+_BIDS = [["67249.9", "0.512"], ["67249.5", "1.204"], ["67248.0", "0.350"], ["67247.1", "2.010"], ["67245.0", "4.800"]]
+_ASKS = [["67250.0", "0.431"], ["67250.6", "0.905"], ["67251.2", "1.700"], ["67252.8", "0.220"], ["67255.0", "3.300"]]
+
+REST_ORDERBOOKS = {
+    "Binance": {"lastUpdateId": 51234567890, "bids": _BIDS, "asks": _ASKS},
+    "Bybit": {"retCode": 0, "result": {"s": "BTCUSDT", "b": _BIDS, "a": _ASKS, "ts": 1718000000000, "u": 1234567}},
+    "Bitget": {"code": "00000", "data": {"bids": _BIDS, "asks": _ASKS, "ts": "1718000000000"}},
+    "Gateio": {"id": 1234567890, "current": 1718000000000, "bids": _BIDS, "asks": _ASKS},
+    "HTX": {"status": "ok", "ch": "market.btcusdt.depth.step0",
+            "tick": {"bids": [[float(p), float(q)] for p, q in _BIDS], "asks": [[float(p), float(q)] for p, q in _ASKS]}},
+    "KuCoin": {"code": "200000", "data": {"sequence": "1234567", "bids": _BIDS, "asks": _ASKS}},
+    "MEXC": {"lastUpdateId": 1234567, "bids": _BIDS, "asks": _ASKS},
+    "OKX": {"code": "0", "data": [{"bids": [b + ["0", "3"] for b in _BIDS], "asks": [a + ["0", "2"] for a in _ASKS], "ts": "1718000000000"}]},
+    "Poloniex": {"time": 1718000000000, "bids": [x for level in _BIDS for x in level], "asks": [x for level in _ASKS for x in level]},
+}
+
+# REST: списки инструментов (base / quote, шаг цены и лота, статус торгов)
+REST_INSTRUMENTS = {
+    "Binance": {"timezone": "UTC", "symbols": [
+        {"symbol": "BTCUSDT", "status": "TRADING", "baseAsset": "BTC", "quoteAsset": "USDT", "filters": [
+            {"filterType": "PRICE_FILTER", "minPrice": "0.01", "tickSize": "0.01000000"},
+            {"filterType": "LOT_SIZE", "minQty": "0.00001", "stepSize": "0.00001000"}]},
+        {"symbol": "ETHBTC", "status": "TRADING", "baseAsset": "ETH", "quoteAsset": "BTC", "filters": [
+            {"filterType": "PRICE_FILTER", "tickSize": "0.00001000"}, {"filterType": "LOT_SIZE", "stepSize": "0.00010000"}]},
+        {"symbol": "LUNAUSDT", "status": "BREAK", "baseAsset": "LUNA", "quoteAsset": "USDT", "filters": []},
+    ]},
+    "Bybit": {"retCode": 0, "result": {"category": "spot", "list": [
+        {"symbol": "BTCUSDT", "baseCoin": "BTC", "quoteCoin": "USDT", "status": "Trading",
+         "lotSizeFilter": {"basePrecision": "0.000001"}, "priceFilter": {"tickSize": "0.01"}},
+    ]}},
+    "Bitget": {"code": "00000", "data": [
+        {"symbol": "BTCUSDT", "baseCoin": "BTC", "quoteCoin": "USDT", "status": "online",
+         "pricePrecision": "2", "quantityPrecision": "6"},
+    ]},
+    "Gateio": [
+        {"id": "BTC_USDT", "base": "BTC", "quote": "USDT", "precision": 1, "amount_precision": 6, "trade_status": "tradable"},
+        {"id": "ETH_BTC", "base": "ETH", "quote": "BTC", "precision": 6, "amount_precision": 4, "trade_status": "untradable"},
+    ],
+    "HTX": {"status": "ok", "data": [
+        {"symbol": "btcusdt", "base-currency": "btc", "quote-currency": "usdt", "price-precision": 2,
+         "amount-precision": 6, "state": "online"},
+    ]},
+    "KuCoin": {"code": "200000", "data": [
+        {"symbol": "BTC-USDT", "baseCurrency": "BTC", "quoteCurrency": "USDT", "priceIncrement": "0.1",
+         "baseIncrement": "0.00000001", "enableTrading": True},
+    ]},
+    "MEXC": {"timezone": "CST", "symbols": [
+        {"symbol": "BTCUSDT", "status": "1", "baseAsset": "BTC", "quoteAsset": "USDT", "quotePrecision": 2,
+         "baseSizePrecision": "0.000001"},
+    ]},
+    "OKX": {"code": "0", "data": [
+        {"instId": "BTC-USDT", "baseCcy": "BTC", "quoteCcy": "USDT", "tickSz": "0.1", "lotSz": "0.00000001", "state": "live"},
+        {"instId": "ETH-BTC", "baseCcy": "ETH", "quoteCcy": "BTC", "tickSz": "0.00001", "lotSz": "0.000001", "state": "live"},
+    ]},
+    "Poloniex": [
+        {"symbol": "BTC_USDT", "baseCurrencyName": "BTC", "quoteCurrencyName": "USDT", "state": "NORMAL",
+         "symbolTradeLimit": {"priceScale": 2, "quantityScale": 6}},
+    ],
+}
+
+# REST: сети и комиссии вывода по валютам (публичные эндпоинты)
+REST_FEES = {
+    "Bitget": {"code": "00000", "data": [
+        {"coin": "BTC", "chains": [
+            {"chain": "BTC", "withdrawable": "true", "rechargeable": "true", "withdrawFee": "0.0002",
+             "depositConfirm": "1", "withdrawConfirm": "1"},
+            {"chain": "BEP20", "withdrawable": "false", "rechargeable": "true", "withdrawFee": "0.0000051",
+             "depositConfirm": "15", "withdrawConfirm": "15"}]},
+        {"coin": "USDT", "chains": [
+            {"chain": "TRC20", "withdrawable": "true", "rechargeable": "true", "withdrawFee": "1.5",
+             "depositConfirm": "19", "withdrawConfirm": "19"}]},
+    ]},
+    "HTX": {"code": 200, "data": [
+        {"currency": "btc", "instStatus": "normal", "chains": [
+            {"chain": "btc", "displayName": "BTC", "baseChain": "BTC", "numOfConfirmations": 2,
+             "depositStatus": "allowed", "withdrawStatus": "allowed", "transactFeeWithdraw": "0.0004"},
+            {"chain": "hbtc", "displayName": "HECO", "baseChain": "HECO", "numOfConfirmations": 30,
+             "depositStatus": "prohibited", "withdrawStatus": "allowed", "transactFeeWithdraw": "0.00001"}]},
+    ]},
+    "KuCoin": {"code": "200000", "data": [
+        {"currency": "BTC", "chains": [
+            {"chainName": "BTC", "chainId": "btc", "withdrawalMinFee": "0.0005", "isWithdrawEnabled": True,
+             "isDepositEnabled": True, "confirms": 2},
+            {"chainName": "BEP20", "chainId": "bsc", "withdrawalMinFee": "0.00001", "isWithdrawEnabled": True,
+             "isDepositEnabled": True, "confirms": 20}]},
+        {"currency": "USDT", "chains": [
+            {"chainName": "TRC20", "chainId": "trx", "withdrawalMinFee": "1", "isWithdrawEnabled": True,
+             "isDepositEnabled": True, "confirms": 20},
+            {"chainName": "ERC20", "chainId": "eth", "withdrawalMinFee": "4", "isWithdrawEnabled": True,
+             "isDepositEnabled": True, "confirms": 64}]},
+        {"currency": "NOCHAIN", "chains": None},
+    ]},
+    "Poloniex": [
+        {"coin": "USDT", "networkList": [
+            {"blockchain": "TRON", "withdrawalEnable": True, "depositEnable": True, "withdrawFee": "2",
+             "minConfirm": 20},
+            {"blockchain": "ETH", "withdrawalEnable": True, "depositEnable": False, "withdrawFee": "5",
+             "minConfirm": 64}]},
+    ],
+}
+
+# WS: типичные тикерные сообщения (уже разобранный JSON; HTX приходит gzip-сжатым)
+WS_FRAMES = {
+    "Binance": [
+        {"e": "24hrTicker", "E": 1718000000000, "s": "BTCUSDT", "p": "450.1", "P": "0.674", "w": "66990.2",
+         "x": "66800.0", "c": "67250.01", "Q": "0.010", "b": "67250.00", "B": "1.2", "a": "67250.01", "A": "0.4",
+         "o": "66799.9", "h": "67400.0", "l": "66500.0", "v": "21000.5", "q": "1406000000.1",
+         "O": 1717913600000, "C": 1718000000000, "F": 1, "L": 2, "n": 2},
+        {"e": "24hrTicker", "E": 1718000000000, "s": "ETHUSDT", "p": "22.4", "P": "0.642", "w": "3500.1",
+         "x": "3490.0", "c": "3512.44", "Q": "0.5", "b": "3512.43", "B": "10.1", "a": "3512.44", "A": "3.2",
+         "o": "3490.0", "h": "3530.0", "l": "3480.0", "v": "310000.5", "q": "1085000000.0",
+         "O": 1717913600000, "C": 1718000000000, "F": 1, "L": 2, "n": 2},
+    ],
+    "Bybit": {"topic": "tickers.BTCUSDT", "ts": 1718000000000, "type": "snapshot", "cs": 123456789,
+              "data": {"symbol": "BTCUSDT", "lastPrice": "67250.5", "highPrice24h": "67400", "lowPrice24h": "66500",
+                       "prevPrice24h": "66800", "volume24h": "8123.4", "turnover24h": "545000000", "price24hPcnt": "0.0067"}},
+    "OKX": {"arg": {"channel": "tickers", "instId": "BTC-USDT"},
+            "data": [{"instType": "SPOT", "instId": "BTC-USDT", "last": "67249.8", "lastSz": "0.01",
+                      "askPx": "67249.8", "askSz": "0.3", "bidPx": "67249.7", "bidSz": "1.1", "open24h": "66800",
+                      "high24h": "67400", "low24h": "66500", "ts": "1718000000000"}]},
+    "KuCoin": {"type": "message", "topic": "/market/ticker:all", "subject": "BTC-USDT",
+               "data": {"bestAsk": "67250.7", "bestAskSize": "0.2", "bestBid": "67250.6", "bestBidSize": "0.8",
+                        "price": "67250.7", "sequence": "1234567", "size": "0.001", "time": 1718000000000}},
+    "Gateio": {"time": 1718000000, "time_ms": 1718000000000, "channel": "spot.tickers", "event": "update",
+               "result": {"currency_pair": "BTC_USDT", "last": "67248.3", "lowest_ask": "67248.4",
+                          "highest_bid": "67248.3", "change_percentage": "0.67", "base_volume": "4321.1",
+                          "quote_volume": "290000000", "high_24h": "67400", "low_24h": "66500"}},
+    "HTX": {"ch": "market.btcusdt.ticker", "ts": 1718000000000,
+            "tick": {"open": 66800.0, "high": 67400.0, "low": 66500.0, "close": 67249.1, "amount": 5123.4,
+                     "vol": 344000000.0, "count": 123456, "bid": 67249.0, "bidSize": 0.5, "ask": 67249.2, "askSize": 0.7}},
+    "MEXC": {"c": "spot@public.deals.v3.api@BTCUSDT", "s": "BTCUSDT", "t": 1718000000000,
+             "d": {"deals": [{"S": 1, "p": "67252.03", "t": 1718000000000, "v": "0.0021"},
+                             {"S": 2, "p": "67252.01", "t": 1718000000001, "v": "0.0150"}],
+                   "e": "spot@public.deals.v3.api"}},
+    "Bitget": {"action": "snapshot", "arg": {"instType": "SP", "channel": "ticker", "instId": "BTCUSDT"},
+               "data": [{"instId": "BTCUSDT", "lastPr": "67251.2", "open24h": "66800", "high24h": "67400",
+                         "low24h": "66500", "bidPr": "67251.1", "askPr": "67251.3", "ts": "1718000000000"}]},
+    "Poloniex": {"channel": "ticker",
+                 "data": [{"symbol": "BTC_USDT", "dailyChange": "0.0067", "high": "67400", "amount": "345000000",
+                           "quantity": "5120", "tradeCount": 12345, "low": "66500", "closeTime": 1718000000000,
+                           "startTime": 1717913600000, "close": "67255.12", "open": "66800", "ts": 1718000000000}]},
+}
+
+
+def make_binance_ticker_arr(n: int) -> list:
+    """Синтетический кадр !ticker@arr на n пар (формат как в WS_FRAMES['Binance'])."""
+    template = WS_FRAMES["Binance"][0]
+    return [dict(template, s=f"COIN{i}USDT", c=f"{1 + i * 0.001:.6f}") for i in range(n)]
+
+
+# WS: диффы стакана, записанные подряд (Binance — после REST-снапшота lastUpdateId=51234567890,
+# с пропуском 51234567896..899; OKX — снапшот из канала, затем разрыв prevSeqId)
+WS_DEPTH_DIFFS = {
+    "Binance": [
+        {"e": "depthUpdate", "E": 1718000000100, "s": "BTCUSDT", "U": 51234567880, "u": 51234567884,
+         "b": [["67249.9", "0.100"]], "a": []},
+        {"e": "depthUpdate", "E": 1718000000200, "s": "BTCUSDT", "U": 51234567885, "u": 51234567892,
+         "b": [["67249.9", "0.700"], ["67248.0", "0"]], "a": [["67250.0", "0.500"]]},
+        {"e": "depthUpdate", "E": 1718000000300, "s": "BTCUSDT", "U": 51234567893, "u": 51234567895,
+         "b": [["67250.3", "0.250"]], "a": [["67250.6", "0"]]},
+        {"e": "depthUpdate", "E": 1718000000400, "s": "BTCUSDT", "U": 51234567900, "u": 51234567902,
+         "b": [["67249.5", "2.000"]], "a": [["67250.0", "0.600"]]},
+        {"e": "depthUpdate", "E": 1718000000500, "s": "BTCUSDT", "U": 51234567903, "u": 51234567906,
+         "b": [["67250.4", "0.150"]], "a": [["67250.0", "0"], ["67250.9", "1.100"]]},
+        {"e": "depthUpdate", "E": 1718000000600, "s": "BTCUSDT", "U": 51234567907, "u": 51234567910,
+         "b": [["67245.0", "0"]], "a": [["67251.2", "2.500"]]},
+    ],
+    "OKX": [
+        {"arg": {"channel": "books", "instId": "BTC-USDT"}, "action": "snapshot",
+         "data": [{"bids": [b + ["0", "3"] for b in _BIDS], "asks": [a + ["0", "2"] for a in _ASKS],
+                   "ts": "1718000000000", "prevSeqId": -1, "seqId": 100}]},
+        {"arg": {"channel": "books", "instId": "BTC-USDT"}, "action": "update",
+         "data": [{"bids": [["67249.9", "0.9", "0", "4"]], "asks": [], "ts": "1718000000100",
+                   "prevSeqId": 100, "seqId": 101}]},
+        {"arg": {"channel": "books", "instId": "BTC-USDT"}, "action": "update",
+         "data": [{"bids": [], "asks": [], "ts": "1718000000200", "prevSeqId": 101, "seqId": 101}]},
+        {"arg": {"channel": "books", "instId": "BTC-USDT"}, "action": "update",
+         "data": [{"bids": [], "asks": [["67250.0", "0", "0", "0"]], "ts": "1718000000300",
+                   "prevSeqId": 105, "seqId": 106}]},
+    ],
+}
+
+
+def make_levels(mid: float, depth: int, step: float = 0.0001, side: str = "asks") -> list:
+    """Синтетические уровни стакана [[price, qty], ...] от лучшей цены вглубь."""
+    sign = 1 if side == "asks" else -1
+    return [[f"{mid * (1 + sign * step * (i + 1)):.8f}", f"{0.5 + (i % 7) * 0.25:.4f}"] for i in range(depth)]
@@ -0,0 +1,156 @@
+import argparse
+import asyncio
+import logging
+import multiprocessing
+import time
+from backend.core.price_store import price_store
+from backend.core.price_board import publish_to_board
+from backend.core.tick_history import record_history
+from backend.core.archive import archive_ticks
+from backend.core.instruments import registry
+from backend.core.websocket_connector import WebSocketSupervisor
+from backend.core.websocket_price_updater import FEEDS, SHARDABLE, build_connector
+
+# 🧵 Многопроцессный приём цен: биржи (и доли символов внутри биржи) раскладываются по воркерам,
+# воркеры отдают нормализованные тики родителю по pipe пачками
+MONITOR_INTERVAL = 1  # как часто проверяем, живы ли воркеры (сек)
+
+
+def parse_shards(items) -> dict:
+    """["Bybit=2", "OKX=3"] -> {"Bybit": 2, "OKX": 3}."""
+    shards = {}
+    for item in items or ():
+        exchange, _, count = item.partition("=")
+        if exchange not in FEEDS:
+            raise ValueError(f"Неизвестная биржа: {exchange}")
+        shards[exchange] = max(1, int(count or 1))
+    return shards
+
+
+def plan_shards(exchanges, shards: dict, workers: int) -> list:
+    """
+    Раскладывает шарды (exchange, index, count) по воркерам по кругу.
+    Биржи с общим потоком на все пары (Binance !ticker@arr, KuCoin, HTX ...) делить нельзя — у них один шард.
+    """
+    specs = []
+    for exchange in exchanges:
+        count = shards.get(exchange, 1)
+        if count > 1 and exchange not in SHARDABLE:
+            logging.warning(f"⚠️ {exchange}: поток общий на все пары, шардирование не поддерживается")
+            count = 1
+        specs.extend((exchange, index, count) for index in range(count))
+    workers = max(1, min(workers, len(specs)))
+    return [specs[i::workers] for i in range(workers)]
+
+
+def pipe_sink(exchange: str, conn):
+    """Sink воркера: пачка (symbol, price) -> одно сообщение [(exchange, symbol, price, ts)] в pipe."""
+    def sink(batch):
+        now = time.time()
+        conn.send([(exchange, symbol, price, now) for symbol, price in batch])
+    return sink
+
+
+async def _worker_main(specs, conn):
+    await registry.ensure()   # кеш на диске уже обновил родительский процесс
+    connectors = [build_connector(exchange, (index, count), sink=pipe_sink(exchange, conn))
+                  for exchange, index, count in specs]
+    await WebSocketSupervisor(connectors).run()
+
+
+def run_worker(specs, conn):
+    """Точка входа процесса-воркера: свой event loop и свои WS-подключения."""
+    try:
+        asyncio.run(_worker_main(specs, conn))
+    except KeyboardInterrupt:
+        pass
+
+
+class ShardedIngestion:
+    """
+    🧭 Родительский процесс: запускает воркеры по плану, читает их pipe из event loop
+    и публикует тики в store (по умолчанию общий price_store). Упавший воркер перезапускается.
+    """
+
+    def __init__(self, plan, store=price_store, target=run_worker):
+        self.plan = plan
+        self.store = store
+        self.target = target
+        self.processes = [None] * len(plan)
+        self.connections = [None] * len(plan)
+        self.ticks = [0] * len(plan)
+        self.restarts = 0
+
+    def _start(self, i: int):
+        receiver, sender = multiprocessing.Pipe(duplex=False)
+        process = multiprocessing.Process(target=self.target, args=(self.plan[i], sender), daemon=True)
+        process.start()
+        sender.close()  # у родителя остаётся только читающий конец
+        self.processes[i] = process
+        self.connections[i] = receiver
+        loop = asyncio.get_running_loop()
+        loop.add_reader(receiver.fileno(), self._drain, i)
+        logging.info(f"🧵 Воркер {i}: {', '.join(f'{e}[{n + 1}/{c}]' for e, n, c in self.plan[i])}")
+
+    def _stop(self, i: int):
+        receiver, process = self.connections[i], self.processes[i]
+        if receiver is not None:
+            asyncio.get_running_loop().remove_reader(receiver.fileno())
+            receiver.close()
+        if process is not None and process.is_alive():
+            process.terminate()
+            process.join(timeout=5)
+
+    def _drain(self, i: int):
+        receiver, update = self.connections[i], self.store.update
+        try:
+            while receiver.poll():
+                batch = receiver.recv()
+                for exchange, symbol, price, ts in batch:
+                    update(exchange, symbol, price, ts)
+                self.ticks[i] += len(batch)
+        except (EOFError, OSError):
+            asyncio.get_running_loop().remove_reader(receiver.fileno())  # воркер умер — перезапустит монитор
+
+    async def run(self):
+        """🔄 Работает, пока не отменят; при выходе останавливает воркеры."""
+        for i in range(len(self.plan)):
+            self._start(i)
+        try:
+            while True:
+                await asyncio.sleep(MONITOR_INTERVAL)
+                for i, process in enumerate(self.processes):
+                    if not process.is_alive():
+                        logging.error(f"❌ Воркер {i} завершился (код {process.exitcode}), перезапуск")
+                        self._stop(i)
+                        self._start(i)
+                        self.restarts += 1
+        finally:
+            for i in range(len(self.plan)):
+                self._stop(i)
+
+    def stats(self) -> dict:
+        return {"workers": len(self.plan), "ticks": sum(self.ticks), "ticks_per_worker": list(self.ticks),
+                "restarts": self.restarts}
+
+
+async def main(exchanges=None, shards=None, workers: int = None):
+    """🚀 Шардированный приём цен; доску цен, историю и архив тиков и сброс в БД ведёт родительский процесс."""
+    await registry.ensure()
+    publish_to_board(price_store)
+    history = record_history(price_store)
+    archiver = archive_ticks(price_store)
+    plan = plan_shards(exchanges or list(FEEDS), shards or {}, workers or multiprocessing.cpu_count())
+    await asyncio.gather(ShardedIngestion(plan).run(), price_store.run_flusher(), history.run_flusher(),
+                         archiver.run())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Многопроцессный приём цен с бирж")
+    parser.add_argument("--workers", type=int, default=multiprocessing.cpu_count(),
+                        help="число процессов-воркеров (по умолчанию — число ядер)")
+    parser.add_argument("--shards", nargs="*", default=[], metavar="EXCHANGE=N",
+                        help=f"сколько шардов по символам на биржу; делятся только {', '.join(SHARDABLE)}")
+    parser.add_argument("--exchanges", nargs="*", default=None, help="какие биржи запускать (по умолчанию все)")
+    args = parser.parse_args()
+    asyncio.run(main(args.exchanges, parse_shards(args.shards), args.workers))
@@ -0,0 +1,172 @@
+import threading
+from collections import namedtuple
+from datetime import datetime
+from sqlalchemy import insert, tuple_ # type: ignore
+from sqlalchemy.orm import Session # type: ignore
+from backend.database.db_upsert import bulk_upsert
+from backend.database.models import ArbitrageSignal, SignalHistory
+
+# 🔄 Жизненный цикл сигналов в памяти: opened -> updated -> closed. Каждый скан сравнивается с состоянием,
+# в БД одним пакетом уходят только изменения: upsert открытых / заметно изменившихся, DELETE закрытых и их
+# строки в signal_history (длительность, спред при открытии / пиковый / последний). Сигнал закрывается, когда
+# его актив проверен (scope), а сигнала в результате нет. Состояние поднимается из arbitrage_signals при старте.
+SPREAD_EPSILON = 0.01   # п.п.; меньшие изменения спреда не переписывают строку в БД
+
+SIGNAL_KEY = (ArbitrageSignal.asset, ArbitrageSignal.buy_exchange, ArbitrageSignal.sell_exchange)
+SIGNAL_COLUMNS = ("buy_price", "sell_price", "spread", "size_usdt", "timestamp")
+
+Changes = namedtuple("Changes", "opened updated closed")
+
+
+class SignalState:
+    """📍 Открытый сигнал: последние значения, время открытия и пиковый спред."""
+
+    __slots__ = ("asset", "buy_exchange", "sell_exchange", "type", "buy_price", "sell_price", "spread",
+                 "size_usdt", "opened_at", "updated_at", "closed_at", "open_spread", "peak_spread", "updates")
+
+    def __init__(self, signal, opened_at: datetime):
+        self.asset = signal.asset
+        self.buy_exchange = signal.buy_exchange
+        self.sell_exchange = signal.sell_exchange
+        self.type = signal.type
+        self.opened_at = opened_at
+        self.open_spread = self.peak_spread = signal.spread
+        self.closed_at = None
+        self.updates = 0
+        self.set(signal)
+
+    @property
+    def key(self) -> tuple:
+        return self.asset, self.buy_exchange, self.sell_exchange
+
+    @property
+    def duration(self) -> float:
+        return ((self.closed_at or self.updated_at) - self.opened_at).total_seconds()
+
+    def set(self, signal):
+        self.buy_price = signal.buy_price
+        self.sell_price = signal.sell_price
+        self.spread = signal.spread
+        self.size_usdt = signal.size_usdt
+        self.updated_at = signal.timestamp or datetime.utcnow()
+
+    def changed(self, signal) -> bool:
+        return abs(signal.spread - self.spread) >= SPREAD_EPSILON or signal.size_usdt != self.size_usdt
+
+    def row(self) -> dict:
+        return {"asset": self.asset, "buy_exchange": self.buy_exchange, "sell_exchange": self.sell_exchange,
+                "buy_price": self.buy_price, "sell_price": self.sell_price, "spread": self.spread,
+                "size_usdt": self.size_usdt, "type": self.type, "timestamp": self.updated_at}
+
+    def history_row(self) -> dict:
+        return {"asset": self.asset, "buy_exchange": self.buy_exchange, "sell_exchange": self.sell_exchange,
+                "type": self.type, "opened_at": self.opened_at, "closed_at": self.closed_at,
+                "duration_s": self.duration, "open_spread": self.open_spread, "peak_spread": self.peak_spread,
+                "close_spread": self.spread, "size_usdt": self.size_usdt, "updates": self.updates}
+
+
+class SignalTracker:
+    """
+    🔄 Открытые сигналы одного типа в памяти и их разница со сканом.
+    min_spread — сигналы ниже порога считаются пропавшими (закрываются).
+    """
+
+    def __init__(self, signal_type: str = "межбиржевой", min_spread: float = 0.0):
+        self.signal_type = signal_type
+        self.min_spread = min_spread
+        self.active = {}      # (asset, buy_exchange, sell_exchange) -> SignalState
+        self._by_asset = {}   # asset -> {ключ}
+        self.loaded = False
+        self.lock = threading.Lock()   # process_candidates и сверка идут из разных потоков
+        self.opened = self.updated = self.closed = 0
+
+    def __len__(self):
+        return len(self.active)
+
+    def _add(self, state: SignalState):
+        self.active[state.key] = state
+        self._by_asset.setdefault(state.asset, set()).add(state.key)
+
+    def _remove(self, state: SignalState):
+        del self.active[state.key]
+        keys = self._by_asset[state.asset]
+        keys.discard(state.key)
+        if not keys:
+            del self._by_asset[state.asset]
+
+    def load(self, db: Session):
+        """📂 Открытые сигналы из arbitrage_signals (время открытия до рестарта неизвестно — берётся timestamp)."""
+        self.active, self._by_asset = {}, {}
+        for signal in db.query(ArbitrageSignal).filter(ArbitrageSignal.type == self.signal_type):
+            self._add(SignalState(signal, signal.timestamp or datetime.utcnow()))
+        self.loaded = True
+
+    def invalidate(self):
+        """Транзакция не прошла — состояние перечитается из БД при следующем скане."""
+        self.loaded = False
+
+    def diff(self, signals, scope=None, now: datetime = None) -> Changes:
+        """
+        🔍 Применяет скан к состоянию. scope — проверенные активы (None — все): открытые сигналы этих активов,
+        которых нет в signals, закрываются. Возвращает Changes со списками SignalState.
+        """
+        now = now or datetime.utcnow()
+        opened, updated, seen = [], [], set()
+        for signal in signals:
+            if signal.spread < self.min_spread:
+                continue
+            key = (signal.asset, signal.buy_exchange, signal.sell_exchange)
+            seen.add(key)
+            state = self.active.get(key)
+            if state is None:
+                state = SignalState(signal, signal.timestamp or now)
+                self._add(state)
+                opened.append(state)
+                continue
+            state.peak_spread = max(state.peak_spread, signal.spread)
+            if state.changed(signal):
+                state.set(signal)
+                state.updates += 1
+                updated.append(state)
+
+        checked = self.active if scope is None else [key for asset in scope for key in self._by_asset.get(asset, ())]
+        closed = [self.active[key] for key in checked if key not in seen]
+        for state in closed:
+            state.closed_at = now
+            self._remove(state)
+
+        self.opened += len(opened)
+        self.updated += len(updated)
+        self.closed += len(closed)
+        return Changes(opened, updated, closed)
+
+    @staticmethod
+    def persist(db: Session, changes: Changes):
+        """💾 Изменения одним пакетом: upsert открытых и обновлённых, DELETE и история закрытых."""
+        rows = [state.row() for state in changes.opened + changes.updated]
+        if rows:
+            bulk_upsert(db, ArbitrageSignal, rows, keys=("asset", "buy_exchange", "sell_exchange"),
+                        update_columns=list(SIGNAL_COLUMNS))
+        if changes.closed:
+            db.query(ArbitrageSignal).filter(
+                tuple_(*SIGNAL_KEY).in_([state.key for state in changes.closed])
+            ).delete(synchronize_session=False)
+            db.execute(insert(SignalHistory), [state.history_row() for state in changes.closed])
+
+    def apply(self, db: Session, signals, scope=None, now: datetime = None) -> Changes:
+        """🔄 Скан -> разница -> запись и коммит; при ошибке откат и перечитывание состояния из БД."""
+        with self.lock:
+            try:
+                if not self.loaded:
+                    self.load(db)
+                changes = self.diff(signals, scope, now)
+                self.persist(db, changes)
+                db.commit()
+                return changes
+            except Exception:
+                db.rollback()
+                self.invalidate()
+                raise
+
+    def stats(self) -> dict:
+        return {"active": len(self.active), "opened": self.opened, "updated": self.updated, "closed": self.closed}
@@ -0,0 +1,271 @@
+import asyncio
+import json
+import logging
+import time
+from datetime import timezone
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select # type: ignore
+from backend.core.price_board import get_board
+from backend.database.db_connector import AsyncSessionLocal
+from backend.database.models import Price, ArbitrageSignal
+
+# 📡 Потоковая раздача цен и сигналов (WebSocket и SSE): клиенту уходят только изменения.
+# Сообщение — JSON:
+#   {"type": "snapshot" | "delta", "ts": время публикации,
+#    "prices": [[exchange, asset, price, ts], ...],
+#    "signals": [{"action": "new" | "updated" | "removed", "asset": ..., "buy_exchange": ..., ...}, ...]}
+# Первым сообщением клиент получает снапшот текущего состояния (с учётом фильтра), дальше — дельты.
+PRICE_POLL_INTERVAL = 0.25   # опрос доски цен (сек)
+DB_POLL_INTERVAL = 2         # опрос БД: сигналы и цены, если доски нет (сек)
+CLIENT_BUFFER = 64           # сообщений в очереди клиента; переполнилась — клиент отключается
+SSE_KEEPALIVE = 15           # комментарий-пинг в SSE, если долго нет данных (сек)
+SLOW_CLIENT_CODE = 1013      # WebSocket close code "Try Again Later"
+
+SIGNAL_FIELDS = ("buy_price", "sell_price", "spread", "size_usdt", "type")
+
+
+async def load_prices():
+    """[(exchange, asset, price, ts)] и признак живой доски (иначе — из БД)."""
+    board = get_board()
+    if board is not None:
+        return board.rows(), True
+    async with AsyncSessionLocal() as db:
+        rows = (await db.execute(select(Price.exchange, Price.asset, Price.price, Price.timestamp))).all()
+    return [(exchange, asset, price, timestamp.replace(tzinfo=timezone.utc).timestamp() if timestamp else 0.0)
+            for exchange, asset, price, timestamp in rows], False
+
+
+async def load_signals():
+    """[{asset, buy_exchange, sell_exchange, buy_price, ...}] из arbitrage_signals."""
+    async with AsyncSessionLocal() as db:
+        signals = (await db.scalars(select(ArbitrageSignal))).all()
+    return [
+        {"asset": s.asset, "buy_exchange": s.buy_exchange, "sell_exchange": s.sell_exchange,
+         **{field: getattr(s, field) for field in SIGNAL_FIELDS}}
+        for s in signals
+    ]
+
+
+def signal_key(signal: dict) -> tuple:
+    return signal["asset"], signal["buy_exchange"], signal["sell_exchange"]
+
+
+def filter_rows(prices, signals, assets, exchanges):
+    """Фильтр клиента: актив и/или биржа (для сигнала — любая из двух бирж)."""
+    if assets is not None:
+        prices = [p for p in prices if p[1] in assets]
+        signals = [s for s in signals if s["asset"] in assets]
+    if exchanges is not None:
+        prices = [p for p in prices if p[0] in exchanges]
+        signals = [s for s in signals if s["buy_exchange"] in exchanges or s["sell_exchange"] in exchanges]
+    return prices, signals
+
+
+def encode(kind: str, prices, signals) -> str:
+    return json.dumps({"type": kind, "ts": time.time(), "prices": prices, "signals": signals},
+                      separators=(",", ":"), default=str)
+
+
+class StreamClient:
+    """👤 Подписчик: фильтр и ограниченная очередь готовых сообщений."""
+
+    def __init__(self, assets=None, exchanges=None, buffer: int = CLIENT_BUFFER):
+        self.assets = frozenset(assets) if assets else None
+        self.exchanges = frozenset(exchanges) if exchanges else None
+        self.queue = asyncio.Queue(buffer)
+        self.dropped = False
+
+    @property
+    def filter_key(self) -> tuple:
+        return self.assets, self.exchanges
+
+    def push(self, payload: str) -> bool:
+        """Кладёт сообщение; при переполнении очищает очередь и оставляет маркер отключения (None)."""
+        try:
+            self.queue.put_nowait(payload)
+            return True
+        except asyncio.QueueFull:
+            self.dropped = True
+            self.close()
+            return False
+
+    def close(self):
+        """Очищает очередь и оставляет маркер конца потока."""
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.queue.put_nowait(None)
+
+    async def next(self, timeout: float = None):
+        """Следующее сообщение; None — поток закрыт (dropped — за медлительность); TimeoutError — нет данных."""
+        return await asyncio.wait_for(self.queue.get(), timeout)
+
+
+class StreamHub:
+    """
+    🛰️ Источник дельт для всех подписчиков: опрашивает доску цен и сигналы, считает разницу
+    с прошлым состоянием и раздаёт её. Сообщение кодируется один раз на каждый уникальный фильтр.
+    Опрос идёт, только пока есть подписчики. prices / signals — корутины-загрузчики (по умолчанию из доски и БД).
+    """
+
+    def __init__(self, prices=load_prices, signals=load_signals, price_interval: float = PRICE_POLL_INTERVAL,
+                 db_interval: float = DB_POLL_INTERVAL, buffer: int = CLIENT_BUFFER):
+        self.load_prices = prices
+        self.load_signals = signals
+        self.price_interval = price_interval
+        self.db_interval = db_interval
+        self.buffer = buffer
+        self.prices = {}     # (exchange, asset) -> (price, ts)
+        self.signals = {}    # (asset, buy_exchange, sell_exchange) -> сигнал
+        self.clients = set()
+        self._tasks = []
+
+        # 📊 Метрики
+        self.published = 0
+        self.messages = 0
+        self.dropped_clients = 0
+
+    def subscribe(self, assets=None, exchanges=None) -> StreamClient:
+        client = StreamClient(assets, exchanges, self.buffer)
+        prices = [[exchange, asset, price, ts] for (exchange, asset), (price, ts) in self.prices.items()]
+        client.push(encode("snapshot", *filter_rows(prices, list(self.signals.values()), *client.filter_key)))
+        self.clients.add(client)
+        if not self._tasks:
+            self._tasks = [asyncio.create_task(self.poll_prices()), asyncio.create_task(self.poll_signals())]
+        return client
+
+    def unsubscribe(self, client: StreamClient):
+        self.clients.discard(client)
+        if not self.clients:
+            for task in self._tasks:
+                task.cancel()
+            self._tasks = []
+
+    def diff_prices(self, rows) -> list:
+        changed = []
+        for exchange, asset, price, ts in rows:
+            key = (exchange, asset)
+            if self.prices.get(key, (None,))[0] != price:
+                self.prices[key] = (price, ts)
+                changed.append([exchange, asset, price, ts])
+        return changed
+
+    def diff_signals(self, rows) -> list:
+        changed, seen = [], set()
+        for signal in rows:
+            key = signal_key(signal)
+            seen.add(key)
+            previous = self.signals.get(key)
+            if previous is None or any(previous[field] != signal[field] for field in SIGNAL_FIELDS):
+                self.signals[key] = signal
+                changed.append({"action": "new" if previous is None else "updated", **signal})
+        for key in [key for key in self.signals if key not in seen]:
+            changed.append({"action": "removed", **self.signals.pop(key)})
+        return changed
+
+    def publish(self, prices=(), signals=()):
+        """📤 Раздаёт дельту: фильтрует и кодирует один раз на фильтр, медленных клиентов отключает."""
+        groups = {}
+        for client in self.clients:
+            groups.setdefault(client.filter_key, []).append(client)
+        for (assets, exchanges), clients in groups.items():
+            selected = filter_rows(prices, signals, assets, exchanges)
+            if not selected[0] and not selected[1]:
+                continue
+            payload = encode("delta", *selected)
+            for client in clients:
+                if client.push(payload):
+                    self.messages += 1
+                else:
+                    self.clients.discard(client)
+                    self.dropped_clients += 1
+                    logging.warning(f"⚠️ Поток: клиент не успевает читать, отключён (буфер {self.buffer})")
+        self.published += 1
+
+    async def poll_prices(self):
+        while True:
+            live = False
+            try:
+                rows, live = await self.load_prices()
+                changed = self.diff_prices(rows)
+                if changed:
+                    self.publish(prices=changed)
+            except Exception as e:
+                logging.error(f"❌ Поток: ошибка чтения цен: {e}")
+            await asyncio.sleep(self.price_interval if live else self.db_interval)
+
+    async def poll_signals(self):
+        while True:
+            try:
+                changed = self.diff_signals(await self.load_signals())
+                if changed:
+                    self.publish(signals=changed)
+            except Exception as e:
+                logging.error(f"❌ Поток: ошибка чтения сигналов: {e}")
+            await asyncio.sleep(self.db_interval)
+
+    def stats(self) -> dict:
+        return {"clients": len(self.clients), "published": self.published, "messages": self.messages,
+                "dropped_clients": self.dropped_clients, "prices": len(self.prices), "signals": len(self.signals)}
+
+
+def parse_list(value: str):
+    """"BTC,ETH" -> ["BTC", "ETH"]; пусто — без фильтра."""
+    return [item for item in value.split(",") if item] if value else None
+
+
+router = APIRouter()
+hub = StreamHub()
+
+
+@router.websocket("/ws/stream")
+async def stream_websocket(websocket: WebSocket, assets: str = None, exchanges: str = None):
+    """📡 Дельты цен и сигналов по WebSocket. ?assets=BTCUSDT,ETHUSDT&exchanges=Binance,OKX"""
+    await websocket.accept()
+    client = hub.subscribe(parse_list(assets), parse_list(exchanges))
+
+    async def watch_disconnect():
+        # клиент ничего не шлёт; без чтения отключение заметили бы только на следующей дельте
+        while (await websocket.receive())["type"] != "websocket.disconnect":
+            pass
+        client.close()
+
+    watcher = asyncio.create_task(watch_disconnect())
+    try:
+        while (payload := await client.next()) is not None:
+            await websocket.send_text(payload)
+        if client.dropped:
+            await websocket.close(code=SLOW_CLIENT_CODE, reason="client too slow")
+    except (WebSocketDisconnect, RuntimeError):
+        pass
+    finally:
+        watcher.cancel()
+        hub.unsubscribe(client)
+
+
+@router.get("/stream")
+async def stream_events(assets: str = None, exchanges: str = None):
+    """📡 То же через Server-Sent Events."""
+    client = hub.subscribe(parse_list(assets), parse_list(exchanges))
+
+    async def events():
+        try:
+            while True:
+                try:
+                    payload = await client.next(SSE_KEEPALIVE)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                if payload is None:
+                    yield "event: dropped\ndata: client too slow\n\n"
+                    return
+                yield f"data: {payload}\n\n"
+        finally:
+            hub.unsubscribe(client)
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+
+@router.get("/stream/stats")
+async def stream_stats():
+    return hub.stats()
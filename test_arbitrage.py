@@ -0,0 +1,141 @@
+import asyncio
+from datetime import datetime, timezone
+import logging
+import numpy as np
+from sqlalchemy import create_engine, event # type: ignore
+from sqlalchemy.orm import sessionmaker # type: ignore
+from backend.core import arbitrage
+from backend.core.archive import Archiver, ArchiveReader
+from backend.core.backtest import Backtest
+from backend.core.local_orderbook import OrderBookManager
+from backend.core.signal_lifecycle import SignalTracker
+from backend.database.models import ArbitrageSignal, Base, Liquidity, OrderBook, Price
+from backend.database.orderbook_codec import encode_levels
+
+T0 = datetime(2026, 1, 1, 12, tzinfo=timezone.utc).timestamp()
+
+
+def okx_price(i: int) -> float:
+    return 105.0 if 30 <= i < 45 else 100.0   # 15 секунд OKX дороже Binance на 5%
+
+
+def book(mid: float) -> tuple:
+    """Глубокий стакан: 10 000 USDT на уровне, сделка 5000 USDT исполняется по лучшей цене."""
+    return [(mid, 100.0), (mid * 0.999, 100.0)], [(mid, 100.0), (mid * 1.001, 100.0)]
+
+
+def market():
+    ticks, books = [], []
+    for i in range(120):
+        ticks.append(("Binance", "BTCUSDT", 100.0, T0 + i))
+        ticks.append(("OKX", "BTCUSDT", okx_price(i), T0 + i + 0.5))
+        for exchange, mid in (("Binance", 100.0), ("OKX", okx_price(i))):
+            bids, asks = book(mid)
+            books.append((exchange, "BTCUSDT", T0 + i + 0.5, *zip(*bids), *zip(*asks)))
+    # ETH расходится на 5%, но стаканов по нему нет — отказ по ликвидности
+    ticks += [("Binance", "ETHUSDT", 3000.0, T0 + 10), ("OKX", "ETHUSDT", 3150.0, T0 + 10.5)]
+    return sorted(ticks, key=lambda tick: tick[3]), books
+
+
+def write_archive(root: str):
+    ticks, books = market()
+    manager = OrderBookManager()
+
+    async def scenario():
+        archiver = Archiver(root)
+        for tick in ticks:
+            archiver.record(*tick)
+        for n, (exchange, asset, ts, bid_price, bid_qty, ask_price, ask_qty) in enumerate(books):
+            manager._book(exchange, asset).apply_snapshot(zip(bid_price, bid_qty), zip(ask_price, ask_qty), n)
+            if exchange == "OKX":   # оба стакана секунды обновлены — снимаем
+                archiver.snapshot_books(manager, ts=ts)
+        await archiver.close()
+
+    asyncio.run(scenario())
+
+
+def test_backtest_replays_archive_into_signals_fills_and_pnl(tmp_path):
+    write_archive(str(tmp_path))
+    reader = ArchiveReader(str(tmp_path))
+
+    backtest = Backtest(latency_ms=200, cooldown=60).run(reader)
+    stats = backtest.stats()
+    assert stats["ticks"] == 242 and stats["books"] == 240
+    # пересчёт через 50 мс после каждого тика с 30.5 по 45.0 с видит премию OKX
+    assert stats["signals"] == 30 and stats["rejected"] == {"liquidity": 1, "risk": 0, "order": 0}
+    first = backtest.signals[0]
+    assert (first.asset, first.buy_exchange, first.sell_exchange, first.size_usdt) == ("BTCUSDT", "Binance", "OKX", 5000)
+    assert first.timestamp == datetime(2026, 1, 1, 12, 0, 30, 550000)
+    assert round(first.spread, 3) == 4.79   # после тейкерских комиссий 0.1% на обеих биржах
+
+    # одна сделка на связку за cooldown; исполнение через 200 мс по стаканам того момента
+    assert stats["fills"] == 1 and stats["cooldown_skipped"] == 29
+    fill = backtest.fills[0]
+    assert round(fill.ts - T0, 3) == 30.75 and (fill.buy_price, fill.sell_price, fill.qty) == (100.0, 105.0, 50.0)
+    assert stats["pnl_usdt"] == round(50 * 105.0 * 0.999 - 50 * 100.0 * 1.001, 4)
+    assert stats["simulated_s"] == 119.5 and stats["ticks_per_s"] > 0
+
+    # детерминизм: повторный прогон даёт те же сигналы и сделки
+    again = Backtest(latency_ms=200, cooldown=60).run(reader)
+    assert [(s.timestamp, s.spread) for s in again.signals] == [(s.timestamp, s.spread) for s in backtest.signals]
+    assert again.fills == backtest.fills
+
+    # окно без расхождения и более строгий порог
+    assert Backtest().run(reader, start=T0, end=T0 + 30).stats()["signals"] == 0
+    assert Backtest(min_spread=5.0).run(reader).stats()["signals"] == 0
+
+
+def test_backtest_uses_pluggable_risk_and_misses_fill_on_stale_book():
+    ticks, books = market()
+    rejected = Backtest(risk=lambda candidates: np.zeros(len(candidates), dtype=bool)).replay(ticks, books).finish().stats()
+    assert rejected["signals"] == 0 and rejected["rejected"]["risk"] == 30
+
+    # стаканы пропали после 31-й секунды: сигналы ещё есть, пока снапшот свежее book_max_age, сделка не исполняется
+    early = [b for b in books if b[2] < T0 + 31]
+    backtest = Backtest(latency_ms=2000, book_max_age=1.0).replay(ticks, early).finish()
+    assert backtest.stats()["signals"] == 2 and backtest.stats()["fills"] == 0
+    assert backtest.stats()["missed_fills"] == 1
+
+
+def scan_database(path, assets: int):
+    """БД для полного скана: OKX дороже Binance на 5% по всем активам, у C0 нет ликвидности на OKX,
+    у C1 нет стакана на Binance, сигнал по C2 уже сохранён."""
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine, tables=[m.__table__ for m in (Price, Liquidity, OrderBook, ArbitrageSignal)])
+    levels = encode_levels(np.array([[100.0, 1000.0], [105.0, 1000.0]]))
+    db = sessionmaker(bind=engine)()
+    for i in range(assets):
+        asset = f"C{i}USDT"
+        for exchange, price in (("Binance", 100.0), ("OKX", 105.0)):
+            db.add(Price(exchange=exchange, asset=asset, price=price))
+            if (i, exchange) != (0, "OKX"):
+                db.add(Liquidity(exchange=exchange, asset=asset, bid_volume=1.0, ask_volume=1.0))
+            if (i, exchange) != (1, "Binance"):
+                db.add(OrderBook(exchange=exchange, asset=asset, bids=levels, asks=levels))
+    db.add(ArbitrageSignal(asset="C2USDT", buy_exchange="Binance", sell_exchange="OKX", buy_price=1.0,
+                           sell_price=1.0, spread=3.0, type="межбиржевой"))
+    db.commit()
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+    return engine, db, statements
+
+
+def test_full_scan_preloads_rows_with_constant_number_of_queries(tmp_path, monkeypatch, caplog):
+    monkeypatch.setattr(arbitrage, "get_board", lambda: None)
+    caplog.set_level(logging.INFO)
+    counts = {}
+    for assets in (5, 60):
+        engine, db, statements = scan_database(tmp_path / f"scan{assets}.db", assets)
+        monkeypatch.setattr(arbitrage, "signal_tracker", SignalTracker(min_spread=arbitrage.MIN_SPREAD))
+        signals = arbitrage.find_arbitrage_opportunities(db)
+        assert len(signals) == assets - 2 and all(s.size_usdt == 5000 for s in signals)
+        counts[assets] = len(statements)
+        with engine.connect() as conn:
+            assert conn.exec_driver_sql("SELECT COUNT(*) FROM arbitrage_signals").scalar() == assets - 2   # C2 обновлён, не продублирован
+    # цены, ликвидность, стаканы, открытые сигналы, upsert — число запросов не растёт с числом кандидатов
+    assert counts[5] == counts[60] <= 6
+
+    assert "🔁 Сигналы открыты/обновлены: 57/1" in caplog.text
+    assert "🔢 Кандидаты по этапам: спред 60 → ликвидность 59 → риски 59 → price impact 58" in caplog.text
+    assert all(f" {stage} " in caplog.text for stage in ("prices", "scan", "preload", "liquidity", "risk", "impact"))
+
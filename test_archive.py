@@ -0,0 +1,60 @@
+import asyncio
+import os
+from datetime import datetime, timezone
+from backend.core.archive import Archiver, ArchiveReader
+from backend.core.local_orderbook import OrderBookManager
+
+# 2026-01-01 23:59:30 UTC: тики переходят через полночь
+T0 = datetime(2026, 1, 1, 23, 59, 30, tzinfo=timezone.utc).timestamp()
+
+
+def test_ticks_and_books_roll_into_partitions_and_scan_back(tmp_path):
+    root = str(tmp_path)
+    books = OrderBookManager()
+    book = books._book("Binance", "BTCUSDT")
+    book.apply_snapshot([(65000.0, 1.0), (64999.0, 2.0), (64998.0, 3.0)], [(65001.0, 0.5), (65002.0, 1.5)], 1)
+    books._book("OKX", "BTCUSDT")  # не синхронизирован — в архив не попадает
+
+    async def scenario():
+        archiver = Archiver(root, book_depth=2)
+        for i in range(60):
+            archiver.record("Binance", "BTCUSDT", 65000.0 + i, T0 + i)
+            archiver.record("OKX", "ETHUSDT", 3000.0 + i, T0 + i + 0.5)
+        archiver.snapshot_books(books, ts=T0 + 1)
+        await archiver.flush()
+        # файлы прошедших суток закрываются сразу
+        assert archiver.stats()["ticks"] == {"rows": 120, "closed_files": 4, "open_files": 0}
+
+        # файл текущих суток открыт (скрытое имя) — читатель его не видит до закрытия
+        archiver.record("Bybit", "SOLUSDT", 150.0)
+        await archiver.flush()
+        assert archiver.stats()["ticks"]["open_files"] == 1
+        assert ArchiveReader(root).scan().num_rows == 120
+        await archiver.close()
+        return archiver.stats()
+
+    stats = asyncio.run(scenario())
+    assert stats["ticks"] == {"rows": 121, "closed_files": 5, "open_files": 0}
+    assert sorted(os.listdir(tmp_path / "ticks"))[:2] == ["date=2026-01-01", "date=2026-01-02"]
+
+    reader = ArchiveReader(root)
+    assert reader.summary("ticks")["rows"] == 121
+    table = reader.scan("ticks", exchanges=["Binance"], start=T0 + 30, end=T0 + 40)
+    assert sorted(table.column("price").to_pylist()) == [65030.0 + i for i in range(10)]
+    assert set(table.column("date").to_pylist()) == {"2026-01-02"}
+
+    ticks = reader.ticks(start=T0 + 29, end=T0 + 31)
+    assert ticks == [("Binance", "BTCUSDT", 65029.0, T0 + 29), ("OKX", "ETHUSDT", 3029.0, T0 + 29.5),
+                     ("Binance", "BTCUSDT", 65030.0, T0 + 30), ("OKX", "ETHUSDT", 3030.0, T0 + 30.5)]
+    assert sum(batch.num_rows for batch in reader.batches(assets=["ETHUSDT"])) == 60
+
+    snapshot = reader.scan("books").to_pylist()
+    assert len(snapshot) == 1
+    assert snapshot[0]["exchange"] == "Binance" and snapshot[0]["bid_price"] == [65000.0, 64999.0]
+    assert snapshot[0]["ask_qty"] == [0.5, 1.5]
+
+
+def test_reader_on_empty_archive(tmp_path):
+    reader = ArchiveReader(str(tmp_path))
+    assert reader.scan("books").num_rows == 0
+    assert reader.ticks() == []
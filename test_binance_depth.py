@@ -0,0 +1,82 @@
+import asyncio
+import json
+from urllib.parse import parse_qs, urlsplit
+import websockets
+from sqlalchemy import create_engine # type: ignore
+from sqlalchemy.orm import sessionmaker # type: ignore
+from backend.core.binance_depth import Depth5Multiplexer, stream_name
+from backend.core.instruments import InstrumentRegistry
+from backend.core.liquidity_checker import delete_delisted_prices
+from backend.database.models import Base, Price
+from backend.core.sample_payloads import REST_ORDERBOOKS
+
+DEPTH5 = {"lastUpdateId": 51234567890, "bids": REST_ORDERBOOKS["Binance"]["bids"], "asks": REST_ORDERBOOKS["Binance"]["asks"]}
+
+
+async def start_combined_stream_server(connections: list):
+    """🧪 Локальный /stream?streams=a/b/c: по одному depth5-кадру на каждый поток."""
+    async def handler(ws):
+        streams = parse_qs(urlsplit(ws.request.path).query)["streams"][0].split("/")
+        connections.append(streams)
+        for stream in streams:
+            await ws.send(json.dumps({"stream": stream, "data": DEPTH5}))
+        await ws.wait_closed()
+
+    server = await websockets.serve(handler, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    return server, f"ws://127.0.0.1:{port}/stream?streams="
+
+
+def test_snapshot_multiplexes_streams_over_few_connections():
+    assets = [f"COIN{i}USDT" for i in range(450)] + ["BTCUSDT"]
+
+    async def scenario():
+        connections = []
+        server, url = await start_combined_stream_server(connections)
+        try:
+            multiplexer = Depth5Multiplexer(assets, url=url, streams_per_connection=200)
+            seen = []
+            multiplexer.add_listener("BTCUSDT", lambda asset, bid_volume, *_: seen.append((asset, bid_volume)))
+            results = await multiplexer.snapshot(timeout=5)
+        finally:
+            server.close()
+        return connections, results, seen
+
+    connections, results, seen = asyncio.run(scenario())
+
+    assert sorted(len(streams) for streams in connections) == [51, 200, 200]
+    assert len(results) == len(assets)
+    exchange, asset, bid_volume, ask_volume, bids, asks = next(r for r in results if r[1] == "BTCUSDT")
+    assert exchange == "Binance"
+    assert round(bid_volume, 3) == 8.876
+    assert round(ask_volume, 3) == 6.556
+    assert seen == [("BTCUSDT", bid_volume)]
+
+
+def test_handle_ignores_unknown_streams():
+    multiplexer = Depth5Multiplexer(["btcusdt"])
+    assert multiplexer.handle({"stream": stream_name("ETHUSDT"), "data": DEPTH5}) is None
+    assert multiplexer.handle({"result": None, "id": 1}) is None
+    assert multiplexer.handle({"stream": "btcusdt@depth5@100ms", "data": DEPTH5}) == "BTCUSDT"
+    assert multiplexer.messages == 1
+
+
+def test_only_delisted_pairs_lose_their_prices(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'prices.db'}")
+    Base.metadata.create_all(engine, tables=[Price.__table__])
+    db = sessionmaker(bind=engine)()
+    db.add_all([Price(exchange=exchange, asset=asset, price=1.0) for exchange, asset in (
+        ("Binance", "BTCUSDT"), ("Binance", "LUNAUSDT"), ("Binance", "NEWUSDT"), ("OKX", "LUNAUSDT"))])
+    db.commit()
+
+    registry = InstrumentRegistry()
+    for exchange, native, base in (("Binance", "BTCUSDT", "BTC"), ("Binance", "LUNAUSDT", "LUNA"),
+                                   ("OKX", "LUNA-USDT", "LUNA")):
+        registry.add(exchange, native, base, "USDT")
+    registry.mark_listed("Binance", {registry.instrument_id("Binance", "BTCUSDT")})   # LUNA снята на Binance
+
+    # стакан BTCUSDT не пришёл за таймаут, NEWUSDT реестру неизвестен — обе цены остаются
+    assert delete_delisted_prices(db, registry) == 1
+    db.commit()
+    assert sorted((p.exchange, p.asset) for p in db.query(Price)) == \
+        [("Binance", "BTCUSDT"), ("Binance", "NEWUSDT"), ("OKX", "LUNAUSDT")]
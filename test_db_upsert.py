@@ -0,0 +1,63 @@
+import pytest
+from datetime import datetime
+from sqlalchemy import create_engine, event, inspect, text # type: ignore
+from sqlalchemy.orm import sessionmaker # type: ignore
+from backend.database.db_upsert import build_upsert, bulk_upsert
+from backend.database.migrations import add_unique_keys
+from backend.database.models import Base, Price
+
+T0, T1 = datetime(2026, 1, 1), datetime(2026, 1, 2)
+
+
+def prices_db(path):
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine, tables=[Price.__table__])
+    inserts = []
+    event.listen(engine, "before_cursor_execute",
+                 lambda conn, cursor, statement, *args: inserts.append(statement)
+                 if statement.startswith("INSERT") else None)
+    return engine, sessionmaker(bind=engine)(), inserts
+
+
+def stored(db) -> dict:
+    return {(p.exchange, p.asset): (p.price, p.timestamp) for p in db.query(Price)}
+
+
+def test_bulk_upsert_dedupes_last_wins_and_chunks(tmp_path):
+    engine, db, inserts = prices_db(tmp_path / "prices.db")
+    rows = [{"exchange": "Binance", "asset": f"C{i}USDT", "price": float(i), "timestamp": T0} for i in range(5)]
+    rows.append({"exchange": "Binance", "asset": "C0USDT", "price": 99.0, "timestamp": T0})   # дубликат ключа
+
+    assert bulk_upsert(db, Price, rows, keys=("exchange", "asset"), chunk_size=2) == 5
+    db.commit()
+    assert len(inserts) == 3                                   # 5 уникальных строк по 2 на INSERT
+    assert stored(db)[("Binance", "C0USDT")] == (99.0, T0)    # из дубликатов побеждает последний
+    assert bulk_upsert(db, Price, [], keys=("exchange", "asset")) == 0 and len(inserts) == 3
+
+    # конфликт обновляет только update_columns
+    bulk_upsert(db, Price, [{"exchange": "Binance", "asset": "C1USDT", "price": 10.0, "timestamp": T1}],
+                keys=("exchange", "asset"), update_columns=["price"])
+    db.commit()
+    assert stored(db)[("Binance", "C1USDT")] == (10.0, T0) and len(stored(db)) == 5
+
+
+def test_unsupported_dialect_raises():
+    with pytest.raises(ValueError):
+        build_upsert("postgresql", Price, [{"exchange": "OKX", "asset": "BTCUSDT", "price": 1.0}],
+                     keys=("exchange", "asset"), update_columns=["price"])
+
+
+def test_add_unique_keys_keeps_latest_duplicate(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    with engine.begin() as conn:   # таблица до миграции: без уникального ключа, с дубликатами
+        conn.execute(text("CREATE TABLE prices (id INTEGER PRIMARY KEY, exchange VARCHAR(50), asset VARCHAR(20), "
+                          "price FLOAT, timestamp DATETIME)"))
+        conn.execute(text("INSERT INTO prices (exchange, asset, price) VALUES "
+                          "('OKX', 'BTCUSDT', 1.0), ('OKX', 'BTCUSDT', 2.0), ('OKX', 'ETHUSDT', 3.0)"))
+
+    add_unique_keys(engine)
+    add_unique_keys(engine)   # повторный запуск ничего не ломает
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT asset, price FROM prices ORDER BY asset")).all() == \
+            [("BTCUSDT", 2.0), ("ETHUSDT", 3.0)]
+    assert "uq_prices_exchange_asset" in {ix["name"] for ix in inspect(engine).get_indexes("prices")}
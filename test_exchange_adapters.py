@@ -0,0 +1,51 @@
+import copy
+import pytest
+from backend.core.exchange_adapters import ADAPTERS, split_symbol
+from backend.core.sample_payloads import REST_ORDERBOOKS, REST_TICKERS, WS_FRAMES
+
+# биржа -> (цена BTCUSDT в записанных REST-тикерах и WS-сообщении, нативный символ)
+EXPECTED = {
+    "Binance": (67250.01, "BTCUSDT"),
+    "Bybit": (67250.5, "BTCUSDT"),
+    "Bitget": (67251.2, "BTCUSDT"),
+    "Gateio": (67248.3, "BTC_USDT"),
+    "HTX": (67249.1, "btcusdt"),
+    "KuCoin": (67250.7, "BTC-USDT"),
+    "MEXC": (67252.03, "BTCUSDT"),
+    "OKX": (67249.8, "BTC-USDT"),
+    "Poloniex": (67255.12, "BTC_USDT"),
+}
+
+
+@pytest.mark.parametrize("exchange", sorted(EXPECTED))
+def test_adapter_parses_recorded_payloads(exchange):
+    adapter = copy.copy(ADAPTERS[exchange])
+    adapter._canonical, adapter._native = {}, {}   # без кеша реестра инструментов — разбор строки
+    price, native = EXPECTED[exchange]
+
+    tickers = dict(adapter.parse_tickers(REST_TICKERS[exchange]))
+    assert tickers["BTCUSDT"] == price and {"ETHUSDT", "SOLUSDT"} <= set(tickers)
+
+    bids, asks = adapter.parse_orderbook(REST_ORDERBOOKS[exchange], depth=3)
+    assert bids[0] == (67249.9, 0.512) and asks[0] == (67250.0, 0.431) and len(bids) == len(asks) == 3
+
+    assert adapter.parse_ws(WS_FRAMES[exchange])[0] == ("BTCUSDT", price)
+    assert adapter.native("BTCUSDT") == native and adapter.canonical(native) == "BTCUSDT"
+
+
+def test_ws_drops_zero_prices_and_service_messages():
+    gateio = ADAPTERS["Gateio"]
+    frame = copy.deepcopy(WS_FRAMES["Gateio"])
+    result = frame["result"] if isinstance(frame["result"], dict) else frame["result"][0]
+    result["last"] = "0"
+    assert gateio.parse_ws(frame) == []
+    assert gateio.parse_ws({"channel": "spot.tickers", "event": "subscribe", "result": {"status": "success"}}) == []
+    assert ADAPTERS["Bybit"].parse_ws({"op": "pong"}) == []
+    assert ADAPTERS["Bybit"].parse_ws({"topic": "tickers.BTCUSDT", "data": {"symbol": "BTCUSDT"}}) == []
+
+
+def test_unknown_rest_format_and_bad_tickers_are_skipped():
+    binance = ADAPTERS["Binance"]
+    assert binance.parse_tickers({"code": -1121}) == []
+    assert binance.parse_tickers([{"symbol": "BTCUSDT", "price": "1.5"}, {"symbol": "ETHUSDT"}]) == [("BTCUSDT", 1.5)]
+    assert split_symbol("ETHBTC") == ("ETH", "BTC") and split_symbol("USDT") is None
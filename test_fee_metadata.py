@@ -0,0 +1,133 @@
+import asyncio
+import json
+import math
+from aiohttp import web
+from backend.core.fee_metadata import FEE_SOURCES, FeeMetadata, UNKNOWN_ROUTE
+from backend.core.price_matrix import TAKER_FEES
+from backend.core.price_matrix import Opportunity
+from backend.core.risk_managment import check_risk, check_risk_batch
+from backend.core.sample_payloads import REST_FEES
+
+
+async def start_fake_exchange(payloads: dict):
+    """🧪 Локальный HTTP-сервер с записанными ответами эндпоинтов валют по /<exchange>."""
+    async def handler(request):
+        exchange = request.match_info["exchange"]
+        if exchange not in payloads:
+            return web.Response(status=503)
+        return web.json_response(payloads[exchange])
+
+    app = web.Application()
+    app.router.add_get("/{exchange}", handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    return runner, f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}"
+
+
+def loaded_metadata(tmp_path, payloads=REST_FEES) -> tuple:
+    path = tmp_path / "fees.json"
+    path.write_text(json.dumps({"taker_fees": {"Binance": 0.075},
+                                "networks": [["Binance", "ETH", "ERC20", 0.0012, True, True, 12]]}))
+
+    async def scenario():
+        runner, base_url = await start_fake_exchange(payloads)
+        try:
+            sources = {exchange: (f"{base_url}/{exchange}", parse) for exchange, (_, parse) in FEE_SOURCES.items()}
+            metadata = FeeMetadata(sources=sources, path=str(path))
+            return metadata, await metadata.refresh()
+        finally:
+            await runner.cleanup()
+    return asyncio.run(scenario())
+
+
+def test_metadata_loads_networks_and_picks_cheapest_open_route(tmp_path):
+    metadata, counts = loaded_metadata(tmp_path)
+    assert counts == {"Bitget": 3, "HTX": 2, "KuCoin": 4, "Poloniex": 2}
+    assert len(metadata) == 12 and not metadata.is_stale()
+    assert metadata.taker_fee("Binance") == 0.075 and metadata.taker_fee("Gateio") == 0.2   # файл, затем TAKER_FEES
+    assert set(metadata.networks[("Poloniex", "USDT")]) == {"TRX", "ETH"}                  # TRON -> TRX
+
+    # BEP20 дешевле, депозит на Bitget открыт; обратно BEP20 закрыт на вывод
+    route = metadata.route("BTC", "KuCoin", "Bitget")
+    assert (route.network, route.fee, route.minutes) == ("BSC", 0.00001, 5 + 15 * 3 / 60)
+    assert metadata.route("BTC", "Bitget", "KuCoin")[:2] == ("BTC", 0.0002)
+    assert metadata.route("BTC", "KuCoin", "HTX").network == "BTC"        # депозит HECO на HTX закрыт
+    assert metadata.route("USDT", "KuCoin", "Poloniex")[:2] == ("TRX", 1.0)
+    assert metadata.route("BTC", "Poloniex", "KuCoin") is UNKNOWN_ROUTE
+
+    # биржа недоступна при обновлении — прошлые данные остаются
+    async def refresh_without_kucoin():
+        runner, base_url = await start_fake_exchange({})
+        try:
+            metadata.sources = {name: (f"{base_url}/{name}", parse) for name, (_, parse) in FEE_SOURCES.items()}
+            return await metadata.refresh()
+        finally:
+            await runner.cleanup()
+    assert set(asyncio.run(refresh_without_kucoin()).values()) == {0}
+    assert metadata.route("BTC", "KuCoin", "Bitget").network == "BSC"
+
+
+def test_risk_batch_uses_real_fees_and_transfer_time(tmp_path, capsys):
+    metadata, _ = loaded_metadata(tmp_path)
+    metadata.add("OKX", "SOL", "SOL", 0.01, withdraw_enabled=False)
+    metadata.add("Binance", "SOL", "SOL", 0.01)
+    metadata.add("OKX", "LTC", "LTC", 0.001, confirmations=30)
+    metadata.add("Binance", "LTC", "LTC", 0.0001, confirmations=30)
+
+    candidates = [
+        Opportunity("BTCUSDT", "KuCoin", "Bitget", 60000.0, 61000.0, 1.7, 1.5),    # BEP20: 0.06% + тейкеры 0.2%
+        Opportunity("BTCUSDT", "Bitget", "KuCoin", 60000.0, 61000.0, 1.7, 1.5),    # 0.0002 BTC = 1.2% от 1000 USDT
+        Opportunity("BTCUSDT", "Poloniex", "Binance", 60000.0, 61000.0, 1.7, 1.4),  # нет данных — по умолчанию
+        Opportunity("ETHUSDT", "Binance", "OKX", 100.0, 115.0, 15.0, 14.8),        # скачок цены
+        Opportunity("SOLUSDT", "OKX", "Binance", 100.0, 104.0, 4.0, 3.8),          # вывод SOL с OKX закрыт
+        Opportunity("LTCUSDT", "OKX", "Binance", 100.0, 104.0, 4.0, 3.8),          # 30 блоков LTC — 80 минут
+    ]
+    assert check_risk_batch(candidates, metadata=metadata).tolist() == [True, False, True, False, False, False]
+    assert check_risk_batch(candidates[:2], max_fee=2.0, metadata=metadata).tolist() == [True, True]
+    assert check_risk_batch([], metadata=metadata).shape == (0,)
+    assert math.isinf(metadata.route("SOL", "OKX", "Binance").fee)
+
+    # одиночная проверка — та же логика без вывода в stdout
+    assert check_risk("BTCUSDT", "Binance", "OKX", 100.0, 103.0) is True
+    assert check_risk("BTCUSDT", "Binance", "OKX", 100.0, 120.0) is False
+    assert capsys.readouterr().out == ""
+
+
+def test_fees_for_non_usd_quotes_are_converted_through_base_usdt_price(tmp_path):
+    metadata, _ = loaded_metadata(tmp_path)
+    metadata.add("Binance", "ETH", "ERC20", 0.003)
+    metadata.add("OKX", "ETH", "ERC20", 0.003)
+    # ETHBTC: цена пары в BTC; 0.003 ETH по 3000 USDT = 0.9% от 1000 USDT + тейкеры 0.175% > 1%
+    candidates = [Opportunity("ETHBTC", "Binance", "OKX", 0.05, 0.0515, 3.0, 2.8),
+                  Opportunity("ETHUSDT", "Binance", "OKX", 3000.0, 3090.0, 3.0, 2.8)]
+    prices = {("ETH", "Binance"): 3000.0}
+    assert check_risk_batch(candidates, metadata=metadata,
+                            usd_price=lambda coin, exchange: prices.get((coin, exchange))).tolist() == [False, False]
+    # цены ETH в USDT нет — комиссия вывода по умолчанию, а не 0.0015% от цены в BTC
+    assert check_risk_batch(candidates[:1], max_fee=0.3, metadata=metadata,
+                            usd_price=lambda coin, exchange: None).tolist() == [False]
+    assert check_risk_batch(candidates[:1], metadata=metadata, usd_price=lambda coin, exchange: None).tolist() == [True]
+
+
+def test_cold_start_without_fees_file_falls_back_to_defaults(tmp_path, caplog):
+    caplog.set_level("INFO")
+
+    async def scenario():
+        runner, base_url = await start_fake_exchange({"KuCoin": REST_FEES["KuCoin"]})
+        try:
+            sources = {exchange: (f"{base_url}/{exchange}", parse) for exchange, (_, parse) in FEE_SOURCES.items()}
+            metadata = FeeMetadata(sources=sources, path=str(tmp_path / "missing" / "fees.json"))
+            return metadata, await metadata.refresh()
+        finally:
+            await runner.cleanup()
+
+    metadata, counts = asyncio.run(scenario())
+    assert counts == {"Bitget": 0, "HTX": 0, "KuCoin": 4, "Poloniex": 0} and not metadata.is_stale()
+    assert metadata.taker_fees == {} and metadata.taker_fee("Binance") == TAKER_FEES["Binance"]
+    assert metadata.route("BTC", "Binance", "OKX") is UNKNOWN_ROUTE
+    assert "локального файла комиссий нет" in caplog.text
+    # без данных о сетях риски считаются по значениям по умолчанию
+    candidate = Opportunity("BTCUSDT", "Binance", "OKX", 60000.0, 61800.0, 3.0, 2.8)
+    assert check_risk_batch([candidate], metadata=metadata).tolist() == [True]
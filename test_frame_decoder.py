@@ -0,0 +1,34 @@
+import asyncio
+import gzip
+import json
+from backend.core.frame_decoder import ExtractedTickers, FrameDecoder, decode_frame, extract_binance_tickers
+from backend.core.websocket_price_updater import price_parser
+from backend.core.sample_payloads import WS_FRAMES, make_binance_ticker_arr
+
+
+def test_binance_extraction_matches_full_parse():
+    parse = price_parser("Binance")
+    for separators in ((",", ":"), (", ", ": ")):
+        frame = json.dumps(make_binance_ticker_arr(300), separators=separators)
+        extracted = decode_frame(frame, extract_binance_tickers)
+        assert isinstance(extracted, ExtractedTickers)
+        assert parse(extracted) == parse(decode_frame(frame))
+
+    # не массив тикеров — обычный разбор
+    assert decode_frame('{"result":null,"id":1}', extract_binance_tickers) == {"result": None, "id": 1}
+
+
+def test_decoder_offloads_gzip_and_large_frames():
+    htx = gzip.compress(json.dumps(WS_FRAMES["HTX"]).encode())
+    large = json.dumps(make_binance_ticker_arr(50))
+    decoder = FrameDecoder(offload="thread", offload_bytes=len(large))
+
+    async def scenario():
+        return await decoder(htx), await decoder(large), await decoder("pong")
+
+    htx_data, large_data, pong = asyncio.run(scenario())
+
+    assert htx_data == WS_FRAMES["HTX"]
+    assert len(large_data) == 50
+    assert pong == {"event": "pong"}
+    assert decoder.offloaded == 2
@@ -0,0 +1,131 @@
+import asyncio
+import copy
+from aiohttp import web
+from backend.core.exchange_adapters import ADAPTERS
+from backend.core.instruments import INSTRUMENT_SOURCES, InstrumentRegistry
+from backend.core.sample_payloads import REST_INSTRUMENTS
+
+
+async def start_fake_exchange(payloads: dict):
+    """🧪 Локальный HTTP-сервер с записанными списками инструментов по /<exchange>."""
+    async def handler(request):
+        exchange = request.match_info["exchange"]
+        if exchange not in payloads:
+            return web.Response(status=503)
+        return web.json_response(payloads[exchange])
+
+    app = web.Application()
+    app.router.add_get("/{exchange}", handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    return runner, f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}"
+
+
+def sources_at(base_url: str) -> dict:
+    return {exchange: (f"{base_url}/{exchange}", parse) for exchange, (_, parse) in INSTRUMENT_SOURCES.items()}
+
+
+def refresh(registry_factory, payloads):
+    async def scenario():
+        runner, base_url = await start_fake_exchange(payloads)
+        try:
+            registry = registry_factory(sources_at(base_url))
+            return registry, await registry.refresh()
+        finally:
+            await runner.cleanup()
+    return asyncio.run(scenario())
+
+
+def test_registry_loads_instruments_and_caches_ids_on_disk(tmp_path):
+    path = str(tmp_path / "instruments.json")
+    registry, counts = refresh(lambda sources: InstrumentRegistry(path, sources=sources), REST_INSTRUMENTS)
+    assert counts["Binance"] == 2 and counts["Gateio"] == 1 and counts["OKX"] == 2   # неторгуемые пропущены
+    assert len(registry) == 11
+
+    # O(1) в обе стороны и метаданные инструмента
+    assert registry.canonical("KuCoin", "BTC-USDT") == "BTCUSDT" and registry.native("HTX", "BTCUSDT") == "btcusdt"
+    assert registry.canonical("Gateio", "ETH_BTC") is None and registry.native("Bybit", "ETHBTC") is None
+    btc = registry.find("Binance", "BTCUSDT")
+    assert (btc.base, btc.quote, btc.tick_size, btc.lot_size) == ("BTC", "USDT", 0.01, 0.00001)
+    assert registry.find("Gateio", "BTCUSDT").tick_size == 0.1 and registry.find("HTX", "BTCUSDT").lot_size == 1e-6
+    assert registry.get(btc.id) is btc and registry.instrument_id("Binance", "BTCUSDT") == btc.id
+
+    # индекс актива по биржам
+    listings = registry.listings("BTCUSDT")
+    assert set(listings) == set(INSTRUMENT_SOURCES) and listings["OKX"].native == "BTC-USDT"
+    assert registry.assets[registry.asset_id("ETHBTC")] == "ETHBTC" and set(registry.listings("ETHBTC")) == {"Binance", "OKX"}
+
+    # кеш на диске: те же id без сети
+    cached = InstrumentRegistry(path)
+    assert cached.load_cache()
+    assert [tuple(i) for i in cached.instruments] == [tuple(i) for i in registry.instruments]
+
+    # адаптеры отвечают по реестру
+    adapters = {name: copy.copy(ADAPTERS[name]) for name in ("KuCoin", "HTX")}
+    for adapter in adapters.values():
+        adapter._canonical, adapter._native = {}, {}
+    cached.install(adapters)
+    assert adapters["KuCoin"]._canonical == {"BTC-USDT": "BTCUSDT"} and adapters["HTX"].native("BTCUSDT") == "btcusdt"
+
+
+def test_stale_cache_keeps_ids_for_unavailable_exchanges(tmp_path):
+    path = str(tmp_path / "instruments.json")
+    refresh(lambda sources: InstrumentRegistry(path, sources=sources), REST_INSTRUMENTS)
+
+    # кеш устарел, OKX недоступен; у Binance появилась новая пара
+    payloads = copy.deepcopy({exchange: REST_INSTRUMENTS[exchange] for exchange in ("Binance",)})
+    payloads["Binance"]["symbols"].append({"symbol": "HOTUSDT", "status": "TRADING", "baseAsset": "HOT",
+                                           "quoteAsset": "USDT", "filters": []})
+
+    async def scenario():
+        runner, base_url = await start_fake_exchange(payloads)
+        try:
+            registry = InstrumentRegistry(path, ttl=0, sources=sources_at(base_url))
+            registry.install = lambda adapters=None: None   # глобальные адаптеры в тесте не трогаем
+            return await registry.ensure()
+        finally:
+            await runner.cleanup()
+
+    before = InstrumentRegistry(path)
+    assert before.load_cache()
+    registry = asyncio.run(scenario())
+    assert registry.instrument_id("OKX", "ETHBTC") == before.instrument_id("OKX", "ETHBTC") is not None
+    assert registry.instrument_id("Binance", "BTCUSDT") == before.instrument_id("Binance", "BTCUSDT")
+    assert registry.canonical("Binance", "HOTUSDT") == "HOTUSDT" and len(registry) == len(before) + 1
+
+
+def test_delisted_instruments_leave_subscriptions_and_return_when_relisted(tmp_path):
+    path = str(tmp_path / "instruments.json")
+    registry, _ = refresh(lambda sources: InstrumentRegistry(path, sources=sources), REST_INSTRUMENTS)
+    btc = registry.instrument_id("Binance", "BTCUSDT")
+
+    # BTCUSDT на Binance снят с торгов, OKX недоступен, у Bybit пустой ответ — их пары остаются
+    payloads = copy.deepcopy({exchange: REST_INSTRUMENTS[exchange] for exchange in ("Binance", "Bybit")})
+    payloads["Binance"]["symbols"][0]["status"] = "BREAK"
+    payloads["Bybit"]["result"]["list"] = []
+    counts = asyncio.run(refresh_with(registry, payloads))
+    assert (counts["Binance"], counts["Bybit"], counts["OKX"]) == (1, 0, 0)
+    assert registry.natives("Binance") == ["ETHBTC"] and registry.native("Binance", "BTCUSDT") is None
+    assert "Binance" not in registry.listings("BTCUSDT") and registry.delisted == {btc}
+    assert registry.natives("OKX") == ["BTC-USDT", "ETH-BTC"] and registry.natives("Bybit") == ["BTCUSDT"]
+    assert registry.canonical("Binance", "BTCUSDT") == "BTCUSDT"   # старые сообщения по-прежнему разбираются
+
+    # отметка переживает перезапуск через кеш
+    cached = InstrumentRegistry(path)
+    assert cached.load_cache() and cached.delisted == {btc} and cached.natives("Binance") == ["ETHBTC"]
+
+    # пара вернулась — тот же id, снова в подписках
+    asyncio.run(refresh_with(registry, {"Binance": REST_INSTRUMENTS["Binance"]}))
+    assert registry.delisted == set() and registry.natives("Binance") == ["BTCUSDT", "ETHBTC"]
+    assert registry.instrument_id("Binance", "BTCUSDT") == btc
+
+
+async def refresh_with(registry: InstrumentRegistry, payloads: dict) -> dict:
+    runner, base_url = await start_fake_exchange(payloads)
+    try:
+        registry.sources = sources_at(base_url)
+        return await registry.refresh()
+    finally:
+        await runner.cleanup()
@@ -0,0 +1,146 @@
+import asyncio
+import json
+import numpy as np
+import pytest
+import websockets
+from aiohttp import web
+from backend.core.local_orderbook import DepthEvent, LocalOrderBook, OrderBookManager, SequenceGap
+from backend.core.sample_payloads import REST_ORDERBOOKS, WS_DEPTH_DIFFS
+
+BINANCE_SNAPSHOT_2 = {
+    "lastUpdateId": 51234567905,
+    "bids": [["67250.3", "0.250"], ["67249.9", "0.700"], ["67249.5", "2.000"], ["67247.1", "2.010"], ["67245.0", "4.800"]],
+    "asks": [["67250.0", "0.600"], ["67251.2", "1.700"], ["67252.8", "0.220"]],
+}
+OKX_RESUBSCRIBE = [
+    {"arg": {"channel": "books", "instId": "BTC-USDT"}, "action": "snapshot",
+     "data": [{"bids": [["67249.0", "1.0", "0", "1"]], "asks": [["67251.0", "2.0", "0", "1"]],
+               "ts": "1718000001000", "prevSeqId": -1, "seqId": 200}]},
+    {"arg": {"channel": "books", "instId": "BTC-USDT"}, "action": "update",
+     "data": [{"bids": [["67249.5", "0.3", "0", "1"]], "asks": [], "ts": "1718000001100",
+               "prevSeqId": 200, "seqId": 201}]},
+]
+
+
+async def start_replay_server(on_message):
+    """🧪 Локальный WebSocket-сервер: на каждое сообщение клиента отвечает записанными кадрами."""
+    async def handler(ws):
+        async for message in ws:
+            for frame in on_message(json.loads(message)):
+                await ws.send(json.dumps(frame))
+
+    server = await websockets.serve(handler, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    return server, f"ws://127.0.0.1:{port}"
+
+
+async def start_snapshot_server(snapshots: list, calls: list):
+    """🧪 REST-снапшоты по очереди (последний отдаётся повторно)."""
+    async def depth(request):
+        calls.append(request.query["symbol"])
+        return web.json_response(snapshots.pop(0) if len(snapshots) > 1 else snapshots[0])
+
+    app = web.Application()
+    app.router.add_get("/depth", depth)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{port}/depth?symbol={{}}"
+
+
+async def wait_for(condition, timeout: float = 5):
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while not condition():
+        assert loop.time() < deadline, "стакан не синхронизировался"
+        await asyncio.sleep(0.01)
+
+
+def test_local_book_applies_diffs_and_detects_gaps():
+    book = LocalOrderBook("Binance", "BTCUSDT")
+    book.buffer(DepthEvent("BTCUSDT", False, 8, 10, [["99", "1"]], []))
+    book.buffer(DepthEvent("BTCUSDT", False, 11, 12, [["101", "0"]], [["102", "3"]]))
+    book.apply_snapshot([["101", "2"], ["100", "1"]], [["103", "1"]], 10)
+
+    assert book.last_update_id == 12
+    assert book.levels(5) == ([(100.0, 1.0)], [(102.0, 3.0), (103.0, 1.0)])
+    assert book.apply_diff(DepthEvent("BTCUSDT", False, 5, 12, [["1", "1"]], [])) is False
+    with pytest.raises(SequenceGap):
+        book.apply_diff(DepthEvent("BTCUSDT", False, 14, 15, [], []))
+
+    impacts = book.impacts([102, 400, 500], "buy")   # глубина asks — 409 USDT
+    assert impacts[0] == 0
+    assert impacts[1] > 0
+    assert np.isnan(impacts[2])
+
+
+def test_binance_replay_resyncs_after_gap():
+    async def scenario():
+        calls = []
+        rest, snapshot_url = await start_snapshot_server([REST_ORDERBOOKS["Binance"], BINANCE_SNAPSHOT_2], calls)
+        subscriptions = []
+
+        def on_message(message):
+            subscriptions.append(message)
+            return WS_DEPTH_DIFFS["Binance"] if message["method"] == "SUBSCRIBE" else []
+
+        server, url = await start_replay_server(on_message)
+        manager = OrderBookManager()
+        task = asyncio.create_task(manager.run_exchange("Binance", ["BTCUSDT"], url=url, snapshot_url=snapshot_url))
+        try:
+            await wait_for(lambda: manager.book("Binance", "BTCUSDT") is not None
+                           and manager.book("Binance", "BTCUSDT").last_update_id == 51234567910)
+            best = manager.best_bid_ask("Binance", "BTCUSDT")
+            levels = manager.levels("Binance", "BTCUSDT", 3)
+            stats = manager.stats()["Binance"]
+        finally:
+            task.cancel()
+            server.close()
+            await rest.cleanup()
+        return best, levels, stats, calls, subscriptions
+
+    best, levels, stats, calls, subscriptions = asyncio.run(scenario())
+
+    assert subscriptions[0]["params"] == ["btcusdt@depth@100ms"]
+    assert calls == ["BTCUSDT", "BTCUSDT"]
+    assert best == (67250.4, 67250.9)
+    assert levels == ([(67250.4, 0.15), (67250.3, 0.25), (67249.9, 0.7)],
+                      [(67250.9, 1.1), (67251.2, 2.5), (67252.8, 0.22)])
+    assert stats["gaps"] == 1
+    assert stats["synced_books"] == 1
+
+
+def test_okx_replay_resubscribes_after_gap():
+    async def scenario():
+        subscriptions = []
+
+        def on_message(message):
+            if message["op"] != "subscribe":
+                return []
+            subscriptions.append(message["args"])
+            return WS_DEPTH_DIFFS["OKX"] if len(subscriptions) == 1 else OKX_RESUBSCRIBE
+
+        server, url = await start_replay_server(on_message)
+        manager = OrderBookManager()
+        task = asyncio.create_task(manager.run_exchange("OKX", ["BTCUSDT"], url=url))
+        try:
+            await wait_for(lambda: manager.book("OKX", "BTCUSDT") is not None
+                           and manager.book("OKX", "BTCUSDT").last_update_id == 201)
+            best = manager.best_bid_ask("OKX", "BTCUSDT")
+            impacts = manager.impacts("OKX", "BTCUSDT", [10], "buy")
+            stats = manager.stats()["OKX"]
+        finally:
+            task.cancel()
+            server.close()
+        return best, impacts, stats, subscriptions
+
+    best, impacts, stats, subscriptions = asyncio.run(scenario())
+
+    assert subscriptions == [[{"channel": "books", "instId": "BTC-USDT"}]] * 2
+    assert best == (67249.5, 67251.0)
+    assert impacts[0] == 0
+    assert stats["gaps"] == 1
+    assert stats["resyncs"] == 1
+    assert stats["snapshots"] == 2
@@ -0,0 +1,68 @@
+import numpy as np
+from sqlalchemy import create_engine, text # type: ignore
+from backend.core.arbitrage import pick_trade_size
+from backend.database import migrations
+from backend.database.orderbook_codec import BookSide, decode_legacy, decode_levels, encode_levels, is_binary, load_side
+
+SHALLOW = np.array([[100.0, 1.0], [100.1, 1.0]])   # 200.1 USDT глубины
+
+
+def test_sizes_deeper_than_book_are_not_fillable():
+    side = BookSide(SHALLOW)
+    impacts = side.impacts([100, 200.1, 500, 5000], "buy")
+    assert impacts[0] == 0 and round(impacts[1], 4) == round((200.1 / 2 - 100) / 100 * 100, 4)
+    assert np.isnan(impacts[2:]).all()
+    assert side.impact(5000, "buy") is None
+    assert np.isnan(BookSide(np.empty((0, 2))).impacts([100], "sell")).all()
+
+
+def test_trade_size_never_exceeds_book_depth():
+    shallow = np.nan_to_num(BookSide(SHALLOW).impacts((100, 500, 1000, 5000), "buy"), nan=100.0)
+    deep = np.zeros(4)
+    assert pick_trade_size(shallow, deep) == 100
+    assert pick_trade_size(deep, shallow) == 100
+    assert pick_trade_size(np.full(4, 100.0), deep) is None
+    assert pick_trade_size(deep, deep) == 5000
+
+
+def test_levels_roundtrip_with_cumulative_columns():
+    blob = encode_levels([(100.0, 2.0), (101.0, 1.0)])
+    assert is_binary(blob) and not is_binary("[(100.0, 2.0)]")
+    assert decode_levels(blob).tolist() == [[100.0, 2.0, 2.0, 200.0], [101.0, 1.0, 3.0, 301.0]]
+    assert decode_levels(encode_levels([])).shape == (0, 4)
+    assert decode_levels(encode_levels([100.0, 2.0, 101.0, 1.0])).shape == (2, 4)   # плоский список -> пары
+
+    # старый текст: кортежи чисел и списки строк (лишние поля отбрасываются), bytes из BLOB-колонки
+    assert decode_legacy("[(100.0, 2.0), (101.0, 1.0)]").tolist() == [[100.0, 2.0], [101.0, 1.0]]
+    assert decode_legacy(b"[['100.5', '3', '0']]").tolist() == [[100.5, 3.0]]
+    assert decode_legacy("[]").shape == (0, 2) and load_side(None).shape == (0, 2)
+    assert load_side(blob).tolist() == decode_levels(blob).tolist()
+
+
+def test_migration_converts_legacy_text_books_in_batches(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'books.db'}")
+    binary = encode_levels([(1.0, 1.0)])
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE order_books (id INTEGER PRIMARY KEY, exchange VARCHAR(50), "
+                          "asset VARCHAR(50), bids TEXT NOT NULL, asks TEXT NOT NULL, timestamp DATETIME)"))
+        conn.execute(text("INSERT INTO order_books (id, exchange, asset, bids, asks) VALUES (:id, 'Binance', :asset, :bids, :asks)"), [
+            {"id": 1, "asset": "BTCUSDT", "bids": "[(100.0, 2.0)]", "asks": "[(101.0, 1.0)]"},
+            {"id": 2, "asset": "ETHUSDT", "bids": "[['10', '5']]", "asks": "[]"},
+            {"id": 3, "asset": "SOLUSDT", "bids": binary, "asks": "[(2.0, 3.0)]"},   # частично переведённая строка
+            {"id": 4, "asset": "XRPUSDT", "bids": binary, "asks": binary},           # уже бинарная
+            {"id": 5, "asset": "DOGEUSDT", "bids": "[(1.0,", "asks": "[]"},          # битая — пропускается
+        ])
+    monkeypatch.setattr(migrations, "MIGRATION_BATCH_SIZE", 2)
+
+    assert migrations.migrate_orderbooks_to_binary(bind=engine) == 3
+    with engine.connect() as conn:
+        books = {row.id: (row.bids, row.asks) for row in conn.execute(text("SELECT id, bids, asks FROM order_books"))}
+    assert decode_levels(books[1][0]).tolist() == [[100.0, 2.0, 2.0, 200.0]]
+    assert decode_levels(books[1][1]).tolist() == [[101.0, 1.0, 1.0, 101.0]]
+    assert decode_levels(books[2][0]).tolist() == [[10.0, 5.0, 5.0, 50.0]] and len(decode_levels(books[2][1])) == 0
+    assert books[3] == (binary, encode_levels([(2.0, 3.0)])) and books[4] == (binary, binary)
+    assert books[5] == ("[(1.0,", "[]")
+
+    # повторный запуск ничего не трогает; без таблицы — 0
+    assert migrations.migrate_orderbooks_to_binary(bind=engine) == 0
+    assert migrations.migrate_orderbooks_to_binary(bind=create_engine("sqlite://")) == 0
@@ -0,0 +1,67 @@
+import multiprocessing
+import time
+from backend.core.price_board import PriceBoard, get_board
+from backend.core.price_store import LastPriceStore
+
+
+def test_reader_sees_writer_updates_and_slots_survive_restart(tmp_path):
+    path = str(tmp_path / "prices.board")
+    writer = PriceBoard(path, capacity=4, writer=True)
+    store = LastPriceStore()
+    store.subscribe(writer.write)
+    reader = PriceBoard(path)
+
+    store.update("Binance", "BTCUSDT", 65000.0, 100.0)
+    store.update("OKX", "BTCUSDT", 65010.0, 101.0)
+    assert reader.get("Binance", "BTCUSDT") == (65000.0, 100.0)
+    assert reader.quotes("BTCUSDT") == [("Binance", 65000.0, 100.0), ("OKX", 65010.0, 101.0)]
+    assert reader.get("Bybit", "BTCUSDT") is None
+
+    store.update("Binance", "BTCUSDT", 65001.0, 102.0)
+    store.update("Binance", "ETHUSDT", 3000.0, 103.0)
+    assert [row[:3] for row in reader.rows()] == [
+        ("Binance", "BTCUSDT", 65001.0), ("OKX", "BTCUSDT", 65010.0), ("Binance", "ETHUSDT", 3000.0)]
+
+    # перезапуск писателя: слоты и цены на месте, новые ключи продолжают нумерацию
+    writer.close()
+    writer = PriceBoard(path, capacity=4, writer=True)
+    assert writer.slot("Binance", "ETHUSDT") == 2
+    writer.write("Bybit", "BTCUSDT", 65005.0, 104.0)
+    writer.write("Bybit", "ETHUSDT", 3001.0, 105.0)  # места нет — пропускаем, а не падаем
+    writer.write("Bybit", "X" * 40, 1.0, 106.0)
+    assert writer.dropped == 2
+    assert reader.get("Bybit", "BTCUSDT") == (65005.0, 104.0)
+    assert len(reader) == 4
+
+
+def hammer(path, count):
+    writer = PriceBoard(path, writer=True)
+    for i in range(1, count + 1):
+        writer.write("Binance", "BTCUSDT", float(i), float(i))
+
+
+def test_seqlock_never_returns_torn_values(tmp_path):
+    path = str(tmp_path / "prices.board")
+    PriceBoard(path, writer=True).write("Binance", "BTCUSDT", 0.5, 0.5)
+    reader = PriceBoard(path)
+    process = multiprocessing.get_context("fork").Process(target=hammer, args=(path, 200_000))
+    process.start()
+    reads = 0
+    while process.is_alive():
+        price, ts = reader.get("Binance", "BTCUSDT")
+        _, prices, timestamps = reader.snapshot()
+        assert price == ts and prices[0] == timestamps[0]
+        reads += 1
+    process.join()
+    assert reads > 0
+    assert reader.get("Binance", "BTCUSDT") == (200_000.0, 200_000.0)
+
+
+def test_get_board_falls_back_when_writer_is_missing_or_stale(tmp_path):
+    path = str(tmp_path / "prices.board")
+    assert get_board(path) is None
+    writer = PriceBoard(path, writer=True)
+    writer.write("Binance", "BTCUSDT", 65000.0, time.time() - 3600)
+    assert get_board(path) is None
+    writer.write("Binance", "BTCUSDT", 65000.0)
+    assert get_board(path).get("Binance", "BTCUSDT")[0] == 65000.0
@@ -0,0 +1,69 @@
+import numpy as np
+from pytest import approx
+from backend.core.instruments import InstrumentRegistry
+from backend.core.price_matrix import PriceMatrix, scan_spreads
+
+# Binance / OKX — 0.1%, HTX — 0.2% тейкера
+QUOTES = [
+    ("Binance", "BTCUSDT", 100.0), ("OKX", "BTCUSDT", 103.5),                                 # нетто 3.29%
+    ("Binance", "ETHUSDT", 100.0), ("HTX", "ETHUSDT", 103.2),                                 # брутто 3.2%, нетто 2.89%
+    ("Binance", "XRPUSDT", 100.0), ("OKX", "XRPUSDT", 105.0), ("HTX", "XRPUSDT", 110.0),      # три пары
+    ("Binance", "SOLUSDT", 100.0), ("OKX", "SOLUSDT", 0.0), ("HTX", "SOLUSDT", None),         # одна котировка
+]
+
+
+def pairs(opportunities) -> list:
+    return [(o.asset, o.buy_exchange, o.sell_exchange) for o in opportunities]
+
+
+def test_scan_threshold_is_net_of_fees_and_pairs_sorted_by_spread():
+    matrix = PriceMatrix.from_rows(QUOTES)
+    found = scan_spreads(matrix, min_spread=3.0)
+    assert pairs(found) == [("XRPUSDT", "Binance", "HTX"), ("XRPUSDT", "Binance", "OKX"),
+                            ("XRPUSDT", "OKX", "HTX"), ("BTCUSDT", "Binance", "OKX")]
+    btc = found[-1]
+    assert (btc.buy_price, btc.sell_price, btc.gross_spread) == (100.0, 103.5, approx(3.5))
+    assert btc.spread == approx((103.5 * 0.999 - 100.1) / 100.1 * 100)
+    assert [o.spread for o in found] == sorted((o.spread for o in found), reverse=True)
+
+    # без комиссий ETH проходит порог по брутто-спреду, а порог включительный
+    free = scan_spreads(matrix, min_spread=3.2, fees={"Binance": 0, "OKX": 0, "HTX": 0})
+    assert ("ETHUSDT", "Binance", "HTX") in pairs(free)
+    assert all(o.spread == approx(o.gross_spread) for o in free)
+
+    # top_k и подмножество строк
+    assert pairs(scan_spreads(matrix, top_k=2)) == pairs(found[:2])
+    assert pairs(scan_spreads(matrix, rows=[matrix.asset_index["BTCUSDT"]])) == [("BTCUSDT", "Binance", "OKX")]
+
+
+def test_scan_skips_missing_and_nan_quotes():
+    matrix = PriceMatrix.from_rows(QUOTES)
+    sol = matrix.asset_index["SOLUSDT"]
+    assert np.isnan(matrix.prices[sol, 1:]).all() and matrix.quoted_assets() == 3
+    assert scan_spreads(matrix, min_spread=-100.0, rows=[sol]) == []
+
+    # котировка пропала — пара исчезает, NaN не попадает в результат
+    matrix.remove("OKX", "BTCUSDT")
+    matrix.update("HTX", "XRPUSDT", float("nan"))
+    found = scan_spreads(matrix, min_spread=-100.0)
+    assert not any(np.isnan(o.spread) or np.isnan(o.gross_spread) for o in found)
+    assert set(pairs(found)) == {("ETHUSDT", "Binance", "HTX"), ("ETHUSDT", "HTX", "Binance"),
+                                 ("XRPUSDT", "Binance", "OKX"), ("XRPUSDT", "OKX", "Binance")}
+
+    assert scan_spreads(PriceMatrix(), min_spread=0.0) == []
+    assert scan_spreads(PriceMatrix.from_rows([("Binance", "BTCUSDT", 100.0)]), min_spread=-100.0) == []
+
+
+def test_matrix_rows_are_registry_asset_ids():
+    registry = InstrumentRegistry()
+    registry.add("OKX", "ETH-USDT", "ETH", "USDT")
+    registry.add("Binance", "BTCUSDT", "BTC", "USDT")
+    matrix = PriceMatrix(capacity=1, registry=registry)
+    matrix.load([("Binance", "BTCUSDT", 100.0), ("OKX", "BTCUSDT", 104.0), ("Binance", "SOLUSDT", 1.0)])
+    assert matrix.asset_row("BTCUSDT") == registry.asset_id("BTCUSDT") == 1
+    assert registry.asset_id("SOLUSDT") == 2 and registry.listings("SOLUSDT") == {}   # символ без инструментов
+
+    # реестр вырос в обход матрицы — строки новых активов пустые
+    registry.add("KuCoin", "XRP-USDT", "XRP", "USDT")
+    assert matrix.prices.shape == (4, 2) and np.isnan(matrix.prices[3]).all()
+    assert pairs(scan_spreads(matrix)) == [("BTCUSDT", "Binance", "OKX")]
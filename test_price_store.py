@@ -0,0 +1,60 @@
+import asyncio
+from datetime import datetime
+from sqlalchemy import select # type: ignore
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker # type: ignore
+from sqlalchemy.pool import NullPool # type: ignore
+from backend.core.price_store import LastPriceStore
+from backend.database.models import Base, Price
+
+
+def test_updates_coalesce_in_memory_and_fan_out_to_subscribers():
+    store = LastPriceStore()
+    seen, late = [], []
+    store.subscribe(lambda *tick: seen.append(tick))
+    store.update("Binance", "BTCUSDT", 100.0, ts=1.0)
+    store.update("Binance", "BTCUSDT", 101.0, ts=2.0)
+    store.update("OKX", "BTCUSDT", 102.0, ts=3.0)
+    store.subscribe(late.append)
+    store.unsubscribe(late.append)
+    store.update("OKX", "ETHUSDT", 10.0, ts=4.0)
+
+    assert seen == [("Binance", "BTCUSDT", 100.0, 1.0), ("Binance", "BTCUSDT", 101.0, 2.0),
+                    ("OKX", "BTCUSDT", 102.0, 3.0), ("OKX", "ETHUSDT", 10.0, 4.0)]
+    assert late == []
+    assert store.get("Binance", "BTCUSDT") == (101.0, 2.0) and store.get("HTX", "BTCUSDT") is None
+    assert (len(store), store.updates, store.coalesced) == (3, 4, 1)
+
+    # take_dirty отдаёт последнюю цену каждого ключа и время самого старого изменения
+    rows, dirty_since = store.take_dirty()
+    assert sorted(rows) == [("Binance", "BTCUSDT", 101.0, 2.0), ("OKX", "BTCUSDT", 102.0, 3.0),
+                            ("OKX", "ETHUSDT", 10.0, 4.0)]
+    assert dirty_since == 1.0
+    assert store.take_dirty() == ([], None)
+    store.update("OKX", "ETHUSDT", 11.0, ts=5.0)
+    assert store.take_dirty() == ([("OKX", "ETHUSDT", 11.0, 5.0)], 5.0)
+
+
+def test_flush_writes_dirty_rows_and_requeues_after_failure(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'prices.db'}", poolclass=NullPool)
+    store = LastPriceStore(session_factory=async_sessionmaker(engine, expire_on_commit=False))
+    now = datetime.utcnow().timestamp()
+
+    async def scenario():
+        store.update("Binance", "BTCUSDT", 100.0, ts=now)
+        store.update("OKX", "BTCUSDT", 101.0, ts=now)
+        assert await store.flush() == 0          # таблицы ещё нет — запись падает
+        assert store.stats()["dirty"] == 2 and store.flush_errors == 1
+
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all, tables=[Price.__table__])
+        store.update("OKX", "BTCUSDT", 102.0, ts=now + 1)
+        assert await store.flush() == 2          # строки после ошибки + новая цена, склеенная с ними
+        assert await store.flush() == 0
+        async with store.session_factory() as db:
+            rows = (await db.execute(select(Price.exchange, Price.price).order_by(Price.exchange))).all()
+        await engine.dispose()
+        return rows
+
+    assert asyncio.run(scenario()) == [("Binance", 100.0), ("OKX", 102.0)]
+    stats = store.stats()
+    assert (stats["flushes"], stats["flushed_rows"], stats["dirty"]) == (1, 2, 0)
@@ -0,0 +1,131 @@
+import asyncio
+import time
+from aiohttp import web
+from sqlalchemy import select # type: ignore
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker # type: ignore
+from backend.core import price_updater
+from backend.core.price_store import LastPriceStore
+from backend.core.price_updater import RateLimiter, create_session, get_metrics, poll_and_save, poll_once
+from backend.core.sample_payloads import REST_TICKERS
+from backend.database.models import Base, Price
+
+
+async def start_fake_exchange(payloads: dict):
+    """🧪 Локальный HTTP-сервер, отдающий записанные ответы бирж по /<exchange>."""
+    async def ticker(request):
+        exchange = request.match_info["exchange"]
+        if exchange not in payloads:
+            return web.Response(status=503)
+        if isinstance(payloads[exchange], str):   # не JSON: страница ошибки / техработы
+            return web.Response(text=payloads[exchange], content_type="text/html")
+        return web.json_response(payloads[exchange])
+
+    app = web.Application()
+    app.router.add_get("/{exchange}", ticker)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{port}"
+
+
+def test_poll_once_parses_all_exchanges():
+    async def scenario():
+        runner, base_url = await start_fake_exchange(REST_TICKERS)
+        try:
+            apis = {exchange: f"{base_url}/{exchange}" for exchange in REST_TICKERS}
+            async with create_session() as session:
+                return await poll_once(session, apis)
+        finally:
+            await runner.cleanup()
+
+    price_updater.rate_limiters.clear()
+    results = asyncio.run(scenario())
+
+    assert set(results) == set(REST_TICKERS)
+    for exchange, rows in results.items():
+        assets = {row["asset"] for row in rows}
+        assert "BTCUSDT" in assets, exchange
+        assert all(row["price"] > 0 for row in rows)
+
+    metrics = get_metrics()
+    assert metrics["KuCoin"]["pairs"] == 3
+    assert metrics["Binance"]["latency_ms"] is not None
+    assert metrics["Binance"]["age_s"] < 5
+
+
+def test_failed_exchange_does_not_block_others():
+    async def scenario():
+        runner, base_url = await start_fake_exchange({"Binance": REST_TICKERS["Binance"]})
+        try:
+            apis = {"Binance": f"{base_url}/Binance", "OKX": f"{base_url}/OKX"}
+            async with create_session() as session:
+                return await poll_once(session, apis)
+        finally:
+            await runner.cleanup()
+
+    price_updater.rate_limiters.clear()
+    price_updater.exchange_metrics.pop("OKX", None)
+    results = asyncio.run(scenario())
+
+    assert list(results) == ["Binance"]
+    assert get_metrics()["OKX"]["errors"] == 1
+
+
+def test_non_json_body_and_db_error_do_not_stop_polling(monkeypatch):
+    async def broken_save(rows):
+        raise RuntimeError("db down")
+
+    async def scenario():
+        payloads = {"Binance": REST_TICKERS["Binance"], "OKX": "<html>502 Bad Gateway</html>"}
+        runner, base_url = await start_fake_exchange(payloads)
+        try:
+            apis = {exchange: f"{base_url}/{exchange}" for exchange in payloads}
+            async with create_session() as session:
+                return await poll_and_save(session, apis)
+        finally:
+            await runner.cleanup()
+
+    price_updater.rate_limiters.clear()
+    price_updater.exchange_metrics.pop("OKX", None)
+    monkeypatch.setattr(price_updater, "save_prices", broken_save)
+    results = asyncio.run(scenario())
+
+    assert list(results) == ["Binance"]
+    assert get_metrics()["OKX"]["errors"] == 1 and get_metrics()["OKX"]["last_error"]
+
+
+def test_rate_limiter_spaces_requests():
+    async def scenario():
+        limiter = RateLimiter(0.05)
+        started = time.monotonic()
+        for _ in range(3):
+            await limiter.wait()
+        return time.monotonic() - started
+
+    assert asyncio.run(scenario()) >= 0.1
+
+
+def test_store_flushes_through_async_session():
+    async def scenario():
+        engine = create_async_engine("sqlite+aiosqlite://")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        store = LastPriceStore(session_factory=async_sessionmaker(engine, expire_on_commit=False))
+
+        store.update("Binance", "BTCUSDT", 65000.0)
+        store.update("Binance", "BTCUSDT", 65010.0)
+        store.update("OKX", "BTCUSDT", 65020.0)
+        assert await store.flush() == 2
+        store.update("Binance", "BTCUSDT", 65030.0)
+        assert await store.flush() == 1
+        assert await store.flush() == 0
+
+        async with engine.connect() as conn:
+            rows = (await conn.execute(select(Price.exchange, Price.price).order_by(Price.exchange))).all()
+        await engine.dispose()
+        assert [tuple(row) for row in rows] == [("Binance", 65030.0), ("OKX", 65020.0)]
+        assert store.stats()["flushed_rows"] == 3 and store.stats()["flush_errors"] == 0
+
+    asyncio.run(scenario())
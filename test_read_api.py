@@ -0,0 +1,106 @@
+import time
+from datetime import datetime, timedelta
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine # type: ignore
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker # type: ignore
+from sqlalchemy.orm import sessionmaker # type: ignore
+from sqlalchemy.pool import NullPool # type: ignore
+from backend.core import read_api
+from backend.core.price_board import PriceBoard
+from backend.database.db_connector import get_async_db
+from backend.database.models import Base, Price, ArbitrageSignal
+
+EXCHANGES = ("Binance", "OKX", "Bybit")
+
+
+def make_client(monkeypatch, tmp_path, board=None):
+    # файл, а не :memory: — TestClient поднимает свой event loop, эндпоинты читают через aiosqlite
+    path = tmp_path / "api.db"
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    now = datetime(2026, 1, 1)
+    for i in range(10):
+        for j, exchange in enumerate(EXCHANGES):
+            db.add(Price(exchange=exchange, asset=f"COIN{i}USDT", price=10.0 + i + j / 10,
+                         timestamp=now + timedelta(seconds=i)))
+        db.add(ArbitrageSignal(asset=f"COIN{i}USDT", buy_exchange="Binance", sell_exchange=EXCHANGES[1 + i % 2],
+                               buy_price=10.0, sell_price=10.1, spread=i / 4, size_usdt=100.0,
+                               type="межбиржевой", timestamp=now))
+    db.commit()
+    db.close()
+    AsyncSession = async_sessionmaker(create_async_engine(f"sqlite+aiosqlite:///{path}", poolclass=NullPool))
+
+    async def session():
+        async with AsyncSession() as s:
+            yield s
+
+    monkeypatch.setattr(read_api, "get_board", lambda: board)
+    monkeypatch.setattr(read_api, "cache", read_api.ResponseCache(ttl=60))
+    app = FastAPI()
+    app.include_router(read_api.router)
+    app.dependency_overrides[get_async_db] = session
+    return TestClient(app)
+
+
+def fetch_all(client, url, **params):
+    rows, cursor, pages = [], None, 0
+    while True:
+        body = client.get(url, params={**params, **({"cursor": cursor} if cursor else {})}).json()
+        rows += body["data"]
+        pages += 1
+        cursor = body["next_cursor"]
+        if cursor is None:
+            return rows, pages
+
+
+def test_prices_pagination_filters_and_projection(monkeypatch, tmp_path):
+    client = make_client(monkeypatch, tmp_path)
+
+    rows, pages = fetch_all(client, "/prices", sort="-price", limit=7)
+    assert pages == 5 and len(rows) == 30
+    assert [r["price"] for r in rows] == sorted((r["price"] for r in rows), reverse=True)
+
+    rows, _ = fetch_all(client, "/prices", exchange="OKX,Bybit", asset="COIN1USDT,COIN2USDT",
+                        fields="exchange,price", sort="timestamp", limit=3)
+    assert [set(r) for r in rows] == [{"exchange", "price"}] * 4
+    assert sorted(r["price"] for r in rows) == [11.1, 11.2, 12.1, 12.2]
+
+    assert client.get("/prices", params={"fields": "id"}).status_code == 400
+    assert client.get("/prices", params={"cursor": "garbage"}).status_code == 400
+
+
+def test_signals_sorted_by_spread_with_etag(monkeypatch, tmp_path):
+    client = make_client(monkeypatch, tmp_path)
+
+    rows, pages = fetch_all(client, "/arbitrage", min_spread=0.5, exchange="OKX", limit=2)
+    assert [r["spread"] for r in rows] == [2.0, 1.5, 1.0, 0.5]
+    assert pages == 2
+
+    first = client.get("/arbitrage", params={"fields": "asset,spread", "limit": 3})
+    assert first.json()["data"][0] == {"asset": "COIN9USDT", "spread": 2.25}
+    etag = first.headers["etag"]
+    again = client.get("/arbitrage", params={"limit": 3, "fields": "asset,spread"}, headers={"If-None-Match": etag})
+    assert again.status_code == 304 and again.content == b""
+    assert read_api.cache.stats()["hits"] == 1 and read_api.cache.stats()["not_modified"] == 1
+
+
+def test_board_prices_and_symbol_quotes(monkeypatch, tmp_path):
+    board = PriceBoard(str(tmp_path / "prices.board"), writer=True)
+    for i, exchange in enumerate(("Binance", "OKX", "Bybit", "Gateio")):
+        board.write(exchange, "BTCUSDT", 65000.0 + i * 10 * (-1) ** i, time.time())
+        board.write(exchange, "ETHUSDT", 3000.0 + i, time.time())
+    client = make_client(monkeypatch, tmp_path, board)
+
+    rows, pages = fetch_all(client, "/prices", sort="-price", limit=3, fields="exchange,asset,price")
+    assert pages == 3 and len(rows) == 8
+    assert [r["price"] for r in rows] == sorted((r["price"] for r in rows), reverse=True)
+    rows, _ = fetch_all(client, "/prices", asset="ETHUSDT", limit=3)
+    assert [r["exchange"] for r in rows] == ["Binance", "Bybit", "Gateio", "OKX"]
+
+    quotes = client.get("/quotes/BTCUSDT").json()
+    assert [q["exchange"] for q in quotes["quotes"]] == ["Gateio", "OKX", "Binance", "Bybit"]
+    assert quotes["spread"] == round((65020.0 - 64970.0) / 64970.0 * 100, 4)
+    assert client.get("/price/BTCUSDT").json() == {"symbol": "BTCUSDT", "price": 64970.0, "exchange": "Gateio"}
+    assert client.get("/quotes/DOGEUSDT").status_code == 404
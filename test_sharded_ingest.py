@@ -0,0 +1,97 @@
+import asyncio
+import time
+from backend.core import instruments, sharded_ingest
+from backend.core.price_store import LastPriceStore
+from backend.core.sharded_ingest import ShardedIngestion, parse_shards, pipe_sink, plan_shards
+from backend.core.websocket_price_updater import shard_symbols
+
+
+def test_plan_spreads_shards_across_workers():
+    shards = parse_shards(["Bybit=3", "Binance=2"])
+    plan = plan_shards(["Binance", "Bybit", "OKX"], shards, workers=2)
+
+    assert shards == {"Bybit": 3, "Binance": 2}
+    assert plan == [
+        [("Binance", 0, 1), ("Bybit", 1, 3), ("OKX", 0, 1)],
+        [("Bybit", 0, 3), ("Bybit", 2, 3)],
+    ]
+    assert plan_shards(["Binance"], {}, workers=8) == [[("Binance", 0, 1)]]
+
+
+def test_shard_symbols_partition_is_complete():
+    symbols = [f"COIN{i}USDT" for i in range(10)]
+    parts = [shard_symbols(reversed(symbols), (i, 3)) for i in range(3)]
+    assert sorted(sum(parts, [])) == sorted(symbols)
+    assert not set(parts[0]) & set(parts[1])
+
+
+def one_batch_worker(specs, conn):
+    """Воркер теста: одна пачка тиков на шард и выход (монитор должен перезапустить)."""
+    for exchange, index, count in specs:
+        pipe_sink(exchange, conn)([(f"COIN{index}USDT", 1.0 + index)])
+    time.sleep(0.05)
+
+
+def test_parent_collects_ticks_and_restarts_workers():
+    async def scenario():
+        sharded_ingest.MONITOR_INTERVAL = 0.05
+        ingestion = ShardedIngestion([[("Bybit", 0, 2)], [("Bybit", 1, 2)]], store=LastPriceStore(),
+                                     target=one_batch_worker)
+        task = asyncio.create_task(ingestion.run())
+        while ingestion.restarts < 2:
+            await asyncio.sleep(0.01)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        return ingestion
+
+    try:
+        ingestion = asyncio.run(scenario())
+    finally:
+        sharded_ingest.MONITOR_INTERVAL = 1
+
+    assert ingestion.store.get("Bybit", "COIN0USDT")[0] == 1.0
+    assert ingestion.store.get("Bybit", "COIN1USDT")[0] == 2.0
+    assert ingestion.stats()["ticks"] >= 2
+    assert all(not process.is_alive() for process in ingestion.processes)
+
+
+class Recorder:
+    """Заглушка долгоживущих задач: запоминает вызов и сразу завершается."""
+
+    def __init__(self, calls: list, name: str):
+        self.calls, self.name = calls, name
+
+    def __call__(self, *args, **kwargs):
+        self.calls.append((self.name, args))
+        return self
+
+    async def run(self):
+        self.calls.append((self.name, "run"))
+
+    run_flusher = run
+
+
+def test_entry_points_ensure_registry_and_start_workers(monkeypatch):
+    calls = []
+
+    async def ensure():
+        calls.append(("registry", "ensure"))
+    monkeypatch.setattr(instruments.registry, "ensure", ensure)
+    for name in ("WebSocketSupervisor", "ShardedIngestion", "publish_to_board", "record_history", "archive_ticks"):
+        monkeypatch.setattr(sharded_ingest, name, Recorder(calls, name))
+    monkeypatch.setattr(sharded_ingest, "price_store", Recorder(calls, "price_store"))
+
+    # воркер: реестр, затем коннекторы своих шардов под супервизором
+    asyncio.run(sharded_ingest._worker_main([("Bybit", 0, 2), ("OKX", 0, 1)], None))
+    assert calls[0] == ("registry", "ensure")
+    (name, (connectors,)), run = calls[1:]
+    assert name == "WebSocketSupervisor" and [c.exchange for c in connectors] == ["Bybit[1/2]", "OKX"]
+    assert run == ("WebSocketSupervisor", "run")
+
+    # родитель: реестр до запуска воркеров, затем план шардов и фоновые задачи
+    calls.clear()
+    asyncio.run(sharded_ingest.main(["Bybit", "OKX"], {"Bybit": 2}, workers=2))
+    assert calls[0] == ("registry", "ensure")
+    assert ("ShardedIngestion", ([[("Bybit", 0, 2), ("OKX", 0, 1)], [("Bybit", 1, 2)]],)) in calls
+    assert all(call in calls for call in [("ShardedIngestion", "run"), ("price_store", "run"),
+                                          ("archive_ticks", "run")])
@@ -0,0 +1,85 @@
+from datetime import datetime, timedelta
+from sqlalchemy import create_engine, event # type: ignore
+from sqlalchemy.orm import sessionmaker # type: ignore
+from backend.core.signal_lifecycle import SignalTracker
+from backend.database.models import ArbitrageSignal, Base, SignalHistory
+
+T0 = datetime(2026, 1, 1, 12)
+
+
+def signal(asset: str, spread: float, at: float, buy="Binance", sell="OKX", size=1000, kind="межбиржевой"):
+    return ArbitrageSignal(asset=asset, buy_exchange=buy, sell_exchange=sell, buy_price=100.0,
+                           sell_price=100.0 + spread, spread=spread, size_usdt=size, type=kind,
+                           timestamp=T0 + timedelta(seconds=at))
+
+
+def signals_db(path):
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine, tables=[ArbitrageSignal.__table__, SignalHistory.__table__])
+    writes = []
+    event.listen(engine, "before_cursor_execute",
+                 lambda conn, cursor, statement, *args: writes.append(statement)
+                 if not statement.lstrip().upper().startswith("SELECT") else None)
+    return engine, sessionmaker(bind=engine)(), writes
+
+
+def stored(db) -> dict:
+    return {(s.asset, s.buy_exchange, s.sell_exchange): s.spread for s in db.query(ArbitrageSignal)}
+
+
+def test_tracker_persists_only_changes_and_records_closed_history(tmp_path):
+    engine, db, writes = signals_db(tmp_path / "signals.db")
+    tracker = SignalTracker(min_spread=3.0)
+    at = lambda seconds: T0 + timedelta(seconds=seconds)
+
+    changes = tracker.apply(db, [signal("BTCUSDT", 4.0, 0), signal("ETHUSDT", 3.5, 0)], now=at(0))
+    assert (len(changes.opened), len(changes.updated), len(changes.closed)) == (2, 0, 0)
+    assert stored(db) == {("BTCUSDT", "Binance", "OKX"): 4.0, ("ETHUSDT", "Binance", "OKX"): 3.5}
+
+    # скан без изменений — ни одной записи в БД
+    writes.clear()
+    changes = tracker.apply(db, [signal("BTCUSDT", 4.005, 10), signal("ETHUSDT", 3.5, 10)], now=at(10))
+    assert changes == ([], [], []) and writes == []
+
+    # рост спреда — одна строка в одном upsert, пик запоминается
+    changes = tracker.apply(db, [signal("BTCUSDT", 6.0, 20), signal("ETHUSDT", 3.5, 20)], now=at(20))
+    assert [s.asset for s in changes.updated] == ["BTCUSDT"] and len(writes) == 1
+    tracker.apply(db, [signal("BTCUSDT", 4.5, 30), signal("ETHUSDT", 3.5, 30)], now=at(30))
+
+    # событийный пересчёт только ETH: BTC не трогается, ETH упал ниже порога — закрыт
+    changes = tracker.apply(db, [signal("ETHUSDT", 2.0, 40)], scope={"ETHUSDT"}, now=at(40))
+    assert [s.asset for s in changes.closed] == ["ETHUSDT"] and set(stored(db)) == {("BTCUSDT", "Binance", "OKX")}
+
+    # полный скан без BTC — закрыт и он; таблица сигналов пуста, история с длительностью и пиком
+    changes = tracker.apply(db, [], now=at(50))
+    assert [s.asset for s in changes.closed] == ["BTCUSDT"] and stored(db) == {} and len(tracker) == 0
+    history = {h.asset: h for h in db.query(SignalHistory)}
+    btc, eth = history["BTCUSDT"], history["ETHUSDT"]
+    assert (btc.opened_at, btc.closed_at, btc.duration_s) == (T0, at(50), 50.0)
+    assert (btc.open_spread, btc.peak_spread, btc.close_spread, btc.updates) == (4.0, 6.0, 4.5, 2)
+    assert (eth.duration_s, eth.peak_spread, eth.close_spread, eth.updates) == (40.0, 3.5, 3.5, 0)
+    assert tracker.stats() == {"active": 0, "opened": 2, "updated": 2, "closed": 2}
+
+
+def test_tracker_restores_open_signals_and_ignores_other_types(tmp_path):
+    engine, db, _ = signals_db(tmp_path / "signals.db")
+    SignalTracker(min_spread=3.0).apply(db, [signal("BTCUSDT", 4.0, 0), signal("SOLUSDT", 5.0, 0, sell="HTX")])
+    db.add(signal("USDT>ETH>BTC", 0.5, 0, buy="Binance", sell="Binance", kind="треугольный"))
+    db.commit()
+
+    # перезапуск: состояние из БД, треугольный сигнал принадлежит другому детектору
+    tracker = SignalTracker(min_spread=3.0)
+    changes = tracker.apply(db, [signal("BTCUSDT", 4.0, 60)], now=T0 + timedelta(seconds=60))
+    assert changes.opened == [] and [s.asset for s in changes.closed] == ["SOLUSDT"]
+    assert set(stored(db)) == {("BTCUSDT", "Binance", "OKX"), ("USDT>ETH>BTC", "Binance", "Binance")}
+    assert db.query(SignalHistory).one().duration_s == 60.0
+
+    # ошибка записи — откат, состояние перечитывается из БД
+    tracker.persist = lambda db, changes: (_ for _ in ()).throw(RuntimeError("db down"))
+    try:
+        tracker.apply(db, [])
+    except RuntimeError:
+        pass
+    assert not tracker.loaded and set(stored(db)) >= {("BTCUSDT", "Binance", "OKX")}
+    del tracker.persist
+    assert [s.asset for s in tracker.apply(db, []).closed] == ["BTCUSDT"]
@@ -0,0 +1,128 @@
+import asyncio
+import json
+import aiohttp
+import uvicorn
+import websockets
+from datetime import datetime, timezone
+from fastapi import FastAPI
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker # type: ignore
+from sqlalchemy.pool import NullPool # type: ignore
+from backend.core import stream_api
+from backend.core.stream_api import StreamHub
+from backend.database.models import ArbitrageSignal, Base, Price
+
+
+def make_signal(asset, buy, sell, spread):
+    return {"asset": asset, "buy_exchange": buy, "sell_exchange": sell, "buy_price": 1.0, "sell_price": 1.1,
+            "spread": spread, "size_usdt": 500.0, "type": "межбиржевой"}
+
+
+async def no_signals():
+    return []
+
+
+def test_hub_sends_filtered_deltas_and_drops_slow_clients():
+    async def no_prices():
+        return [], True
+
+    async def scenario():
+        hub = StreamHub(prices=no_prices, signals=no_signals, buffer=3)
+        hub.diff_prices([("Binance", "BTCUSDT", 65000.0, 1.0), ("OKX", "ETHUSDT", 3000.0, 1.0)])
+        btc = hub.subscribe(assets=["BTCUSDT"])
+        okx = hub.subscribe(exchanges=["OKX"])
+        slow = hub.subscribe()
+
+        snapshot = json.loads(await btc.next())
+        assert snapshot["type"] == "snapshot" and snapshot["prices"] == [["Binance", "BTCUSDT", 65000.0, 1.0]]
+        await okx.next()
+
+        # повторная цена не рассылается, изменённая — только подписчикам с подходящим фильтром
+        changed = hub.diff_prices([("Binance", "BTCUSDT", 65000.0, 2.0), ("OKX", "BTCUSDT", 65010.0, 2.0)])
+        hub.publish(prices=changed)
+        assert json.loads(await btc.next())["prices"] == [["OKX", "BTCUSDT", 65010.0, 2.0]]
+        assert json.loads(await okx.next())["prices"] == [["OKX", "BTCUSDT", 65010.0, 2.0]]
+
+        hub.publish(signals=hub.diff_signals([make_signal("ETHUSDT", "Binance", "OKX", 1.0)]))
+        assert json.loads(await okx.next())["signals"][0]["action"] == "new"
+        assert btc.queue.empty()
+        hub.publish(signals=hub.diff_signals([make_signal("ETHUSDT", "Binance", "OKX", 1.2)]))
+        hub.publish(signals=hub.diff_signals([]))
+        assert [json.loads(await okx.next())["signals"][0]["action"] for _ in range(2)] == ["updated", "removed"]
+
+        # slow не читал ни одного сообщения: буфер 3 переполнен -> отключён, в очереди только маркер
+        assert slow.dropped and slow not in hub.clients
+        assert await slow.next() is None
+        assert hub.dropped_clients == 1
+        for client in (btc, okx, slow):
+            hub.unsubscribe(client)
+        assert hub._tasks == []
+
+    asyncio.run(scenario())
+
+
+def test_websocket_and_sse_clients_receive_deltas():
+    prices = [("Binance", "BTCUSDT", 65000.0, 1.0)]
+
+    async def load_prices():
+        return list(prices), True
+
+    async def scenario():
+        stream_api.hub = StreamHub(prices=load_prices, signals=no_signals, price_interval=0.01)
+        app = FastAPI()
+        app.include_router(stream_api.router)
+        server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=0, log_level="warning"))
+        serving = asyncio.create_task(server.serve())
+        while not server.started:
+            await asyncio.sleep(0.01)
+        port = server.servers[0].sockets[0].getsockname()[1]
+
+        async with websockets.connect(f"ws://127.0.0.1:{port}/ws/stream?assets=BTCUSDT") as ws, \
+                aiohttp.ClientSession() as session, \
+                session.get(f"http://127.0.0.1:{port}/stream?exchanges=OKX") as sse:
+            assert json.loads(await ws.recv())["type"] == "snapshot"
+            assert (await sse.content.readline()).startswith(b"data: ")
+            while len(stream_api.hub.clients) < 2:
+                await asyncio.sleep(0.01)
+
+            prices.append(("OKX", "BTCUSDT", 65010.0, 2.0))
+            received = []
+            while not any(m["prices"] == [["OKX", "BTCUSDT", 65010.0, 2.0]] for m in received):
+                received.append(json.loads(await ws.recv()))
+            line = b""
+            while not line.startswith(b"data: "):
+                line = await sse.content.readline()
+            assert json.loads(line[6:])["prices"] == [["OKX", "BTCUSDT", 65010.0, 2.0]]
+
+        while stream_api.hub.clients:
+            await asyncio.sleep(0.01)
+        server.should_exit = True
+        await serving
+
+    hub = stream_api.hub
+    try:
+        asyncio.run(scenario())
+    finally:
+        stream_api.hub = hub
+
+
+def test_loaders_read_prices_and_signals_from_db(tmp_path, monkeypatch):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'stream.db'}", poolclass=NullPool)
+    monkeypatch.setattr(stream_api, "AsyncSessionLocal", async_sessionmaker(engine, expire_on_commit=False))
+    monkeypatch.setattr(stream_api, "get_board", lambda: None)   # доски нет — цены из БД
+
+    async def scenario():
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all, tables=[Price.__table__, ArbitrageSignal.__table__])
+        async with stream_api.AsyncSessionLocal() as db:
+            db.add(Price(exchange="OKX", asset="BTCUSDT", price=100.0, timestamp=datetime(2026, 1, 1)))
+            db.add(ArbitrageSignal(**make_signal("BTCUSDT", "Binance", "OKX", 4.0)))
+            await db.commit()
+        result = await stream_api.load_prices(), await stream_api.load_signals()
+        await engine.dispose()
+        return result
+
+    (prices, live), signals = asyncio.run(scenario())
+    assert live is False
+    assert prices == [("OKX", "BTCUSDT", 100.0, datetime(2026, 1, 1, tzinfo=timezone.utc).timestamp())]
+    assert signals == [make_signal("BTCUSDT", "Binance", "OKX", 4.0)]
+
@@ -0,0 +1,120 @@
+import asyncio
+import threading
+from backend.core.price_matrix import Opportunity
+from backend.core.tick_engine import CandidateBatcher, LatencyHistogram, TickArbitrageEngine
+
+
+def test_latency_histogram_percentiles_and_summary():
+    histogram = LatencyHistogram(buckets=(1, 5, 50))
+    assert histogram.percentile(99) == 0.0 and histogram.summary()["avg_ms"] == 0.0
+
+    for ms, times in ((0.5, 50), (5, 45), (40, 4), (20000, 1)):   # 5 мс — ещё корзина <=5
+        for _ in range(times):
+            histogram.record(ms)
+    assert [histogram.percentile(q) for q in (50, 95, 99, 100)] == [1.0, 5.0, 50.0, 20000.0]
+    summary = histogram.summary()
+    assert summary["buckets"] == {"<=1": 50, "<=5": 45, "<=50": 4, "inf": 1}
+    assert (summary["count"], summary["max_ms"]) == (100, 20000.0)
+    assert summary["avg_ms"] == round((0.5 * 50 + 5 * 45 + 40 * 4 + 20000) / 100, 2)
+
+
+def test_engine_debounces_ticks_and_reports_cleared_assets():
+    found, cleared = [], []
+
+    async def on_opportunities(opportunities):   # корутина — запускается задачей
+        found.append([(o.asset, o.buy_exchange, o.sell_exchange) for o in opportunities])
+
+    async def scenario():
+        engine = TickArbitrageEngine(on_opportunities, min_spread=3.0, debounce_ms=20, on_cleared=cleared.append)
+        engine.on_tick("Binance", "BTCUSDT", 100.0)   # до run() очереди нет — тик игнорируется
+        task = asyncio.create_task(engine.run())
+        await asyncio.sleep(0)
+
+        # пачка тиков одного актива — один пересчёт после debounce
+        for price in (103.0, 104.0, 105.0):
+            engine.on_tick("OKX", "BTCUSDT", price)
+            engine.on_tick("Binance", "BTCUSDT", 100.0)
+        await asyncio.sleep(0.005)
+        assert list(engine._pending) == [engine.matrix.asset_index["BTCUSDT"]]   # ключ — id актива
+        await asyncio.sleep(0.1)
+        assert (engine.ticks, engine.evaluations, engine.signals) == (6, 1, 1)
+        assert found == [[("BTCUSDT", "Binance", "OKX")]] and cleared == []
+        assert engine.tick_to_eval.max_ms >= 20   # задержка от первого тика пачки
+
+        # спред схлопнулся — on_cleared один раз; актив без возможностей повторно не сообщается
+        engine.on_tick("OKX", "BTCUSDT", 100.5)
+        await asyncio.sleep(0.1)
+        engine.on_tick("OKX", "BTCUSDT", 100.2)
+        engine.on_tick("Binance", "ETHUSDT", 3000.0)
+        await asyncio.sleep(0.1)
+        assert cleared == ["BTCUSDT"] and len(found) == 1
+        stats = engine.stats()
+        assert (stats["evaluations"], stats["pending_assets"], stats["tick_to_signal"]["count"]) == (4, 0, 1)
+        task.cancel()
+
+    asyncio.run(scenario())
+
+
+def test_engine_drops_ticks_when_queue_is_full():
+    async def scenario():
+        engine = TickArbitrageEngine(debounce_ms=1, queue_size=2)
+        task = asyncio.create_task(engine.run())
+        await asyncio.sleep(0)
+        for price in range(100, 105):   # обработчик ещё не запускался — в очередь влезают два тика
+            engine.on_tick("Binance", "BTCUSDT", float(price))
+        assert (engine.dropped, engine.stats()["queue_depth"]) == (3, 2)
+        await asyncio.sleep(0.05)
+        assert (engine.ticks, engine.evaluations, engine.stats()["queue_depth"]) == (2, 1, 0)
+        assert engine.matrix.prices[engine.matrix.asset_index["BTCUSDT"], 0] == 101.0
+        task.cancel()
+
+    asyncio.run(scenario())
+
+
+def test_failed_callback_task_is_kept_and_logged(caplog):
+    async def on_opportunities(opportunities):
+        raise RuntimeError("db down")
+
+    async def scenario():
+        engine = TickArbitrageEngine(on_opportunities, min_spread=3.0, debounce_ms=1)
+        task = asyncio.create_task(engine.run())
+        await asyncio.sleep(0)
+        engine.on_tick("Binance", "ADAUSDT", 1.0)
+        engine.on_tick("OKX", "ADAUSDT", 1.1)
+        await asyncio.sleep(0.05)
+        task.cancel()
+        return engine
+
+    engine = asyncio.run(scenario())
+    assert engine.signals == 1 and engine.callback_errors == 1 and engine._tasks == set()
+    assert "db down" in caplog.text
+
+
+def opportunity(asset: str, spread: float) -> Opportunity:
+    return Opportunity(asset, "Binance", "OKX", 100.0, 100.0 + spread, spread, spread)
+
+
+def test_batcher_runs_one_batch_at_a_time_and_merges_by_asset():
+    calls, release = [], threading.Event()
+
+    def process(candidates, cleared):
+        calls.append(([(c.asset, c.spread) for c in candidates], sorted(cleared)))
+        release.wait(5)
+
+    async def scenario():
+        batcher = CandidateBatcher(process)
+        first = asyncio.create_task(batcher.on_opportunities([opportunity("BTCUSDT", 4.0)]))
+        await asyncio.sleep(0.02)   # первая пачка пишется в потоке
+
+        # пока идёт запись: новые пачки не запускают второй поток, а сливаются (последняя по активу побеждает)
+        assert batcher.on_opportunities([opportunity("ETHUSDT", 5.0)]) is None
+        assert batcher.on_opportunities([opportunity("ETHUSDT", 6.0), opportunity("SOLUSDT", 3.5)]) is None
+        assert batcher.on_cleared("SOLUSDT") is None and batcher.on_cleared("XRPUSDT") is None
+        assert len(calls) == 1
+        release.set()
+        await first
+        return batcher
+
+    batcher = asyncio.run(scenario())
+    assert calls == [([("BTCUSDT", 4.0)], []), ([("ETHUSDT", 6.0)], ["SOLUSDT", "XRPUSDT"])]
+    assert (batcher.batches, batcher.merged, batcher._running) == (2, 4, False)
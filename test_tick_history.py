@@ -0,0 +1,104 @@
+import asyncio
+from datetime import datetime, timezone
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import inspect, select # type: ignore
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker # type: ignore
+from sqlalchemy.pool import NullPool # type: ignore
+from backend.core import read_api
+from backend.core.tick_history import CandleAggregator, TickHistory
+from backend.database.db_connector import get_async_db
+from backend.database.models import PriceCandle, tick_table
+
+# 2026-01-01 23:59:00 UTC: минута до смены суток
+T0 = datetime(2026, 1, 1, 23, 59, tzinfo=timezone.utc).timestamp()
+
+
+def test_aggregator_builds_ohlc_and_spread_per_period():
+    aggregator = CandleAggregator(periods=(1, 60))
+    aggregator.add("OKX", "BTCUSDT", 100.0, T0)              # других бирж ещё нет — спред не считается
+    aggregator.add("Binance", "BTCUSDT", 101.0, T0 + 0.2)    # +1% к OKX
+    aggregator.add("Binance", "BTCUSDT", 99.0, T0 + 0.7)     # -1%
+    aggregator.add("Binance", "BTCUSDT", 102.0, T0 + 1.5)    # новая секунда: закрывает свечу 1s
+    aggregator.add("Binance", "BTCUSDT", 50.0, T0 + 0.9)     # запоздал в закрытую секунду
+    rows = {(row["exchange"], row["period"], row["start"]): row for row in aggregator.take()}
+
+    start = datetime.utcfromtimestamp(T0)
+    first_second = rows[("Binance", 1, start)]
+    assert (first_second["open"], first_second["high"], first_second["low"], first_second["close"]) == \
+        (101.0, 101.0, 99.0, 99.0)
+    assert first_second["ticks"] == 2 and first_second["spread_count"] == 2
+    assert round(first_second["spread_min"], 6) == -1.0 and round(first_second["spread_max"], 6) == 1.0
+
+    minute = rows[("Binance", 60, start)]
+    # 50.0 попал в ещё открытую минуту, но не в закрытую секунду
+    assert (minute["open"], minute["high"], minute["low"], minute["close"], minute["ticks"]) == \
+        (101.0, 102.0, 50.0, 50.0, 4)
+    assert rows[("OKX", 60, start)]["spread_count"] == 0 and rows[("OKX", 60, start)]["spread_min"] is None
+    assert aggregator.late == 1
+    assert aggregator.take() == []
+
+
+def test_history_writes_daily_tables_and_serves_candles(tmp_path):
+    path = tmp_path / "history.db"
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}", poolclass=NullPool)
+    Session = async_sessionmaker(engine, expire_on_commit=False)
+
+    async def scenario():
+        history = TickHistory(session_factory=Session, periods=(1, 60), retention_days=1)
+        for i in range(120):  # 2 минуты по тику в секунду на двух биржах, через полночь
+            history.record("Binance", "BTCUSDT", 100.0 + i % 7, T0 + i)
+            history.record("OKX", "BTCUSDT", 100.0, T0 + i + 0.5)
+            if i == 59:
+                assert await history.flush() == 120
+        assert await history.flush() == 120
+        assert await history.flush() == 0
+
+        async with engine.connect() as conn:
+            names = await conn.run_sync(lambda c: inspect(c).get_table_names())
+            day_one = (await conn.execute(select(tick_table(datetime(2026, 1, 1).date())))).all()
+            minutes = (await conn.execute(select(PriceCandle).where(PriceCandle.period == 60)
+                                          .order_by(PriceCandle.exchange, PriceCandle.start))).all()
+        assert {"price_ticks_20260101", "price_ticks_20260102"} <= set(names)
+        assert len(day_one) == 120 and all(ts < T0 + 60 for *_, ts in day_one)
+        # первая минута была записана открытой, затем перезаписана закрытой свечой
+        assert [(m.exchange, m.ticks) for m in minutes] == [("Binance", 60), ("Binance", 60),
+                                                            ("OKX", 60), ("OKX", 60)]
+        assert history.stats()["written_ticks"] == 240
+        return history
+
+    history = asyncio.run(scenario())
+
+    async def session():
+        async with Session() as s:
+            yield s
+
+    app = FastAPI()
+    app.include_router(read_api.router)
+    app.dependency_overrides[get_async_db] = session
+    client = TestClient(app)
+
+    body = client.get("/candles/BTCUSDT", params={"start": "2026-01-01T23:59:00", "end": "2026-01-02T00:01:00",
+                                                  "exchange": "Binance"}).json()
+    assert body["period"] == "1s" and len(body["candles"]) == 120
+    assert body["candles"][0]["open"] == 100.0 and body["candles"][-1]["close"] == 100.0 + 119 % 7
+    # первый тик Binance пришёл раньше OKX — сравнить было не с чем
+    assert round(body["spread"]["Binance"]["max"], 6) == 6.0 and body["spread"]["Binance"]["ticks"] == 119
+
+    # полдня 1s-свечей не влезает в MAX_CANDLES — выбирается 1m; явный 1s — ошибка
+    half_day = {"start": "2026-01-01T18:00:00", "end": "2026-01-02T06:00:00"}
+    body = client.get("/candles/BTCUSDT", params=half_day).json()
+    assert body["period"] == "1m" and len(body["candles"]) == 4
+    assert client.get("/candles/BTCUSDT", params={**half_day, "period": "1s"}).status_code == 400
+
+    async def rotate():
+        # сутки 1 января старше retention_days=1, 1s-свечи старше суток; минутные остаются
+        assert await history.prune(now=datetime(2026, 1, 3, 12)) == ["price_ticks_20260101"]
+        async with engine.connect() as conn:
+            names = await conn.run_sync(lambda c: inspect(c).get_table_names())
+            periods = (await conn.execute(select(PriceCandle.period).distinct())).scalars().all()
+        await engine.dispose()
+        assert "price_ticks_20260101" not in names and "price_ticks_20260102" in names
+        assert periods == [60]
+
+    asyncio.run(rotate())
@@ -0,0 +1,100 @@
+import asyncio
+from datetime import datetime
+from sqlalchemy import select # type: ignore
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker # type: ignore
+from sqlalchemy.pool import NullPool # type: ignore
+from backend.core.triangular import CurrencyGraph, TriangularDetector, TRIANGULAR_TYPE
+from backend.database.models import ArbitrageSignal, Base, SignalHistory
+
+PRICES = [("Binance", "BTCUSDT", 100.0), ("Binance", "ETHUSDT", 10.0), ("Binance", "SOLUSDT", 1.0),
+          ("OKX", "BTCUSDT", 100.0), ("OKX", "ETHUSDT", 10.0), ("OKX", "ETHBTC", 0.1)]
+
+
+def test_graph_indexes_triangles_by_pair():
+    graph = CurrencyGraph("Binance", fee=0.1)
+    for symbol in ("BTCUSDT", "ETHUSDT", "ETHBTC", "SOLUSDT", "SOLBTC", "XYZ"):
+        graph.update(symbol, 1.0)
+    assert graph.symbols == ["BTCUSDT", "ETHUSDT", "ETHBTC", "SOLUSDT", "SOLBTC"]   # XYZ не разбирается
+    assert sorted(map(sorted, graph.paths)) == [["BTC", "ETH", "USDT"], ["BTC", "SOL", "USDT"]]
+    assert len(graph.cycles_of(graph.symbol_index["BTCUSDT"])) == 2
+    assert len(graph.cycles_of(graph.symbol_index["ETHBTC"])) == 1
+
+
+def signals_db(path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}", poolclass=NullPool)
+    return engine, async_sessionmaker(engine, expire_on_commit=False)
+
+
+async def create_tables(engine):
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all, tables=[ArbitrageSignal.__table__, SignalHistory.__table__])
+
+
+def test_tick_rechecks_only_touched_cycles_and_flushes_signals(tmp_path):
+    engine, Session = signals_db(tmp_path / "signals.db")
+
+    async def scenario():
+        await create_tables(engine)
+        detector = TriangularDetector(session_factory=Session)
+        assert detector.load(PRICES) == []   # треугольник есть только на OKX, цены согласованы
+        assert detector.stats()["cycles"] == 1
+
+        # на Binance появляется ETHBTC — новый треугольник, ETH переоценён в BTC на 2%
+        found = detector.on_tick("Binance", "ETHBTC", 0.102)
+        assert [(o.exchange, o.path, o.symbols) for o in found] == \
+            [("Binance", ("USDT", "ETH", "BTC"), ("ETHUSDT", "ETHBTC", "BTCUSDT"))]
+        assert round(found[0].profit, 4) == round((1.02 * 0.999 ** 3 - 1) * 100, 4)
+
+        checks = detector.cycle_checks
+        assert detector.on_tick("Binance", "SOLUSDT", 1.1) == []    # пара вне треугольников
+        assert detector.cycle_checks == checks
+        assert detector.on_tick("OKX", "ETHBTC", 0.1001) == []      # 0.1% не покрывает комиссии
+        assert detector.cycle_checks == checks + 1
+
+        assert await detector.flush() == (1, 0)
+        assert await detector.flush() == (0, 0)                     # без изменений — без транзакции
+        async with Session() as db:
+            signal = (await db.scalars(select(ArbitrageSignal))).one()
+        assert (signal.asset, signal.buy_exchange, signal.sell_exchange, signal.type) == \
+            ("USDT>ETH>BTC", "Binance", "Binance", TRIANGULAR_TYPE)
+        assert round(signal.sell_price, 4) == round(1 + signal.spread / 100, 4)
+
+        # расхождение закрылось — сигнал удаляется, закрытие попадает в историю
+        assert detector.on_tick("Binance", "BTCUSDT", 98.0) == []
+        assert await detector.flush() == (0, 1)
+        async with Session() as db:
+            assert (await db.scalars(select(ArbitrageSignal))).all() == []
+            history = (await db.scalars(select(SignalHistory))).one()
+        assert (history.asset, history.type, history.close_spread) == ("USDT>ETH>BTC", TRIANGULAR_TYPE, signal.spread)
+        await engine.dispose()
+
+    asyncio.run(scenario())
+
+
+def test_restart_closes_triangular_signals_of_previous_run(tmp_path):
+    engine, Session = signals_db(tmp_path / "signals.db")
+
+    def signal(asset, exchange, sell_exchange, kind, spread=1.0):
+        return ArbitrageSignal(asset=asset, buy_exchange=exchange, sell_exchange=sell_exchange, buy_price=1.0,
+                               sell_price=1 + spread / 100, spread=spread, type=kind, timestamp=datetime(2026, 1, 1))
+
+    async def scenario():
+        await create_tables(engine)
+        async with Session() as db:
+            db.add_all([signal("USDT>ETH>BTC", "OKX", "OKX", TRIANGULAR_TYPE),
+                        signal("BTCUSDT", "Binance", "OKX", "межбиржевой", spread=4.0)])
+            await db.commit()
+
+        # после рестарта треугольник на OKX уже невыгоден — первый сброс закрывает его с историей
+        detector = TriangularDetector(session_factory=Session)
+        assert detector.load(PRICES) == []
+        assert await detector.flush() == (0, 1)
+        async with Session() as db:
+            left = (await db.scalars(select(ArbitrageSignal))).all()
+            history = (await db.scalars(select(SignalHistory))).one()
+        assert [(s.asset, s.type) for s in left] == [("BTCUSDT", "межбиржевой")]
+        assert (history.asset, history.buy_exchange, history.type) == ("USDT>ETH>BTC", "OKX", TRIANGULAR_TYPE)
+        assert detector.stats()["signals"] == {"active": 0, "opened": 0, "updated": 0, "closed": 1}
+        await engine.dispose()
+
+    asyncio.run(scenario())
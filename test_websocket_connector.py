@@ -0,0 +1,91 @@
+import asyncio
+import json
+import websockets
+from backend.core.websocket_connector import InboundQueue, WebSocketConnector, WebSocketSupervisor, backoff_delay
+from backend.core.websocket_price_updater import FEEDS, build_connector
+from backend.core.sample_payloads import WS_FRAMES
+
+
+def test_inbound_queue_policies():
+    async def scenario():
+        coalesce = InboundQueue(maxsize=2, policy="coalesce")
+        for price in (1.0, 2.0, 3.0):
+            coalesce.put("BTCUSDT", ("BTCUSDT", price))
+        coalesce.put("ETHUSDT", ("ETHUSDT", 10.0))
+        coalesce.put("SOLUSDT", ("SOLUSDT", 5.0))
+
+        drop = InboundQueue(maxsize=2, policy="drop")
+        for i in range(5):
+            drop.put(None, i)
+        return coalesce, await coalesce.get_batch(), drop, await drop.get_batch(limit=1)
+
+    coalesce, coalesced_batch, drop, dropped_batch = asyncio.run(scenario())
+
+    assert coalesced_batch == [("BTCUSDT", 3.0), ("ETHUSDT", 10.0)]
+    assert (coalesce.coalesced, coalesce.dropped) == (2, 1)
+    assert dropped_batch == [0]
+    assert (len(drop), drop.dropped) == (1, 3)
+
+
+def test_backoff_grows_and_is_capped():
+    for attempt in range(10):
+        delay = backoff_delay(attempt, base=1, cap=30)
+        assert min(30, 2 ** attempt) * 0.5 <= delay <= min(30, 2 ** attempt)
+
+
+def test_connector_reconnects_and_cancels_heartbeat():
+    async def scenario():
+        connections = []
+
+        async def handler(ws):
+            connections.append(json.loads(await ws.recv()))
+            for price in ("1.0", "2.0", "3.0"):
+                await ws.send(json.dumps([{"s": "BTCUSDT", "c": price}]))
+            if len(connections) == 1:
+                await ws.close()  # первое соединение обрывается — ждём переподключения
+            else:
+                await ws.wait_closed()
+
+        server = await websockets.serve(handler, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        received = []
+
+        async def subscribe(ws):
+            await ws.send(json.dumps({"op": "subscribe"}))
+
+        connector = WebSocketConnector(
+            "Binance", f"ws://127.0.0.1:{port}",
+            parse=lambda data: [(t["s"], (t["s"], float(t["c"]))) for t in data],
+            sink=received.extend,
+            subscribe=subscribe,
+            ping=lambda: {"op": "ping"}, ping_interval=0.01,
+            backoff_base=0.01, backoff_max=0.05,
+        )
+        supervisor = WebSocketSupervisor([connector])
+        task = asyncio.create_task(supervisor.run(report_interval=60))
+        while len(connections) < 2 or connector.metrics.messages < 6 or len(connector.queue):
+            await asyncio.sleep(0.01)
+        metrics = supervisor.metrics()["Binance"]
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        leftover = [t for t in asyncio.all_tasks() if t.get_coro().__qualname__.startswith("WebSocketConnector.")]
+        server.close()
+        return connections, received, metrics, leftover
+
+    connections, received, metrics, leftover = asyncio.run(scenario())
+
+    assert connections == [{"op": "subscribe"}] * 2
+    assert received[-1] == ("BTCUSDT", 3.0)
+    assert metrics["messages"] == 6
+    assert metrics["reconnects"] >= 1
+    assert metrics["queue_depth"] == 0
+    assert leftover == []
+
+
+def test_price_feeds_cover_all_exchanges():
+    assert set(FEEDS) == set(WS_FRAMES)
+    for exchange, frame in WS_FRAMES.items():
+        connector = build_connector(exchange)
+        updates = connector.parse(connector.decode.decode(json.dumps(frame)))
+        assert updates, exchange
+        assert all(key == symbol and price > 0 for key, (symbol, price) in updates)
@@ -0,0 +1,210 @@
+import asyncio
+import bisect
+import logging
+import time
+from backend.core.instruments import registry
+from backend.core.price_matrix import PriceMatrix, scan_spreads
+
+# ⏱️ Границы корзин гистограммы задержек (мс)
+LATENCY_BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+class LatencyHistogram:
+    """📊 Гистограмма задержек с фиксированными корзинами."""
+
+    def __init__(self, buckets=LATENCY_BUCKETS_MS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # последняя корзина — всё, что больше
+        self.total = 0
+        self.sum_ms = 0.0
+        self.max_ms = 0.0
+
+    def record(self, ms: float):
+        self.counts[bisect.bisect_left(self.buckets, ms)] += 1
+        self.total += 1
+        self.sum_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+
+    def percentile(self, q: float) -> float:
+        """Верхняя граница корзины, в которую попадает q-й процентиль."""
+        if not self.total:
+            return 0.0
+        threshold = self.total * q / 100
+        seen = 0
+        for i, count in enumerate(self.counts):
+            seen += count
+            if seen >= threshold:
+                return float(self.buckets[i]) if i < len(self.buckets) else self.max_ms
+        return self.max_ms
+
+    def summary(self) -> dict:
+        return {
+            "count": self.total,
+            "avg_ms": round(self.sum_ms / self.total, 2) if self.total else 0.0,
+            "p50_ms": self.percentile(50),
+            "p95_ms": self.percentile(95),
+            "p99_ms": self.percentile(99),
+            "max_ms": round(self.max_ms, 2),
+            "buckets": {f"<={b}": c for b, c in zip(self.buckets, self.counts)} | {"inf": self.counts[-1]},
+        }
+
+
+class TickArbitrageEngine:
+    """
+    ⚡ Событийный поиск арбитража: каждый тик попадает в очередь, а спред
+    пересчитывается только для затронутого актива — не чаще раза в debounce_ms.
+    Активы внутри движка — id реестра инструментов (строки матрицы).
+    on_opportunities(opportunities) получает найденные возможности (может быть корутиной),
+    on_cleared(asset) — у актива, где они были, возможностей больше нет (закрытие сигналов).
+    """
+
+    def __init__(self, on_opportunities=None, min_spread: float = 3.0, debounce_ms: float = 50,
+                 queue_size: int = 100_000, matrix: PriceMatrix = None, on_cleared=None):
+        self.matrix = matrix or PriceMatrix(registry=registry)
+        self.on_opportunities = on_opportunities
+        self.on_cleared = on_cleared
+        self._with_opportunities = set()   # id активов, у которых последний пересчёт нашёл возможности
+        self.min_spread = min_spread
+        self.debounce_ms = debounce_ms
+        self.queue = None
+        self.queue_size = queue_size
+        self._pending = {}   # id актива -> время первого необработанного тика
+        self._loop = None
+        self._tasks = set()  # запущенные обработчики-корутины (ссылка держит задачу до завершения)
+
+        # 📊 Метрики
+        self.ticks = 0
+        self.dropped = 0
+        self.evaluations = 0
+        self.signals = 0
+        self.callback_errors = 0
+        self.tick_to_eval = LatencyHistogram()
+        self.tick_to_signal = LatencyHistogram()
+
+    def on_tick(self, exchange: str, asset: str, price: float, ts: float = None):
+        """🔔 Синхронный приёмник тиков (подписывается на price_store)."""
+        if self.queue is None:
+            return
+        try:
+            self.queue.put_nowait((exchange, asset, price, ts or time.time()))
+        except asyncio.QueueFull:
+            self.dropped += 1
+
+    async def run(self):
+        """🔄 Разбирает очередь тиков и планирует пересчёт по активам."""
+        self._loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=self.queue_size)
+        while True:
+            exchange, asset, price, ts = await self.queue.get()
+            self.ticks += 1
+            row = self.matrix.update(exchange, asset, price)
+            if row not in self._pending:
+                self._pending[row] = ts
+                self._loop.call_later(self.debounce_ms / 1000, self._evaluate, row)
+
+    def _evaluate(self, row: int):
+        """Пересчитывает все пары бирж только для одного актива (row — id актива)."""
+        first_tick_at = self._pending.pop(row, None)
+        if first_tick_at is None:
+            return
+        opportunities = scan_spreads(self.matrix, min_spread=self.min_spread, rows=[row])
+        self.evaluations += 1
+        latency_ms = (time.time() - first_tick_at) * 1000
+        self.tick_to_eval.record(latency_ms)
+        if not opportunities:
+            if row in self._with_opportunities:
+                self._with_opportunities.discard(row)
+                self._notify(self.on_cleared, self.matrix.assets[row])
+            return
+
+        self._with_opportunities.add(row)
+        self.signals += len(opportunities)
+        self.tick_to_signal.record(latency_ms)
+        self._notify(self.on_opportunities, opportunities)
+
+    def _notify(self, callback, argument):
+        if callback is not None:
+            result = callback(argument)
+            if asyncio.iscoroutine(result):
+                task = self._loop.create_task(result)
+                self._tasks.add(task)
+                task.add_done_callback(self._task_done)
+
+    def _task_done(self, task: asyncio.Task):
+        self._tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            self.callback_errors += 1
+            logging.error(f"❌ Обработчик возможностей: {task.exception()!r}")
+
+    def stats(self) -> dict:
+        return {
+            "ticks": self.ticks,
+            "dropped": self.dropped,
+            "queue_depth": self.queue.qsize() if self.queue else 0,
+            "pending_assets": len(self._pending),
+            "evaluations": self.evaluations,
+            "signals": self.signals,
+            "callback_errors": self.callback_errors,
+            "tick_to_eval": self.tick_to_eval.summary(),
+            "tick_to_signal": self.tick_to_signal.summary(),
+        }
+
+    async def report(self, interval: float = 30):
+        """📜 Периодически пишет метрики и гистограммы задержек в лог."""
+        while True:
+            await asyncio.sleep(interval)
+            stats = self.stats()
+            latency = stats["tick_to_signal"]
+            logging.info(
+                f"⚡ Тиков: {stats['ticks']} (потеряно {stats['dropped']}), пересчётов: {stats['evaluations']}, "
+                f"сигналов: {stats['signals']} | тик→сигнал p50 {latency['p50_ms']} мс, "
+                f"p95 {latency['p95_ms']} мс, p99 {latency['p99_ms']} мс, max {latency['max_ms']} мс"
+            )
+
+
+class CandidateBatcher:
+    """
+    📝 Обработка кандидатов движка в потоке по одной пачке за раз: пока идёт запись, новые возможности
+    и закрытия сливаются по активу (последняя пачка актива побеждает), а не копятся в пуле потоков.
+    process(candidates, cleared_assets) — синхронная функция (process_candidates).
+    """
+
+    def __init__(self, process):
+        self.process = process
+        self._candidates = {}   # актив -> возможности последней пачки
+        self._cleared = set()   # активы без возможностей
+        self._running = False
+        self.batches = 0
+        self.merged = 0
+
+    def on_opportunities(self, opportunities):
+        """Приёмник on_opportunities движка: корутина записи или None, если запись уже идёт."""
+        by_asset = {}
+        for opportunity in opportunities:
+            by_asset.setdefault(opportunity.asset, []).append(opportunity)
+        self._candidates.update(by_asset)
+        self._cleared -= by_asset.keys()
+        return self._start()
+
+    def on_cleared(self, asset: str):
+        self._candidates.pop(asset, None)
+        self._cleared.add(asset)
+        return self._start()
+
+    def _start(self):
+        if self._running:
+            self.merged += 1
+            return None
+        self._running = True
+        return self._drain()
+
+    async def _drain(self):
+        try:
+            while self._candidates or self._cleared:
+                candidates = [c for batch in self._candidates.values() for c in batch]
+                cleared = list(self._cleared)
+                self._candidates, self._cleared = {}, set()
+                self.batches += 1
+                await asyncio.to_thread(self.process, candidates, cleared)
+        finally:
+            self._running = False
@@ -0,0 +1,215 @@
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import inspect, text # type: ignore
+from backend.database.db_connector import AsyncSessionLocal
+from backend.database.db_upsert import bulk_upsert_async
+from backend.database.models import PriceCandle, TICK_TABLE_PREFIX, tick_table
+
+# 📼 История тиков и свечи.
+# Каждый тик из price_store копится в памяти и пачкой дописывается в таблицу своих суток (price_ticks_YYYYMMDD).
+# Параллельно CandleAggregator ведёт открытые свечи 1s / 1m / 1h по (exchange, asset): OHLC, число тиков и
+# статистику спреда — премии цены биржи к самой дешёвой из остальных бирж по этому активу, %.
+# Запросы за период читают свечи (read_api /candles), сырые тики нужны только для бэктеста.
+CANDLE_PERIODS = (1, 60, 3600)
+HISTORY_FLUSH_INTERVAL = 1.0       # сек
+TICK_RETENTION_DAYS = 7            # сколько суток сырых тиков хранить
+CANDLE_RETENTION = {1: timedelta(days=1), 60: timedelta(days=30), 3600: None}   # None — бессрочно
+MAX_PENDING_TICKS = 1_000_000      # столько тиков держим в памяти, пока БД недоступна; дальше старые теряются
+
+
+class CandleAggregator:
+    """
+    🕯️ Инкрементальные свечи: тик обновляет открытую свечу каждого периода за O(число периодов).
+    Свеча закрывается первым тиком следующего интервала. Запаздывающий тик из уже закрытого интервала
+    в свечи не попадает (считается в late).
+    """
+
+    def __init__(self, periods=CANDLE_PERIODS):
+        self.periods = periods
+        self._open = {}      # (exchange, asset, period) -> [start, open, high, low, close, ticks, s_min, s_max, s_sum, s_n]
+        self._dirty = set()  # открытые свечи, изменённые с прошлого take()
+        self._closed = []    # закрытые, но ещё не отданные свечи (строки)
+        self._last = {}      # asset -> {exchange: последняя цена}
+        self.late = 0
+
+    def spread(self, exchange: str, asset: str, price: float):
+        """Премия к самой дешёвой из остальных бирж, % (None — других бирж пока нет)."""
+        quotes = self._last.setdefault(asset, {})
+        quotes[exchange] = price
+        cheapest = min((p for ex, p in quotes.items() if ex != exchange), default=None)
+        if not cheapest:
+            return None
+        return (price - cheapest) / cheapest * 100
+
+    def add(self, exchange: str, asset: str, price: float, ts: float):
+        spread = self.spread(exchange, asset, price)
+        for period in self.periods:
+            start = ts - ts % period
+            key = (exchange, asset, period)
+            candle = self._open.get(key)
+            if candle is None or start > candle[0]:
+                if candle is not None:
+                    self._closed.append(candle_row(key, candle))
+                    self._dirty.discard(key)
+                candle = self._open[key] = [start, price, price, price, price, 0, None, None, 0.0, 0]
+            elif start < candle[0]:
+                self.late += 1
+                continue
+            if price > candle[2]:
+                candle[2] = price
+            if price < candle[3]:
+                candle[3] = price
+            candle[4] = price
+            candle[5] += 1
+            if spread is not None:
+                candle[6] = spread if candle[6] is None else min(candle[6], spread)
+                candle[7] = spread if candle[7] is None else max(candle[7], spread)
+                candle[8] += spread
+                candle[9] += 1
+            self._dirty.add(key)
+
+    def take(self) -> list:
+        """Строки для upsert в price_candles: закрытые свечи и текущее состояние изменённых открытых."""
+        rows = self._closed + [candle_row(key, self._open[key]) for key in self._dirty]
+        self._closed = []
+        self._dirty = set()
+        return rows
+
+    def __len__(self):
+        return len(self._open)
+
+
+def candle_row(key: tuple, candle: list) -> dict:
+    exchange, asset, period = key
+    start, open_, high, low, close, ticks, s_min, s_max, s_sum, s_n = candle
+    return {"exchange": exchange, "asset": asset, "period": period, "start": datetime.utcfromtimestamp(start),
+            "open": open_, "high": high, "low": low, "close": close, "ticks": ticks,
+            "spread_min": s_min, "spread_max": s_max, "spread_sum": s_sum, "spread_count": s_n}
+
+
+class TickHistory:
+    """
+    📼 Append-only история тиков с пакетной записью и свечами.
+    record() — подписчик price_store (только память), run_flusher() — фоновая запись и ротация суток.
+    """
+
+    def __init__(self, flush_interval: float = HISTORY_FLUSH_INTERVAL, retention_days: int = TICK_RETENTION_DAYS,
+                 session_factory=AsyncSessionLocal, periods=CANDLE_PERIODS):
+        self.flush_interval = flush_interval
+        self.retention_days = retention_days
+        self.session_factory = session_factory
+        self.aggregator = CandleAggregator(periods)
+        self._ticks = []            # (exchange, asset, price, ts) с прошлого сброса
+        self._retry_candles = []    # свечи из неудачного сброса; более новые строки того же ключа их перекроют
+        self._tables = set()        # таблицы, существование которых уже проверено
+        self._pruned_day = None
+
+        # 📊 Метрики
+        self.recorded = 0
+        self.written_ticks = 0
+        self.written_candles = 0
+        self.flush_errors = 0
+        self.lost_ticks = 0
+
+    def record(self, exchange: str, symbol: str, price: float, ts: float = None):
+        """⚡ Тик в буфер и в свечи (сигнатура подписчика price_store). Никаких обращений к БД."""
+        if ts is None:
+            ts = time.time()
+        self._ticks.append((exchange, symbol, price, ts))
+        self.aggregator.add(exchange, symbol, price, ts)
+        self.recorded += 1
+
+    async def _ensure_table(self, db, table):
+        if table.name not in self._tables:
+            conn = await db.connection()
+            await conn.run_sync(table.create, checkfirst=True)
+            self._tables.add(table.name)
+
+    async def flush(self) -> int:
+        """🔄 Дописывает тики в таблицы их суток и upsert-ит свечи одной транзакцией. Возвращает число тиков."""
+        ticks, self._ticks = self._ticks, []
+        candles, self._retry_candles = self._retry_candles + self.aggregator.take(), []
+        if not ticks and not candles:
+            return 0
+
+        by_day = {}
+        for exchange, asset, price, ts in ticks:
+            by_day.setdefault(datetime.utcfromtimestamp(ts).date(), []).append(
+                {"exchange": exchange, "asset": asset, "price": price, "ts": ts})
+        try:
+            async with self.session_factory() as db:
+                for day, rows in by_day.items():
+                    table = tick_table(day)
+                    await self._ensure_table(db, table)
+                    await db.execute(table.insert(), rows)
+                if candles:
+                    await self._ensure_table(db, PriceCandle.__table__)
+                    await bulk_upsert_async(db, PriceCandle, candles, keys=("exchange", "asset", "period", "start"))
+                await db.commit()
+        except Exception as e:
+            self.flush_errors += 1
+            self._ticks = ticks + self._ticks
+            if len(self._ticks) > MAX_PENDING_TICKS:
+                self.lost_ticks += len(self._ticks) - MAX_PENDING_TICKS
+                self._ticks = self._ticks[-MAX_PENDING_TICKS:]
+            self._retry_candles = candles
+            self._tables.clear()  # DDL мог откатиться вместе с транзакцией (SQLite)
+            logging.error(f"❌ Ошибка записи истории тиков ({len(ticks)} тиков, {len(candles)} свечей): {e}")
+            return 0
+
+        self.written_ticks += len(ticks)
+        self.written_candles += len(candles)
+        return len(ticks)
+
+    async def prune(self, now: datetime = None) -> list:
+        """🗑️ Удаляет таблицы тиков старше retention_days и свечи старше CANDLE_RETENTION; возвращает имена таблиц."""
+        now = now or datetime.utcnow()
+        oldest = f"{TICK_TABLE_PREFIX}{(now - timedelta(days=self.retention_days)).date():%Y%m%d}"
+        async with self.session_factory() as db:
+            conn = await db.connection()
+            names = await conn.run_sync(lambda sync_conn: inspect(sync_conn).get_table_names())
+            expired = sorted(name for name in names if name.startswith(TICK_TABLE_PREFIX) and name < oldest)
+            for name in expired:
+                await db.execute(text(f"DROP TABLE {name}"))
+                self._tables.discard(name)
+            if PriceCandle.__tablename__ in names:
+                for period, keep in CANDLE_RETENTION.items():
+                    if keep is not None:
+                        await db.execute(PriceCandle.__table__.delete().where(
+                            PriceCandle.period == period, PriceCandle.start < now - keep))
+            await db.commit()
+        if expired:
+            logging.info(f"🗑️ История тиков: удалены {', '.join(expired)}")
+        return expired
+
+    async def run_flusher(self):
+        """⏱️ Фоновая задача: сброс каждые flush_interval, раз в сутки — ротация."""
+        try:
+            while True:
+                await asyncio.sleep(self.flush_interval)
+                await self.flush()
+                today = datetime.utcnow().date()
+                if self._pruned_day != today:
+                    try:
+                        await self.prune()
+                        self._pruned_day = today
+                    except Exception as e:
+                        logging.error(f"❌ Ротация истории тиков: {e}")
+        finally:
+            await self.flush()
+
+    def stats(self) -> dict:
+        return {"recorded": self.recorded, "pending": len(self._ticks), "written_ticks": self.written_ticks,
+                "written_candles": self.written_candles, "open_candles": len(self.aggregator),
+                "late_ticks": self.aggregator.late, "flush_errors": self.flush_errors, "lost_ticks": self.lost_ticks}
+
+
+def record_history(store, **kwargs) -> TickHistory:
+    """🔗 Подписывает историю тиков на обновления стора; run_flusher() запускает вызывающий."""
+    history = TickHistory(**kwargs)
+    store.subscribe(history.record)
+    logging.info(f"📼 История тиков: свечи {', '.join(f'{p}s' for p in history.aggregator.periods)}, "
+                 f"сырые тики {history.retention_days} сут.")
+    return history
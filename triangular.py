@@ -0,0 +1,258 @@
+import asyncio
+import logging
+import math
+from collections import namedtuple
+from datetime import datetime
+import numpy as np
+from backend.core.exchange_adapters import split_symbol
+from backend.core.price_matrix import DEFAULT_TAKER_FEE, TAKER_FEES
+from backend.core.signal_lifecycle import SignalTracker
+from backend.database.db_connector import AsyncSessionLocal
+from backend.database.models import ArbitrageSignal
+
+# 🔺 Треугольный арбитраж внутри одной биржи.
+# Граф валют биржи: вершины — валюты, ребро — торговая пара (BTCUSDT = BTC–USDT). Цикл A→B→C→A выгоден,
+# если произведение курсов после трёх тейкерских комиссий больше 1. В логарифмах:
+#   L = Σ dir·log(price)  (dir = +1 — продаём base за quote, -1 — покупаем base за quote)
+#   прямой обход выгоден при L + 3·log(1 - fee) > log(1 + min_profit), обратный — при -L + 3·log(1 - fee) > ...
+# Все треугольники перечисляются один раз (и дополняются при появлении новой пары); индекс «пара -> циклы»
+# позволяет на тике пересчитать векторно только циклы, проходящие через обновлённое ребро,
+# вместо Bellman-Ford по всему графу.
+TRIANGULAR_TYPE = "треугольный"
+MIN_TRIANGULAR_PROFIT = 0.3   # % после комиссий трёх сделок
+TRIANGULAR_FLUSH_INTERVAL = 1.0
+START_CURRENCIES = ("USDT", "USDC", "FDUSD", "BTC", "ETH", "BNB")   # с какой валюты начинать путь в сигнале
+
+TriangularOpportunity = namedtuple("TriangularOpportunity", "exchange path symbols prices profit")
+
+
+class CurrencyGraph:
+    """🕸️ Валютный граф одной биржи: log-цены пар и индекс треугольников по парам."""
+
+    def __init__(self, exchange: str, fee: float, capacity: int = 1024):
+        self.exchange = exchange
+        self.log_fee = 3 * math.log(1 - fee / 100)
+        self.symbols = []           # индекс пары -> символ
+        self.pairs = []             # индекс пары -> (base, quote)
+        self.symbol_index = {}
+        self.neighbors = {}         # валюта -> {валюта: индекс пары}
+        self.prices = np.full(capacity, np.nan)
+        self.log_prices = np.full(capacity, np.nan)
+        self.paths = []             # индекс цикла -> (A, B, C) для прямого обхода
+        self._legs = np.zeros((capacity, 3), dtype=np.int32)
+        self._dirs = np.zeros((capacity, 3))
+        self._active = np.zeros((capacity, 2), dtype=bool)   # [цикл, прямой / обратный] сейчас выгоден
+        self._by_symbol = {}        # индекс пары -> np.ndarray индексов циклов
+
+    def __len__(self):
+        return len(self.paths)
+
+    def _direction(self, pair: int, sell: str) -> float:
+        return 1.0 if self.pairs[pair][0] == sell else -1.0
+
+    def add_symbol(self, asset: str):
+        """Добавляет пару и все новые треугольники через неё. None — символ не разбирается или ребро уже есть."""
+        parsed = split_symbol(asset)
+        if parsed is None:
+            return None
+        base, quote = parsed
+        if quote in self.neighbors.get(base, {}):
+            return None
+        pair = len(self.symbols)
+        if pair >= self.prices.shape[0]:
+            self.prices = np.concatenate([self.prices, np.full(pair, np.nan)])
+            self.log_prices = np.concatenate([self.log_prices, np.full(pair, np.nan)])
+        self.symbols.append(asset)
+        self.pairs.append(parsed)
+        self.symbol_index[asset] = pair
+
+        base_edges = self.neighbors.setdefault(base, {})
+        quote_edges = self.neighbors.setdefault(quote, {})
+        touched = {pair: []}
+        for other in base_edges.keys() & quote_edges.keys():
+            # base -> quote -> other -> base
+            second, third = quote_edges[other], self.neighbors[other][base]
+            cycle = self._add_cycle((base, quote, other), (pair, second, third),
+                                    (1.0, self._direction(second, quote), self._direction(third, other)))
+            for leg in (pair, second, third):
+                touched.setdefault(leg, []).append(cycle)
+        base_edges[quote] = pair
+        quote_edges[base] = pair
+        for leg, cycles in touched.items():
+            known = self._by_symbol.get(leg)
+            self._by_symbol[leg] = np.array(cycles, dtype=np.int64) if known is None else np.append(known, cycles)
+        return pair
+
+    def _add_cycle(self, path, legs, dirs) -> int:
+        cycle = len(self.paths)
+        if cycle >= self._legs.shape[0]:
+            self._legs = np.vstack([self._legs, np.zeros_like(self._legs)])
+            self._dirs = np.vstack([self._dirs, np.zeros_like(self._dirs)])
+            self._active = np.vstack([self._active, np.zeros_like(self._active)])
+        self.paths.append(path)
+        self._legs[cycle] = legs
+        self._dirs[cycle] = dirs
+        return cycle
+
+    def update(self, asset: str, price: float):
+        """⚡ Новая цена пары (неизвестная пара добавляется в граф). Возвращает индекс пары или None."""
+        pair = self.symbol_index.get(asset)
+        if pair is None:
+            pair = self.add_symbol(asset)
+            if pair is None:
+                return None
+        if price and price > 0:
+            self.prices[pair] = price
+            self.log_prices[pair] = math.log(price)
+        else:
+            self.prices[pair] = self.log_prices[pair] = np.nan
+        return pair
+
+    def check(self, cycles: np.ndarray, threshold: float) -> tuple:
+        """
+        Пересчитывает циклы: (начавшиеся [(цикл, обход, прибыль %)], закончившиеся [(цикл, обход)]).
+        Обход 0 — прямой (A→B→C→A), 1 — обратный.
+        """
+        total = (self._dirs[cycles] * self.log_prices[self._legs[cycles]]).sum(axis=1)
+        gains = np.column_stack([total, -total]) + self.log_fee
+        hits = gains > threshold        # NaN (нет цены у одной из пар) — не выгодно
+        was = self._active[cycles]
+        self._active[cycles] = hits
+        found = [(int(cycles[i]), int(j), math.expm1(float(gains[i, j])) * 100) for i, j in zip(*np.nonzero(hits))]
+        gone = [(int(cycles[i]), int(j)) for i, j in zip(*np.nonzero(was & ~hits))]
+        return found, gone
+
+    def cycles_of(self, pair: int):
+        return self._by_symbol.get(pair)
+
+    def all_cycles(self) -> np.ndarray:
+        return np.arange(len(self.paths))
+
+    def opportunity(self, cycle: int, reverse: int, profit: float) -> TriangularOpportunity:
+        """Путь в порядке сделок, начиная со стартовой валюты (USDT, если она есть в цикле)."""
+        path, legs = list(self.paths[cycle]), [self.symbols[leg] for leg in self._legs[cycle]]
+        if reverse:   # A→C→B→A по тем же парам
+            path, legs = [path[0], path[2], path[1]], [legs[2], legs[1], legs[0]]
+        start = next((path.index(c) for c in START_CURRENCIES if c in path), 0)
+        path, legs = path[start:] + path[:start], legs[start:] + legs[:start]
+        prices = [float(self.prices[self.symbol_index[symbol]]) for symbol in legs]
+        return TriangularOpportunity(self.exchange, tuple(path), tuple(legs), tuple(prices), profit)
+
+
+def signal_row(opportunity: TriangularOpportunity, now: datetime) -> dict:
+    """
+    Строка arbitrage_signals: asset — путь "USDT>BTC>ETH", обе биржи — биржа цикла,
+    buy_price — 1 единица стартовой валюты на входе, sell_price — сколько её на выходе после комиссий.
+    """
+    return {"asset": ">".join(opportunity.path), "buy_exchange": opportunity.exchange,
+            "sell_exchange": opportunity.exchange, "buy_price": 1.0, "sell_price": 1 + opportunity.profit / 100,
+            "spread": opportunity.profit, "size_usdt": None, "type": TRIANGULAR_TYPE, "timestamp": now}
+
+
+class TriangularDetector:
+    """
+    🔺 Поиск треугольного арбитража по тикам (подписчик price_store).
+    Тик пересчитывает только циклы через обновлённую пару и обновляет набор выгодных сейчас треугольников;
+    раз в flush_interval набор применяется к SignalTracker: upsert изменившихся, закрытие исчезнувших
+    с записью в signal_history. Открытые сигналы прошлого запуска трекер поднимает из arbitrage_signals.
+    """
+
+    def __init__(self, min_profit: float = MIN_TRIANGULAR_PROFIT, fees: dict = None,
+                 flush_interval: float = TRIANGULAR_FLUSH_INTERVAL, session_factory=AsyncSessionLocal):
+        self.min_profit = min_profit
+        self.threshold = math.log1p(min_profit / 100)
+        self.fees = TAKER_FEES if fees is None else fees
+        self.flush_interval = flush_interval
+        self.session_factory = session_factory
+        self.graphs = {}        # биржа -> CurrencyGraph
+        self.tracker = SignalTracker(TRIANGULAR_TYPE, min_spread=min_profit)
+        self._current = {}      # (путь, биржа) -> строка сигнала выгодного сейчас треугольника
+        self._dirty = False     # набор изменился после прошлого сброса
+
+        # 📊 Метрики
+        self.ticks = 0
+        self.cycle_checks = 0
+        self.opportunities = 0
+        self.flush_errors = 0
+
+    def graph(self, exchange: str) -> CurrencyGraph:
+        graph = self.graphs.get(exchange)
+        if graph is None:
+            graph = self.graphs[exchange] = CurrencyGraph(exchange, self.fees.get(exchange, DEFAULT_TAKER_FEE))
+        return graph
+
+    def load(self, rows) -> list:
+        """🔄 Строит графы из (exchange, asset, price) — таблица prices или доска — и делает полный проход."""
+        for exchange, asset, price in rows:
+            self.graph(exchange).update(asset, price)
+        found = []
+        for graph in self.graphs.values():
+            found += self._check(graph, graph.all_cycles())
+        logging.info(f"🔺 Треугольники: {sum(len(g) for g in self.graphs.values())} циклов "
+                     f"на {len(self.graphs)} биржах, выгодных сейчас {len(found)}")
+        return found
+
+    def on_tick(self, exchange: str, asset: str, price: float, ts: float = None) -> list:
+        """⚡ Синхронный приёмник тиков: пересчёт циклов через пару asset. Возвращает новые/обновлённые возможности."""
+        self.ticks += 1
+        graph = self.graph(exchange)
+        pair = graph.update(asset, price)
+        if pair is None:
+            return []
+        cycles = graph.cycles_of(pair)
+        if cycles is None:
+            return []
+        return self._check(graph, cycles)
+
+    def _check(self, graph: CurrencyGraph, cycles: np.ndarray) -> list:
+        if not len(cycles):
+            return []
+        self.cycle_checks += len(cycles)
+        found, gone = graph.check(cycles, self.threshold)
+        for cycle, reverse in gone:
+            self._current.pop((">".join(graph.opportunity(cycle, reverse, 0.0).path), graph.exchange), None)
+            self._dirty = True
+        if not found:
+            return []
+        now = datetime.utcnow()
+        opportunities = [graph.opportunity(*hit) for hit in found]
+        for opportunity in opportunities:
+            self._current[(">".join(opportunity.path), opportunity.exchange)] = signal_row(opportunity, now)
+        self._dirty = True
+        self.opportunities += len(opportunities)
+        return opportunities
+
+    async def flush(self) -> tuple:
+        """
+        💾 Применяет выгодные сейчас треугольники к трекеру одной транзакцией (первый сброс после старта —
+        всегда: закрывает сигналы прошлого запуска). Возвращает (открыто или обновлено, закрыто).
+        """
+        if not self._dirty and self.tracker.loaded:
+            return 0, 0
+        self._dirty = False
+        signals = [ArbitrageSignal(**row) for row in self._current.values()]
+        try:
+            async with self.session_factory() as db:
+                changes = await db.run_sync(self.tracker.apply, signals)
+        except Exception as e:
+            self.flush_errors += 1
+            self._dirty = True   # трекер перечитает состояние из БД, следующий сброс повторит
+            logging.error(f"❌ Ошибка записи треугольных сигналов: {e}")
+            return 0, 0
+        return len(changes.opened) + len(changes.updated), len(changes.closed)
+
+    async def run(self):
+        """⏱️ Фоновая задача: сброс сигналов каждые flush_interval."""
+        try:
+            while True:
+                await asyncio.sleep(self.flush_interval)
+                await self.flush()
+        finally:
+            await self.flush()
+
+    def stats(self) -> dict:
+        return {"ticks": self.ticks, "exchanges": len(self.graphs),
+                "pairs": sum(len(g.symbols) for g in self.graphs.values()),
+                "cycles": sum(len(g) for g in self.graphs.values()), "cycle_checks": self.cycle_checks,
+                "opportunities": self.opportunities, "profitable": len(self._current), "flush_errors": self.flush_errors,
+                "signals": self.tracker.stats()}
@@ -1,21 +1,250 @@
 import asyncio
-import websockets
+import inspect
 import json
 import logging
+import random
+import time
+from collections import OrderedDict, deque
+import websockets
+
+# 🔁 Переподключение: экспоненциальный backoff с jitter (сек)
+BACKOFF_BASE = 1
+BACKOFF_MAX = 60
+STABLE_AFTER = 30          # соединение, прожившее дольше, сбрасывает backoff
+QUEUE_SIZE = 50_000        # входящих обновлений на биржу
+CONSUMER_BATCH = 1000      # сколько обновлений потребитель забирает за раз
+
+
+def backoff_delay(attempt: int, base: float = BACKOFF_BASE, cap: float = BACKOFF_MAX) -> float:
+    """Задержка перед попыткой attempt (0, 1, 2 ...): base * 2^attempt, не больше cap, со случайным разбросом 50–100%."""
+    return min(cap, base * 2 ** attempt) * random.uniform(0.5, 1.0)
+
+
+class InboundQueue:
+    """
+    📥 Ограниченная очередь входящих обновлений.
+    policy="drop" — при переполнении новые отбрасываются;
+    policy="coalesce" — по ключу хранится только последнее значение (для цен теряется лишь промежуточное).
+    """
+
+    def __init__(self, maxsize: int = QUEUE_SIZE, policy: str = "drop"):
+        if policy not in ("drop", "coalesce"):
+            raise ValueError(f"Неизвестная политика очереди: {policy}")
+        self.maxsize = maxsize
+        self.policy = policy
+        self._items = OrderedDict() if policy == "coalesce" else deque()
+        self._ready = asyncio.Event()
+        self.dropped = 0
+        self.coalesced = 0
+
+    def __len__(self):
+        return len(self._items)
+
+    def put(self, key, item) -> bool:
+        if self.policy == "coalesce" and key in self._items:
+            self._items[key] = item
+            self.coalesced += 1
+            return True
+        if len(self._items) >= self.maxsize:
+            self.dropped += 1
+            return False
+        if self.policy == "coalesce":
+            self._items[key] = item
+        else:
+            self._items.append(item)
+        self._ready.set()
+        return True
+
+    async def get_batch(self, limit: int = CONSUMER_BATCH) -> list:
+        while not self._items:
+            self._ready.clear()
+            await self._ready.wait()
+        items = self._items
+        if self.policy == "coalesce":
+            batch = [items.popitem(last=False)[1] for _ in range(min(limit, len(items)))]
+        else:
+            batch = [items.popleft() for _ in range(min(limit, len(items)))]
+        return batch
+
+
+class ConnectorMetrics:
+    """📊 Счётчики одной биржи; msgs/s считается между двумя вызовами snapshot()."""
+
+    def __init__(self):
+        self.messages = 0
+        self.updates = 0
+        self.errors = 0
+        self.reconnects = 0
+        self.parse_seconds = 0.0
+        self.connected_at = None
+        self.last_message_at = None
+        self._window_started = time.monotonic()
+        self._window_messages = 0
 
+    def snapshot(self, queue: InboundQueue) -> dict:
+        now = time.monotonic()
+        elapsed = now - self._window_started
+        rate = (self.messages - self._window_messages) / elapsed if elapsed > 0 else 0.0
+        self._window_started, self._window_messages = now, self.messages
+        return {
+            "connected": self.connected_at is not None,
+            "messages": self.messages,
+            "msgs_per_s": round(rate, 1),
+            "updates": self.updates,
+            "parse_us_avg": round(self.parse_seconds / self.messages * 1e6, 1) if self.messages else 0.0,
+            "queue_depth": len(queue),
+            "dropped": queue.dropped,
+            "coalesced": queue.coalesced,
+            "reconnects": self.reconnects,
+            "errors": self.errors,
+            "last_message_age_s": round(time.time() - self.last_message_at, 1) if self.last_message_at else None,
+        }
 
 
 class WebSocketConnector:
-    def __init__(self, exchange_url, subscribe_message, handler):
-        self.exchange_url = exchange_url
-        self.subscribe_message = subscribe_message
-        self.handler = handler
+    """
+    🔌 Жизненный цикл одного WS-подключения биржи:
+    подключение (url — строка или корутина, отдающая url), подписка, heartbeat, backoff при обрывах.
+    Чтение отделено от потребления ограниченной очередью, чтобы медленный потребитель не тормозил сокет.
+
+    subscribe(ws)        — корутина, отправляющая подписки после каждого подключения;
+    decode(message)      — сырое сообщение -> объект (по умолчанию json.loads), может быть корутиной;
+    control(ws, data)    — корутина для служебных сообщений (ping/pong), True — сообщение обработано;
+    parse(data)          — объект -> [(key, item)] для очереди;
+    sink(items)          — потребитель пачки item'ов;
+    ping()               — сообщение heartbeat, отправляется каждые ping_interval секунд.
+    """
+
+    def __init__(self, exchange, url, parse, sink, subscribe=None, decode=json.loads, control=None,
+                 ping=None, ping_interval: float = 20, queue_size: int = QUEUE_SIZE, policy: str = "coalesce",
+                 backoff_base: float = BACKOFF_BASE, backoff_max: float = BACKOFF_MAX):
+        self.exchange = exchange
+        self.url = url
+        self.parse = parse
+        self.sink = sink
+        self.subscribe = subscribe
+        self.decode = decode
+        self.control = control
+        self.ping = ping
+        self.ping_interval = ping_interval
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.queue = InboundQueue(queue_size, policy)
+        self.metrics = ConnectorMetrics()
+
+    async def _resolve_url(self) -> str:
+        return self.url if isinstance(self.url, str) else await self.url()
+
+    async def _heartbeat(self, ws):
+        while True:
+            await asyncio.sleep(self.ping_interval)
+            message = self.ping()
+            await ws.send(message if isinstance(message, str) else json.dumps(message))
+
+    async def _read(self, ws):
+        metrics, queue = self.metrics, self.queue
+        async for message in ws:
+            metrics.messages += 1
+            metrics.last_message_at = time.time()
+            started = time.perf_counter()
+            try:
+                data = self.decode(message)
+                if inspect.isawaitable(data):  # декодер унёс кадр в пул
+                    data = await data
+                if self.control is not None and await self.control(ws, data):
+                    continue
+                for key, item in self.parse(data):
+                    queue.put(key, item)
+                    metrics.updates += 1
+            except Exception as e:
+                metrics.errors += 1
+                logging.warning(f"⚠️ {self.exchange}: не разобрано сообщение: {e}")
+            finally:
+                metrics.parse_seconds += time.perf_counter() - started
 
     async def connect(self):
-        async with websockets.connect(self.exchange_url) as websocket:
-            await websocket.send(json.dumps(self.subscribe_message))
-            logging.info(f"Subscribed: {self.subscribe_message}")
+        """Одна сессия: подключение, подписка и чтение до обрыва. Heartbeat живёт ровно столько же."""
+        heartbeat = None
+        try:
+            async with websockets.connect(await self._resolve_url(), max_size=None) as ws:
+                self.metrics.connected_at = time.monotonic()
+                if self.subscribe is not None:
+                    await self.subscribe(ws)
+                logging.info(f"✅ {self.exchange}: подключено")
+                if self.ping is not None:
+                    heartbeat = asyncio.create_task(self._heartbeat(ws))
+                await self._read(ws)
+        finally:
+            if heartbeat is not None:
+                heartbeat.cancel()
+                await asyncio.gather(heartbeat, return_exceptions=True)
+
+    async def consume(self):
+        """📤 Разбирает очередь пачками и отдаёт их в sink."""
+        while True:
+            batch = await self.queue.get_batch()
+            try:
+                self.sink(batch)
+            except Exception as e:
+                self.metrics.errors += 1
+                logging.error(f"❌ {self.exchange}: ошибка потребителя: {e}")
+            await asyncio.sleep(0)  # даём поработать остальным биржам
+
+    async def run(self):
+        """🔄 Подключение с переподключением по backoff; работает, пока не отменят."""
+        consumer = asyncio.create_task(self.consume())
+        attempt = 0
+        try:
+            while True:
+                try:
+                    await self.connect()
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    self.metrics.errors += 1
+                    logging.error(f"❌ Ошибка WebSocket {self.exchange}: {e}")
+
+                connected_at, self.metrics.connected_at = self.metrics.connected_at, None
+                if connected_at is not None and time.monotonic() - connected_at > STABLE_AFTER:
+                    attempt = 0
+                delay = backoff_delay(attempt, self.backoff_base, self.backoff_max)
+                attempt += 1
+                self.metrics.reconnects += 1
+                logging.info(f"🔁 {self.exchange}: переподключение через {delay:.1f} с")
+                await asyncio.sleep(delay)
+        finally:
+            consumer.cancel()
+            await asyncio.gather(consumer, return_exceptions=True)
+
+
+class WebSocketSupervisor:
+    """🧭 Запускает все коннекторы в одном event loop и собирает их метрики."""
+
+    def __init__(self, connectors):
+        self.connectors = {connector.exchange: connector for connector in connectors}
+
+    def metrics(self) -> dict:
+        return {exchange: connector.metrics.snapshot(connector.queue)
+                for exchange, connector in self.connectors.items()}
+
+    async def report(self, interval: float = 30):
+        """📜 Периодически пишет метрики бирж в лог."""
+        while True:
+            await asyncio.sleep(interval)
+            for exchange, m in self.metrics().items():
+                logging.info(
+                    f"📡 {exchange}: {m['msgs_per_s']} msg/s, разбор {m['parse_us_avg']} мкс, "
+                    f"очередь {m['queue_depth']} (сброшено {m['dropped']}, склеено {m['coalesced']}), "
+                    f"переподключений {m['reconnects']}, ошибок {m['errors']}"
+                )
 
-            async for message in websocket:
-                data = json.loads(message)
-                await self.handler(data)
+    async def run(self, report_interval: float = 30):
+        """Работает, пока не отменят; при выходе дожидается остановки всех коннекторов."""
+        tasks = [asyncio.create_task(connector.run()) for connector in self.connectors.values()]
+        tasks.append(asyncio.create_task(self.report(report_interval)))
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
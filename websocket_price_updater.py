@@ -1,13 +1,18 @@
 import asyncio
+import functools
 import json
-from sqlalchemy.orm import Session
-from backend.database.db_connector import get_db
-from backend.database.models import Price
+import time
+from backend.core.price_store import price_store
+from backend.core.price_board import publish_to_board
+from backend.core.tick_history import record_history
+from backend.core.archive import archive_ticks
+from backend.core.exchange_adapters import ADAPTERS
+from backend.core.instruments import registry
+from backend.core.websocket_connector import WebSocketConnector, WebSocketSupervisor
+from backend.core.frame_decoder import FrameDecoder, ExtractedTickers, extract_binance_tickers, orjson
 from backend.utils.logger import logging
 import logging
-import websockets
 import requests
-import gzip
 import aiohttp
 
 
@@ -26,6 +31,9 @@ WS_ENDPOINTS = {
 }
 
 def get_bybit_symbols():
+    symbols = registry.natives("Bybit")
+    if symbols:
+        return symbols
     url = "https://api.bybit.com/v5/market/instruments-info?category=spot"
     response = requests.get(url).json()
     symbols = [item["symbol"] for item in response.get("result", {}).get("list", [])]
@@ -36,306 +44,214 @@ async def get_and_save_initial_bybit_prices():
     async with aiohttp.ClientSession() as session:
         async with session.get(url) as response:
             data = await response.json()
-            prices = data.get('result', {}).get('list', [])
-            for item in prices:
-                symbol = item['symbol']
-                price = float(item['lastPrice'])
-                await save_price('Bybit', symbol, price)
+            for symbol, price in ADAPTERS['Bybit'].parse_tickers(data):
+                price_store.update('Bybit', symbol, price)
 
 
 def get_okx_symbols():
+    symbols = registry.natives("OKX")
+    if symbols:
+        return symbols
     url = "https://www.okx.com/api/v5/public/instruments?instType=SPOT"
     response = requests.get(url).json()
     symbols = [item["instId"] for item in response.get("data", [])]
     return symbols
 
 def get_gateio_symbols():
+    symbols = registry.natives("Gateio")
+    if symbols:
+        return symbols
     url = "https://api.gateio.ws/api/v4/spot/currency_pairs"
     response = requests.get(url).json()
     return [item["id"] for item in response if item.get("trade_status") == "tradable"]
 
-async def save_price(exchange, symbol, price):
-    db: Session = next(get_db())
-    existing_price = db.query(Price).filter(Price.exchange == exchange, Price.asset == symbol).first()
-    if existing_price:
-        existing_price.price = price
-    else:
-        db.add(Price(exchange=exchange, asset=symbol, price=price))
-    db.commit()
-
-# Обработчики сообщений
-#BINANCE
-async def handle_binance(ws):
-    async for message in ws:
-        data = json.loads(message)
-        for item in data:
-            symbol = item['s']
-            price = float(item['c'])
-            await save_price('Binance', symbol, price)
+def price_parser(exchange):
+    """WS-сообщение -> [(symbol, (symbol, price))]: ключ очереди — символ, в ней остаётся последняя цена."""
+    adapter = ADAPTERS[exchange]
+    parse_ws, canonical = adapter.parse_ws, adapter.canonical
+
+    def parse(data):
+        if isinstance(data, ExtractedTickers):  # поля уже вынуты декодером, JSON не разбирался
+            pairs = ((canonical(raw), price) for raw, price in data if price)
+        else:
+            pairs = parse_ws(data)
+        return [(symbol, (symbol, price)) for symbol, price in pairs]
+
+    return parse
+
+
+def price_sink(exchange):
+    def sink(batch):
+        for symbol, price in batch:
+            price_store.update(exchange, symbol, price)
+    return sink
+
+
+def shard_symbols(symbols, shard) -> list:
+    """Доля символов для шарда (index, count); сортировка — чтобы все процессы делили список одинаково."""
+    index, count = shard
+    return sorted(symbols)[index::count]
+
+
+async def send_batches(ws, messages, pause: float):
+    for message in messages:
+        await ws.send(json.dumps(message))
+        await asyncio.sleep(pause)
+
+# Подписки и служебные сообщения
+#BINANCE — поток !ticker@arr задаётся в URL, подписка не нужна
 
 #BYBIT
-async def handle_bybit(ws):
-    symbols = get_bybit_symbols()
+async def subscribe_bybit(ws, shard=(0, 1)):
+    symbols = shard_symbols(await asyncio.to_thread(get_bybit_symbols), shard)
     batch_size = 20
-    symbol_batches = [symbols[i:i + batch_size] for i in range(0, len(symbols), batch_size)]
-
-    # Подписываемся на все символы партиями
-    for batch in symbol_batches:
-        subscribe_message = {
-            "op": "subscribe",
-            "args": [f"tickers.{symbol}" for symbol in batch]
-        }
-        await ws.send(json.dumps(subscribe_message))
-        await asyncio.sleep(0.2)
-
-    async for message in ws:
-        data = json.loads(message)
-        if "topic" in data and data["topic"].startswith("tickers.") and "data" in data:
-            ticker_data = data["data"]
-            symbol = ticker_data.get("symbol")
-            price = ticker_data.get("lastPrice")
-
-            if symbol and price:
-                await save_price('Bybit', symbol, float(price))
+    await send_batches(ws, [
+        {"op": "subscribe", "args": [f"tickers.{symbol}" for symbol in symbols[i:i + batch_size]]}
+        for i in range(0, len(symbols), batch_size)
+    ], pause=0.2)
 
 #OKX
-async def handle_okx(ws):
-    symbols = get_okx_symbols()
+async def subscribe_okx(ws, shard=(0, 1)):
+    symbols = shard_symbols(await asyncio.to_thread(get_okx_symbols), shard)
     batch_size = 20
-    symbol_batches = [symbols[i:i + batch_size] for i in range(0, len(symbols), batch_size)]
-
-    for batch in symbol_batches:
-        subscribe_message = {
-            "op": "subscribe",
-            "args": [{"channel": "tickers", "instId": symbol} for symbol in batch]
-        }
-        await ws.send(json.dumps(subscribe_message))
-        await asyncio.sleep(0.2)
-
-    async for message in ws:
-        data = json.loads(message)
-
-
-        if data.get("arg", {}).get("channel") == "tickers" and "data" in data:
-            for ticker in data["data"]:
-                symbol = ticker['instId'].replace("-", "")
-                price = ticker.get('last')
-                if symbol and price:
-                    await save_price('OKX', symbol, float(price))
-
-#KUCOIN
-async def handle_kucoin(_):
-    while True:
-        try:
-            token_response = requests.post("https://api.kucoin.com/api/v1/bullet-public").json()
-            ws_endpoint = token_response["data"]["instanceServers"][0]["endpoint"]
-            token = token_response["data"]["token"]
-            ws_url = f"{ws_endpoint}?token={token}"
-
-            async with websockets.connect(ws_url) as websocket:
-                subscribe_message = {
-                    "id": "kucoin_prices",
-                    "type": "subscribe",
-                    "topic": "/market/ticker:all",
-                    "response": True
-                }
-                await websocket.send(json.dumps(subscribe_message))
-                logging.info("✅ KuCoin подписка отправлена!")
-
-                async for message in websocket:
-                    data = json.loads(message)
-
-                    if data.get("type") == "ping":
-                        pong_response = {"id": data["id"], "type": "pong"}
-                        await websocket.send(json.dumps(pong_response))
-                        logging.info("✅ KuCoin отправлен pong")
-                        continue
-
-                    if data.get("type") == "message" and "data" in data:
-                        ticker = data["data"]
-                        symbol = data.get("subject").replace("-", "")
-                        price = ticker.get('price')
-                        if symbol and price:
-                            try:
-                                await save_price('KuCoin', symbol, float(price))
-                                logging.info(f"✅ KuCoin цена обновлена: {symbol} - {price}")
-                            except Exception as save_exc:
-                                return
-        except Exception as e:
-            await asyncio.sleep(5)
+    await send_batches(ws, [
+        {"op": "subscribe", "args": [{"channel": "tickers", "instId": symbol} for symbol in symbols[i:i + batch_size]]}
+        for i in range(0, len(symbols), batch_size)
+    ], pause=0.2)
+
+#KUCOIN — URL с токеном запрашивается заново при каждом подключении
+async def kucoin_url():
+    async with aiohttp.ClientSession() as session:
+        async with session.post("https://api.kucoin.com/api/v1/bullet-public") as response:
+            token_response = await response.json()
+    ws_endpoint = token_response["data"]["instanceServers"][0]["endpoint"]
+    token = token_response["data"]["token"]
+    return f"{ws_endpoint}?token={token}"
+
+async def subscribe_kucoin(ws):
+    await ws.send(json.dumps({
+        "id": "kucoin_prices",
+        "type": "subscribe",
+        "topic": "/market/ticker:all",
+        "response": True
+    }))
+    logging.info("✅ KuCoin подписка отправлена!")
+
+async def control_kucoin(ws, data):
+    if data.get("type") == "ping":
+        await ws.send(json.dumps({"id": data["id"], "type": "pong"}))
+        return True
+    return data.get("type") in ("pong", "welcome", "ack")
 
 #GATEIO
-async def handle_gateio(ws):
-    symbols = get_gateio_symbols()
+async def subscribe_gateio(ws, shard=(0, 1)):
+    symbols = shard_symbols(await asyncio.to_thread(get_gateio_symbols), shard)
     batch_size = 10
-    symbol_batches = [symbols[i:i + batch_size] for i in range(0, len(symbols), batch_size)]
-
-    for batch in symbol_batches:
-        subscribe_message = {
-            "time": int(asyncio.get_event_loop().time()),
-            "channel": "spot.tickers",
-            "event": "subscribe",
-            "payload": batch
-        }
-        await ws.send(json.dumps(subscribe_message))
-        logging.info(f"📡 Gate.io подписка на: {batch}")
-        await asyncio.sleep(0.5)
-
-    # 🧠 Запускаем задачу, которая будет сама пинговать
-    async def send_ping():
-        while True:
-            try:
-                await ws.ping()
-                logging.debug("📤 Отправлен ping")
-                await asyncio.sleep(20)  # Gate.io отключает через ~30 сек без пинга
-            except Exception as e:
-                logging.error(f"❌ Ping error Gate.io: {e}")
-                break
-
-    asyncio.create_task(send_ping())
-
-    async for message in ws:
-        try:
-            data = json.loads(message)
-
-            if data.get("event") == "ping":
-                await ws.send(json.dumps({"event": "pong"}))
-                logging.info("🔁 Gate.io отправлен pong (json)")
-                continue
-
-            if data.get("channel") == "spot.tickers" and data.get("event") == "update":
-                for ticker in data.get("result", []):
-                    symbol = ticker.get("currency_pair", "").replace("_", "").upper()
-                    price = float(ticker.get("last", 0))
-                    if symbol and price > 0:
-                        await save_price('Gateio', symbol, price)
-                        logging.info(f"✅ Gate.io цена обновлена: {symbol} - {price}")
-        except Exception as e:
-            logging.error(f"❌ Ошибка Gate.io: {e} | message: {message}")
-
-
+    await send_batches(ws, [
+        {"time": int(time.time()), "channel": "spot.tickers", "event": "subscribe", "payload": symbols[i:i + batch_size]}
+        for i in range(0, len(symbols), batch_size)
+    ], pause=0.5)
 
+async def control_gateio(ws, data):
+    if data.get("event") == "ping":
+        await ws.send(json.dumps({"event": "pong"}))
+        return True
+    return data.get("channel") == "spot.pong"
 
 #HUOBI(HTX)
-async def handle_htx(ws):
-    subscribe_message = {"sub": "market.tickers", "id": "htx_prices"}
-    await ws.send(json.dumps(subscribe_message))
-
-    async for message in ws:
-        decompressed_data = gzip.decompress(message).decode('utf-8') if isinstance(message, bytes) else message
-        data = json.loads(decompressed_data)
-
-        if 'ping' in data:
-            pong_response = json.dumps({"pong": data["ping"]})
-            await ws.send(pong_response)
-        elif 'ch' in data and 'tick' in data:
-            tickers = data['tick']
-            symbol = tickers['symbol'].upper()
-            price = float(tickers['close'])
-            await save_price('HTX', symbol, price)
-
+async def subscribe_htx(ws):
+    await ws.send(json.dumps({"sub": "market.tickers", "id": "htx_prices"}))
 
+async def control_htx(ws, data):
+    if 'ping' in data:
+        await ws.send(json.dumps({"pong": data["ping"]}))
+        return True
+    return False
 
 #MEXC
-async def handle_mexc(ws):
-    subscribe_message = {
+async def subscribe_mexc(ws):
+    await ws.send(json.dumps({
         "method": "SUBSCRIPTION",
         "params": ["spot@public.deals.v3.api@BTCUSDT"],
-    }
-    await ws.send(json.dumps(subscribe_message))
-
-    async for message in ws:
-        data = json.loads(message)
-        if data.get("c") == "spot@public.deals.v3.api":
-            for deal in data.get("d", {}).get("deals", []):
-                symbol = deal.get("s", "").upper()
-                price = float(deal.get("p", 0))
-                if symbol and price:
-                    await save_price('MEXC', symbol, price)
+    }))
 
 #BITGET
-async def handle_bitget(ws):
-    subscribe_message = {
+async def subscribe_bitget(ws):
+    await ws.send(json.dumps({
         "op": "subscribe",
         "args": [{"instType": "SP", "channel": "ticker", "instId": "default"}]
-    }
-    await ws.send(json.dumps(subscribe_message))
-
-    async for message in ws:
-        data = json.loads(message)
-        if data.get("action") == "update" and "data" in data:
-            for ticker in data["data"]:
-                symbol = ticker["instId"].replace("_", "").upper()
-                price = float(ticker["lastPr"])
-                await save_price('Bitget', symbol, price)
+    }))
 
 #POLONIEX
-async def handle_poloniex(ws):
-    subscribe_message = {
+async def subscribe_poloniex(ws):
+    await ws.send(json.dumps({
         "event": "subscribe",
         "channel": ["ticker"],
         "symbols": ["all"]
-    }
-    await ws.send(json.dumps(subscribe_message))
-
-    async def send_ping(ws):
-        while True:
-            try:
-                await ws.send(json.dumps({"event": "ping"}))
-                await asyncio.sleep(15)  # отправляем ping чаще
-            except websockets.exceptions.ConnectionClosed:
-                break
-
-    asyncio.create_task(send_ping(ws))
-
-    async for message in ws:
-        data = json.loads(message)
-        if data.get("channel") == "ticker" and data.get("data"):
-            for ticker in data["data"]:
-                symbol = ticker["symbol"].replace("_", "").upper()
-                price = float(ticker["close"])
-                await save_price('Poloniex', symbol, price)
-
+    }))
+
+
+# exchange -> (url, subscribe, control, ping, ping_interval)
+FEEDS = {
+    "Binance": (WS_ENDPOINTS["Binance"], None, None, None, None),
+    "Bybit": (WS_ENDPOINTS["Bybit"], subscribe_bybit, None, lambda: {"op": "ping"}, 20),
+    "OKX": (WS_ENDPOINTS["OKX"], subscribe_okx, None, lambda: "ping", 25),
+    "KuCoin": (kucoin_url, subscribe_kucoin, control_kucoin,
+               lambda: {"id": str(int(time.time() * 1000)), "type": "ping"}, 18),
+    "Gateio": (WS_ENDPOINTS["Gateio"], subscribe_gateio, control_gateio,
+               lambda: {"time": int(time.time()), "channel": "spot.ping"}, 20),  # Gate.io отключает через ~30 сек без пинга
+    "HTX": (WS_ENDPOINTS["HTX"], subscribe_htx, control_htx, None, None),
+    "MEXC": (WS_ENDPOINTS["MEXC"], subscribe_mexc, None, lambda: {"method": "PING"}, 20),
+    "Bitget": (WS_ENDPOINTS["Bitget"], subscribe_bitget, None, lambda: "ping", 25),
+    "Poloniex": (WS_ENDPOINTS["Poloniex"], subscribe_poloniex, None, lambda: {"event": "ping"}, 15),
+}
 
 
+# Биржи, где подписка по символам и поток можно поделить между процессами
+SHARDABLE = ("Bybit", "OKX", "Gateio")
 
-# Пример обработчиков, для остальных бирж сделай аналогично
 
-async def connect_exchange(exchange, url, handler):
-    while True:
-        try:
-            async with websockets.connect(url) as ws:
-                await handler(ws)
-        except Exception as e:
-            logging.error(f"Ошибка WebSocket {exchange}: {e}")
-            await asyncio.sleep(5)  # переподключение после ошибки
+# 🧩 Декодеры: gzip HTX — в пуле потоков; !ticker@arr на сотни КБ без orjson — выборочным извлечением
+# (с orjson полный разбор не медленнее регулярки)
+DECODERS = {
+    "Binance": lambda: FrameDecoder(extract=None if orjson else extract_binance_tickers),
+    "HTX": lambda: FrameDecoder(offload="thread"),
+}
 
 
-async def main():
-    # Для Bybit сначала загружаем REST-данные
+def build_connector(exchange, shard=(0, 1), sink=None) -> WebSocketConnector:
+    """Коннектор биржи; shard=(index, count) — только своя доля символов, sink — куда отдавать цены."""
+    url, subscribe, control, ping, ping_interval = FEEDS[exchange]
+    decoder = DECODERS.get(exchange, FrameDecoder)()
+    name = exchange
+    if shard[1] > 1:
+        subscribe = functools.partial(subscribe, shard=shard)
+        name = f"{exchange}[{shard[0] + 1}/{shard[1]}]"
+    return WebSocketConnector(
+        name, url,
+        parse=price_parser(exchange),
+        sink=sink or price_sink(exchange),
+        subscribe=subscribe,
+        decode=decoder,
+        control=control,
+        ping=ping,
+        ping_interval=ping_interval or 20,
+        policy="coalesce",
+    )
+
+
+async def main(exchanges=None):
+    """🚀 Все WS-подключения под одним супервизором + доска цен, история тиков, архив на диске и сброс цен в БД."""
+    # Для Bybit можно сначала загрузить REST-данные
     # await get_and_save_initial_bybit_prices()
 
-    exchanges = [
-        # ('Binance', WS_ENDPOINTS['Binance'], handle_binance),
-        # ('Bybit', WS_ENDPOINTS['Bybit'], handle_bybit),
-        # ('OKX', WS_ENDPOINTS['OKX'], handle_okx),
-        # ('KuCoin', WS_ENDPOINTS['KuCoin'], handle_kucoin),
-         ('Gateio', WS_ENDPOINTS['Gateio'], handle_gateio),
-        # ('HTX', WS_ENDPOINTS['HTX'], handle_htx),
-        # ('MEXC', WS_ENDPOINTS['MEXC'], handle_mexc),
-        # ('Bitget', WS_ENDPOINTS['Bitget'], handle_bitget),
-        # ('Poloniex', WS_ENDPOINTS['Poloniex'], handle_poloniex),
-    ]
-
-    
-
-    # Затем запускаем WS-подключения
-    tasks = [
-        asyncio.create_task(connect_exchange(name, url, handler))
-        for name, url, handler in exchanges
-    ]
-
-    await asyncio.gather(*tasks, return_exceptions=True)
+    await registry.ensure()
+    publish_to_board(price_store)
+    history = record_history(price_store)
+    archiver = archive_ticks(price_store)
+    supervisor = WebSocketSupervisor([build_connector(exchange) for exchange in (exchanges or FEEDS)])
+    await asyncio.gather(supervisor.run(), price_store.run_flusher(), history.run_flusher(), archiver.run(),
+                         return_exceptions=True)
 
 if __name__ == "__main__":
     asyncio.run(main())